@@ -4,22 +4,36 @@
 """
 
 import os
-import re
-from datetime import datetime
-from flask import Flask, request, abort
-from linebot import WebhookHandler
-from linebot.exceptions import InvalidSignatureError
-from linebot.models import (
-    MessageEvent,
-    TextMessage,
-    ImageMessage,
-    PostbackEvent
-)
+import hmac
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from typing import Dict
+from flask import Flask, Response, request, abort, jsonify
 from dotenv import load_dotenv
 
 from src.database import SalesDatabase
-from src.line_handler import LineHandler
+from src.time_buckets import DEFAULT_WINDOWS, parse_clock, parse_windows
+from src.event_queue import EventQueue
+from src.admission import (
+    AdmissionController, extract_user_ids, parse_events, sign_body, split_user_events, validate_signature
+)
+from src import metrics
+from src import tracing
+from src.profiling import RequestProfiler, MemoryTracker
+from src.capture import WebhookCapture
+from src.dashboard import Broadcaster, DASHBOARD_HTML, summary_delta
+from src import export
+from src.api import DEFAULT_PAGE_SIZE, ResponseCache, order_page
+from src.audit import AuditLog
+from src.catalog import DEFAULT_PRICE_TOLERANCE, Catalog, classify, price_deviation
+from src import leaderboard
+from src.profiles import ProfileCache
+from src.search import SearchIndex
+from src.scheduler import DEFAULT_TIMEZONE, LeaderLock, run_exclusive, start_scheduler
 from src import commission_calculator
+from src import money
 
 # โหลด environment variables
 load_dotenv()
@@ -34,27 +48,697 @@ CHANNEL_SECRET = os.getenv('LINE_CHANNEL_SECRET')
 if not CHANNEL_ACCESS_TOKEN or not CHANNEL_SECRET:
     raise ValueError("กรุณาตั้งค่า LINE_CHANNEL_ACCESS_TOKEN และ LINE_CHANNEL_SECRET ใน .env")
 
+# ตั้งค่าคิว Webhook (ประมวลผลเบื้องหลังหลังตอบ 'OK')
+WEBHOOK_ASYNC = os.getenv('WEBHOOK_ASYNC', '1') == '1'
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', 2))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', 3))
+
+# ตั้งค่า Admission Control (ปฏิเสธด้วย 503 เมื่อมีคำขอมากเกินไป)
+WEBHOOK_MAX_IN_FLIGHT = int(os.getenv('WEBHOOK_MAX_IN_FLIGHT', 32))
+WEBHOOK_QUEUE_HIGH_WATER = int(os.getenv('WEBHOOK_QUEUE_HIGH_WATER', 200))
+WEBHOOK_USER_RATE = float(os.getenv('WEBHOOK_USER_RATE', 2))
+WEBHOOK_USER_BURST = float(os.getenv('WEBHOOK_USER_BURST', 10))
+WEBHOOK_RETRY_AFTER = int(os.getenv('WEBHOOK_RETRY_AFTER', 5))
+# เวลารอสูงสุด (วินาที) ที่เลื่อนข้อความของผู้ใช้ที่ส่งถี่เกินไป (นานกว่านี้ตอบ 503 ให้ LINE ส่งซ้ำ)
+WEBHOOK_USER_MAX_DEFER = float(os.getenv('WEBHOOK_USER_MAX_DEFER', 30))
+
+# ตั้งค่า Tracing (สัดส่วนเหตุการณ์ที่เก็บ trace, 0 = ปิด)
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.1))
+
+# โฟลเดอร์ข้อมูล (เปลี่ยนได้เพื่อ replay ลงโฟลเดอร์ใหม่)
+DATA_DIR = os.getenv('DATA_DIR', 'data')
+
+# บันทึก Webhook body ที่รับเข้าประมวลผลสำหรับ replay (ว่าง = ปิด)
+WEBHOOK_CAPTURE_DIR = os.getenv('WEBHOOK_CAPTURE_DIR', '')
+
+# ช่วงเวลาที่บันทึกยอดขายในข้อมูลสรุป เช่น "sales_18_22=18:00-22:00,sales_22_02=22:00-02:00"
+# (ว่าง = 18:00-22:00 และ 22:00-00:00)
+SALES_WINDOWS = parse_windows(os.getenv('SALES_WINDOWS', '')) or list(DEFAULT_WINDOWS)
+# เวลาเริ่มวันทำการ (ออเดอร์หลังเที่ยงคืนของกะดึกนับเป็นวันเดียวกัน) และความละเอียดของดัชนีเวลา (นาที)
+BUSINESS_DAY_START = parse_clock(os.getenv('BUSINESS_DAY_START', '06:00'))
+TIME_BUCKET_MINUTES = int(os.getenv('TIME_BUCKET_MINUTES', 15))
+
+# รูปแบบสรุปยอดและยืนยันออเดอร์: "text" หรือ "flex" (Flex bubble)
+REPLY_FORMAT = os.getenv('REPLY_FORMAT', 'text')
+
+# รหัสสำหรับ endpoint ผู้ดูแลระบบ (/admin/*) ถ้าไม่ตั้งค่าจะปิด endpoint เหล่านี้
+ADMIN_SECRET = os.getenv('ADMIN_SECRET')
+
+# Dashboard แบบ SSE (/dashboard?token=...) ถ้าไม่ตั้งค่า DASHBOARD_TOKEN จะปิด
+# แต่ละผู้ชมใช้ thread ของ gunicorn หนึ่งตัว จึงจำกัดจำนวนและปิด stream เป็นระยะ (เบราว์เซอร์เชื่อมต่อใหม่เอง)
+DASHBOARD_TOKEN = os.getenv('DASHBOARD_TOKEN')
+DASHBOARD_MAX_CLIENTS = int(os.getenv('DASHBOARD_MAX_CLIENTS', 4))
+DASHBOARD_STREAM_SECONDS = float(os.getenv('DASHBOARD_STREAM_SECONDS', 240))
+DASHBOARD_RECENT_ORDERS = 20
+
+# Read API (/api/*) สำหรับระบบหลังบ้าน ส่ง header Authorization: Bearer <API_TOKEN> (ไม่ตั้งค่า = ปิด)
+API_TOKEN = os.getenv('API_TOKEN')
+API_HISTORY_MAX_DAYS = 366
+
+# ปิดวันอัตโนมัติ: เวลา "HH:MM" ตาม SCHEDULER_TIMEZONE (ว่าง = ปิด) ควรก่อน BUSINESS_DAY_START
+# และส่งสรุปยอดสุดท้ายไปที่ DAY_CLOSE_NOTIFY_TO (LINE user/group id, ว่าง = ไม่ส่ง)
+DAY_CLOSE_TIME = os.getenv('DAY_CLOSE_TIME', '')
+DAY_CLOSE_NOTIFY_TO = os.getenv('DAY_CLOSE_NOTIFY_TO', '')
+SCHEDULER_TIMEZONE = os.getenv('SCHEDULER_TIMEZONE', DEFAULT_TIMEZONE)
+
+# อายุ cache ชื่อที่แสดงของผู้ส่ง (วินาที) และอายุของผล "ดึงชื่อไม่ได้"
+PROFILE_CACHE_TTL = float(os.getenv('PROFILE_CACHE_TTL', 6 * 3600))
+PROFILE_NEGATIVE_TTL = float(os.getenv('PROFILE_NEGATIVE_TTL', 600))
+
+# แคตตาล็อกสินค้า (JSON ดูตัวอย่างใน catalog.example.json, ว่าง = จัดประเภทจากคำสำคัญอย่างเดียว)
+# และสัดส่วนที่ยอดต่างจากราคาตั้งได้ก่อนแจ้งเตือนในข้อความยืนยัน
+CATALOG_FILE = os.getenv('CATALOG_FILE', '')
+CATALOG_PRICE_TOLERANCE = float(os.getenv('CATALOG_PRICE_TOLERANCE', DEFAULT_PRICE_TOLERANCE))
+
+# นาฬิกาสำหรับเวลาที่ออเดอร์ไม่ได้ระบุ วันที่ปัจจุบัน ชื่อไฟล์รูปภาพ และเวลาใน audit log
+# (replay แทนด้วยเวลาที่รับ Webhook เดิม ส่วนประกอบอื่นจึงอ่านผ่าน lambda ทุกครั้ง)
+clock = datetime.now
+
 # สร้าง instances
-db = SalesDatabase()
-line_handler = LineHandler(CHANNEL_ACCESS_TOKEN, CHANNEL_SECRET)
-handler = line_handler.handler
+db = SalesDatabase(DATA_DIR, SALES_WINDOWS, TIME_BUCKET_MINUTES, BUSINESS_DAY_START, clock=lambda: clock())
+
+# LINE SDK ใช้เวลา import นาน จึงสร้าง LineHandler เมื่อมีเหตุการณ์แรก (ดู get_line_handler)
+line_handler = None
+_line_handler_lock = threading.Lock()
+tracing.configure(TRACE_SAMPLE_RATE, os.path.join(db.data_dir, "traces", "spans.jsonl"))
+profiler = RequestProfiler(os.path.join(db.data_dir, "profiles"))
+memory_tracker = MemoryTracker()
+capture = WebhookCapture(WEBHOOK_CAPTURE_DIR) if WEBHOOK_CAPTURE_DIR else None
+broadcaster = Broadcaster(DASHBOARD_MAX_CLIENTS)
+api_cache = ResponseCache()
+audit_log = AuditLog(os.path.join(db.data_dir, "audit"), clock=lambda: clock())
+leader = LeaderLock(os.path.join(db.data_dir, "locks"))
+leaderboards = leaderboard.Leaderboards(db.data_dir)
+search_index = SearchIndex(os.path.join(db.data_dir, "search"), os.path.join(db.data_dir, "archive"))
+catalog = None
+if CATALOG_FILE:
+    try:
+        catalog = Catalog.load(CATALOG_FILE)
+        print(f"📚 โหลดแคตตาล็อกสินค้า {len(catalog)} รายการ")
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ ไม่สามารถโหลดแคตตาล็อกสินค้า {CATALOG_FILE}: {e}")
+profiles = ProfileCache(
+    lambda user_id, group_id=None: get_line_handler().get_display_name(user_id, group_id),
+    ttl=PROFILE_CACHE_TTL,
+    negative_ttl=PROFILE_NEGATIVE_TTL
+)
+
+
+def get_line_handler():
+    """
+    สร้าง LineHandler และลงทะเบียน event handler เมื่อเรียกใช้ครั้งแรก
+
+    Returns:
+        LineHandler ของแอป
+    """
+    global line_handler
+    if line_handler is None:
+        with _line_handler_lock:
+            if line_handler is None:
+                from linebot.models import MessageEvent, TextMessage, ImageMessage, PostbackEvent
+                from src.line_handler import LineHandler
+                
+                instance = LineHandler(
+                    CHANNEL_ACCESS_TOKEN,
+                    CHANNEL_SECRET,
+                    api_endpoint=os.getenv('LINE_API_ENDPOINT'),
+                    data_endpoint=os.getenv('LINE_API_DATA_ENDPOINT'),
+                    reply_format=REPLY_FORMAT
+                )
+                instance.handler.add(MessageEvent, message=TextMessage)(_once(handle_text_message))
+                instance.handler.add(MessageEvent, message=ImageMessage)(_once(handle_image_message))
+                instance.handler.add(PostbackEvent)(_once(handle_postback))
+                line_handler = instance
+    return line_handler
+
+
+def _event_key(event):
+    """รหัสของเหตุการณ์ LINE (webhookEventId หรือ message id สำหรับ payload เก่า)"""
+    key = getattr(event, "webhook_event_id", None)
+    if not key and getattr(event, "message", None) is not None:
+        key = f"message:{event.message.id}"
+    return key
+
+
+def _once(func):
+    """
+    ข้ามเหตุการณ์ที่ประมวลผลเสร็จแล้ว
+    
+    คิวจะลองใหม่ทั้ง body เมื่อเหตุการณ์ใดล้มเหลว และ dead letter ก็ replay ทั้ง body
+    เหตุการณ์ที่บันทึกข้อมูลไปแล้วจึงต้องไม่ถูกประมวลผลซ้ำ
+    """
+    @wraps(func)
+    def wrapper(event):
+        key = _event_key(event)
+        if key and key in event_queue.processed:
+            print(f"↩️ ข้ามเหตุการณ์ที่ประมวลผลแล้ว {key}")
+            return
+        func(event)
+        if key:
+            event_queue.processed.add(key)
+    return wrapper
+
+
+def process_event(body: str, signature: str):
+    """ประมวลผล Webhook body หนึ่งรายการ (เป็น root span ของ trace)"""
+    handler = get_line_handler().handler
+    with tracing.trace("webhook_event"):
+        profiler.run(handler.handle, body, signature)
+
+
+event_queue = EventQueue(
+    os.path.join(db.data_dir, "queue"),
+    process_func=process_event,
+    workers=WEBHOOK_WORKERS,
+    max_attempts=WEBHOOK_MAX_ATTEMPTS
+)
+
+admission = AdmissionController(
+    max_in_flight=WEBHOOK_MAX_IN_FLIGHT,
+    queue_high_water=WEBHOOK_QUEUE_HIGH_WATER,
+    user_rate=WEBHOOK_USER_RATE,
+    user_burst=WEBHOOK_USER_BURST,
+    retry_after=WEBHOOK_RETRY_AFTER,
+    max_defer=WEBHOOK_USER_MAX_DEFER
+)
+
+if WEBHOOK_ASYNC:
+    event_queue.start()
+
+
+def _service_unavailable() -> Response:
+    """ตอบ 503 พร้อม Retry-After เพื่อให้ LINE ส่งซ้ำภายหลัง"""
+    return Response(
+        "Service Unavailable",
+        status=503,
+        headers={"Retry-After": str(admission.retry_after)}
+    )
+
+
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "atmo_queue_size",
+    "Webhook events queued or being processed",
+    lambda: {None: event_queue.size()}
+))
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "atmo_dashboard_clients",
+    "Dashboard SSE streams currently open",
+    lambda: {None: broadcaster.client_count()}
+))
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "atmo_webhook_in_flight",
+    "Webhook requests currently being handled",
+    lambda: {None: admission.stats()["in_flight"]}
+))
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "atmo_webhook_admitted_total",
+    "Webhook requests admitted",
+    lambda: {None: admission.stats()["admitted"]},
+    metric_type="counter"
+))
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "atmo_webhook_shed_total",
+    "Webhook requests rejected with 503 by reason",
+    lambda: {
+        key[len("shed_"):]: value
+        for key, value in admission.stats().items()
+        if key.startswith("shed_") and key != "shed_total"
+    },
+    label_name="reason",
+    metric_type="counter"
+))
 
 
 @app.route("/webhook", methods=['POST'])
+@metrics.timed("webhook")
 def webhook():
     """Webhook endpoint สำหรับรับข้อความจาก LINE"""
-    signature = request.headers['X-Line-Signature']
-    body = request.get_data(as_text=True)
+    if not admission.try_enter():
+        return _service_unavailable()
+    
+    try:
+        received_at = datetime.now().timestamp()
+        signature = request.headers['X-Line-Signature']
+        body = request.get_data(as_text=True)
+        
+        with metrics.timed("signature"):
+            valid = validate_signature(CHANNEL_SECRET, body, signature)
+        if not valid:
+            metrics.ERRORS_TOTAL.inc("signature")
+            abort(400)
+        
+        events = parse_events(body)
+        for event in events:
+            if (event.get("deliveryContext") or {}).get("isRedelivery"):
+                metrics.REDELIVERIES_TOTAL.inc()
+        
+        reason, deferred = admission.check(event_queue.size(), extract_user_ids(events))
+        if reason:
+            return _service_unavailable()
+        
+        # บันทึก body ตามที่ LINE ส่งมา (ก่อนแยกเหตุการณ์ที่เลื่อน) เพื่อให้ replay ได้เหตุการณ์ครบ
+        if capture is not None:
+            capture.record(body, received_at)
+        
+        if deferred:
+            # ตอบ OK แต่เลื่อนเหตุการณ์ของผู้ใช้ที่ส่งถี่เกินไปไปประมวลผลภายหลัง (ผู้ใช้อื่นไม่ต้องรอ)
+            body, deferred_body, count = split_user_events(body, list(deferred))
+            signature = sign_body(CHANNEL_SECRET, body)
+            deferred_signature = sign_body(CHANNEL_SECRET, deferred_body)
+            metrics.DEFERRED_EVENTS_TOTAL.inc(amount=count)
+        
+        if not WEBHOOK_ASYNC:
+            process_event(body, signature)
+            if deferred:
+                process_event(deferred_body, deferred_signature)
+            return 'OK'
+        
+        # เข้าคิวแล้วตอบทันที งานที่เหลือให้ worker ทำหลังตอบกลับ
+        event_queue.enqueue(body, signature)
+        if deferred:
+            event_queue.enqueue(deferred_body, deferred_signature, delay=max(deferred.values()))
+        return 'OK'
+    finally:
+        admission.leave()
+
+
+def require_admin(func):
+    """Decorator ตรวจสอบ X-Admin-Secret สำหรับ endpoint ผู้ดูแลระบบ"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_SECRET:
+            abort(404)
+        provided = request.headers.get('X-Admin-Secret', '')
+        if not hmac.compare_digest(provided.encode('utf-8'), ADMIN_SECRET.encode('utf-8')):
+            abort(403)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+@app.route("/admin/profile", methods=['GET', 'POST'])
+@require_admin
+def admin_profile():
+    """สั่ง profile เหตุการณ์ N รายการถัดไป (POST ?requests=N) หรือดูไฟล์ที่บันทึกไว้ (GET)"""
+    if request.method == 'POST':
+        profiler.arm(request.args.get('requests', 1, type=int))
+    
+    filename = request.args.get('file')
+    if filename:
+        try:
+            summary = profiler.summarize(filename, request.args.get('limit', 20, type=int),
+                                         request.args.get('sort', 'cumulative'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if summary is None:
+            abort(404)
+        return Response(summary, mimetype="text/plain")
+    
+    return jsonify({
+        "remaining": profiler.remaining(),
+        "profiles": profiler.list_profiles()
+    })
+
+
+@app.route("/admin/tracemalloc/<action>", methods=['GET', 'POST'])
+@require_admin
+def admin_tracemalloc(action: str):
+    """จัดการ tracemalloc: start, snapshot, diff, stop, status"""
+    if action == "start":
+        memory_tracker.start(request.args.get('frames', 10, type=int))
+    elif action == "snapshot":
+        try:
+            name = memory_tracker.snapshot(request.args.get('name'))
+        except RuntimeError as e:
+            return jsonify({"error": str(e)}), 409
+        return jsonify({"snapshot": name})
+    elif action == "diff":
+        try:
+            stats = memory_tracker.diff(
+                request.args.get('from', ''),
+                request.args.get('to', ''),
+                request.args.get('limit', 20, type=int),
+                request.args.get('key', 'lineno')
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if stats is None:
+            abort(404)
+        return jsonify({"top": stats})
+    elif action == "stop":
+        memory_tracker.stop()
+    elif action != "status":
+        abort(404)
     
+    return jsonify(memory_tracker.status())
+
+
+@app.route("/admin/export/<kind>")
+@require_admin
+def admin_export(kind: str):
+    """ส่งออกออเดอร์หรือสรุปรายวัน ?start=YYYY-MM-DD&end=YYYY-MM-DD&format=csv|jsonl แบบ streaming"""
+    fmt = request.args.get('format', export.CSV)
+    if kind not in export.EXPORT_KINDS or fmt not in export.EXPORT_FORMATS:
+        abort(404)
     try:
-        handler.handle(body, signature)
-    except InvalidSignatureError:
-        abort(400)
+        start = export.parse_date(request.args.get('start') or db.get_date() or '')
+        end = export.parse_date(request.args.get('end') or start)
+    except ValueError:
+        return jsonify({"error": "start/end ต้องอยู่ในรูปแบบ YYYY-MM-DD"}), 400
+    if start > end:
+        return jsonify({"error": "start ต้องไม่เกิน end"}), 400
     
-    return 'OK'
+    # วันปัจจุบันคัดลอกจากหน่วยความจำ (วันเก่าอ่านจาก archive ทีละวันระหว่างส่ง)
+    with db.lock:
+        current = dict(db.get_summary(), orders=db.get_orders().to_dicts())
+    chunks = export.export_chunks(
+        export.iter_days(DATA_DIR, start, end, current), kind, fmt,
+        [window.name for window in SALES_WINDOWS]
+    )
+    headers = {
+        "Content-Disposition": f'attachment; filename="atmo_{kind}_{start}_{end}.{fmt}"',
+        "Vary": "Accept-Encoding"
+    }
+    if request.args.get('gzip') != '0' and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        headers["Content-Encoding"] = "gzip"
+        chunks = export.gzip_chunks(chunks)
+    return Response(chunks, content_type=export.MIME_TYPES[fmt], headers=headers)
+
+
+def require_dashboard(func):
+    """Decorator ตรวจสอบ ?token= สำหรับ Dashboard (EventSource ส่ง header เองไม่ได้)"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not DASHBOARD_TOKEN:
+            abort(404)
+        provided = request.args.get('token', '')
+        if not hmac.compare_digest(provided.encode('utf-8'), DASHBOARD_TOKEN.encode('utf-8')):
+            abort(403)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def _dashboard_totals(summary: Dict) -> Dict:
+    """ข้อมูลสรุปสำหรับ Dashboard (เพิ่มเรทปัจจุบัน)"""
+    rate, _, _ = commission_calculator.calculate_commission_rate(summary.get("total_sales", 0))
+    return dict(summary, rate=rate)
+
+
+def _order_view(order) -> Dict:
+    """ข้อมูลออเดอร์หนึ่งแถวของ Dashboard"""
+    return {
+        "order_id": order.order_id,
+        "time": order.time,
+        "product_name": order.product_name,
+        "amount": order.amount,
+        "voided": order.voided
+    }
+
+
+def _dashboard_snapshot() -> Dict:
+    """ข้อมูลทั้งหมดของ Dashboard ตอนเชื่อมต่อ (จากหน่วยความจำ ไม่อ่านไฟล์)"""
+    return {
+        "summary": _dashboard_totals(db.get_summary()),
+        "orders": [_order_view(order) for order in db.get_orders()[-DASHBOARD_RECENT_ORDERS:]]
+    }
+
+
+def _publish_changes(before: Dict, after: Dict, order=None):
+    """
+    ส่งเฉพาะส่วนที่เปลี่ยนให้ Dashboard (เรียกขณะถือ db.lock เพื่อให้ลำดับเหตุการณ์ตรงกับข้อมูล)
+    
+    Args:
+        before: ข้อมูลสรุปก่อนเปลี่ยน
+        after: ข้อมูลสรุปหลังเปลี่ยน
+        order: ออเดอร์ที่เพิ่มหรือเปลี่ยน (ถ้ามี)
+    """
+    before, after = _dashboard_totals(before), _dashboard_totals(after)
+    delta = summary_delta(before, after)
+    if order is not None:
+        broadcaster.publish("order", {"order": _order_view(order), "totals": delta})
+    elif delta:
+        broadcaster.publish("totals", delta)
+    
+    if "rate" in delta:
+        broadcaster.publish("tier", {
+            "rate": after["rate"],
+            "previous_rate": before["rate"],
+            "total_sales": after.get("total_sales", 0)
+        })
+    
+    if "ot_penalty" in delta or "ot_sales" in delta:
+        ot_sales = after.get("ot_sales", 0)
+        broadcaster.publish("ot", {
+            "ot_sales": ot_sales,
+            "min_sales": commission_calculator.OT_EVENING_MIN_SALES,
+            "met": ot_sales >= commission_calculator.OT_EVENING_MIN_SALES,
+            "ot_penalty": after.get("ot_penalty", 0)
+        })
+
+
+@app.route("/dashboard")
+@require_dashboard
+def dashboard():
+    """หน้า Dashboard แบบอ่านอย่างเดียว"""
+    return Response(DASHBOARD_HTML, mimetype="text/html")
+
+
+@app.route("/dashboard/events")
+@require_dashboard
+def dashboard_events():
+    """Server-Sent Events ของวัน: snapshot ตอนเชื่อมต่อ แล้วส่งเฉพาะส่วนที่เปลี่ยน"""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    # ถือ db.lock ก่อน lock ของ Broadcaster (ลำดับเดียวกับฝั่ง publish) ให้ snapshot ตรงกับเหตุการณ์ถัดไป
+    with db.lock:
+        subscribed = broadcaster.subscribe(_dashboard_snapshot, last_event_id)
+    if subscribed is None:
+        return Response("dashboard is full", status=503, headers={"Retry-After": "30"})
+    
+    subscription, initial = subscribed
+    response = Response(
+        broadcaster.stream(subscription, initial, max_seconds=DASHBOARD_STREAM_SECONDS),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # ถ้าการเชื่อมต่อปิดก่อนเริ่มส่ง generator จะไม่ได้ทำงาน จึงลบผู้ชมตอนปิด response ด้วย
+    response.call_on_close(lambda: broadcaster.unsubscribe(subscription))
+    return response
+
+
+def require_api(func):
+    """Decorator ตรวจสอบ Authorization: Bearer สำหรับ Read API"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not API_TOKEN:
+            abort(404)
+        provided = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(provided.encode('utf-8'), API_TOKEN.encode('utf-8')):
+            abort(401)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def _not_modified(snapshot) -> bool:
+    """คำขอมี If-None-Match / If-Modified-Since ที่ตรงกับ snapshot ปัจจุบันหรือไม่"""
+    if request.if_none_match:
+        return request.if_none_match.contains(snapshot.etag.strip('"'))
+    if request.if_modified_since:
+        return request.if_modified_since >= datetime.fromtimestamp(int(snapshot.modified), timezone.utc)
+    return False
+
+
+def _api_response(build, locked: bool = False) -> Response:
+    """
+    JSON response ของ Read API พร้อม ETag/Last-Modified จากเวอร์ชันของ snapshot
+    
+    ตรวจ 304 ก่อนโดยไม่ล็อกและไม่ serialize แล้วจึงใช้ body จาก cache ของเวอร์ชันเดียวกัน
+    
+    Args:
+        build: ฟังก์ชันสร้างข้อมูลจาก snapshot (ValueError = คำขอไม่ถูกต้อง)
+        locked: เรียก build ขณะถือ db.lock (เมื่ออ่านข้อมูลที่ไม่อยู่ใน snapshot เช่นรายการออเดอร์)
+    """
+    snapshot = db.get_snapshot()
+    if not _not_modified(snapshot):
+        key = request.full_path
+        body = api_cache.get(key, snapshot.version)
+        if body is None:
+            try:
+                if locked:
+                    with db.lock:
+                        snapshot = db.get_snapshot()
+                        data = build(snapshot)
+                else:
+                    data = build(snapshot)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            body = json.dumps(dict(data, version=snapshot.version), ensure_ascii=False).encode('utf-8')
+            api_cache.put(key, snapshot.version, body)
+        response = Response(body, content_type="application/json; charset=utf-8")
+    else:
+        response = Response(status=304)
+    response.set_etag(snapshot.etag.strip('"'))
+    response.last_modified = datetime.fromtimestamp(int(snapshot.modified), timezone.utc)
+    # ให้ client ถามซ้ำทุกครั้ง (ได้ 304 ถ้ายังไม่มีการเปลี่ยนแปลง)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route("/api/summary")
+@require_api
+def api_summary():
+    """ข้อมูลสรุปของวันปัจจุบัน"""
+    return _api_response(lambda snapshot: {"summary": _dashboard_totals(snapshot.summary)})
+
+
+@app.route("/api/orders")
+@require_api
+def api_orders():
+    """ออเดอร์ของวันปัจจุบันทีละหน้า ?cursor=...&limit=50"""
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return _api_response(
+        lambda snapshot: order_page(db.get_orders(), snapshot.summary.get("date"), cursor, limit),
+        locked=True
+    )
+
+
+@app.route("/api/history")
+@require_api
+def api_history():
+    """สรุปรายวันย้อนหลัง ?start=YYYY-MM-DD&end=YYYY-MM-DD (ค่าเริ่มต้น 30 วันล่าสุด)"""
+    def build(snapshot):
+        end = export.parse_date(request.args.get('end') or snapshot.summary.get("date") or datetime.now().strftime("%Y-%m-%d"))
+        default_start = datetime.strptime(end, "%Y-%m-%d") - timedelta(days=29)
+        start = export.parse_date(request.args.get('start') or default_start.strftime("%Y-%m-%d"))
+        days = (datetime.strptime(end, "%Y-%m-%d") - datetime.strptime(start, "%Y-%m-%d")).days
+        if not 0 <= days < API_HISTORY_MAX_DAYS:
+            raise ValueError(f"ช่วงวันที่ต้องไม่เกิน {API_HISTORY_MAX_DAYS} วัน และ start ต้องไม่เกิน end")
+        
+        fields = export.summary_fields([window.name for window in SALES_WINDOWS])
+        # วันเก่าอ่านจาก archive โดยไม่ล็อก (archive ใหม่ทำให้เวอร์ชันเปลี่ยนอยู่แล้ว)
+        current = dict(snapshot.summary, orders=[])
+        return {
+            "start": start,
+            "end": end,
+            "days": [
+                {field: row.get(field) for field in fields}
+                for row in export.summary_rows(export.iter_days(DATA_DIR, start, end, current))
+            ]
+        }
+    return _api_response(build)
+
+
+@app.route("/api/top/<board>")
+@require_api
+def api_top(board):
+    """อันดับยอดย้อนหลัง /api/top/<days|staff|products>?period=quarter&k=10"""
+    def build(snapshot):
+        try:
+            k = int(request.args.get('k', leaderboard.DEFAULT_K))
+        except ValueError:
+            raise ValueError("k ต้องเป็นตัวเลข")
+        return leaderboards.top(board, _today(), request.args.get('period'), k)
+    return _api_response(build)
+
+
+def close_day_job():
+    """
+    ปิดวัน: บันทึกข้อมูลสรุปรายวัน สำรองผ่าน _archive_data() รวมรูปภาพเป็น zip และส่งสรุปยอดสุดท้าย
+    
+    รันจาก scheduler หรือ /admin/close-day ผ่าน run_exclusive เท่านั้น (ไม่อยู่ใน request ของ LINE)
+    
+    Returns:
+        ข้อมูลสรุปรายวัน หรือ None ถ้ายังไม่ได้เริ่มวัน
+    """
+    with db.lock:
+        if not db.is_day_started():
+            return None
+        date = db.get_date()
+        summary = db.get_summary()
+        _audit(None, "close_day", fields={
+            "total_sales": summary.get("total_sales", 0),
+            "total_orders": summary.get("total_orders", 0)
+        })
+        rollup = db.close_day()
+        broadcaster.publish("day", _dashboard_snapshot())
+    
+    # งานที่ใช้เวลาทำหลังปล่อย lock (ออเดอร์ของวันใหม่ไม่ต้องรอ)
+    try:
+        db.compact_images(date)
+    except OSError as e:
+        print(f"⚠️ ไม่สามารถรวมรูปภาพของ {date} ได้: {e}")
+    search_index.sync_archives()
+    if DAY_CLOSE_NOTIFY_TO:
+        try:
+            get_line_handler().push_summary(DAY_CLOSE_NOTIFY_TO, rollup["summary"])
+        except Exception as e:
+            print(f"⚠️ ไม่สามารถส่งสรุปยอดปิดวันได้: {e}")
+    print(f"🌙 ปิดวัน {date}: ยอดขาย {rollup['summary'].get('total_sales', 0):,.0f} บาท")
+    return rollup
+
+
+@app.route("/admin/close-day", methods=['POST'])
+@require_admin
+def admin_close_day():
+    """ปิดวันทันที (เช่นจาก Cloud Scheduler เมื่อ instance ไม่ได้รันตลอดเวลา)"""
+    ran, rollup = run_exclusive(leader, "close_day", close_day_job)
+    if not ran:
+        return jsonify({"error": "มีการปิดวันกำลังทำงานอยู่"}), 409
+    if rollup is None:
+        return jsonify({"closed": False, "reason": "ยังไม่ได้เริ่มวัน"})
+    return jsonify({"closed": True, "rollup": rollup})
+
+
+@app.route("/admin/dead-letters")
+@require_admin
+def admin_dead_letters():
+    """รายการเหตุการณ์ใน dead letter"""
+    return jsonify({"dead_letters": [
+        {key: record.get(key) for key in ("event_id", "attempts", "received_at", "failed_at", "last_error")}
+        for record in event_queue.list_dead_letters()
+    ]})
+
+
+@app.route("/admin/dead-letters/<event_id>/replay", methods=['POST'])
+@require_admin
+def admin_replay_dead_letter(event_id: str):
+    """
+    ประมวลผลเหตุการณ์ใน dead letter อีกครั้งภายใน process ของเซิร์ฟเวอร์
+
+    ต้องทำใน process นี้เท่านั้น process อื่นจะมีข้อมูลในหน่วยความจำคนละชุด
+    และเขียนทับ sales_data.json ของกันและกัน
+    """
+    if event_id not in {record["event_id"] for record in event_queue.list_dead_letters()}:
+        abort(404)
+    replayed = event_queue.replay_dead_letter(event_id)
+    return jsonify({"event_id": event_id, "replayed": replayed})
+
+
+@app.route("/healthz")
+def healthz():
+    """Health check สำหรับ startup/liveness probe (ไม่แตะฐานข้อมูลหรือ LINE SDK)"""
+    return 'ok'
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Metrics รูปแบบ Prometheus text"""
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/stats")
+def stats():
+    """สถิติคิว การปฏิเสธคำขอ cache ของ Read API ชื่อผู้ส่ง อันดับยอด และ index ค้นหา (JSON)"""
+    return jsonify({
+        "queue_size": event_queue.size(),
+        "dead_letters": event_queue.dead_letter_count(),
+        "admission": admission.stats(),
+        "api_cache": api_cache.stats(),
+        "profiles": profiles.stats(),
+        "leaderboards": leaderboards.stats(),
+        "search": search_index.stats()
+    })
 
 
-@handler.add(MessageEvent, message=TextMessage)
 def handle_text_message(event):
     """จัดการข้อความที่เป็นข้อความ"""
     user_id = event.source.user_id
@@ -100,8 +784,11 @@ def handle_text_message(event):
         staff_count = user_state.get("staff_count", len(staff_names))
         date = user_state.get("date")
         
-        # เริ่มต้นวัน
-        db.start_day(date, staff_count, staff_names)
+        # เริ่มต้นวัน (ถือ lock เพื่อไม่ให้ออเดอร์หรือการปิดวันที่ worker อื่นกำลังทำแทรกกลาง)
+        with db.lock:
+            db.start_day(date, staff_count, staff_names)
+            _audit(event, "start_day", fields={"staff_count": staff_count, "staff_names": staff_names})
+            broadcaster.publish("day", _dashboard_snapshot())
         
         # ล้างสถานะ
         line_handler.clear_user_state(user_id)
@@ -115,6 +802,8 @@ def handle_text_message(event):
 
 พร้อมรับออเดอร์แล้ว! 🚀"""
         line_handler.send_message(reply_token, message)
+        # index archive ของวันก่อนหลังตอบกลับแล้ว
+        search_index.sync_archives()
         return
     
     # ถ้าไม่ได้อยู่ในโฟลว์พิเศษ ให้ประมวลผลเป็นออเดอร์
@@ -126,7 +815,6 @@ def handle_text_message(event):
     process_order_text(event, text)
 
 
-@handler.add(MessageEvent, message=ImageMessage)
 def handle_image_message(event):
     """จัดการข้อความที่เป็นรูปภาพ"""
     if not db.is_day_started():
@@ -147,7 +835,6 @@ def handle_image_message(event):
     line_handler.send_message(event.reply_token, "📸 รับรูปภาพแล้ว! กรุณาส่งข้อมูลออเดอร์ (ชื่อสินค้า, ยอดเงิน, เวลา)")
 
 
-@handler.add(PostbackEvent)
 def handle_postback(event):
     """จัดการ Postback Event (จาก Date Picker)"""
     user_id = event.source.user_id
@@ -182,8 +869,7 @@ def handle_command(event, command: str):
             line_handler.send_message(reply_token, "กรุณาเริ่มต้นวันก่อน โดยส่งคำสั่ง /start")
             return
         
-        summary = db.get_summary()
-        line_handler.send_summary(reply_token, summary)
+        line_handler.send_summary(reply_token, db.get_snapshot())
     
     elif command == "/images":
         # แสดงรูปภาพทั้งหมด
@@ -195,9 +881,15 @@ def handle_command(event, command: str):
         line_handler.send_images_gallery(reply_token, image_paths)
     
     elif command == "/reset":
-        # รีเซ็ตข้อมูล
-        summary = db.get_summary()
-        db.reset()
+        # รีเซ็ตข้อมูล (ถือ lock เพื่อไม่ให้ออเดอร์ที่ worker อื่นกำลังบันทึกหายหรือถูกเขียนทับ)
+        with db.lock:
+            summary = db.get_summary()
+            _audit(event, "reset", fields={
+                "total_sales": summary.get("total_sales", 0),
+                "total_orders": summary.get("total_orders", 0)
+            })
+            db.reset()
+            broadcaster.publish("day", _dashboard_snapshot())
         
         message = f"""🔄 รีเซ็ตข้อมูลสำเร็จ!
 
@@ -211,6 +903,36 @@ def handle_command(event, command: str):
 กรุณาเริ่มต้นวันใหม่ด้วย /start"""
         
         line_handler.send_message(reply_token, message)
+        search_index.sync_archives()
+    
+    elif command.startswith("/audit"):
+        # ประวัติของออเดอร์
+        if not db.is_day_started():
+            line_handler.send_message(reply_token, "กรุณาเริ่มต้นวันก่อน โดยส่งคำสั่ง /start")
+            return
+        
+        handle_audit_command(event, command)
+    
+    elif command.startswith("/edit") or command.startswith("/void") or command == "/undo":
+        # แก้ไข ยกเลิก หรือย้อนออเดอร์
+        if not db.is_day_started():
+            line_handler.send_message(reply_token, "กรุณาเริ่มต้นวันก่อน โดยส่งคำสั่ง /start")
+            return
+        
+        if command.startswith("/edit"):
+            handle_edit_command(event, command)
+        elif command.startswith("/void"):
+            handle_void_command(event, command)
+        else:
+            handle_undo_command(event)
+    
+    elif command == "/top" or command.startswith("/top "):
+        # อันดับยอดย้อนหลัง (ไม่ต้องเริ่มวัน)
+        handle_top_command(event, command)
+    
+    elif command == "/find" or command.startswith("/find "):
+        # ค้นหาออเดอร์ย้อนหลัง (ไม่ต้องเริ่มวัน)
+        handle_find_command(event, command)
     
     elif command == "/help":
         # แสดงความช่วยเหลือ
@@ -220,92 +942,30 @@ def handle_command(event, command: str):
         line_handler.send_message(reply_token, f"ไม่รู้จักคำสั่ง {command}\nพิมพ์ /help เพื่อดูคำสั่งที่ใช้ได้")
 
 
-def process_order_text(event, text: str):
-    """ประมวลผลข้อความออเดอร์"""
-    reply_token = event.reply_token
-    user_id = event.source.user_id
-    
-    # ดึงข้อมูลจากข้อความ
-    lines = text.split('\n')
-    
-    # บรรทัดแรกคือชื่อสินค้า
-    product_name = lines[0].strip() if lines else ""
-    
-    # ดึงยอดเงิน
-    amount = commission_calculator.extract_amount(text)
-    
-    # ดึงเวลา
-    time = commission_calculator.extract_time(text)
-    
-    if not amount:
-        line_handler.send_message(reply_token, "ไม่พบยอดเงินในข้อความ กรุณาระบุยอดเงิน")
-        return
-    
-    if not time:
-        # ใช้เวลาปัจจุบัน
-        time = datetime.now().strftime("%H:%M")
-    
-    # ตรวจสอบว่ามีแจกัน 2 ใบขึ้นไปหรือไม่
-    is_two_vases = False
-    if re.search(r'(\d+)\s*(แจกัน|vase|เวส)', product_name, re.IGNORECASE):
-        match = re.search(r'(\d+)\s*(แจกัน|vase|เวส)', product_name, re.IGNORECASE)
-        vase_count = int(match.group(1))
-        if vase_count >= 2:
-            is_two_vases = True
-    
-    # คำนวณคอมมิชชั่น
-    total_sales = db.get_summary().get("total_sales", 0)
-    commission_info = commission_calculator.calculate_order_commission(
-        amount=amount,
-        product_name=product_name,
-        total_sales=total_sales + amount,  # ยอดรวมหลังเพิ่มออเดอร์นี้
-        is_two_vases=is_two_vases
-    )
-    
-    # ดึงรูปภาพถ้ามี
-    user_state = line_handler.get_user_state(user_id)
-    image_data = user_state.get("pending_image")
-    image_path = None
-    
-    # บันทึกออเดอร์
-    order_id = len(db.get_orders()) + 1
-    
-    if image_data:
-        image_path = db.save_image(image_data, order_id)
-        # ล้างรูปภาพที่รอ
-        user_state.pop("pending_image", None)
-        line_handler.set_user_state(user_id, "idle", user_state)
-    
-    db.add_order(
-        order_id=order_id,
-        amount=amount,
-        product_name=product_name,
-        time=time,
-        image_path=image_path,
-        note="",
-        commission_1=commission_info["commission_1"],
-        commission_5=commission_info["commission_5"],
-        add_on_2vases=commission_info["add_on_2vases"],
-        is_special=commission_info["is_special"],
-        count_as_order=commission_info["count_as_order"]
-    )
+def _recalculate_totals() -> Dict:
+    """
+    คำนวณ Add on (order), OT Penalty, คอมมิชชั่นรวม และ Incentive ใหม่จากยอดของวัน (ต้องถือ db.lock)
     
-    # คำนวณยอดรวมใหม่
+    Returns:
+        ข้อมูลสรุปหลังอัพเดท
+    """
     summary = db.get_summary()
     total_orders = summary.get("total_orders", 0)
     
     # คำนวณ Add on (order)
     add_on_order = commission_calculator.calculate_order_bonus(total_orders)
     
-    # คำนวณ OT Penalty
-    sales_18_22 = summary.get("sales_18_22", 0)
+    # คำนวณ OT Penalty จากยอดช่วง OT ของดัชนีเวลา (ไม่ขึ้นกับช่วงที่ตั้งใน SALES_WINDOWS)
+    ot_sales = db.sales_between(
+        commission_calculator.OT_EVENING_START, commission_calculator.OT_EVENING_END
+    )
     commission_before_penalty = (
         summary.get("commission_1_total", 0) +
         summary.get("commission_5_total", 0) +
         summary.get("add_on_2vases", 0) +
         add_on_order
     )
-    ot_penalty = commission_calculator.calculate_ot_penalty(commission_before_penalty, sales_18_22)
+    ot_penalty = commission_calculator.calculate_ot_penalty(commission_before_penalty, ot_sales)
     
     # คำนวณคอมมิชชั่นรวม
     commission_total = commission_calculator.calculate_total_commission(
@@ -321,24 +981,452 @@ def process_order_text(event, text: str):
     incentive_per_person = commission_calculator.calculate_incentive_per_person(commission_total, staff_count)
     
     # อัพเดทยอดรวม
-    db.update_totals(add_on_order, ot_penalty, commission_total, incentive_per_person)
+    db.update_totals(add_on_order, ot_penalty, commission_total, incentive_per_person, ot_sales)
     
-    # ดึงข้อมูลสรุปใหม่
-    summary = db.get_summary()
+    return db.get_summary()
+
+
+def _audit(event, op: str, order=None, fields: Dict = None):
+    """
+    บันทึกเหตุการณ์ลง audit log (เรียกขณะถือ db.lock ถ้าเป็นการเปลี่ยนออเดอร์ ให้ลำดับตรงกับข้อมูล)
+    
+    Args:
+        event: LINE event ที่ทำให้เกิดการเปลี่ยนแปลง (None = งานตามเวลา)
+        op: ชนิดเหตุการณ์
+        order: ออเดอร์หลังเปลี่ยน (ถ้ามี)
+        fields: ฟิลด์ที่แยกจากข้อความหรือฟิลด์ที่เปลี่ยน
+    """
+    message = getattr(event, "message", None)
+    commission = None
+    if order is not None:
+        commission = {
+            "commission_1": order.commission_1,
+            "commission_5": order.commission_5,
+            "add_on_2vases": order.add_on_2vases,
+            "is_special": order.is_special,
+            "voided": order.voided
+        }
+    try:
+        audit_log.append(
+            op,
+            date=db.get_date(),
+            order_id=order.order_id if order is not None else None,
+            user_id=event.source.user_id if event is not None else "scheduler",
+            message_id=getattr(message, "id", None),
+            fields=fields,
+            commission=commission,
+            rule_version=commission_calculator.RULE_VERSION
+        )
+    except OSError as e:
+        print(f"⚠️ ไม่สามารถบันทึก audit log ได้: {e}")
+
+
+def _update_order(event, old, changes: Dict, op: str):
+    """
+    บันทึกการแก้ไขหรือยกเลิกออเดอร์ แล้วคำนวณยอดรวมใหม่ (ต้องถือ db.lock)
+    
+    คอมมิชชั่น 1-4% ของออเดอร์นี้คิดจากยอดสะสมก่อนออเดอร์ (O(log n))
+    ส่วนที่ออเดอร์ถัดไปได้เปลี่ยนเพราะยอดสะสมเปลี่ยน บันทึกเป็นรายการปรับยอดในนามออเดอร์นี้
+    คอมมิชชั่น 1-4% รวมทั้งวันจึงเท่ากับการคำนวณทั้งวันใหม่ทุกสตางค์
+    
+    Args:
+        event: LINE event ของคำสั่ง (สำหรับ audit log)
+        old: ออเดอร์ก่อนแก้ไข (ต้องยังไม่ถูกยกเลิก)
+        changes: ฟิลด์ที่เปลี่ยน
+        op: "edit" หรือ "void"
+        
+    Returns:
+        ข้อมูลสรุปหลังอัพเดท
+    """
+    before = db.get_summary()
+    voided = changes.get("voided", False)
+    commission_1, following = commission_calculator.recalculate_commission_1(
+        sales_before=db.sales_before(old.order_id),
+        old_amount=old.amount,
+        old_commission_1=old.commission_1,
+        new_amount=0 if voided else changes.get("amount", old.amount),
+        old_total=before.get("total_sales", 0)
+    )
+    if not voided:
+        changes = dict(changes, commission_1=commission_1)
+    
+    adjustments = {money.COMMISSION_1: money.to_satang(following)} if following else None
+    new = db.update_order(old.order_id, changes, op, adjustments)
+    _audit(event, op, new, changes)
+    search_index.add(db.get_date(), new)
+    summary = _recalculate_totals()
+    _publish_changes(before, summary, new)
+    return summary
+
+
+def _totals_text(summary: Dict) -> str:
+    """ข้อความยอดรวมสั้นๆ หลังแก้ไขออเดอร์"""
+    return f"""💰 ยอดขายรวม: {summary.get('total_sales', 0):,.0f} บาท
+📦 จำนวนออเดอร์: {summary.get('total_orders', 0)} ออเดอร์
+💵 คอมมิชชั่นรวม: {summary.get('commission_total', 0):,.2f} บาท
+👤 Incentive ต่อคน: {summary.get('incentive_per_person', 0):,.2f} บาท"""
+
+
+def _find_order_for_change(reply_token: str, command: str):
+    """
+    แยกรหัสออเดอร์จากคำสั่ง /edit หรือ /void แล้วดึงออเดอร์
+    
+    Returns:
+        (ออเดอร์, ข้อความส่วนที่เหลือ) หรือ (None, "") ถ้าไม่พบ (แจ้งผู้ใช้แล้ว)
+    """
+    name, _, rest = command.partition(' ')
+    first_line, _, other_lines = rest.partition('\n')
+    order_id_text, _, first_rest = first_line.strip().partition(' ')
+    
+    if not order_id_text.lstrip('#').isdigit():
+        line_handler.send_message(reply_token, f"กรุณาระบุรหัสออเดอร์ เช่น {name} 12")
+        return None, ""
+    
+    order = db.get_order(int(order_id_text.lstrip('#')))
+    if order is None:
+        line_handler.send_message(reply_token, f"ไม่พบออเดอร์ #{order_id_text.lstrip('#')}")
+        return None, ""
+    if order.voided:
+        line_handler.send_message(reply_token, f"ออเดอร์ #{order.order_id} ถูกยกเลิกไปแล้ว")
+        return None, ""
+    
+    return order, (first_rest + "\n" + other_lines).strip()
+
+
+def handle_edit_command(event, command: str):
+    """
+    แก้ไขออเดอร์: /edit <รหัส> ตามด้วยข้อความออเดอร์ใหม่ (ยอดเงิน เวลา หรือทั้งออเดอร์)
+    
+    ถ้าข้อความใหม่มีบรรทัดเดียวจะแก้เฉพาะยอดเงินและเวลาที่ระบุ โดยใช้ชื่อสินค้าเดิม
+    """
+    reply_token = event.reply_token
+    command = command.replace('\r', '')
+    
+    with db.lock:
+        old, body = _find_order_for_change(reply_token, command)
+        if old is None:
+            return
+        if not body:
+            line_handler.send_message(reply_token, f"กรุณาระบุข้อมูลใหม่ เช่น /edit {old.order_id} 1,500 บาท")
+            return
+        
+        lines = body.split('\n')
+        if len(lines) >= 2:
+            product_name = lines[0].strip()
+            order_text = body
+        else:
+            product_name = old.product_name
+            order_text = f"{product_name}\n{body}"
+        amount = commission_calculator.extract_amount(body) or old.amount
+        time = commission_calculator.extract_time(body) or old.time
+        
+        # จัดประเภทจากแคตตาล็อกแบบเดียวกับตอนเพิ่มออเดอร์ (ไม่เช่นนั้นจะเสียคอมมิชชั่น 5%)
+        _, catalog_type = classify(catalog, order_text)
+        commission_info = commission_calculator.calculate_order_commission(
+            amount=amount,
+            product_name=product_name,
+            order_text=order_text,
+            product_type=catalog_type
+        )
+        summary = _update_order(event, old, {
+            "amount": amount,
+            "product_name": product_name,
+            "time": time,
+            "commission_5": commission_info["commission_5"],
+            "add_on_2vases": commission_info["add_on_2vases"],
+            "is_special": commission_info["is_special"],
+            "count_as_order": commission_info["count_as_order"]
+        }, "edit")
+    
+    message = f"""✏️ แก้ไขออเดอร์ #{old.order_id} แล้ว
+
+• สินค้า: {product_name}
+• ยอดเงิน: {old.amount:,.0f} → {amount:,.0f} บาท
+• เวลา: {time}
+
+{_totals_text(summary)}
+
+พิมพ์ /undo เพื่อย้อนกลับ"""
+    line_handler.send_message(reply_token, message)
+
+
+def handle_void_command(event, command: str):
+    """ยกเลิกออเดอร์: /void <รหัส>"""
+    reply_token = event.reply_token
+    
+    with db.lock:
+        old, _ = _find_order_for_change(reply_token, command)
+        if old is None:
+            return
+        summary = _update_order(event, old, {"voided": True}, "void")
+    
+    message = f"""🗑️ ยกเลิกออเดอร์ #{old.order_id} แล้ว
+({old.product_name} {old.amount:,.0f} บาท)
+
+{_totals_text(summary)}
+
+พิมพ์ /undo เพื่อย้อนกลับ"""
+    line_handler.send_message(reply_token, message)
+
+
+def handle_undo_command(event):
+    """ย้อนการเพิ่ม แก้ไข หรือยกเลิกออเดอร์ล่าสุด"""
+    reply_token = event.reply_token
+    
+    with db.lock:
+        before = db.get_summary()
+        change = db.undo()
+        if change is None:
+            line_handler.send_message(reply_token, "ไม่มีรายการให้ย้อนกลับ")
+            return
+        order = db.get_order(change["order_id"])
+        _audit(event, "undo", order, {"reverted": change["op"]})
+        search_index.add(db.get_date(), order)
+        summary = _recalculate_totals()
+        _publish_changes(before, summary, order)
+    
+    action = {"add": "เพิ่ม", "edit": "แก้ไข", "void": "ยกเลิก"}[change["op"]]
+    message = f"""↩️ ย้อนการ{action}ออเดอร์ #{change['order_id']} แล้ว
+
+{_totals_text(summary)}"""
+    line_handler.send_message(reply_token, message)
+
+
+_AUDIT_OPS = {
+    "add": "เพิ่ม",
+    "edit": "แก้ไข",
+    "void": "ยกเลิก",
+    "undo": "ย้อน",
+}
+
+
+def handle_audit_command(event, command: str):
+    """ประวัติการเปลี่ยนแปลงของออเดอร์: /audit <รหัส> (อ่านจาก index ไม่ต้องอ่านทั้ง log)"""
+    reply_token = event.reply_token
+    order_id_text = command.partition(' ')[2].strip().lstrip('#')
+    if not order_id_text.isdigit():
+        line_handler.send_message(reply_token, "กรุณาระบุรหัสออเดอร์ เช่น /audit 12")
+        return
+    
+    date = db.get_date()
+    entries = audit_log.history(date, int(order_id_text))
+    if not entries:
+        line_handler.send_message(reply_token, f"ไม่พบประวัติของออเดอร์ #{order_id_text}")
+        return
+    
+    lines = [f"🧾 ประวัติออเดอร์ #{order_id_text} ({date})"]
+    for entry in entries:
+        fields = entry["fields"]
+        commission = entry["commission"]
+        detail = ", ".join(
+            f"{key}={value}" for key, value in fields.items() if key not in ("text", "image_path")
+        )
+        lines.append("")
+        lines.append(f"• {entry['ts'][11:19]} {_AUDIT_OPS.get(entry['op'], entry['op'])} โดย {entry['user_id']}")
+        if detail:
+            lines.append(f"  {detail}")
+        lines.append(
+            f"  คอมมิชชั่น 1-4% {commission.get('commission_1', 0):,.2f} | "
+            f"5% {commission.get('commission_5', 0):,.2f} | "
+            f"Add on {commission.get('add_on_2vases', 0):,.0f} (กฎ v{entry['rule_version']})"
+        )
+    line_handler.send_message(reply_token, "\n".join(lines))
+
+
+_TOP_TITLES = {
+    leaderboard.DAYS: "📅 วันที่ยอดขายสูงสุด",
+    leaderboard.STAFF: "🏅 คนตอบที่ Incentive สูงสุด",
+    leaderboard.PRODUCTS: "💐 สินค้าขายดี",
+}
+
+
+def _today() -> str:
+    """วันที่อ้างอิงของอันดับย้อนหลัง (วันที่เริ่มไว้ หรือวันนี้ถ้ายังไม่เริ่มวัน)"""
+    return db.get_date() or clock().strftime("%Y-%m-%d")
+
+
+def handle_top_command(event, command: str):
+    """อันดับยอดย้อนหลัง: /top [days|staff|products] [week|month|quarter|year|all] [จำนวน]"""
+    reply_token = event.reply_token
+    board, period, k = leaderboard.DAYS, None, leaderboard.DEFAULT_K
+    for arg in command.split()[1:]:
+        if arg.isdigit():
+            k = int(arg)
+        elif arg in leaderboard.PERIODS:
+            period = arg
+        else:
+            board = arg
+    
+    try:
+        result = leaderboards.top(board, _today(), period, k)
+    except ValueError as e:
+        line_handler.send_message(reply_token, f"{e}\nเช่น /top staff quarter 5")
+        return
+    
+    span = "ทั้งหมด" if result["period"] == "all" else f"{result['start']} ถึง {result['end']}"
+    lines = [f"{_TOP_TITLES[board]} ({span})"]
+    if not result["items"]:
+        lines.append("ยังไม่มีข้อมูลของวันที่ปิดแล้วในช่วงนี้")
+    for rank, item in enumerate(result["items"], 1):
+        name = item.get("date") or item.get("name") or item.get("product_name")
+        line = f"{rank}. {name}: {item['total']:,.0f} บาท"
+        if "orders" in item:
+            line += f" ({item['orders']} ออเดอร์)"
+        lines.append(line)
+    line_handler.send_message(reply_token, "\n".join(lines))
+
+
+FIND_LIMIT = 10
+
+
+def handle_find_command(event, command: str):
+    """ค้นหาออเดอร์ย้อนหลังจากชื่อสินค้าและหมายเหตุ: /find <คำค้น>"""
+    reply_token = event.reply_token
+    query = command.partition(' ')[2].strip()
+    if not query:
+        line_handler.send_message(reply_token, "กรุณาระบุคำค้น เช่น /find ฟาแลน")
+        return
+    
+    search_index.sync_archives()
+    with metrics.timed("search"):
+        found = search_index.find(query, FIND_LIMIT)
+    if not found["total"]:
+        line_handler.send_message(reply_token, f"ไม่พบออเดอร์ที่มี \"{query}\"")
+        return
+    
+    lines = [f"🔎 พบ {found['total']} ออเดอร์ที่มี \"{query}\""]
+    for item in found["results"]:
+        voided = " (ยกเลิก)" if item["voided"] else ""
+        name = item["text"].replace("\n", " / ")
+        lines.append(f"• {item['date']} #{item['order_id']} {name}: {item['amount']:,.0f} บาท{voided}")
+    if found["total"] > FIND_LIMIT:
+        lines.append(f"... แสดง {FIND_LIMIT} รายการล่าสุด")
+    line_handler.send_message(reply_token, "\n".join(lines))
+
+
+@tracing.traced("process_order_text")
+def process_order_text(event, text: str):
+    """ประมวลผลข้อความออเดอร์"""
+    reply_token = event.reply_token
+    user_id = event.source.user_id
+    
+    # ดึงข้อมูลจากข้อความ
+    lines = text.split('\n')
+    
+    # บรรทัดแรกคือชื่อสินค้า
+    product_name = lines[0].strip() if lines else ""
+    
+    with metrics.timed("parse"):
+        # ดึงยอดเงิน
+        amount = commission_calculator.extract_amount(text)
+        
+        # ดึงเวลา
+        time = commission_calculator.extract_time(text)
+    
+    if not amount:
+        line_handler.send_message(reply_token, "ไม่พบยอดเงินในข้อความ กรุณาระบุยอดเงิน")
+        return
+    
+    if not time:
+        # ใช้เวลาปัจจุบัน
+        time = clock().strftime("%H:%M")
+    
+    # จับคู่แต่ละบรรทัดกับแคตตาล็อก: ประเภทคอมมิชชั่นจากบรรทัดชื่อสินค้า (ไม่พบ = ใช้คำสำคัญ)
+    # และเทียบยอดกับราคาตั้งรวมของทุกบรรทัดที่พบ
+    catalog_matches, catalog_type, price_flag = [None], None, None
+    if catalog is not None:
+        with metrics.timed("catalog"):
+            catalog_matches, catalog_type = classify(catalog, text)
+        deviation = price_deviation(amount, catalog_matches)
+        if deviation is not None and abs(deviation[1]) > CATALOG_PRICE_TOLERANCE:
+            price_flag = {"list_price": deviation[0], "price_deviation": round(deviation[1], 4)}
+    
+    # ชื่อผู้ส่งจาก cache (เรียก profile API เฉพาะครั้งแรกหรือเมื่อหมดอายุ และไม่ถือ db.lock ระหว่างรอ)
+    staff_name = profiles.get(user_id, getattr(event.source, "group_id", None))
+    
+    # worker หลายตัวอาจประมวลผลออเดอร์พร้อมกัน จึงต้องล็อกช่วงอ่าน-คำนวณ-บันทึก
+    with db.lock:
+        # คำนวณคอมมิชชั่น
+        before = db.get_summary()
+        previous_sales = before.get("total_sales", 0)
+        # ยอดรวมหลังเพิ่มออเดอร์นี้ (บวกเป็นสตางค์เพื่อไม่ให้คลาดเคลื่อน)
+        total_sales = money.to_baht(money.to_satang(previous_sales) + money.to_satang(amount))
+        with metrics.timed("commission"):
+            commission_info = commission_calculator.calculate_order_commission(
+                amount=amount,
+                product_name=product_name,
+                order_text=text,
+                total_sales=total_sales,
+                product_type=catalog_type
+            )
+            
+            # คอมมิชชั่น 1-4% คิดจากส่วนต่างที่เกิน 20,000 ของยอดสะสม
+            # ออเดอร์นี้จึงได้เฉพาะส่วนที่เพิ่มขึ้นจากยอดก่อนหน้า
+            commission_1 = commission_calculator.calculate_commission_1_delta(previous_sales, total_sales)
+            rate, _, _ = commission_calculator.calculate_commission_rate(total_sales)
+        
+        # ดึงรูปภาพถ้ามี
+        user_state = line_handler.get_user_state(user_id)
+        image_data = user_state.get("pending_image")
+        image_path = None
+        
+        # บันทึกออเดอร์
+        order_id = len(db.get_orders()) + 1
+        
+        if image_data:
+            image_path = db.save_image(image_data, order_id)
+            # ล้างรูปภาพที่รอ
+            user_state.pop("pending_image", None)
+            line_handler.set_user_state(user_id, "idle", user_state)
+        
+        db.add_order(
+            order_id=order_id,
+            amount=amount,
+            product_name=product_name,
+            time=time,
+            image_path=image_path,
+            note="",
+            commission_1=commission_1,
+            commission_5=commission_info["commission_5"],
+            add_on_2vases=commission_info["add_on_2vases"],
+            is_special=commission_info["is_special"],
+            count_as_order=commission_info["count_as_order"],
+            user_id=user_id,
+            staff_name=staff_name
+        )
+        
+        order = db.get_order(order_id)
+        _audit(event, "add", order, {
+            "text": text,
+            "product_name": product_name,
+            "amount": amount,
+            "time": time,
+            "image_path": image_path,
+            "rate": rate,
+            "catalog": catalog_matches[0].item.name if catalog_matches[0] is not None else None,
+            **(price_flag or {})
+        })
+        search_index.add(db.get_date(), order)
+        
+        # คำนวณยอดรวมใหม่
+        summary = _recalculate_totals()
+        _publish_changes(before, summary, order)
+        snapshot = db.get_snapshot()
     
     # ส่งข้อความยืนยัน
     order_info = {
         "product_name": product_name,
         "amount": amount,
         "time": time,
-        "commission_1": commission_info["commission_1"],
+        "commission_1": commission_1,
         "commission_5": commission_info["commission_5"],
         "add_on_2vases": commission_info["add_on_2vases"],
         "is_special": commission_info["is_special"],
-        "rate": commission_info["rate"]
+        "rate": rate,
+        **(price_flag or {})
     }
     
-    line_handler.send_order_confirmation(reply_token, order_info, summary)
+    line_handler.send_order_confirmation(reply_token, order_info, snapshot)
 
 
 @app.route("/")
@@ -376,6 +1464,12 @@ def index():
     """
 
 
+# เริ่ม scheduler หลังประกาศงานทั้งหมด (import APScheduler เมื่อตั้ง DAY_CLOSE_TIME เท่านั้น)
+scheduler = None
+if DAY_CLOSE_TIME:
+    scheduler = start_scheduler([("close_day", close_day_job, DAY_CLOSE_TIME)], leader, SCHEDULER_TIMEZONE)
+
+
 if __name__ == "__main__":
     port = int(os.getenv('PORT', 8080))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark แบบ end-to-end ของระบบคำนวณคอมมิชชั่น ATMO'decor
+
+วัดผล:
+- ความเร็วการแยกข้อความ (extract_amount + extract_time) ต่อวินาที
+- ความเร็ว calculate_order_commission ต่อวินาที
+- เวลา SalesDatabase.add_order เมื่อมีออเดอร์ในวันนั้น 10/100/1,000/10,000 รายการ
+- เวลา archive ข้อมูลของวัน
+- หน่วยความจำต่อออเดอร์
+- เวลาโหลด index ค้นหาของออเดอร์หนึ่งปี และความเร็ว /find
+- ความเร็วการจับคู่บรรทัดของออเดอร์กับแคตตาล็อกสินค้า 100 และ 5,000 รายการ
+
+การใช้งาน:
+    python -m benchmarks.bench_e2e
+    python -m benchmarks.bench_e2e --sizes 10 100 --output report.json
+    python -m benchmarks.bench_e2e --baseline benchmarks/baseline.json
+    python -m benchmarks.bench_e2e --update-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.order_generator import generate_orders
+from src import commission_calculator
+from src.catalog import Catalog, CatalogItem
+from src.database import SalesDatabase
+from src.rendering import SummaryRenderer, render_summary_text
+from src.search import DOCS_FILE, SearchIndex
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+DEFAULT_OUTPUT = os.path.join("benchmarks", "report.json")
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _ops_per_sec(func, items: List, min_seconds: float = 0.5) -> float:
+    """เรียก func กับทุก item ซ้ำจนครบเวลาขั้นต่ำ แล้วคืนค่าจำนวนครั้งต่อวินาที"""
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        for item in items:
+            func(item)
+        calls += len(items)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return calls / elapsed
+
+
+def bench_parser(orders: List[Dict]) -> float:
+    """ความเร็วการดึงยอดเงินและเวลาจากข้อความ (ข้อความ/วินาที)"""
+    def parse(order):
+        commission_calculator.extract_amount(order["text"])
+        commission_calculator.extract_time(order["text"])
+    return _ops_per_sec(parse, orders)
+
+
+def bench_commission(orders: List[Dict]) -> float:
+    """ความเร็ว calculate_order_commission (ครั้ง/วินาที)"""
+    def calculate(order):
+        commission_calculator.calculate_order_commission(
+            amount=order["amount"],
+            product_name=order["product_name"],
+            order_text=order["text"],
+            total_sales=60000
+        )
+    return _ops_per_sec(calculate, orders)
+
+
+def bench_render(orders: List[Dict]) -> Dict[str, float]:
+    """ความเร็วการสร้างข้อความสรุปยอด: render ใหม่ทุกครั้ง เทียบกับใช้ cache ตาม snapshot"""
+    data_dir = tempfile.mkdtemp(prefix="atmo_bench_")
+    try:
+        db = SalesDatabase(data_dir=data_dir)
+        db.start_day("2026-01-11", 2, ["Oil", "Fang"])
+        _fill_day(db, orders[:200])
+        snapshot = db.get_snapshot()
+        renderer = SummaryRenderer()
+        return {
+            "render_summary_ops_per_sec": _ops_per_sec(lambda _: render_summary_text(snapshot.summary), orders),
+            "render_summary_cached_ops_per_sec": _ops_per_sec(lambda _: renderer.summary_text(snapshot), orders),
+            "render_confirmation_ops_per_sec": _ops_per_sec(
+                lambda order: renderer.confirmation_text(order, snapshot), orders),
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def bench_search(orders: List[Dict], days: int = 365, per_day: int = 100) -> Dict[str, float]:
+    """โหลด index ค้นหาของออเดอร์ days วัน แล้ววัดความเร็วคำค้นภาษาไทย อังกฤษ และหลายคำ"""
+    data_dir = tempfile.mkdtemp(prefix="atmo_bench_")
+    try:
+        with open(os.path.join(data_dir, DOCS_FILE), 'w', encoding='utf-8') as f:
+            for day in range(days):
+                date = time.strftime("%Y-%m-%d", time.gmtime(1767225600 + day * 86400))
+                for order_id in range(1, per_day + 1):
+                    order = orders[(day * per_day + order_id) % len(orders)]
+                    f.write(json.dumps({"date": date, "order_id": order_id, "text": order["product_name"],
+                                        "amount": order["amount"], "voided": False}, ensure_ascii=False) + "\n")
+        index = SearchIndex(data_dir)
+        started = time.perf_counter()
+        index.find("x")
+        load_ms = (time.perf_counter() - started) * 1000
+        queries = ["ฟาแลน", "curve", "กุหลาบ 30", "ทิวลิปส้ม"]
+        return {
+            "search_load_ms@year": load_ms,
+            "search_ops_per_sec@year": _ops_per_sec(index.find, queries),
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def bench_catalog(orders: List[Dict], sizes=(100, 5000)) -> Dict[str, float]:
+    """ความเร็ว Catalog.resolve ต่อบรรทัด เมื่อแคตตาล็อกมีขนาดต่างกัน (ชื่อสุ่มจากพยางค์)"""
+    syllables = ["แจ", "กัน", "ดอก", "ไม้", "ลิป", "ทิว", "กุหลาบ", "เซรา", "มิก", "vase", "rose", "lily", "oud", "mini"]
+    lines = [order["product_name"] for order in orders[:500]]
+    result = {}
+    for size in sizes:
+        items = [
+            CatalogItem(" ".join(syllables[(i // len(syllables) ** j) % len(syllables)] for j in range(3)) + f" {i}",
+                        "other", 1000)
+            for i in range(size)
+        ]
+        catalog = Catalog(items + [CatalogItem("แจกันฟาแลนด์", "faland", 6500, ("faland",))])
+        result[f"catalog_resolve_ops_per_sec@{size}"] = _ops_per_sec(catalog.resolve, lines)
+    return result
+
+
+def _fill_day(db: SalesDatabase, orders: List[Dict]):
+    """เพิ่มออเดอร์ลงฐานข้อมูลโดยไม่เขียนไฟล์ทุกครั้ง (บันทึกครั้งเดียวตอนท้าย)"""
+    db._save_data = lambda: None
+    try:
+        for i, order in enumerate(orders, 1):
+            db.add_order(
+                order_id=i,
+                amount=order["amount"],
+                product_name=order["product_name"],
+                time=order["time"]
+            )
+    finally:
+        del db._save_data
+    db._save_data()
+
+
+def bench_day(size: int, samples: int = 20) -> Dict[str, float]:
+    """
+    วัด add_order, archive และหน่วยความจำเมื่อวันนั้นมีออเดอร์ size รายการ
+
+    Args:
+        size: จำนวนออเดอร์ในวัน
+        samples: จำนวนครั้งที่วัด add_order
+
+    Returns:
+        Dictionary ของผลการวัด
+    """
+    data_dir = tempfile.mkdtemp(prefix="atmo_bench_")
+    try:
+        orders = list(generate_orders(size + samples, seed=size))
+        db = SalesDatabase(data_dir=data_dir)
+        db.start_day("2026-01-11", 2, ["Oil", "Fang"])
+
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        _fill_day(db, orders[:size])
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies = []
+        for i, order in enumerate(orders[size:], size + 1):
+            started = time.perf_counter()
+            db.add_order(
+                order_id=i,
+                amount=order["amount"],
+                product_name=order["product_name"],
+                time=order["time"]
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        db._archive_data()
+        archive_ms = (time.perf_counter() - started) * 1000
+
+        return {
+            f"add_order_p50_ms@{size}": _percentile(latencies, 50),
+            f"add_order_p95_ms@{size}": _percentile(latencies, 95),
+            f"archive_ms@{size}": archive_ms,
+            f"memory_bytes_per_order@{size}": (after - before) / size,
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def run(sizes: List[int]) -> Dict:
+    """รัน benchmark ทั้งหมดและคืนค่ารายงาน"""
+    orders = list(generate_orders(2000))
+    metrics = {
+        "parser_ops_per_sec": bench_parser(orders),
+        "commission_ops_per_sec": bench_commission(orders),
+    }
+    metrics.update(bench_render(orders))
+    metrics.update(bench_search(orders))
+    metrics.update(bench_catalog(orders))
+    for size in sizes:
+        print(f"  ⏱️  {size:,} ออเดอร์/วัน ...")
+        metrics.update(bench_day(size))
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "metrics": {name: round(value, 4) for name, value in metrics.items()},
+    }
+
+
+def higher_is_better(metric: str) -> bool:
+    """metric ที่ค่ามากดีกว่า (throughput) ลงท้ายด้วย _per_sec"""
+    return metric.endswith("_per_sec")
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    เปรียบเทียบรายงานกับ baseline
+
+    Args:
+        report: รายงานปัจจุบัน
+        baseline: รายงาน baseline
+        tolerance: สัดส่วนที่ยอมให้แย่ลง (เช่น 0.25 = 25%)
+
+    Returns:
+        รายการข้อความของ metric ที่แย่ลงเกินเกณฑ์
+    """
+    regressions = []
+    for name, base_value in baseline.get("metrics", {}).items():
+        value = report["metrics"].get(name)
+        if value is None or not base_value:
+            continue
+        if higher_is_better(name):
+            worse = value < base_value * (1 - tolerance)
+        else:
+            worse = value > base_value * (1 + tolerance)
+        if worse:
+            change = (value - base_value) / base_value * 100
+            regressions.append(f"{name}: {base_value:,.4f} → {value:,.4f} ({change:+.1f}%)")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ระบบคำนวณคอมมิชชั่น")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=None, help="ไฟล์ baseline สำหรับตรวจ regression")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true", help="บันทึกผลครั้งนี้เป็น baseline")
+    args = parser.parse_args(argv)
+
+    print("🏁 เริ่ม benchmark")
+    report = run(args.sizes)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for name, value in report["metrics"].items():
+        print(f"  {name:<36} {value:>14,.4f}")
+    print(f"\n📄 บันทึกรายงานที่ {args.output}")
+
+    if args.update_baseline:
+        with open(DEFAULT_BASELINE, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📌 อัพเดท baseline ที่ {DEFAULT_BASELINE}")
+        return 0
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ พบ regression เกิน {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  • {line}")
+            return 1
+        print(f"\n✅ ไม่พบ regression เกิน {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
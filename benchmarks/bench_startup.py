@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark เวลาเริ่มระบบ (cold start) ของ ATMO'decor
+
+รัน `import app` ใน process ใหม่ด้วย `python -X importtime` แล้ววัด:
+- เวลา import app (ช่วงที่ Cloud Run ต้องรอก่อนรับคำขอแรก)
+- เวลาที่เลื่อนไปทำตอนเหตุการณ์แรก (สร้าง LineHandler, โหลดข้อมูลของวัน)
+- module ที่ใช้เวลา import มากที่สุด
+
+ล้มเหลว (exit code 1) ถ้าเวลา import เกินงบ หรือมี module ต้องห้าม
+(เช่น LINE SDK) ถูก import ตั้งแต่เริ่มระบบ
+
+การใช้งาน:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --budget-ms 400 --runs 5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+DEFAULT_BUDGET_MS = 600
+DEFAULT_FORBIDDEN = ["linebot", "requests", "apscheduler"]
+
+# วัดเวลาภายใน process ลูก: import app แล้วทำงานที่เลื่อนไว้ทีละส่วน
+_CHILD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+loaded = sorted(m for m in sys.modules)
+app.get_line_handler()
+handler_ready = time.perf_counter()
+app.db.data
+data_ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "line_handler_ms": (handler_ready - imported) * 1000,
+    "load_data_ms": (data_ready - handler_ready) * 1000,
+    "modules": loaded,
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    แยกผลลัพธ์ของ -X importtime
+
+    Args:
+        stderr: ข้อความ stderr ของ process
+
+    Returns:
+        รายการ (ชื่อ module, self us, cumulative us)
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        entries.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return entries
+
+
+def _run_once(data_dir: str) -> Tuple[Dict, List[Tuple[str, int, int]]]:
+    env = dict(os.environ)
+    env.update({
+        "LINE_CHANNEL_ACCESS_TOKEN": "startup-token",
+        "LINE_CHANNEL_SECRET": "startup-secret",
+        "PYTHONPATH": REPO_ROOT,
+        "PYTHONWARNINGS": "ignore",
+    })
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_SCRIPT],
+        cwd=data_dir, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def run(runs: int = 5) -> Dict:
+    """
+    วัดเวลาเริ่มระบบหลายครั้งแล้วใช้ค่าต่ำสุด (ตัดผลของเครื่องที่ไม่ว่าง)
+
+    Args:
+        runs: จำนวนครั้งที่วัด
+
+    Returns:
+        รายงานผล
+    """
+    samples = []
+    imports: List[Tuple[str, int, int]] = []
+    for _ in range(runs):
+        data_dir = tempfile.mkdtemp(prefix="atmo_startup_")
+        try:
+            sample, imports = _run_once(data_dir)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        samples.append(sample)
+
+    # -X importtime พิมพ์ module ลูกก่อน module แม่ ทุกบรรทัดหลัง "app" คือส่วนที่เลื่อนไปทำภายหลัง
+    names = [entry[0] for entry in imports]
+    startup_imports = imports[:names.index("app") + 1] if "app" in names else imports
+
+    best = min(samples, key=lambda sample: sample["import_ms"])
+    return {
+        "import_ms": best["import_ms"],
+        "line_handler_ms": min(sample["line_handler_ms"] for sample in samples),
+        "load_data_ms": min(sample["load_data_ms"] for sample in samples),
+        "modules": best["modules"],
+        "slowest_imports": [
+            {"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+            for name, self_us, cumulative_us in sorted(startup_imports, key=lambda entry: entry[1], reverse=True)[:15]
+        ],
+    }
+
+
+def check(report: Dict, budget_ms: float, forbidden: List[str]) -> List[str]:
+    """
+    ตรวจรายงานกับงบเวลาและ module ต้องห้าม
+
+    Args:
+        report: รายงานจาก run()
+        budget_ms: งบเวลา import app (มิลลิวินาที)
+        forbidden: ชื่อ package ที่ห้าม import ตอนเริ่มระบบ
+
+    Returns:
+        รายการปัญหาที่พบ
+    """
+    problems = []
+    if report["import_ms"] > budget_ms:
+        problems.append(f"import app ใช้เวลา {report['import_ms']:.1f} ms เกินงบ {budget_ms:.0f} ms")
+    for package in forbidden:
+        if any(module == package or module.startswith(package + ".") for module in report["modules"]):
+            problems.append(f"{package} ถูก import ตั้งแต่เริ่มระบบ")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark เวลาเริ่มระบบ")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="package ที่ห้าม import ตอนเริ่มระบบ")
+    args = parser.parse_args(argv)
+
+    print(f"🧊 วัด cold start {args.runs} ครั้ง ...")
+    report = run(args.runs)
+
+    print(f"• import app: {report['import_ms']:.1f} ms (งบ {args.budget_ms:.0f} ms)")
+    print(f"• สร้าง LineHandler ตอนเหตุการณ์แรก: {report['line_handler_ms']:.1f} ms")
+    print(f"• โหลดข้อมูลของวันตอนใช้ครั้งแรก: {report['load_data_ms']:.1f} ms")
+    print("\nmodule ที่ import นานที่สุดตอนเริ่มระบบ (self time):")
+    for entry in report["slowest_imports"][:10]:
+        print(f"  {entry['module']:<40} {entry['self_ms']:>8.1f} ms")
+
+    problems = check(report, args.budget_ms, args.forbid)
+    if problems:
+        print("\n❌ เริ่มระบบช้าลง:")
+        for problem in problems:
+            print(f"  • {problem}")
+        return 1
+    print("\n✅ อยู่ในงบเวลา")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
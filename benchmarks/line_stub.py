@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+เซิร์ฟเวอร์จำลอง LINE Messaging API สำหรับทดสอบโหลด ATMO'decor
+
+รองรับ endpoint ที่ LineHandler ใช้:
+- POST /v2/bot/message/reply
+- POST /v2/bot/message/push
+- GET  /v2/bot/message/{message_id}/content
+- GET  /v2/bot/profile/{user_id}
+
+ตั้งค่า latency และอัตราการเกิด error ได้ เพื่อจำลอง LINE API ที่ช้าหรือล่ม
+
+การใช้งาน:
+    python -m benchmarks.line_stub --port 9000 --latency-ms 80 --error-rate 0.01
+
+แล้วตั้งค่าแอปด้วย:
+    LINE_API_ENDPOINT=http://127.0.0.1:9000
+    LINE_API_DATA_ENDPOINT=http://127.0.0.1:9000
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# ข้อมูลรูปภาพจำลอง (JPEG header + padding)
+FAKE_IMAGE = b"\xff\xd8\xff\xe0" + b"\x00" * 20 * 1024 + b"\xff\xd9"
+
+_CONTENT_PATH = re.compile(r"^/v2/bot/message/([^/]+)/content$")
+_PROFILE_PATH = re.compile(r"^/v2/bot/profile/([^/]+)$")
+
+
+class LineStubServer:
+    """เซิร์ฟเวอร์จำลอง LINE API ที่รันใน thread เบื้องหลัง"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0,
+        seed: Optional[int] = None
+    ):
+        """
+        สร้าง instance ของ LineStubServer
+
+        Args:
+            host: host ที่ bind
+            port: port ที่ bind (0 = สุ่ม port ว่าง)
+            latency_ms: เวลาหน่วงเฉลี่ยต่อคำขอ
+            jitter_ms: ช่วงสุ่มของเวลาหน่วง (+/-)
+            error_rate: สัดส่วนคำขอที่ตอบ 500
+            seed: seed ของตัวสุ่ม
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests: deque = deque(maxlen=10000)
+        self.counts: Dict[str, int] = {}
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LineStubServer":
+        """เริ่มเซิร์ฟเวอร์ใน thread เบื้องหลัง"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="line-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """หยุดเซิร์ฟเวอร์"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _record(self, kind: str, payload: Optional[Dict] = None):
+        with self._lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            self.requests.append({"kind": kind, "payload": payload, "at": time.time()})
+
+    def _delay_and_fail(self) -> bool:
+        """หน่วงเวลาตามที่ตั้งไว้ และคืนค่า True ถ้าควรตอบ error"""
+        with self._lock:
+            delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return fail
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status: int, data: Dict):
+                self._send(status, json.dumps(data).encode("utf-8"))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                if self.path not in ("/v2/bot/message/reply", "/v2/bot/message/push"):
+                    self._send_json(404, {"message": "Not found"})
+                    return
+
+                if stub._delay_and_fail():
+                    stub._record("error")
+                    self._send_json(500, {"message": "Injected error"})
+                    return
+
+                try:
+                    payload = json.loads(raw or b"{}")
+                except ValueError:
+                    self._send_json(400, {"message": "Invalid JSON"})
+                    return
+                stub._record(self.path.rsplit("/", 1)[-1], payload)
+                self._send_json(200, {})
+
+            def do_GET(self):
+                content = _CONTENT_PATH.match(self.path)
+                profile = _PROFILE_PATH.match(self.path)
+                if not content and not profile:
+                    self._send_json(404, {"message": "Not found"})
+                    return
+
+                if stub._delay_and_fail():
+                    stub._record("error")
+                    self._send_json(500, {"message": "Injected error"})
+                    return
+
+                if content:
+                    stub._record("content", {"message_id": content.group(1)})
+                    self._send(200, FAKE_IMAGE, "image/jpeg")
+                else:
+                    user_id = profile.group(1)
+                    stub._record("profile", {"user_id": user_id})
+                    self._send_json(200, {
+                        "userId": user_id,
+                        "displayName": f"Staff {user_id[-4:]}",
+                        "pictureUrl": "",
+                        "statusMessage": ""
+                    })
+
+        return Handler
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="เซิร์ฟเวอร์จำลอง LINE Messaging API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    args = parser.parse_args(argv)
+
+    stub = LineStubServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"🤖 LINE stub พร้อมที่ {stub.url} (latency {args.latency_ms}±{args.jitter_ms} ms, "
+          f"error {args.error_rate:.1%})")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"สรุปคำขอ: {stub.counts}")
+
+
+if __name__ == "__main__":
+    main()
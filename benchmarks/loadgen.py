@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+ตัวสร้างโหลดสำหรับ /webhook ของ ATMO'decor
+
+ส่ง Webhook body ที่ลงลายเซ็นถูกต้อง (เริ่มต้นวัน, ข้อความออเดอร์, รูปภาพ,
+คำสั่ง /summary และ Postback) ไปที่แอปตามอัตรา RPS ที่กำหนด แล้วรายงาน
+latency p50/p95/p99 และ throughput
+
+การใช้งาน:
+    # รัน gunicorn + LINE stub ให้อัตโนมัติ (ตามค่าใน Dockerfile: 1 worker, 8 threads)
+    python -m benchmarks.loadgen --spawn --rps 50 --duration 30
+
+    # ยิงไปที่แอปที่รันอยู่แล้ว (ต้องชี้ LINE_API_ENDPOINT ไปที่ benchmarks.line_stub)
+    python -m benchmarks.loadgen --url http://127.0.0.1:8080 --secret <channel secret>
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks import webhook_events
+from benchmarks.line_stub import LineStubServer
+from benchmarks.order_generator import generate_order
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+DEFAULT_MIX = {"text": 70, "image": 15, "summary": 10, "postback": 5}
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class LoadGenerator:
+    """คลาสสำหรับยิง Webhook ที่ลงลายเซ็นแล้วไปที่แอป"""
+
+    def __init__(self, url: str, channel_secret: str, users: int = 50, seed: int = 42):
+        """
+        สร้าง instance ของ LoadGenerator
+
+        Args:
+            url: URL ของแอป (เช่น http://127.0.0.1:8080)
+            channel_secret: LINE Channel Secret ที่แอปใช้ตรวจลายเซ็น
+            users: จำนวนผู้ใช้จำลองที่ส่งออเดอร์
+            seed: seed ของตัวสุ่ม
+        """
+        self.url = url.rstrip("/")
+        self.channel_secret = channel_secret
+        self.user_ids = [f"Uload{i:028d}" for i in range(users)]
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def post(self, body: str) -> Tuple[int, float]:
+        """ส่ง body หนึ่งรายการ คืนค่า (status code, latency ms)"""
+        headers = {
+            "Content-Type": "application/json",
+            "X-Line-Signature": webhook_events.sign_body(self.channel_secret, body),
+        }
+        started = time.perf_counter()
+        try:
+            status = self._session().post(f"{self.url}/webhook", data=body.encode("utf-8"),
+                                          headers=headers, timeout=30).status_code
+        except requests.RequestException:
+            status = 0
+        return status, (time.perf_counter() - started) * 1000
+
+    def start_day(self, day: str):
+        """ส่งโฟลว์เริ่มต้นวันตามลำดับ"""
+        for body in webhook_events.start_of_day_flow("Uloadadmin", day, ["Oil", "Fang"]):
+            self.post(body)
+
+    def wait_for_drain(self, timeout: float = 120) -> Optional[float]:
+        """รอจนคิวของแอปว่าง (ดูจาก /stats) คืนค่าเวลาที่ใช้เป็นวินาที"""
+        started = time.perf_counter()
+        while time.perf_counter() - started < timeout:
+            try:
+                if requests.get(f"{self.url}/stats", timeout=5).json().get("queue_size", 0) == 0:
+                    return time.perf_counter() - started
+            except (requests.RequestException, ValueError):
+                pass
+            time.sleep(0.1)
+        return None
+
+    def _bodies_for(self, kind: str, day: str) -> List[str]:
+        with self._random_lock:
+            user_id = self._random.choice(self.user_ids)
+            order = generate_order(self._random)
+        if kind == "text":
+            return [webhook_events.build_body([webhook_events.text_event(user_id, order["text"])])]
+        if kind == "image":
+            return [
+                webhook_events.build_body([webhook_events.image_event(user_id)]),
+                webhook_events.build_body([webhook_events.text_event(user_id, order["text"])]),
+            ]
+        if kind == "summary":
+            return [webhook_events.build_body([webhook_events.text_event(user_id, "/summary")])]
+        postback_user = f"Upostback{user_id[-8:]}"
+        return [webhook_events.build_body([webhook_events.date_postback_event(postback_user, day)])]
+
+    def run(self, rps: float, duration: float, concurrency: int, mix: Dict[str, int], day: str) -> Dict:
+        """
+        ยิงโหลดแบบ open-loop ตามอัตราที่กำหนด
+
+        latency นับจากเวลาที่ควรส่งตามกำหนดการ (รวมเวลารอคิวฝั่งผู้ส่ง)
+        เพื่อไม่ให้ค่าดูดีกว่าความจริงเมื่อแอปตอบช้า
+
+        Args:
+            rps: จำนวน flow ต่อวินาที
+            duration: ระยะเวลา (วินาที)
+            concurrency: จำนวน connection พร้อมกันสูงสุด
+            mix: สัดส่วนของแต่ละ flow
+            day: วันที่ที่ใช้ใน Postback
+
+        Returns:
+            รายงานผล
+        """
+        kinds = list(mix)
+        weights = [mix[kind] for kind in kinds]
+        results: List[Tuple[str, int, float]] = []
+        results_lock = threading.Lock()
+
+        def send(kind: str, scheduled_at: float):
+            for body in self._bodies_for(kind, day):
+                status, _ = self.post(body)
+                latency_ms = (time.perf_counter() - scheduled_at) * 1000
+                with results_lock:
+                    results.append((kind, status, latency_ms))
+                scheduled_at = time.perf_counter()
+
+        total = int(rps * duration)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for i in range(total):
+                scheduled_at = started + i / rps
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                with self._random_lock:
+                    kind = self._random.choices(kinds, weights=weights)[0]
+                pool.submit(send, kind, scheduled_at)
+        elapsed = time.perf_counter() - started
+
+        return self._report(results, elapsed, rps)
+
+    @staticmethod
+    def _report(results: List[Tuple[str, int, float]], elapsed: float, target_rps: float) -> Dict:
+        ok_latencies = [latency for _, status, latency in results if status == 200]
+        statuses: Dict[str, int] = {}
+        for _, status, _ in results:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+        by_kind = {}
+        for kind in sorted({kind for kind, _, _ in results}):
+            latencies = [latency for k, status, latency in results if k == kind and status == 200]
+            by_kind[kind] = {
+                "requests": sum(1 for k, _, _ in results if k == kind),
+                "p50_ms": _percentile(latencies, 50),
+                "p95_ms": _percentile(latencies, 95),
+            }
+
+        return {
+            "target_rps": target_rps,
+            "requests": len(results),
+            "elapsed_s": elapsed,
+            "throughput_rps": len(results) / elapsed if elapsed else 0,
+            "statuses": statuses,
+            "p50_ms": _percentile(ok_latencies, 50),
+            "p95_ms": _percentile(ok_latencies, 95),
+            "p99_ms": _percentile(ok_latencies, 99),
+            "max_ms": max(ok_latencies) if ok_latencies else 0,
+            "by_kind": by_kind,
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_app(stub_url: str, channel_secret: str, workers: int, threads: int, data_dir: str,
+              extra_env: Optional[Dict[str, str]] = None) -> Tuple[subprocess.Popen, str]:
+    """
+    รันแอปด้วย gunicorn (ค่าเดียวกับ Dockerfile) โดยชี้ LINE API ไปที่ stub
+
+    Returns:
+        (process, URL ของแอป)
+    """
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        "LINE_CHANNEL_ACCESS_TOKEN": "loadtest-token",
+        "LINE_CHANNEL_SECRET": channel_secret,
+        "LINE_API_ENDPOINT": stub_url,
+        "LINE_API_DATA_ENDPOINT": stub_url,
+        "PYTHONWARNINGS": "ignore",
+    })
+    env.update(extra_env or {})
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn",
+            "--bind", f"127.0.0.1:{port}",
+            "--workers", str(workers),
+            "--threads", str(threads),
+            "--timeout", "0",
+            "--chdir", data_dir,
+            "--pythonpath", REPO_ROOT,
+            "--log-level", "warning",
+            "app:app",
+        ],
+        env=env,
+    )
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/healthz", timeout=1).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn ไม่พร้อมภายใน 30 วินาที")
+
+
+def _print_report(report: Dict):
+    print("\n" + "=" * 60)
+    print("📊 ผลการทดสอบโหลด")
+    print("=" * 60)
+    print(f"• คำขอทั้งหมด: {report['requests']:,} ({report['throughput_rps']:.1f} req/s, "
+          f"เป้าหมาย {report['target_rps']:.1f} flow/s)")
+    print(f"• สถานะ: {report['statuses']}")
+    print(f"• Latency: p50 {report['p50_ms']:.1f} ms | p95 {report['p95_ms']:.1f} ms | "
+          f"p99 {report['p99_ms']:.1f} ms | max {report['max_ms']:.1f} ms")
+    for kind, stats in report["by_kind"].items():
+        print(f"  - {kind:<8} {stats['requests']:>6} req  p50 {stats['p50_ms']:.1f} ms  p95 {stats['p95_ms']:.1f} ms")
+    if report.get("drain_s") is not None:
+        print(f"• เวลาที่ worker ใช้เคลียร์คิวหลังจบโหลด: {report['drain_s']:.2f} s")
+    if report.get("line_stub"):
+        print(f"• คำขอที่ LINE stub ได้รับ: {report['line_stub']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ทดสอบโหลด /webhook ด้วย Webhook ที่ลงลายเซ็นแล้ว")
+    parser.add_argument("--url", help="URL ของแอปที่รันอยู่แล้ว")
+    parser.add_argument("--secret", default="loadtest-secret", help="LINE Channel Secret ของแอป")
+    parser.add_argument("--spawn", action="store_true", help="รัน gunicorn และ LINE stub ให้อัตโนมัติ")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers (เมื่อใช้ --spawn)")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads (เมื่อใช้ --spawn)")
+    parser.add_argument("--stub-latency-ms", type=float, default=50)
+    parser.add_argument("--stub-jitter-ms", type=float, default=20)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--mix", default=json.dumps(DEFAULT_MIX), help="สัดส่วน flow (JSON)")
+    parser.add_argument("--output", help="บันทึกรายงานเป็นไฟล์ JSON")
+    args = parser.parse_args(argv)
+
+    if not args.url and not args.spawn:
+        parser.error("ต้องระบุ --url หรือ --spawn")
+
+    stub = process = data_dir = None
+    url = args.url
+    try:
+        if args.spawn:
+            stub = LineStubServer(latency_ms=args.stub_latency_ms, jitter_ms=args.stub_jitter_ms,
+                                  error_rate=args.stub_error_rate).start()
+            data_dir = tempfile.mkdtemp(prefix="atmo_load_")
+            process, url = spawn_app(stub.url, args.secret, args.workers, args.threads, data_dir)
+            print(f"🚀 gunicorn {args.workers} worker × {args.threads} threads ที่ {url}, LINE stub ที่ {stub.url}")
+
+        generator = LoadGenerator(url, args.secret, users=args.users)
+        day = date.today().isoformat()
+        generator.start_day(day)
+        generator.wait_for_drain()
+
+        print(f"🔥 ยิงโหลด {args.rps} flow/s เป็นเวลา {args.duration} s ...")
+        report = generator.run(args.rps, args.duration, args.concurrency, json.loads(args.mix), day)
+        report["drain_s"] = generator.wait_for_drain()
+        if stub:
+            report["line_stub"] = dict(stub.counts)
+
+        _print_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return 0
+    finally:
+        if process:
+            process.terminate()
+            process.wait(10)
+        if stub:
+            stub.stop()
+        if data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+ตัวสร้างข้อความออเดอร์จำลองสำหรับ benchmark ATMO'decor
+
+สร้างข้อความออเดอร์ที่ใกล้เคียงของจริงในกลุ่ม LINE: ชื่อสินค้าไทย/อังกฤษ
+ที่มีคำสำคัญจาก commission_calculator, ยอดเงินแบบมีคอมม่า และเวลาที่กระจาย
+ครอบคลุมช่วง OT (18:00-22:00, 22:00-00:00) รวมถึงหลังเที่ยงคืน
+"""
+
+import random
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src import commission_calculator
+
+# (ชื่อสินค้า, ช่วงราคา) แยกตามประเภทคอมมิชชั่น
+PRODUCTS: Dict[str, List[Tuple[str, Tuple[int, int]]]] = {
+    "faland": [
+        ("แจกัน{kw} สีขาว", (4500, 18000)),
+        ("{kw} vase ทรงสูง สีครีม", (4500, 22000)),
+    ],
+    "ikebana_curve": [
+        ("{kw} สีเขียวมะกอก", (6000, 15000)),
+        ("Ikebana {kw} ใบเล็ก", (5000, 9000)),
+    ],
+    "flower_only": [
+        ("{kw} ทิวลิปชมพู", (5000, 20000)),
+        ("{kw} กุหลาบแดง 30 ดอก", (8000, 25000)),
+    ],
+    "perfume": [
+        ("{kw} Rose 50ml", (1200, 4500)),
+        ("{kw} Oud Wood", (1500, 6000)),
+    ],
+    "mini_vase": [
+        ("{kw}ทิวลิปส้ม", (1500, 4000)),
+        ("{kw} ดอกเดซี่", (1200, 3500)),
+    ],
+    "vase": [
+        ("{kw}ดอกไม้ เซรามิก", (3000, 15000)),
+        ("{kw} ทรงกลม สีน้ำเงิน", (3500, 12000)),
+    ],
+    "plain": [
+        ("ช่อดอกกุหลาบ pastel", (1500, 8000)),
+        ("Bouquet white lily", (2000, 9000)),
+        ("พวงหรีดดอกไม้สด", (2500, 7000)),
+    ],
+}
+
+KEYWORDS = {
+    "faland": commission_calculator.FALAND_KEYWORDS,
+    "ikebana_curve": ["Curve", "curve"],
+    "flower_only": commission_calculator.FLOWER_ONLY_KEYWORDS,
+    "perfume": commission_calculator.PERFUME_KEYWORDS,
+    "mini_vase": commission_calculator.MINI_VASE_KEYWORDS,
+    "vase": commission_calculator.VASE_KEYWORDS,
+    "plain": [""],
+}
+
+CATEGORY_WEIGHTS = {
+    "faland": 12,
+    "ikebana_curve": 8,
+    "flower_only": 10,
+    "perfume": 8,
+    "mini_vase": 12,
+    "vase": 25,
+    "plain": 25,
+}
+
+# (ชั่วโมงเริ่ม, ชั่วโมงสิ้นสุด, น้ำหนัก) ครอบคลุมช่วง OT และหลังเที่ยงคืน
+TIME_WINDOWS = [
+    (10, 18, 50),
+    (18, 22, 30),
+    (22, 24, 15),
+    (0, 2, 5),
+]
+
+CUSTOMERS = ["สลิลเกตน์ โลกะวิทย์", "ทดสอบ ระบบ", "Anna Smith", "ปิยะพร ใจดี", "Somchai K."]
+ADDRESSES = [
+    "2882/660 คอนโดศุภาลัยปาร์ค เอกมัย-ทองหล่อ\nกทม. 10310",
+    "99/1 ถนนสุขุมวิท แขวงคลองตัน\nกทม. 10110",
+    "15 หมู่ 3 ตำบลบางพูด\nนนทบุรี 11120",
+]
+
+
+def _pick_weighted(rng: random.Random, weights: Dict[str, int]) -> str:
+    keys = list(weights)
+    return rng.choices(keys, weights=[weights[key] for key in keys])[0]
+
+
+def _random_time(rng: random.Random) -> str:
+    start, end, _ = rng.choices(TIME_WINDOWS, weights=[w[2] for w in TIME_WINDOWS])[0]
+    return f"{rng.randrange(start, end):02d}:{rng.randrange(60):02d}"
+
+
+def generate_order(rng: random.Random, index: int = 1) -> Dict:
+    """
+    สร้างข้อความออเดอร์จำลองหนึ่งรายการ
+
+    Args:
+        rng: ตัวสุ่ม (ใช้ seed เดิมจะได้ผลลัพธ์เดิม)
+        index: ลำดับออเดอร์ในข้อความ
+
+    Returns:
+        Dictionary ที่มี text, product_name, amount, time, category
+    """
+    category = _pick_weighted(rng, CATEGORY_WEIGHTS)
+    template, (low, high) = rng.choice(PRODUCTS[category])
+    product = template.format(kw=rng.choice(KEYWORDS[category])).strip()
+    amount = rng.randrange(low, high, 50)
+    time = _random_time(rng)
+    quantity = rng.choice([1, 1, 1, 2])
+
+    product_name = f"{index}. {product} {quantity}"
+    lines = [product_name]
+
+    # บางออเดอร์มีแจกันหลายรายการ (ใช้ทดสอบ Add on 2vases)
+    if category in ("vase", "faland") and rng.random() < 0.3:
+        lines.append(f"{index + 1}. แจกันใบเล็ก 1")
+
+    amount_format = rng.random()
+    if amount_format < 0.6:
+        lines.append(f"{amount:,} บาท {time} bay {rng.randrange(1, 29):02d}/{rng.randrange(1, 13):02d}")
+    elif amount_format < 0.85:
+        lines.append(f"ยอด {amount:,} บาท เวลา {time}")
+    else:
+        lines.append(f"ราคา {amount:,}")
+        lines.append(f"เวลา {time.replace(':', '.')}")
+
+    lines.append(f"คุณ {rng.choice(CUSTOMERS)}")
+    lines.append(rng.choice(ADDRESSES))
+    lines.append(f"โทร. 08{rng.randrange(10000000, 99999999)}")
+
+    return {
+        "text": "\n".join(lines),
+        "product_name": product_name,
+        "amount": float(amount),
+        "time": time,
+        "category": category,
+    }
+
+
+def generate_orders(count: int, seed: Optional[int] = 42) -> Iterator[Dict]:
+    """
+    สร้างข้อความออเดอร์จำลองหลายรายการ
+
+    Args:
+        count: จำนวนออเดอร์
+        seed: seed ของตัวสุ่ม
+
+    Returns:
+        iterator ของออเดอร์ (ดู generate_order)
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield generate_order(rng, rng.randrange(1, 5))
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+ตัวสร้าง Webhook body ของ LINE พร้อมลายเซ็น X-Line-Signature
+
+ใช้สร้างคำขอที่เหมือนของจริงสำหรับทดสอบโหลดและ replay
+"""
+
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import time
+import uuid
+from typing import Dict, List
+
+_message_ids = itertools.count(100000000000)
+
+
+def sign_body(channel_secret: str, body: str) -> str:
+    """
+    สร้างลายเซ็น X-Line-Signature ของ body
+
+    Args:
+        channel_secret: LINE Channel Secret
+        body: Webhook request body
+
+    Returns:
+        ลายเซ็นแบบ base64
+    """
+    digest = hmac.new(channel_secret.encode("utf-8"), body.encode("utf-8"), hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("utf-8")
+
+
+def _base_event(event_type: str, user_id: str) -> Dict:
+    return {
+        "type": event_type,
+        "mode": "active",
+        "timestamp": int(time.time() * 1000),
+        "source": {"type": "user", "userId": user_id},
+        "replyToken": uuid.uuid4().hex,
+        "webhookEventId": uuid.uuid4().hex.upper()[:26],
+        "deliveryContext": {"isRedelivery": False},
+    }
+
+
+def text_event(user_id: str, text: str) -> Dict:
+    """เหตุการณ์ข้อความ"""
+    event = _base_event("message", user_id)
+    event["message"] = {
+        "type": "text",
+        "id": str(next(_message_ids)),
+        "quoteToken": uuid.uuid4().hex,
+        "text": text,
+    }
+    return event
+
+
+def image_event(user_id: str) -> Dict:
+    """เหตุการณ์รูปภาพ"""
+    event = _base_event("message", user_id)
+    event["message"] = {
+        "type": "image",
+        "id": str(next(_message_ids)),
+        "quoteToken": uuid.uuid4().hex,
+        "contentProvider": {"type": "line"},
+    }
+    return event
+
+
+def date_postback_event(user_id: str, date: str) -> Dict:
+    """เหตุการณ์ Postback จาก Date Picker (/start)"""
+    event = _base_event("postback", user_id)
+    event["postback"] = {"data": "action=select_date", "params": {"date": date}}
+    return event
+
+
+def build_body(events: List[Dict], destination: str = "Uloadtest") -> str:
+    """สร้าง Webhook body จากรายการเหตุการณ์"""
+    return json.dumps({"destination": destination, "events": events}, ensure_ascii=False)
+
+
+def start_of_day_flow(user_id: str, date: str, staff_names: List[str]) -> List[str]:
+    """
+    ลำดับ body สำหรับเริ่มต้นวัน: /start → เลือกวันที่ → จำนวนคน → ชื่อ
+
+    Returns:
+        รายการ Webhook body ที่ต้องส่งตามลำดับ
+    """
+    return [
+        build_body([text_event(user_id, "/start")]),
+        build_body([date_postback_event(user_id, date)]),
+        build_body([text_event(user_id, str(len(staff_names)))]),
+        build_body([text_event(user_id, ", ".join(staff_names))]),
+    ]
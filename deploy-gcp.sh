@@ -90,6 +90,7 @@ gcloud run deploy $SERVICE_NAME \
   --platform managed \
   --memory $MEMORY \
   --cpu $CPU \
+  --no-cpu-throttling \
   --timeout $TIMEOUT \
   --concurrency $CONCURRENCY \
   --min-instances $MIN_INSTANCES \
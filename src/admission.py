@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลควบคุมการรับ Webhook (Admission Control) ATMO'decor
+
+ป้องกันไม่ให้ระบบค้างเมื่อมีข้อความเข้ามาพร้อมกันจำนวนมาก:
+- จำกัดจำนวนคำขอที่กำลังประมวลผลพร้อมกัน (in-flight)
+- ปฏิเสธด้วย 503 + Retry-After เมื่อคิวเกิน high-water mark
+- จำกัดอัตราต่อผู้ใช้ด้วย token bucket เพื่อไม่ให้แชทเดียวแย่งทรัพยากรทั้งหมด
+  คำขอที่มีหลายผู้ใช้จะเลื่อนเฉพาะเหตุการณ์ของผู้ใช้ที่เกินอัตราไปประมวลผลภายหลัง
+  (จอง token ล่วงหน้า เหตุการณ์จึงไม่หายและยังเรียงตามลำดับ) ผู้ใช้อื่นไม่ต้องรอ
+  และปฏิเสธทั้งคำขอเมื่อทุกผู้ใช้ในคำขอเกินอัตรา หรือต้องรอนานเกิน max_defer
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# เหตุผลที่ปฏิเสธคำขอ
+SHED_IN_FLIGHT = "in_flight"
+SHED_QUEUE_FULL = "queue_full"
+SHED_USER_RATE = "user_rate"
+
+
+class TokenBucket:
+    """Token bucket สำหรับจำกัดอัตราคำขอ"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        """
+        สร้าง instance ของ TokenBucket
+
+        Args:
+            rate: จำนวน token ที่เติมต่อวินาที
+            capacity: จำนวน token สูงสุด (burst)
+            now: เวลาปัจจุบัน (time.monotonic)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def available(self, now: float, tokens: float = 1) -> bool:
+        """เติม token ตามเวลาที่ผ่านไป แล้วตรวจว่ามีพอหรือไม่ (ยังไม่ใช้ token)"""
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+        return self.tokens >= tokens
+
+    def try_acquire(self, now: float, tokens: float = 1) -> bool:
+        """ใช้ token ถ้ามีพอ คืนค่า False ถ้าเกินอัตรา"""
+        if self.available(now, tokens):
+            self.tokens -= tokens
+            return True
+        return False
+
+    def wait_time(self, now: float, tokens: float = 1) -> float:
+        """เวลา (วินาที) ที่ต้องรอจนมี token พอ"""
+        if self.available(now, tokens):
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (tokens - self.tokens) / self.rate
+
+    def reserve(self, now: float, tokens: float = 1) -> float:
+        """
+        จอง token ล่วงหน้า (ยอมให้ติดลบ) แล้วคืนเวลาที่ต้องรอจนถึงคิวของ token ที่จองไว้
+
+        การจองครั้งถัดไปจะได้เวลารอที่นานขึ้น เหตุการณ์ที่เลื่อนไว้จึงยังเรียงตามลำดับเดิม
+        """
+        wait = self.wait_time(now, tokens)
+        self.tokens -= tokens
+        return wait
+
+
+def sign_body(channel_secret: str, body: str) -> str:
+    """
+    สร้างลายเซ็น X-Line-Signature ของ body (ใช้กับ body ที่ตัดเหตุการณ์ออกแล้ว)
+
+    Args:
+        channel_secret: LINE Channel Secret
+        body: Webhook request body
+
+    Returns:
+        ลายเซ็นแบบ base64
+    """
+    digest = hmac.new(channel_secret.encode('utf-8'), body.encode('utf-8'), hashlib.sha256).digest()
+    return base64.b64encode(digest).decode('utf-8')
+
+
+def validate_signature(channel_secret: str, body: str, signature: str) -> bool:
+    """
+    ตรวจลายเซ็น X-Line-Signature (HMAC-SHA256 แบบเดียวกับ LINE SDK)
+
+    ไม่ต้อง import LINE SDK จึงตรวจได้ตั้งแต่คำขอแรกหลังเริ่มระบบ
+
+    Args:
+        channel_secret: LINE Channel Secret
+        body: Webhook request body
+        signature: ค่าใน header X-Line-Signature
+
+    Returns:
+        True ถ้าลายเซ็นถูกต้อง
+    """
+    return hmac.compare_digest(signature.encode('utf-8'), sign_body(channel_secret, body).encode('utf-8'))
+
+
+def parse_events(body: str) -> List[Dict]:
+    """
+    แยกรายการเหตุการณ์จาก Webhook body (JSON)
+
+    Args:
+        body: Webhook request body
+
+    Returns:
+        รายการเหตุการณ์ หรือรายการว่างถ้า body ไม่ถูกต้อง
+    """
+    try:
+        events = json.loads(body).get("events", [])
+    except (ValueError, AttributeError):
+        return []
+    return events if isinstance(events, list) else []
+
+
+def extract_user_ids(events: List[Dict]) -> List[str]:
+    """
+    ดึง user id ที่ไม่ซ้ำกันจากรายการเหตุการณ์
+
+    Args:
+        events: รายการเหตุการณ์จาก parse_events()
+
+    Returns:
+        รายการ user id ที่ไม่ซ้ำกัน
+    """
+    user_ids = []
+    for event in events:
+        user_id = (event.get("source") or {}).get("userId")
+        if user_id and user_id not in user_ids:
+            user_ids.append(user_id)
+    return user_ids
+
+
+def split_user_events(body: str, user_ids: List[str]) -> Tuple[str, str, int]:
+    """
+    แยกเหตุการณ์ของผู้ใช้ที่ระบุออกจาก Webhook body เป็นอีก body หนึ่ง
+
+    Args:
+        body: Webhook request body
+        user_ids: user id ที่ต้องแยกเหตุการณ์ออก
+
+    Returns:
+        (body ที่เหลือ, body ของเหตุการณ์ที่แยกออก, จำนวนเหตุการณ์ที่แยกออก)
+    """
+    payload = json.loads(body)
+    kept, moved = [], []
+    for event in payload.get("events", []):
+        (moved if (event.get("source") or {}).get("userId") in user_ids else kept).append(event)
+    return (
+        json.dumps(dict(payload, events=kept), ensure_ascii=False),
+        json.dumps(dict(payload, events=moved), ensure_ascii=False),
+        len(moved)
+    )
+
+
+class AdmissionController:
+    """คลาสสำหรับตัดสินใจรับหรือปฏิเสธคำขอ Webhook"""
+
+    def __init__(
+        self,
+        max_in_flight: int = 32,
+        queue_high_water: int = 200,
+        user_rate: float = 2.0,
+        user_burst: float = 10,
+        retry_after: int = 5,
+        max_tracked_users: int = 10000,
+        max_defer: float = 30
+    ):
+        """
+        สร้าง instance ของ AdmissionController
+
+        Args:
+            max_in_flight: จำนวนคำขอที่ประมวลผลพร้อมกันได้สูงสุด
+            queue_high_water: ขนาดคิวที่เริ่มปฏิเสธคำขอใหม่
+            user_rate: จำนวนข้อความต่อวินาทีต่อผู้ใช้
+            user_burst: จำนวนข้อความที่ส่งติดกันได้ต่อผู้ใช้
+            retry_after: ค่า Retry-After (วินาที) ที่ส่งกลับเมื่อปฏิเสธ
+            max_tracked_users: จำนวน token bucket สูงสุดที่เก็บไว้
+            max_defer: เวลารอสูงสุด (วินาที) ที่เลื่อนเหตุการณ์ของผู้ใช้ที่เกินอัตราได้
+        """
+        self.max_in_flight = max_in_flight
+        self.queue_high_water = queue_high_water
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.retry_after = retry_after
+        self.max_tracked_users = max_tracked_users
+        self.max_defer = max_defer
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._counters = {
+            "admitted": 0,
+            "shed_" + SHED_IN_FLIGHT: 0,
+            "shed_" + SHED_QUEUE_FULL: 0,
+            "shed_" + SHED_USER_RATE: 0,
+            "deferred_users": 0,
+        }
+
+    def try_enter(self) -> bool:
+        """จองที่สำหรับคำขอหนึ่งรายการ คืนค่า False ถ้าเต็ม"""
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self._counters["shed_" + SHED_IN_FLIGHT] += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def leave(self):
+        """คืนที่หลังประมวลผลคำขอเสร็จ"""
+        with self._lock:
+            self._in_flight -= 1
+
+    def check(self, queue_size: int, user_ids: List[str]) -> Tuple[Optional[str], Dict[str, float]]:
+        """
+        ตรวจสอบว่ารับคำขอนี้ได้หรือไม่
+
+        ตรวจ token bucket ของทุกผู้ใช้ก่อนใช้ token ใด ๆ ผู้ใช้ที่เกินอัตราจึงไม่ทำให้
+        ผู้ใช้อื่นในคำขอเดียวกันเสีย token หรือถูกปฏิเสธไปด้วย
+
+        Args:
+            queue_size: จำนวนเหตุการณ์ที่รออยู่ในคิว
+            user_ids: user id ของเหตุการณ์ในคำขอ
+
+        Returns:
+            (เหตุผลที่ปฏิเสธทั้งคำขอ หรือ None ถ้ารับได้,
+             {user id ที่เกินอัตรา: วินาทีที่ต้องเลื่อนเหตุการณ์ของผู้ใช้นั้น})
+        """
+        with self._lock:
+            if queue_size >= self.queue_high_water:
+                self._counters["shed_" + SHED_QUEUE_FULL] += 1
+                return SHED_QUEUE_FULL, {}
+
+            now = time.monotonic()
+            buckets = [(user_id, self._bucket(user_id, now)) for user_id in user_ids]
+            waits = {user_id: bucket.wait_time(now) for user_id, bucket in buckets}
+            limited = [user_id for user_id, wait in waits.items() if wait > 0]
+            if limited and (len(limited) == len(buckets)
+                            or max(waits[user_id] for user_id in limited) > self.max_defer):
+                # ยังไม่ได้รับเหตุการณ์ใดไว้ จึงให้ LINE ส่งซ้ำภายหลัง
+                self._counters["shed_" + SHED_USER_RATE] += 1
+                return SHED_USER_RATE, {}
+
+            deferred = {}
+            for user_id, bucket in buckets:
+                if user_id in limited:
+                    deferred[user_id] = bucket.reserve(now)
+                else:
+                    bucket.try_acquire(now)
+            self._counters["admitted"] += 1
+            self._counters["deferred_users"] += len(deferred)
+            return None, deferred
+
+    def _bucket(self, user_id: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(self.user_rate, self.user_burst, now)
+            self._buckets[user_id] = bucket
+            if len(self._buckets) > self.max_tracked_users:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(user_id)
+        return bucket
+
+    def stats(self) -> Dict:
+        """ดึงสถิติการรับ/ปฏิเสธคำขอ"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = self._in_flight
+            stats["tracked_users"] = len(self._buckets)
+        stats["shed_total"] = sum(value for key, value in stats.items() if key.startswith("shed_"))
+        return stats
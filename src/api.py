@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลช่วยของ Read API ATMO'decor (/api/*)
+
+- ResponseCache: เก็บ body ของ response ที่ serialize แล้วตามเวอร์ชันของ snapshot
+  เมื่อบันทึกข้อมูล (เวอร์ชันเปลี่ยน) cache ทั้งหมดถูกล้างในคำขอถัดไป
+- order_page: แบ่งหน้าออเดอร์ด้วย cursor (ตำแหน่งในวัน) แทนการส่งทั้งรายการ
+  ออเดอร์เพิ่มต่อท้ายเท่านั้น (ยกเลิก = ทำเครื่องหมาย) cursor จึงไม่เลื่อนเมื่อมีออเดอร์ใหม่
+"""
+
+import base64
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class ResponseCache:
+    """cache ของ response body (bytes) สำหรับเวอร์ชันข้อมูลล่าสุดเท่านั้น"""
+
+    def __init__(self, max_entries: int = 128):
+        """
+        สร้าง instance ของ ResponseCache
+
+        Args:
+            max_entries: จำนวน response สูงสุด (เกินแล้วลบรายการที่ใช้นานที่สุด)
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, version: int):
+        # เวอร์ชันใหม่ = มีการบันทึกข้อมูล response เดิมทั้งหมดใช้ไม่ได้แล้ว
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version: int) -> Optional[bytes]:
+        """
+        body ที่เก็บไว้ของ key ณ เวอร์ชันนี้
+
+        Args:
+            key: คีย์ของ response (เช่น path และ query string)
+            version: เวอร์ชันของ snapshot ปัจจุบัน
+
+        Returns:
+            body หรือ None ถ้าไม่มี
+        """
+        with self._lock:
+            if version != self._version:
+                self.misses += 1
+                return None
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Hashable, version: int, body: bytes):
+        """เก็บ body ของ key (ไม่เก็บถ้ามีเวอร์ชันที่ใหม่กว่าแล้ว)"""
+        with self._lock:
+            if self._version is not None and version < self._version:
+                return
+            self._check_version(version)
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """สถิติของ cache"""
+        with self._lock:
+            return {"entries": len(self._entries), "version": self._version, "hits": self.hits, "misses": self.misses}
+
+
+def encode_cursor(date: Optional[str], position: int) -> str:
+    """สร้าง cursor จากวันที่และตำแหน่งออเดอร์"""
+    raw = f"{date or ''}:{position}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    แยก cursor เป็นวันที่และตำแหน่ง
+
+    Raises:
+        ValueError: ถ้า cursor ไม่ถูกต้อง
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode('utf-8')
+        date, _, position = raw.rpartition(":")
+        position = int(position)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("cursor ไม่ถูกต้อง") from e
+    if position < 0:
+        raise ValueError("cursor ไม่ถูกต้อง")
+    return date, position
+
+
+def order_page(orders: Sequence, date: Optional[str], cursor: Optional[str], limit: int) -> Dict:
+    """
+    ออเดอร์หนึ่งหน้า
+
+    Args:
+        orders: OrderBook ของวัน
+        date: วันที่ของข้อมูลปัจจุบัน
+        cursor: cursor จากหน้าก่อน (None = หน้าแรก)
+        limit: จำนวนออเดอร์ต่อหน้า (1..MAX_PAGE_SIZE)
+
+    Returns:
+        {"date", "orders", "next_cursor", "has_more"} เมื่อ has_more เป็น False
+        ใช้ next_cursor เดิมเพื่อรับเฉพาะออเดอร์ใหม่ในภายหลังได้
+
+    Raises:
+        ValueError: ถ้า cursor ไม่ถูกต้องหรือเป็นของวันอื่น
+    """
+    start = 0
+    if cursor:
+        cursor_date, start = decode_cursor(cursor)
+        if cursor_date != (date or ""):
+            raise ValueError("cursor เป็นของวันอื่น กรุณาเริ่มจากหน้าแรก")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    end = min(start + limit, len(orders))
+    return {
+        "date": date,
+        "orders": [order.to_dict() for order in orders[start:end]],
+        "next_cursor": encode_cursor(date, max(start, end)),
+        "has_more": end < len(orders),
+    }
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูล audit log ATMO'decor
+
+- ทุกการเปลี่ยนสถานะ (เพิ่ม/แก้ไข/ยกเลิก/ย้อนออเดอร์ เริ่มวัน รีเซ็ต) ถูกต่อท้ายเป็นเหตุการณ์
+  ในไฟล์ JSON Lines รายเดือน (audit_YYYY-MM.jsonl) พร้อมผู้ส่ง รหัสข้อความ LINE
+  ฟิลด์ที่แยกได้ คอมมิชชั่นที่คำนวณ และเวอร์ชันของกฎคอมมิชชั่น
+- แต่ละรายการเก็บ hash ของรายการก่อนหน้า (prev) และ hash ของตัวเอง
+  การแก้ไข ลบ หรือสลับรายการใดๆ ทำให้ chain ขาดตั้งแต่จุดนั้น
+- verify แบ่งไฟล์เป็นช่วง byte ตามขอบบรรทัดแล้วตรวจพร้อมกันหลาย process
+  จากนั้นต่อ chain ที่รอยต่อของแต่ละช่วง
+- index.tsv เก็บตำแหน่ง (ไฟล์, offset) ของเหตุการณ์ของแต่ละออเดอร์
+  /audit จึง seek ไปอ่านเฉพาะรายการของออเดอร์นั้นโดยไม่ต้องอ่านทั้ง log
+
+การใช้งาน CLI:
+    python -m src.audit verify data/audit
+    python -m src.audit verify data/audit --month 2026-01 --workers 4
+    python -m src.audit show data/audit 2026-01-10 12
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+GENESIS = "0" * 64
+INDEX_FILE = "index.tsv"
+
+# ขนาดของแต่ละช่วงที่ตรวจใน process หนึ่ง
+VERIFY_CHUNK_BYTES = 1024 * 1024
+
+
+def _canonical(entry: Dict) -> str:
+    """JSON รูปแบบเดียวที่ใช้ทั้งบันทึกและคำนวณ hash"""
+    return json.dumps(entry, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def entry_hash(entry: Dict) -> str:
+    """hash ของรายการ (ไม่รวมฟิลด์ hash)"""
+    body = {key: value for key, value in entry.items() if key != "hash"}
+    return hashlib.sha256(_canonical(body).encode('utf-8')).hexdigest()
+
+
+def _month_files(audit_dir: str, month: Optional[str] = None) -> List[str]:
+    if not os.path.isdir(audit_dir):
+        return []
+    names = sorted(
+        name for name in os.listdir(audit_dir)
+        if name.startswith("audit_") and name.endswith(".jsonl")
+    )
+    if month:
+        names = [name for name in names if name == f"audit_{month}.jsonl"]
+    return [os.path.join(audit_dir, name) for name in names]
+
+
+def _last_line(path: str) -> Optional[bytes]:
+    """บรรทัดสุดท้ายที่สมบูรณ์ของไฟล์ (อ่านจากท้ายไฟล์)"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        block = 4096
+        while True:
+            start = max(0, size - block)
+            f.seek(start)
+            data = f.read(size - start)
+            lines = data.rstrip(b"\n").split(b"\n")
+            if len(lines) > 1 or start == 0:
+                return lines[-1] or None
+            block *= 2
+
+
+class AuditLog:
+    """audit log แบบ hash chain ต่อท้ายอย่างเดียว"""
+
+    def __init__(self, audit_dir: str, clock: Callable[[], datetime] = datetime.now):
+        """
+        สร้าง instance ของ AuditLog (อ่านไฟล์เมื่อใช้ครั้งแรก ไม่ให้ช่วงเริ่มระบบต้องอ่านไฟล์)
+
+        Args:
+            audit_dir: โฟลเดอร์เก็บไฟล์ log
+            clock: ฟังก์ชันเวลาปัจจุบันสำหรับ ts และชื่อไฟล์รายเดือน
+        """
+        self.audit_dir = audit_dir
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._seq: Optional[int] = None
+        self._last_hash = GENESIS
+        # {(วันที่, รหัสออเดอร์): [(ไฟล์, offset)]} โหลดจาก index.tsv เมื่อค้นหาครั้งแรก
+        self._index: Optional[Dict[Tuple[str, int], List[Tuple[str, int]]]] = None
+
+    def _load_tail(self):
+        """ต่อ chain จากรายการสุดท้ายของไฟล์ล่าสุด"""
+        self._seq = 0
+        for path in reversed(_month_files(self.audit_dir)):
+            line = _last_line(path)
+            if line:
+                last = json.loads(line)
+                self._seq, self._last_hash = last["seq"], last["hash"]
+                return
+
+    def append(
+        self,
+        op: str,
+        date: Optional[str] = None,
+        order_id: Optional[int] = None,
+        user_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+        fields: Optional[Dict] = None,
+        commission: Optional[Dict] = None,
+        rule_version: Optional[str] = None
+    ) -> Dict:
+        """
+        ต่อท้ายเหตุการณ์หนึ่งรายการ
+
+        Args:
+            op: ชนิดเหตุการณ์ ("add", "edit", "void", "undo", "start_day", "reset")
+            date: วันที่ของข้อมูล (วันทำการ)
+            order_id: รหัสออเดอร์ (ถ้าเกี่ยวกับออเดอร์)
+            user_id: LINE user id ของผู้ส่ง
+            message_id: รหัสข้อความ LINE ที่ทำให้เกิดเหตุการณ์
+            fields: ฟิลด์ที่แยกจากข้อความหรือฟิลด์ที่เปลี่ยน
+            commission: คอมมิชชั่นที่คำนวณได้
+            rule_version: เวอร์ชันของกฎคอมมิชชั่น
+
+        Returns:
+            รายการที่บันทึก (รวม seq, prev และ hash)
+        """
+        now = self.clock()
+        with self._lock:
+            os.makedirs(self.audit_dir, exist_ok=True)
+            if self._seq is None:
+                self._load_tail()
+            entry = {
+                "seq": self._seq + 1,
+                "ts": now.isoformat(timespec="milliseconds"),
+                "date": date,
+                "op": op,
+                "order_id": order_id,
+                "user_id": user_id,
+                "message_id": message_id,
+                "fields": fields or {},
+                "commission": commission or {},
+                "rule_version": rule_version,
+                "prev": self._last_hash,
+            }
+            entry["hash"] = entry_hash(entry)
+
+            name = f"audit_{now.strftime('%Y-%m')}.jsonl"
+            with open(os.path.join(self.audit_dir, name), 'ab') as f:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write((_canonical(entry) + "\n").encode('utf-8'))
+            if order_id is not None:
+                with open(os.path.join(self.audit_dir, INDEX_FILE), 'a', encoding='utf-8') as f:
+                    f.write(f"{date}\t{order_id}\t{name}\t{offset}\n")
+                if self._index is not None:
+                    self._index.setdefault((date, order_id), []).append((name, offset))
+
+            self._seq, self._last_hash = entry["seq"], entry["hash"]
+            return entry
+
+    def _load_index(self):
+        index: Dict[Tuple[str, int], List[Tuple[str, int]]] = {}
+        path = os.path.join(self.audit_dir, INDEX_FILE)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 4:
+                        continue
+                    index.setdefault((parts[0], int(parts[1])), []).append((parts[2], int(parts[3])))
+        self._index = index
+
+    def history(self, date: Optional[str], order_id: int) -> List[Dict]:
+        """
+        เหตุการณ์ทั้งหมดของออเดอร์ตามลำดับ
+
+        Args:
+            date: วันที่ของออเดอร์
+            order_id: รหัสออเดอร์ (นับใหม่ทุกวัน)
+
+        Returns:
+            รายการเหตุการณ์
+        """
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            locations = list(self._index.get((str(date), order_id), ()))
+
+        entries = []
+        handles = {}
+        try:
+            for name, offset in locations:
+                if name not in handles:
+                    handles[name] = open(os.path.join(self.audit_dir, name), 'rb')
+                handles[name].seek(offset)
+                entries.append(json.loads(handles[name].readline()))
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return entries
+
+
+def _split(path: str, chunk_bytes: int) -> List[Tuple[str, int, int]]:
+    """แบ่งไฟล์เป็นช่วง byte ที่เริ่มต้นบรรทัดเสมอ"""
+    size = os.path.getsize(path)
+    ranges = []
+    start = 0
+    with open(path, 'rb') as f:
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            if f.tell() < size:
+                f.readline()
+            end = f.tell()
+            ranges.append((path, start, end))
+            start = end
+    return ranges
+
+
+def _verify_range(task: Tuple[str, int, int]) -> Dict:
+    """ตรวจ hash และ chain ภายในช่วงหนึ่ง (รันใน process แยก)"""
+    path, start, end = task
+    result = {"count": 0, "first_prev": None, "first_seq": None, "last_hash": None, "last_seq": None, "errors": []}
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            location = f"{os.path.basename(path)}@{offset}"
+            offset += len(line)
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                result["errors"].append(f"{location}: อ่านรายการไม่ได้")
+                continue
+            if entry.get("hash") != entry_hash(entry):
+                result["errors"].append(f"{location}: hash ไม่ตรง (seq {entry.get('seq')})")
+            if result["count"] == 0:
+                result["first_prev"], result["first_seq"] = entry.get("prev"), entry.get("seq")
+            else:
+                if entry.get("prev") != result["last_hash"]:
+                    result["errors"].append(f"{location}: chain ขาด (seq {entry.get('seq')})")
+                if entry.get("seq") != result["last_seq"] + 1:
+                    result["errors"].append(f"{location}: seq ไม่ต่อเนื่อง ({result['last_seq']} → {entry.get('seq')})")
+            result["last_hash"], result["last_seq"] = entry.get("hash"), entry.get("seq")
+            result["count"] += 1
+    return result
+
+
+def verify(
+    audit_dir: str,
+    month: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_bytes: int = VERIFY_CHUNK_BYTES
+) -> Dict:
+    """
+    ตรวจ audit log ทั้งหมด (หรือเดือนเดียว) แบบขนาน
+
+    Args:
+        audit_dir: โฟลเดอร์ของ log
+        month: "YYYY-MM" (None = ทุกเดือน ต้องเริ่มจาก GENESIS)
+        workers: จำนวน process (None = ตามจำนวน CPU, 1 = ตรวจใน process นี้)
+        chunk_bytes: ขนาดของแต่ละช่วง
+
+    Returns:
+        {"ok", "files", "chunks", "entries", "errors", "anchor", "last_hash"}
+    """
+    files = _month_files(audit_dir, month)
+    tasks = [task for path in files for task in _split(path, chunk_bytes)]
+    if workers == 1 or len(tasks) <= 1:
+        results = [_verify_range(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_verify_range, tasks))
+
+    errors = []
+    entries = 0
+    anchor = None
+    last_hash, last_seq = None, None
+    for task, result in zip(tasks, results):
+        errors.extend(result["errors"])
+        if not result["count"]:
+            continue
+        if last_hash is None:
+            # ตรวจทุกเดือน: รายการแรกต้องต่อจาก GENESIS, ตรวจเดือนเดียว: ยึด prev ของรายการแรก
+            anchor = result["first_prev"]
+            if not month and (anchor != GENESIS or result["first_seq"] != 1):
+                errors.append(f"{os.path.basename(task[0])}@{task[1]}: รายการแรกไม่ได้เริ่มจาก GENESIS")
+        else:
+            if result["first_prev"] != last_hash:
+                errors.append(f"{os.path.basename(task[0])}@{task[1]}: chain ขาดที่รอยต่อ (seq {result['first_seq']})")
+            if result["first_seq"] != last_seq + 1:
+                errors.append(f"{os.path.basename(task[0])}@{task[1]}: seq ไม่ต่อเนื่อง "
+                              f"({last_seq} → {result['first_seq']})")
+        last_hash, last_seq = result["last_hash"], result["last_seq"]
+        entries += result["count"]
+
+    return {
+        "ok": not errors,
+        "files": len(files),
+        "chunks": len(tasks),
+        "entries": entries,
+        "errors": errors,
+        "anchor": anchor,
+        "last_hash": last_hash,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI ตรวจและค้นหา audit log"""
+    parser = argparse.ArgumentParser(description="ตรวจและค้นหา audit log")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    verify_parser = subparsers.add_parser("verify", help="ตรวจ hash chain")
+    verify_parser.add_argument("audit_dir")
+    verify_parser.add_argument("--month", help="YYYY-MM (ค่าเริ่มต้นคือทุกเดือน)")
+    verify_parser.add_argument("--workers", type=int, default=None)
+
+    show_parser = subparsers.add_parser("show", help="เหตุการณ์ของออเดอร์")
+    show_parser.add_argument("audit_dir")
+    show_parser.add_argument("date", help="YYYY-MM-DD")
+    show_parser.add_argument("order_id", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        for entry in AuditLog(args.audit_dir).history(args.date, args.order_id):
+            print(json.dumps(entry, ensure_ascii=False))
+        return 0
+
+    result = verify(args.audit_dir, args.month, args.workers)
+    print(f"{'✅' if result['ok'] else '❌'} {result['entries']:,} รายการ "
+          f"({result['files']} ไฟล์, {result['chunks']} ช่วง)")
+    for error in result["errors"][:20]:
+        print(f"• {error}")
+    if result["last_hash"]:
+        print(f"• hash ล่าสุด: {result['last_hash']}")
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลบันทึกและ replay Webhook ATMO'decor
+
+- WebhookCapture: บันทึก body ดิบของ Webhook ที่รับเข้าประมวลผล พร้อมเวลาที่รับ
+  ลงไฟล์ JSON Lines แบบ gzip (เปิดใช้ด้วย WEBHOOK_CAPTURE_DIR)
+  แต่ละ process เขียนไฟล์ของตัวเอง ไฟล์ที่ปิดไม่สมบูรณ์จึงไม่กระทบไฟล์อื่น
+- replay: ป้อน log ที่บันทึกไว้กลับเข้า handler ของแอปตามลำดับเดิม
+  โดยใช้โฟลเดอร์ข้อมูลใหม่และ LINE stub (ตามจังหวะเดิมหรือเร็วที่สุด)
+  นาฬิกาของแอประหว่าง replay คือเวลาที่รับเดิม และปิดการตั้งค่าที่มีผลข้างเคียงจาก .env
+  (ปิดวันอัตโนมัติ แคตตาล็อก endpoint ผู้ดูแล) ผลลัพธ์จึงเหมือนเดิมทุกครั้งที่ replay
+
+การใช้งาน CLI:
+    python -m src.capture info data/capture
+    python -m src.capture replay data/capture --data-dir /tmp/rebuild
+    python -m src.capture replay data/capture/webhook_20260111_180000_42_a1b2c3.jsonl.gz --pacing original
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+# การตั้งค่าที่ replay ตั้งเป็นค่าว่างเสมอ (load_dotenv ไม่เขียนทับตัวแปรที่มีอยู่แล้ว ค่าจาก .env จึงไม่มีผล)
+REPLAY_DISABLED_SETTINGS = (
+    "DAY_CLOSE_TIME",
+    "DAY_CLOSE_NOTIFY_TO",
+    "CATALOG_FILE",
+    "ADMIN_SECRET",
+    "API_TOKEN",
+    "DASHBOARD_TOKEN",
+)
+
+
+class WebhookCapture:
+    """บันทึก Webhook body ลงไฟล์ JSON Lines แบบ gzip"""
+
+    def __init__(self, capture_dir: str):
+        """
+        สร้าง instance ของ WebhookCapture
+
+        Args:
+            capture_dir: โฟลเดอร์สำหรับเก็บไฟล์ log
+        """
+        os.makedirs(capture_dir, exist_ok=True)
+        filename = f"webhook_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{uuid.uuid4().hex[:6]}.jsonl.gz"
+        self.path = os.path.join(capture_dir, filename)
+        self._lock = threading.Lock()
+        self._file = gzip.open(self.path, 'ab')
+        self.count = 0
+
+    def record(self, body: str, received_at: Optional[float] = None):
+        """
+        บันทึก body หนึ่งรายการ
+
+        Args:
+            body: Webhook request body
+            received_at: เวลาที่รับ (epoch seconds, ค่าเริ่มต้นคือเวลาปัจจุบัน)
+        """
+        line = json.dumps({
+            "received_at": received_at if received_at is not None else time.time(),
+            "body": body
+        }, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line.encode('utf-8'))
+            # sync flush ให้ข้อมูลที่บันทึกแล้วอ่านได้แม้ process ถูกปิดกะทันหัน
+            self._file.flush(zlib.Z_SYNC_FLUSH)
+            self.count += 1
+
+    def close(self):
+        """ปิดไฟล์"""
+        with self._lock:
+            self._file.close()
+
+
+def _read_file(path: str) -> Iterator[Dict]:
+    # ไฟล์ที่ยังเขียนอยู่หรือถูกปิดกะทันหันจะไม่มี gzip trailer จึงอ่านเท่าที่ได้แล้วหยุด
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                yield json.loads(line)
+        except EOFError:
+            return
+
+
+def read_capture(path: str) -> List[Dict]:
+    """
+    อ่าน log ที่บันทึกไว้ เรียงตามเวลาที่รับ
+
+    Args:
+        path: ไฟล์ log หรือโฟลเดอร์ที่มีไฟล์ .jsonl.gz หลายไฟล์
+
+    Returns:
+        รายการ {"received_at": float, "body": str}
+    """
+    if os.path.isdir(path):
+        paths = [
+            os.path.join(path, name)
+            for name in sorted(os.listdir(path))
+            if name.endswith(".jsonl.gz")
+        ]
+    else:
+        paths = [path]
+
+    records = [record for file_path in paths for record in _read_file(file_path)]
+    records.sort(key=lambda record: record["received_at"])
+    return records
+
+
+def replay(
+    records: List[Dict],
+    process_func,
+    sign_func,
+    pacing: str = "fast",
+    speed: float = 1.0,
+    set_clock: Optional[Callable[[float], None]] = None
+) -> Dict:
+    """
+    ป้อน Webhook body กลับเข้า handler ตามลำดับเดิม
+
+    Args:
+        records: รายการจาก read_capture
+        process_func: ฟังก์ชัน (body, signature) ที่ประมวลผล body
+        sign_func: ฟังก์ชันสร้างลายเซ็นด้วย Channel Secret ปัจจุบัน
+        pacing: "fast" (เร็วที่สุด) หรือ "original" (ตามช่วงเวลาเดิม)
+        speed: ตัวคูณความเร็วเมื่อใช้ pacing แบบ original (2.0 = เร็วกว่าเดิม 2 เท่า)
+        set_clock: ฟังก์ชันตั้งนาฬิกาของแอป เรียกด้วย received_at ก่อนประมวลผลแต่ละรายการ
+
+    Returns:
+        สรุปผล {"events", "errors", "elapsed_s", "events_per_sec"}
+    """
+    errors = 0
+    started = time.perf_counter()
+    first_received = records[0]["received_at"] if records else 0
+
+    for record in records:
+        if pacing == "original":
+            due = started + (record["received_at"] - first_received) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if set_clock is not None:
+            set_clock(record["received_at"])
+        try:
+            process_func(record["body"], sign_func(record["body"]))
+        except Exception as e:
+            errors += 1
+            print(f"⚠️ replay ผิดพลาดที่เหตุการณ์ {record['received_at']}: {e}")
+
+    elapsed = time.perf_counter() - started
+    return {
+        "events": len(records),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "events_per_sec": len(records) / elapsed if elapsed else 0,
+    }
+
+
+def replay_environ(data_dir: str, stub_url: str, channel_secret: str) -> Dict[str, str]:
+    """
+    ตัวแปร environment ของแอประหว่าง replay
+
+    Args:
+        data_dir: โฟลเดอร์ข้อมูลใหม่
+        stub_url: URL ของ LINE stub
+        channel_secret: Channel Secret ที่ใช้เซ็น body ใหม่
+
+    Returns:
+        dict สำหรับ os.environ.update
+    """
+    environ = {setting: "" for setting in REPLAY_DISABLED_SETTINGS}
+    environ.update({
+        "DATA_DIR": data_dir,
+        "LINE_CHANNEL_ACCESS_TOKEN": "replay-token",
+        "LINE_CHANNEL_SECRET": channel_secret,
+        "LINE_API_ENDPOINT": stub_url,
+        "LINE_API_DATA_ENDPOINT": stub_url,
+        "WEBHOOK_ASYNC": "0",
+        "WEBHOOK_CAPTURE_DIR": "",
+        "TRACE_SAMPLE_RATE": "0",
+    })
+    return environ
+
+
+def _load_app(data_dir: str, stub_url: str, channel_secret: str):
+    """import แอปโดยชี้ข้อมูลไปที่ data_dir และ LINE API ไปที่ stub (ประมวลผลแบบ synchronous)"""
+    os.environ.update(replay_environ(data_dir, stub_url, channel_secret))
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    import app
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI สำหรับดูและ replay log ที่บันทึกไว้"""
+    parser = argparse.ArgumentParser(description="Replay Webhook ที่บันทึกไว้")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    info_parser = subparsers.add_parser("info", help="สรุปจำนวนและช่วงเวลาของ log")
+    info_parser.add_argument("file", help="ไฟล์ log หรือโฟลเดอร์")
+
+    replay_parser = subparsers.add_parser("replay", help="ป้อน log กลับเข้าแอปด้วยโฟลเดอร์ข้อมูลใหม่")
+    replay_parser.add_argument("file", help="ไฟล์ log หรือโฟลเดอร์")
+    replay_parser.add_argument("--data-dir", help="โฟลเดอร์ข้อมูลใหม่ (ค่าเริ่มต้นคือโฟลเดอร์ชั่วคราว)")
+    replay_parser.add_argument("--pacing", choices=["fast", "original"], default="fast")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="ตัวคูณความเร็วเมื่อ --pacing original")
+    replay_parser.add_argument("--stub-latency-ms", type=float, default=0)
+    args = parser.parse_args(argv)
+
+    records = read_capture(args.file)
+    if args.command == "info":
+        if not records:
+            print(f"ไม่พบเหตุการณ์ใน {args.file}")
+            return 0
+        first, last = records[0]["received_at"], records[-1]["received_at"]
+        print(f"📼 {len(records):,} เหตุการณ์")
+        print(f"• เริ่ม: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(first))}")
+        print(f"• สิ้นสุด: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last))}")
+        return 0
+
+    # import ภายในเพื่อให้ production ไม่ต้องโหลดเครื่องมือทดสอบ
+    from benchmarks.line_stub import LineStubServer
+    from benchmarks.webhook_events import sign_body
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="atmo_replay_")
+    if os.path.exists(os.path.join(data_dir, "sales_data.json")):
+        print(f"❌ {data_dir} มีข้อมูลอยู่แล้ว กรุณาระบุโฟลเดอร์ใหม่")
+        return 1
+
+    secret = "replay-secret"
+    stub = LineStubServer(latency_ms=args.stub_latency_ms).start()
+    try:
+        app = _load_app(data_dir, stub.url, secret)
+        print(f"▶️ replay {len(records):,} เหตุการณ์ ({args.pacing}) ไปที่ {data_dir}")
+
+        def set_clock(received_at: float):
+            app.clock = lambda: datetime.fromtimestamp(received_at)
+
+        result = replay(records, app.process_event, lambda body: sign_body(secret, body),
+                        args.pacing, args.speed, set_clock)
+    finally:
+        stub.stop()
+
+    summary = app.db.get_summary()
+    print(f"✅ เสร็จสิ้น {result['events']:,} เหตุการณ์ ใน {result['elapsed_s']:.2f} s "
+          f"({result['events_per_sec']:,.1f} เหตุการณ์/s), ผิดพลาด {result['errors']}")
+    print(f"• วันที่: {summary.get('date')} | ออเดอร์: {len(app.db.get_orders())} | "
+          f"ยอดขาย: {summary.get('total_sales', 0):,.0f} บาท")
+    print(f"• LINE stub: {stub.counts}")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
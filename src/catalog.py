@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลแคตตาล็อกสินค้า ATMO'decor
+
+- แคตตาล็อกเป็นไฟล์ JSON: [{"name", "aliases", "category", "list_price"}]
+  category คือประเภทคอมมิชชั่นเดียวกับ check_product_type (faland, ikebana_curve, flower_only,
+  perfume, mini_vase, vase) หรือ other
+- จับคู่บรรทัดของออเดอร์กับชื่อ/ชื่ออื่นของสินค้าแบบใกล้เคียง (พิมพ์ผิดได้ตามความยาวของชื่อ)
+  ชื่อสินค้ามักอยู่กลางข้อความ จึงวัด edit distance ของชื่อกับส่วนใดส่วนหนึ่งของบรรทัด
+- index แบบ bigram: ชื่อที่มี g bigram และพิมพ์ผิดได้ k ตัว ต้องมี bigram ร่วมกับบรรทัด
+  อย่างน้อย g - 2k ตัว จึงต้องมีอย่างน้อยหนึ่งตัวใน 2k + 1 bigram ที่พบน้อยที่สุดของชื่อ
+  index เก็บชื่อไว้เฉพาะใต้ bigram ที่พบน้อยเหล่านี้ (prefix filter) แล้วนับ bigram ร่วมทั้งหมด
+  และตรวจ edit distance (bit-parallel ของ Myers) เฉพาะชื่อที่ผ่านเกณฑ์
+  bigram ที่พบบ่อยไม่ถูกไล่อ่าน เวลาค้นหาจึงแทบไม่โตตามขนาดแคตตาล็อก
+
+การใช้งาน CLI:
+    python -m src.catalog catalog.json "แจกันฟาแลนด สีขาว"
+"""
+
+import json
+import re
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+CATEGORIES = ("faland", "ikebana_curve", "flower_only", "perfume", "mini_vase", "vase", "other")
+NGRAM = 2
+# สัดส่วนที่ยอดต่างจากราคาตั้งได้ก่อนถูกแจ้งเตือน
+DEFAULT_PRICE_TOLERANCE = 0.5
+
+_SPACES = re.compile(r"\s+")
+
+
+class CatalogItem(NamedTuple):
+    """สินค้าในแคตตาล็อก"""
+    name: str
+    category: str
+    list_price: float
+    aliases: Tuple[str, ...] = ()
+
+
+class CatalogMatch(NamedTuple):
+    """ผลการจับคู่บรรทัดกับสินค้า"""
+    item: CatalogItem
+    key: str
+    distance: int
+
+
+def normalize(text: str) -> str:
+    """ตัวพิมพ์เล็กและไม่มีช่องว่าง ("Mini Vase" กับ "minivase" จึงเป็นชื่อเดียวกัน)"""
+    return _SPACES.sub("", text.lower())
+
+
+def max_edits(key: str) -> int:
+    """จำนวนตัวอักษรที่พิมพ์ผิดได้ของชื่อ (ชื่อสั้นต้องตรงทุกตัว)"""
+    if len(key) < 5:
+        return 0
+    if len(key) < 9:
+        return 1
+    return 2
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def pattern_bits(pattern: str) -> Dict[str, int]:
+    """bitmask ตำแหน่งของแต่ละตัวอักษรใน pattern (สำหรับ substring_distance)"""
+    peq: Dict[str, int] = {}
+    for i, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    return peq
+
+
+def substring_distance(pattern: str, text: str, peq: Optional[Dict[str, int]] = None) -> int:
+    """
+    edit distance น้อยที่สุดระหว่าง pattern กับส่วนใดส่วนหนึ่งของ text
+
+    ใช้ bit-parallel ของ Myers: หนึ่งคอลัมน์ของตาราง DP ต่อหนึ่งตัวอักษรของ text
+
+    Args:
+        pattern: ชื่อที่ค้นหา
+        text: ข้อความ
+        peq: ผลของ pattern_bits(pattern) ที่คำนวณไว้ก่อน (ถ้ามี)
+
+    Returns:
+        จำนวนการแก้ไขน้อยที่สุด
+    """
+    m = len(pattern)
+    if m == 0:
+        return 0
+    if peq is None:
+        peq = pattern_bits(pattern)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    best = m
+    for char in text:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & mask
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # แถวบนสุดเป็น 0 ทุกคอลัมน์ (ชื่อเริ่มที่ตำแหน่งใดก็ได้) จึงไม่เติม bit ล่าง
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+        if score < best:
+            best = score
+    return best
+
+
+class Catalog:
+    """แคตตาล็อกสินค้าพร้อม index สำหรับจับคู่แบบใกล้เคียง"""
+
+    def __init__(self, items: Iterable[CatalogItem]):
+        """
+        สร้าง index ของแคตตาล็อก
+
+        Args:
+            items: สินค้าทั้งหมด
+        """
+        self.items: List[CatalogItem] = []
+        # ชื่อที่ normalize แล้ว (ชื่อหลักและชื่ออื่น) → สินค้า
+        self._keys: List[Tuple[str, CatalogItem]] = []
+        for item in items:
+            if item.category not in CATEGORIES:
+                raise ValueError(f"ประเภทสินค้าของ {item.name} ต้องเป็นหนึ่งใน {', '.join(CATEGORIES)}")
+            self.items.append(item)
+            for key in {normalize(name) for name in (item.name,) + tuple(item.aliases)}:
+                if key:
+                    self._keys.append((key, item))
+
+        self._key_grams = [frozenset(_grams(key)) for key, _ in self._keys]
+        self._key_bits = [pattern_bits(key) for key, _ in self._keys]
+        self._required = [len(grams) - NGRAM * max_edits(key) for grams, (key, _) in zip(self._key_grams, self._keys)]
+        frequency = Counter(gram for grams in self._key_grams for gram in grams)
+        self._postings: Dict[str, List[int]] = {}
+        # ชื่อที่สั้นเกินกว่าจะกรองด้วย bigram ได้ ตรวจทุกครั้ง
+        self._always: List[int] = []
+        for key_id, grams in enumerate(self._key_grams):
+            required = self._required[key_id]
+            if required <= 0:
+                self._always.append(key_id)
+                continue
+            rarest = sorted(grams, key=lambda gram: (frequency[gram], gram))[:len(grams) - required + 1]
+            for gram in rarest:
+                self._postings.setdefault(gram, []).append(key_id)
+
+    @classmethod
+    def load(cls, path: str) -> "Catalog":
+        """
+        โหลดแคตตาล็อกจากไฟล์ JSON
+
+        Args:
+            path: path ของไฟล์
+
+        Returns:
+            Catalog
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        return cls(
+            CatalogItem(
+                name=entry["name"],
+                category=entry.get("category", "other"),
+                list_price=float(entry.get("list_price") or 0),
+                aliases=tuple(entry.get("aliases") or ()),
+            )
+            for entry in entries
+        )
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def resolve(self, line: str) -> Optional[CatalogMatch]:
+        """
+        สินค้าที่ตรงกับบรรทัดมากที่สุด
+
+        เลือกชื่อที่ตรงกับบรรทัดได้มากตัวอักษรที่สุด (ความยาวชื่อ - จำนวนที่พิมพ์ผิด)
+        ชื่อที่เจาะจงกว่าจึงชนะแม้พิมพ์ผิด เช่น "ikebana curv" ได้ "ikebana curve" ไม่ใช่ "ikebana"
+
+        Args:
+            line: บรรทัดของออเดอร์
+
+        Returns:
+            CatalogMatch หรือ None ถ้าไม่มีสินค้าที่ใกล้พอ
+        """
+        text = normalize(line)
+        if not text:
+            return None
+        grams = _grams(text)
+        candidates = set(self._always)
+        for gram in grams:
+            candidates.update(self._postings.get(gram, ()))
+
+        # ตรวจชื่อที่ยาวกว่าก่อน: เมื่อชื่อที่เหลือสั้นเกินกว่าจะได้คะแนนสูงกว่า ก็หยุดได้ทันที
+        candidates = sorted(
+            (key_id for key_id in candidates if len(self._key_grams[key_id] & grams) >= self._required[key_id]),
+            key=lambda key_id: len(self._keys[key_id][0]),
+            reverse=True
+        )
+        best: Optional[CatalogMatch] = None
+        best_score = 0
+        for key_id in candidates:
+            key, item = self._keys[key_id]
+            if best is not None and (len(key) < best_score or (len(key) == best_score and best.distance == 0)):
+                break
+            distance = substring_distance(key, text, self._key_bits[key_id])
+            if distance > max_edits(key):
+                continue
+            score = len(key) - distance
+            if best is None or (score, -distance) > (best_score, -best.distance):
+                best, best_score = CatalogMatch(item, key, distance), score
+        return best
+
+    def resolve_lines(self, text: str) -> List[Optional[CatalogMatch]]:
+        """สินค้าของแต่ละบรรทัดในข้อความออเดอร์ตามลำดับบรรทัด (None = ไม่ตรงกับสินค้าใด)"""
+        return [self.resolve(line) for line in text.split('\n')]
+
+
+def product_type(category: str) -> Dict[str, bool]:
+    """
+    ประเภทสินค้าในรูปแบบเดียวกับ check_product_type จาก category ของแคตตาล็อก
+
+    Args:
+        category: ประเภทของสินค้า
+    """
+    return {f"is_{name}": name == category for name in CATEGORIES if name != "other"}
+
+
+def classify(catalog: Optional[Catalog], text: str) -> Tuple[List[Optional[CatalogMatch]], Optional[Dict[str, bool]]]:
+    """
+    จับคู่ข้อความออเดอร์กับแคตตาล็อก (ใช้ทั้งตอนเพิ่มและแก้ไขออเดอร์ ประเภทจึงตรงกันเสมอ)
+
+    Args:
+        catalog: แคตตาล็อก หรือ None ถ้าไม่ได้ตั้งค่า
+        text: ข้อความออเดอร์ (บรรทัดแรกคือชื่อสินค้า)
+
+    Returns:
+        (ผลจาก resolve_lines, ประเภทสินค้าจากบรรทัดแรกหรือ None = ใช้คำสำคัญของ check_product_type)
+    """
+    if catalog is None:
+        return [None], None
+    matches = catalog.resolve_lines(text)
+    if matches[0] is None:
+        return matches, None
+    return matches, product_type(matches[0].item.category)
+
+
+def price_deviation(amount: float, matches: List[Optional[CatalogMatch]]) -> Optional[Tuple[float, float]]:
+    """
+    ยอดของออเดอร์เทียบกับราคาตั้งรวมของสินค้าที่จับคู่ได้
+
+    Args:
+        amount: ยอดเงินของออเดอร์
+        matches: ผลจาก resolve_lines
+
+    Returns:
+        (ราคาตั้งรวม, สัดส่วนที่ต่าง เช่น -0.4 = ต่ำกว่าราคาตั้ง 40%) หรือ None ถ้าไม่มีราคาตั้ง
+    """
+    list_price = sum(match.item.list_price for match in matches if match is not None)
+    if list_price <= 0:
+        return None
+    return list_price, (amount - list_price) / list_price
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI ทดสอบการจับคู่ข้อความกับแคตตาล็อก"""
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(__doc__)
+        return 2
+    catalog = Catalog.load(argv[0])
+    for line in argv[1].split('\n'):
+        match = catalog.resolve(line)
+        if match is None:
+            print(f"• {line}: ไม่พบในแคตตาล็อก")
+        else:
+            print(f"• {line}: {match.item.name} ({match.item.category}, ราคาตั้ง {match.item.list_price:,.0f} บาท, "
+                  f"ต่าง {match.distance} ตัวอักษร)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
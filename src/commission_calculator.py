@@ -8,6 +8,11 @@ import re
 from datetime import datetime
 from typing import Dict, Tuple, Optional, List
 
+from . import money
+
+# เวอร์ชันของกฎคอมมิชชั่น บันทึกลง audit log ทุกเหตุการณ์ (เปลี่ยนทุกครั้งที่แก้เงื่อนไขในโมดูลนี้)
+RULE_VERSION = "2.1"
+
 # เงื่อนไขคอมมิชชั่นหลัก (ยอดขั้นต่ำ, เรท, จำนวนออเดอร์สำหรับโบนัส, โบนัส)
 COMMISSION_TIERS = [
     {"min": 180000, "rate": 0.04, "bonus_orders": 12, "bonus_amount": 1500},
@@ -42,10 +47,15 @@ MIN_VASE_PRICE = 4500
 VASE_ADDON_THRESHOLD = 9500
 
 # OT Penalty
+OT_EVENING_START = "18:00"
+OT_EVENING_END = "22:00"
 OT_EVENING_MIN_SALES = 5000  # ยอดขั้นต่ำช่วง 18:00-22:00
 OT_PENALTY_RATE = 0.30  # หัก 30%
 OT_PENALTY_MAX = 300  # สูงสุด 300 บาท
 
+# เรทคอมมิชชั่นสินค้าพิเศษ
+SPECIAL_RATE = 0.05
+
 
 def extract_amount(text: str) -> Optional[float]:
     """
@@ -203,26 +213,92 @@ def calculate_commission_from_excess(total_sales: float, previous_sales: float =
     Returns:
         คอมมิชชั่นจากส่วนต่าง
     """
-    if total_sales < MIN_SALES_THRESHOLD:
-        return 0.0
+    return money.to_baht(commission_from_excess_satang(money.to_satang(total_sales)))
+
+
+def commission_from_excess_satang(total_satang: int) -> int:
+    """
+    คำนวณคอมมิชชั่นจากส่วนต่างที่เกินยอดขั้นต่ำ หน่วยสตางค์
+    
+    Args:
+        total_satang: ยอดขายสะสม (สตางค์)
+        
+    Returns:
+        คอมมิชชั่นจากส่วนต่าง (สตางค์ ปัดตามกฎของ commission_1)
+    """
+    threshold = MIN_SALES_THRESHOLD * money.SATANG_PER_BAHT
+    if total_satang < threshold:
+        return 0
     
     # หาเรทปัจจุบัน
-    current_rate, _, _ = calculate_commission_rate(total_sales)
+    current_rate, _, _ = calculate_commission_rate(money.to_baht(total_satang))
     
-    # คำนวณส่วนต่างที่เกิน 20,000
-    excess = total_sales - MIN_SALES_THRESHOLD
+    # คำนวณคอมมิชชั่นจากส่วนต่างที่เกิน 20,000
+    return money.apply_rate(total_satang - threshold, money.rate_to_bp(current_rate), money.COMMISSION_1)
+
+
+def calculate_commission_1_delta(previous_sales: float, total_sales: float) -> float:
+    """
+    คำนวณคอมมิชชั่น 1-4% ของออเดอร์หนึ่ง
     
-    # คำนวณคอมมิชชั่นจากส่วนต่าง
-    commission = excess * current_rate
+    คอมมิชชั่นคิดจากยอดสะสม ออเดอร์จึงได้เฉพาะส่วนที่เพิ่มขึ้นจากยอดก่อนหน้า
+    (ผลรวมของทุกออเดอร์เท่ากับคอมมิชชั่นของยอดสะสมสุดท้ายพอดี)
     
-    return commission
+    Args:
+        previous_sales: ยอดขายสะสมก่อนออเดอร์นี้
+        total_sales: ยอดขายสะสมหลังออเดอร์นี้
+        
+    Returns:
+        คอมมิชชั่น 1-4% ของออเดอร์
+    """
+    return money.to_baht(
+        commission_from_excess_satang(money.to_satang(total_sales)) -
+        commission_from_excess_satang(money.to_satang(previous_sales))
+    )
+
+
+def recalculate_commission_1(
+    sales_before: float,
+    old_amount: float,
+    old_commission_1: float,
+    new_amount: float,
+    old_total: float
+) -> Tuple[float, float]:
+    """
+    คำนวณคอมมิชชั่น 1-4% ใหม่เมื่อแก้ไขหรือยกเลิกออเดอร์ที่อยู่กลางวัน
+    
+    ใช้เฉพาะยอดสะสมก่อนออเดอร์และยอดรวมของวัน จึงไม่ต้องคำนวณทุกออเดอร์ใหม่
+    ผลรวมของคอมมิชชั่นหลังปรับยังเท่ากับคอมมิชชั่นของยอดรวมใหม่พอดี
+    
+    Args:
+        sales_before: ยอดขายสะสมก่อนออเดอร์นี้
+        old_amount: ยอดเดิมของออเดอร์
+        old_commission_1: คอมมิชชั่น 1-4% เดิมของออเดอร์
+        new_amount: ยอดใหม่ของออเดอร์ (0 ถ้ายกเลิก)
+        old_total: ยอดขายรวมของวันก่อนแก้ไข
+        
+    Returns:
+        (คอมมิชชั่นใหม่ของออเดอร์นี้, ส่วนต่างคอมมิชชั่นของออเดอร์ถัดไปที่ยอดสะสมเปลี่ยน)
+    """
+    before_satang = money.to_satang(sales_before)
+    old_total_satang = money.to_satang(old_total)
+    new_total_satang = old_total_satang - money.to_satang(old_amount) + money.to_satang(new_amount)
+    
+    order_satang = (
+        commission_from_excess_satang(before_satang + money.to_satang(new_amount)) -
+        commission_from_excess_satang(before_satang)
+    )
+    day_change = commission_from_excess_satang(new_total_satang) - commission_from_excess_satang(old_total_satang)
+    following = day_change - (order_satang - money.to_satang(old_commission_1))
+    return money.to_baht(order_satang), money.to_baht(following)
 
 
 def calculate_order_commission(
     amount: float,
     product_name: str,
     order_text: str = "",
-    total_sales: float = 0
+    total_sales: float = 0,
+    product_type: Optional[Dict[str, bool]] = None
 ) -> Dict:
     """
     คำนวณคอมมิชชั่นสำหรับออเดอร์หนึ่ง
@@ -232,11 +308,13 @@ def calculate_order_commission(
         product_name: ชื่อสินค้า
         order_text: ข้อความออเดอร์ทั้งหมด
         total_sales: ยอดขายสะสมปัจจุบัน
+        product_type: ประเภทสินค้าที่ทราบแล้ว เช่นจากแคตตาล็อก (None = ตรวจจากคำสำคัญในชื่อสินค้า)
         
     Returns:
         Dictionary ที่มีข้อมูลคอมมิชชั่น
     """
-    product_type = check_product_type(product_name)
+    if product_type is None:
+        product_type = check_product_type(product_name)
     
     # ตรวจสอบว่านับเป็นออเดอร์หรือไม่
     count_as_order = not product_type["is_perfume"]
@@ -245,21 +323,17 @@ def calculate_order_commission(
     vase_count = count_vase_items(order_text) if order_text else 0
     
     # คำนวณคอมมิชชั่น 5% (สินค้าพิเศษ)
-    commission_5 = 0.0
-    is_special = False
-    
-    if product_type["is_faland"] and not product_type["is_ikebana_curve"]:
-        # แจกันฟาแลน (ยกเว้น Ikebana Curve)
-        commission_5 = amount * 0.05
-        is_special = True
-    elif product_type["is_ikebana_curve"]:
-        # Ikebana Curve
-        commission_5 = amount * 0.05
-        is_special = True
-    elif product_type["is_flower_only"] and amount >= MIN_FLOWER_ONLY_PRICE:
+    is_special = (
+        # แจกันฟาแลน (ยกเว้น Ikebana Curve) หรือ Ikebana Curve
+        product_type["is_faland"] or product_type["is_ikebana_curve"] or
         # ชุดดอกไม้อย่างเดียว (≥8,000 บาท)
-        commission_5 = amount * 0.05
-        is_special = True
+        (product_type["is_flower_only"] and amount >= MIN_FLOWER_ONLY_PRICE)
+    )
+    commission_5 = 0.0
+    if is_special:
+        commission_5 = money.to_baht(money.apply_rate(
+            money.to_satang(amount), money.rate_to_bp(SPECIAL_RATE), money.COMMISSION_5
+        ))
     
     # คำนวณ Add on (2vases)
     add_on_2vases = 0.0
@@ -317,8 +391,10 @@ def calculate_ot_penalty(
         จำนวนเงินที่ต้องหัก
     """
     if sales_18_22 < OT_EVENING_MIN_SALES:
-        penalty = total_commission * OT_PENALTY_RATE
-        return min(penalty, OT_PENALTY_MAX)
+        penalty = money.apply_rate(
+            money.to_satang(total_commission), money.rate_to_bp(OT_PENALTY_RATE), money.OT_PENALTY
+        )
+        return money.to_baht(min(penalty, OT_PENALTY_MAX * money.SATANG_PER_BAHT))
     return 0.0
 
 
@@ -342,8 +418,10 @@ def calculate_total_commission(
     Returns:
         คอมมิชชั่นรวมสุทธิ
     """
-    total = commission_1_total + commission_5_total + add_on_2vases_total + add_on_order
-    return max(0, total - ot_penalty)
+    total = sum(money.to_satang(value) for value in (
+        commission_1_total, commission_5_total, add_on_2vases_total, add_on_order
+    ))
+    return money.to_baht(max(0, total - money.to_satang(ot_penalty)))
 
 
 def calculate_incentive_per_person(total_commission: float, staff_count: int) -> float:
@@ -359,7 +437,8 @@ def calculate_incentive_per_person(total_commission: float, staff_count: int) ->
     """
     if staff_count <= 0:
         return 0.0
-    return total_commission / staff_count
+    # ปัดลงเป็นสตางค์ ผลรวมที่จ่ายทุกคนจึงไม่เกินคอมมิชชั่นรวม
+    return money.to_baht(money.split(money.to_satang(total_commission), staff_count, money.INCENTIVE))
 
 
 def format_summary(data: Dict) -> str:
@@ -372,50 +451,6 @@ def format_summary(data: Dict) -> str:
     Returns:
         ข้อความสรุปที่จัดรูปแบบแล้ว
     """
-    date = data.get("date", "")
-    staff_count = data.get("staff_count", 0)
-    staff_names = ", ".join(data.get("staff_names", []))
-    total_sales = data.get("total_sales", 0)
-    total_orders = data.get("total_orders", 0)
-    
-    commission_1 = data.get("commission_1_total", 0)
-    commission_5 = data.get("commission_5_total", 0)
-    add_on_2vases = data.get("add_on_2vases", 0)
-    add_on_order = data.get("add_on_order", 0)
-    
-    sales_18_22 = data.get("sales_18_22", 0)
-    ot_penalty = data.get("ot_penalty", 0)
-    
-    commission_total = data.get("commission_total", 0)
-    incentive_per_person = data.get("incentive_per_person", 0)
-    
-    rate, _, _ = calculate_commission_rate(total_sales)
-    
-    # ส่วนต่างที่เกิน 20,000
-    excess = max(0, total_sales - MIN_SALES_THRESHOLD)
-    
-    # สถานะ OT
-    ot_status = "✅" if sales_18_22 >= OT_EVENING_MIN_SALES else "❌"
-    
-    summary = f"""📊 สรุปยอดวันนี้ ({date})
-👥 คนตอบ: {staff_names} ({staff_count} คน)
-
-• ยอดขายรวม: {total_sales:,.0f} บาท
-• ส่วนต่าง (เกิน 20,000): {excess:,.0f} บาท
-• จำนวนออเดอร์: {total_orders} ออเดอร์
-• เรทปัจจุบัน: {rate*100:.0f}%
-
-💰 คอมมิชชั่น:
-• คอมมิชชั่น 1-4%: {commission_1:,.2f} บาท
-• คอมมิชชั่น 5%: {commission_5:,.2f} บาท
-• Add on (2vases): {add_on_2vases:,.0f} บาท
-• Add on (order): {add_on_order:,.0f} บาท
-
-⏰ OT:
-• ช่วง 18:00-22:00: {sales_18_22:,.0f} บาท {ot_status}
-• Penalty: {ot_penalty:,.0f} บาท
-
-💵 รวมทั้งหมด: {commission_total:,.2f} บาท
-💵 Incentive ต่อคน: {incentive_per_person:,.2f} บาท"""
-    
-    return summary
+    # รูปแบบอยู่ที่ rendering.SUMMARY_SECTIONS (import ภายในเพราะ rendering import โมดูลนี้)
+    from .rendering import render_summary_text
+    return render_summary_text(data)
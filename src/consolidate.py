@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลรวมรายงานหลายสาขา ATMO'decor
+
+- แต่ละสาขามีโฟลเดอร์ข้อมูลของตัวเอง (archive/ และ rollups/ จากการปิดวัน)
+  รายชื่อไฟล์ใน archive/ และ rollups/ คือ manifest ของวันที่มีข้อมูล
+- branch_partial อ่านข้อมูลของสาขาเดียวทีละวันใน worker process แยก
+  แล้วคืนผลรวมย่อย (partial rollup) ขนาดเท่ากับจำนวนวัน ไม่ใช่จำนวนออเดอร์
+- merge_rollups รวมผลรวมย่อยสองชุด (บวกค่าทีละคีย์ เป็นสตางค์ทั้งหมด)
+  มีคุณสมบัติ associative และ commutative ลำดับที่สาขาเสร็จจึงไม่มีผลต่อผลลัพธ์
+  process หลักถือเพียงผลรวมย่อย งานจึงเพิ่มตามจำนวนสาขาแบบเส้นตรง
+
+การใช้งาน CLI:
+    python -m src.consolidate --branch siam=/mnt/siam/data --branch central=/mnt/central/data \\
+        --start 2026-01-01 --end 2026-01-31 -o report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import reduce
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from . import money
+from .export import archive_files, parse_date
+
+# ยอดเงินที่รวมข้ามสาขา (เก็บเป็นสตางค์ระหว่างรวม)
+MONEY_FIELDS = (
+    "total_sales",
+    "commission_1_total",
+    "commission_5_total",
+    "add_on_2vases",
+    "add_on_order",
+    "ot_penalty",
+    "commission_total",
+)
+# จำนวนที่รวมข้ามสาขา
+COUNT_FIELDS = ("total_orders", "staff_count", "days")
+
+
+def _rollup_files(rollups_dir: str, start: str, end: str) -> Dict[str, str]:
+    if not os.path.isdir(rollups_dir):
+        return {}
+    return {
+        name[:-5]: os.path.join(rollups_dir, name)
+        for name in os.listdir(rollups_dir)
+        if name.endswith(".json") and start <= name[:-5] <= end
+    }
+
+
+def branch_summaries(data_dir: str, start: str, end: str) -> Iterator[Dict]:
+    """
+    ข้อมูลสรุปรายวันของสาขาหนึ่งในช่วงวันที่ (ทีละวัน)
+
+    ใช้ rollups/<วันที่>.json ที่คำนวณไว้ตอนปิดวันก่อน (ไม่มีรายการออเดอร์ อ่านเร็วกว่า)
+    วันที่ไม่มี rollup อ่านจาก archive ล่าสุดของวันนั้น
+
+    Args:
+        data_dir: โฟลเดอร์ข้อมูลของสาขา
+        start: วันเริ่มต้น (รวม)
+        end: วันสิ้นสุด (รวม)
+    """
+    rollups = _rollup_files(os.path.join(data_dir, "rollups"), start, end)
+    archives = {
+        os.path.basename(path)[6:16]: path
+        for path in archive_files(os.path.join(data_dir, "archive"), start, end)
+    }
+    for date in sorted(set(rollups) | set(archives)):
+        path = rollups.get(date) or archives[date]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ ข้ามไฟล์ที่อ่านไม่ได้ {path}: {e}")
+            continue
+        summary = data["summary"] if date in rollups else data
+        if summary.get("date") == date:
+            yield summary
+
+
+def _totals(summary: Dict) -> Dict[str, int]:
+    """ยอดของหนึ่งวันเป็นจำนวนเต็ม (สตางค์หรือจำนวน) สำหรับรวม"""
+    totals = {field: money.to_satang(summary.get(field) or 0) for field in MONEY_FIELDS}
+    totals["total_orders"] = int(summary.get("total_orders") or 0)
+    totals["staff_count"] = int(summary.get("staff_count") or 0)
+    totals["days"] = 1
+    return totals
+
+
+def empty_rollup() -> Dict:
+    """ผลรวมย่อยว่าง (identity ของ merge_rollups)"""
+    return {"daily": {}, "monthly": {}}
+
+
+def merge_rollups(left: Dict, right: Dict) -> Dict:
+    """
+    รวมผลรวมย่อยสองชุดเป็นชุดใหม่ (ไม่แก้ไขชุดเดิม)
+
+    dict ซ้อนกันรวมทีละคีย์ ค่าที่เป็นตัวเลขนำมาบวกกัน (จำนวนเต็มทั้งหมด จึงไม่มีความคลาดเคลื่อน
+    ของ float ที่ขึ้นกับลำดับการบวก)
+
+    Args:
+        left: ผลรวมย่อย
+        right: ผลรวมย่อย
+
+    Returns:
+        ผลรวมย่อยที่รวมแล้ว
+    """
+    merged = dict(left)
+    for key, value in right.items():
+        if key not in merged:
+            merged[key] = value
+        elif isinstance(value, dict):
+            merged[key] = merge_rollups(merged[key], value)
+        else:
+            merged[key] = merged[key] + value
+    return merged
+
+
+def branch_partial(task: Tuple[str, str, str, str]) -> Dict:
+    """
+    ผลรวมย่อยของสาขาหนึ่ง (รันใน worker process)
+
+    Args:
+        task: (ชื่อสาขา, โฟลเดอร์ข้อมูล, วันเริ่มต้น, วันสิ้นสุด)
+
+    Returns:
+        {"daily": {วันที่: {สาขา: ยอด}}, "monthly": {เดือน: {สาขา: ยอด}}}
+    """
+    branch, data_dir, start, end = task
+    if not os.path.isdir(data_dir):
+        print(f"⚠️ ไม่พบโฟลเดอร์ข้อมูลของสาขา {branch}: {data_dir}")
+    partial = empty_rollup()
+    for summary in branch_summaries(data_dir, start, end):
+        day = {"daily": {summary["date"]: {branch: _totals(summary)}},
+               "monthly": {summary["date"][:7]: {branch: _totals(summary)}}}
+        partial = merge_rollups(partial, day)
+    return partial
+
+
+def consolidate(
+    branches: List[Tuple[str, str]],
+    start: str,
+    end: str,
+    workers: Optional[int] = None
+) -> Dict:
+    """
+    รวมผลรวมย่อยของทุกสาขา
+
+    Args:
+        branches: [(ชื่อสาขา, โฟลเดอร์ข้อมูล)]
+        start: วันเริ่มต้น (รวม)
+        end: วันสิ้นสุด (รวม)
+        workers: จำนวน process (None = ตามจำนวน CPU, 1 = ทำใน process นี้)
+
+    Returns:
+        ผลรวมย่อยของทุกสาขา
+    """
+    tasks = [(name, data_dir, start, end) for name, data_dir in branches]
+    if workers == 1 or len(tasks) <= 1:
+        partials = map(branch_partial, tasks)
+        return reduce(merge_rollups, partials, empty_rollup())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # รวมทีละผลตามลำดับที่ได้ ไม่ต้องถือผลของทุกสาขาพร้อมกัน
+        return reduce(merge_rollups, pool.map(branch_partial, tasks), empty_rollup())
+
+
+def _to_baht(totals: Dict[str, int]) -> Dict:
+    result = {field: money.to_baht(totals.get(field, 0)) for field in MONEY_FIELDS}
+    result.update({field: totals.get(field, 0) for field in COUNT_FIELDS})
+    return result
+
+
+def build_report(rollup: Dict, branches: List[str], start: str, end: str) -> Dict:
+    """
+    รายงานรวม (ยอดเป็นบาท) แยกรายวันและรายเดือน พร้อมยอดของแต่ละสาขา
+
+    Args:
+        rollup: ผลจาก consolidate
+        branches: ชื่อสาขาทั้งหมด
+        start: วันเริ่มต้น
+        end: วันสิ้นสุด
+    """
+    def rows(period: str, groups: Dict) -> List[Dict]:
+        result = []
+        for key in sorted(groups):
+            by_branch = groups[key]
+            total = reduce(merge_rollups, by_branch.values(), {})
+            result.append({
+                period: key,
+                "total": _to_baht(total),
+                "branches": {name: _to_baht(by_branch[name]) for name in sorted(by_branch)},
+            })
+        return result
+
+    monthly = rollup["monthly"]
+    grand = reduce(merge_rollups, (totals for group in monthly.values() for totals in group.values()), {})
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "start": start,
+        "end": end,
+        "branches": branches,
+        "total": _to_baht(grand),
+        "monthly": rows("month", monthly),
+        "daily": rows("date", rollup["daily"]),
+    }
+
+
+def _parse_branch(value: str) -> Tuple[str, str]:
+    name, separator, path = value.partition("=")
+    if not separator or not name or not path:
+        raise argparse.ArgumentTypeError("รูปแบบต้องเป็น ชื่อสาขา=โฟลเดอร์ข้อมูล")
+    return name, path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI รวมรายงานหลายสาขา"""
+    parser = argparse.ArgumentParser(description="รวมรายงานยอดขายหลายสาขา")
+    parser.add_argument("--branch", type=_parse_branch, action="append", required=True,
+                        help="ชื่อสาขา=โฟลเดอร์ข้อมูล (ระบุได้หลายครั้ง)")
+    parser.add_argument("--start", required=True, type=parse_date)
+    parser.add_argument("--end", type=parse_date, help="ค่าเริ่มต้นคือวันเริ่มต้น")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("-o", "--output", default="consolidated_report.json")
+    args = parser.parse_args(argv)
+    end = args.end or args.start
+
+    rollup = consolidate(args.branch, args.start, end, args.workers)
+    report = build_report(rollup, [name for name, _ in args.branch], args.start, end)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"🏢 รวม {len(args.branch)} สาขา {args.start} ถึง {end}")
+    for row in report["monthly"]:
+        print(f"• {row['month']}: ยอดขาย {row['total']['total_sales']:,.0f} บาท | "
+              f"{row['total']['total_orders']} ออเดอร์ | {row['total']['days']} วัน-สาขา")
+    print(f"📄 บันทึกรายงานที่ {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
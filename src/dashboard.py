@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูล Dashboard แบบ Server-Sent Events ATMO'decor
+
+- Broadcaster: ส่งเหตุการณ์ของวัน (ออเดอร์ใหม่ ยอดที่เปลี่ยน tier OT) ให้เบราว์เซอร์
+  ทุกตัวที่เชื่อมต่ออยู่จากใน process เดียว ไม่ต้อง polling หรืออ่านไฟล์ข้อมูล
+- เบราว์เซอร์ได้ snapshot ตอนเชื่อมต่อ หลังจากนั้นได้เฉพาะส่วนที่เปลี่ยน
+- เชื่อมต่อใหม่ด้วย Last-Event-ID จะได้เหตุการณ์ที่พลาดไปจาก ring buffer
+  (ถ้าเก่าเกินไปจะได้ snapshot ใหม่แทน)
+
+แต่ละการเชื่อมต่อใช้ thread ของ gunicorn หนึ่งตัว จึงจำกัดจำนวนผู้ชมและปิด stream
+เป็นระยะ (เบราว์เซอร์เชื่อมต่อใหม่เองโดยอัตโนมัติ) เพื่อไม่ให้แย่ง thread ของ Webhook
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# ฟิลด์ในข้อมูลสรุปที่ไม่ต้องส่งซ้ำเมื่อไม่เปลี่ยน
+_SUMMARY_SKIP = ("staff_names",)
+
+
+def format_event(event_id: Optional[int], event: str, data: Dict) -> str:
+    """
+    แปลงเหตุการณ์เป็นรูปแบบ text/event-stream
+
+    Args:
+        event_id: รหัสเหตุการณ์ (None = ไม่ระบุ)
+        event: ชื่อเหตุการณ์
+        data: ข้อมูล (แปลงเป็น JSON)
+
+    Returns:
+        ข้อความ SSE หนึ่งเหตุการณ์
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def summary_delta(before: Dict, after: Dict) -> Dict:
+    """
+    ฟิลด์ของข้อมูลสรุปที่เปลี่ยน
+
+    Args:
+        before: ข้อมูลสรุปก่อนเปลี่ยน
+        after: ข้อมูลสรุปหลังเปลี่ยน
+
+    Returns:
+        {ฟิลด์: ค่าใหม่} เฉพาะที่เปลี่ยน
+    """
+    return {
+        key: value for key, value in after.items()
+        if key not in _SUMMARY_SKIP and before.get(key) != value
+    }
+
+
+class Subscription:
+    """ผู้ชมหนึ่งราย (คิวเหตุการณ์ของเบราว์เซอร์หนึ่งตัว)"""
+
+    def __init__(self, max_pending: int):
+        self.queue: "queue.Queue[Tuple[int, str, Dict]]" = queue.Queue(max_pending)
+        # ถูกตัดเพราะอ่านไม่ทัน เบราว์เซอร์จะเชื่อมต่อใหม่และได้ snapshot
+        self.dropped = False
+
+
+class Broadcaster:
+    """กระจายเหตุการณ์ของวันให้ผู้ชมทุกคน"""
+
+    def __init__(self, max_clients: int = 4, history: int = 256, max_pending: int = 100):
+        """
+        สร้าง instance ของ Broadcaster
+
+        Args:
+            max_clients: จำนวนผู้ชมพร้อมกันสูงสุด
+            history: จำนวนเหตุการณ์ล่าสุดที่เก็บไว้สำหรับการเชื่อมต่อใหม่
+            max_pending: จำนวนเหตุการณ์ที่ค้างต่อผู้ชมก่อนถูกตัด
+        """
+        self.max_clients = max_clients
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscription] = []
+        self._history: deque = deque(maxlen=history)
+        # เริ่มรหัสจากเวลาปัจจุบัน (มิลลิวินาที) รหัสหลัง process เริ่มใหม่จึงมากกว่าของเดิม
+        # เบราว์เซอร์ที่เชื่อมต่อใหม่ด้วยรหัสจาก process เก่าจะได้ snapshot แทนการ replay
+        self._next_id = int(time.time() * 1000)
+
+    def publish(self, event: str, data: Dict) -> int:
+        """
+        ส่งเหตุการณ์ให้ผู้ชมทุกคน (ไม่บล็อก)
+
+        Args:
+            event: ชื่อเหตุการณ์ เช่น "order", "tier", "ot", "day"
+            data: ข้อมูลที่แปลงเป็น JSON ได้
+
+        Returns:
+            รหัสเหตุการณ์
+        """
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            item = (event_id, event, data)
+            self._history.append(item)
+            for subscription in self._subscribers:
+                if subscription.dropped:
+                    continue
+                try:
+                    subscription.queue.put_nowait(item)
+                except queue.Full:
+                    subscription.dropped = True
+            return event_id
+
+    def subscribe(
+        self,
+        snapshot_func: Callable[[], Dict],
+        last_event_id: Optional[int] = None
+    ) -> Optional[Tuple[Subscription, List[Tuple[Optional[int], str, Dict]]]]:
+        """
+        เพิ่มผู้ชม พร้อมเหตุการณ์เริ่มต้น (เหตุการณ์ที่พลาดไป หรือ snapshot)
+
+        Args:
+            snapshot_func: ฟังก์ชันคืนข้อมูลปัจจุบันทั้งหมดสำหรับ snapshot
+                (ถูกเรียกขณะถือ lock ของ Broadcaster จึงห้ามรอ lock อื่นที่ผู้ publish ถืออยู่)
+            last_event_id: รหัสเหตุการณ์ล่าสุดที่เบราว์เซอร์ได้รับ (จาก Last-Event-ID)
+
+        Returns:
+            (Subscription, รายการเหตุการณ์เริ่มต้น) หรือ None ถ้าผู้ชมเต็ม
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscription = Subscription(self.max_pending)
+            self._subscribers.append(subscription)
+
+            # ถือ lock ระหว่างสร้างเหตุการณ์เริ่มต้น เหตุการณ์ใหม่จึงเข้าคิวหลังจากนี้เท่านั้น
+            oldest = self._history[0][0] if self._history else self._next_id
+            if last_event_id is not None and oldest <= last_event_id + 1 <= self._next_id:
+                initial = [item for item in self._history if item[0] > last_event_id]
+            else:
+                initial = [(self._next_id - 1, "snapshot", snapshot_func())]
+            return subscription, initial
+
+    def unsubscribe(self, subscription: Subscription):
+        """ลบผู้ชม"""
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def client_count(self) -> int:
+        """จำนวนผู้ชมที่เชื่อมต่ออยู่"""
+        with self._lock:
+            return len(self._subscribers)
+
+    def stream(
+        self,
+        subscription: Subscription,
+        initial: List[Tuple[Optional[int], str, Dict]],
+        heartbeat: float = 15,
+        max_seconds: float = 240
+    ) -> Iterator[str]:
+        """
+        สร้าง text/event-stream ของผู้ชมหนึ่งราย
+
+        Args:
+            subscription: จาก subscribe()
+            initial: เหตุการณ์เริ่มต้นจาก subscribe()
+            heartbeat: ส่ง comment ทุกกี่วินาทีเมื่อไม่มีเหตุการณ์ (กัน proxy ตัดการเชื่อมต่อ)
+            max_seconds: ปิด stream หลังจากกี่วินาที (เบราว์เซอร์เชื่อมต่อใหม่เอง)
+
+        Yields:
+            ข้อความ SSE
+        """
+        try:
+            yield "retry: 3000\n\n"
+            for event_id, event, data in initial:
+                yield format_event(event_id, event, data)
+
+            deadline = time.monotonic() + max_seconds
+            while not subscription.dropped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event_id, event, data = subscription.queue.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield format_event(event_id, event, data)
+        finally:
+            self.unsubscribe(subscription)
+
+
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head>
+    <title>ATMO'decor Dashboard</title>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <style>
+        body { font-family: Arial, sans-serif; max-width: 900px; margin: 30px auto; padding: 0 16px; color: #333; }
+        .grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: 12px; }
+        .card { background: #f0f0f0; padding: 14px; border-radius: 6px; }
+        .card .label { color: #666; font-size: 13px; }
+        .card .value { font-size: 24px; font-weight: bold; margin-top: 4px; }
+        .flash { animation: flash 1s; }
+        @keyframes flash { from { background: #fff3b0; } to { background: #f0f0f0; } }
+        table { width: 100%; border-collapse: collapse; margin-top: 20px; }
+        td, th { text-align: left; padding: 6px; border-bottom: 1px solid #ddd; }
+        tr.voided td { color: #aaa; text-decoration: line-through; }
+        #status { float: right; font-size: 13px; color: #999; }
+    </style>
+</head>
+<body>
+    <h1>📊 ATMO'decor <span id="date"></span><span id="status">กำลังเชื่อมต่อ...</span></h1>
+    <div class="grid">
+        <div class="card"><div class="label">ยอดขายรวม (บาท)</div><div class="value" id="total_sales">-</div></div>
+        <div class="card"><div class="label">จำนวนออเดอร์</div><div class="value" id="total_orders">-</div></div>
+        <div class="card"><div class="label">เรทปัจจุบัน</div><div class="value" id="rate">-</div></div>
+        <div class="card"><div class="label">ช่วง 18:00-22:00 (บาท)</div><div class="value" id="ot_sales">-</div></div>
+        <div class="card"><div class="label">คอมมิชชั่นรวม (บาท)</div><div class="value" id="commission_total">-</div></div>
+        <div class="card"><div class="label">Incentive ต่อคน (บาท)</div><div class="value" id="incentive_per_person">-</div></div>
+    </div>
+    <table>
+        <thead><tr><th>#</th><th>เวลา</th><th>สินค้า</th><th>ยอดเงิน</th></tr></thead>
+        <tbody id="orders"></tbody>
+    </table>
+    <script>
+        const fields = ["total_sales", "total_orders", "ot_sales", "commission_total", "incentive_per_person"];
+        const money = (value) => Number(value).toLocaleString("th-TH", {maximumFractionDigits: 2});
+        const rows = new Map();
+
+        function setField(name, value) {
+            const element = document.getElementById(name);
+            if (!element) return;
+            element.textContent = name === "total_orders" ? value : money(value);
+            element.parentElement.classList.remove("flash");
+            void element.parentElement.offsetWidth;
+            element.parentElement.classList.add("flash");
+        }
+
+        function applyTotals(totals) {
+            for (const name of fields) {
+                if (name in totals) setField(name, totals[name]);
+            }
+            if ("date" in totals) document.getElementById("date").textContent = totals.date || "";
+            if ("rate" in totals) document.getElementById("rate").textContent = (totals.rate * 100) + "%";
+        }
+
+        function upsertOrder(order) {
+            let row = rows.get(order.order_id);
+            if (!row) {
+                row = document.createElement("tr");
+                rows.set(order.order_id, row);
+                document.getElementById("orders").prepend(row);
+            }
+            row.className = order.voided ? "voided" : "";
+            row.innerHTML = "";
+            for (const value of [order.order_id, order.time, order.product_name, money(order.amount)]) {
+                const cell = document.createElement("td");
+                cell.textContent = value;
+                row.appendChild(cell);
+            }
+        }
+
+        function reset(snapshot) {
+            rows.clear();
+            document.getElementById("orders").innerHTML = "";
+            applyTotals(snapshot.summary);
+            for (const order of snapshot.orders) upsertOrder(order);
+        }
+
+        const source = new EventSource("/dashboard/events" + window.location.search);
+        source.onopen = () => document.getElementById("status").textContent = "🟢 live";
+        source.onerror = () => document.getElementById("status").textContent = "🔴 กำลังเชื่อมต่อใหม่...";
+        source.addEventListener("snapshot", (e) => reset(JSON.parse(e.data)));
+        source.addEventListener("day", (e) => reset(JSON.parse(e.data)));
+        source.addEventListener("order", (e) => {
+            const data = JSON.parse(e.data);
+            upsertOrder(data.order);
+            applyTotals(data.totals);
+        });
+        source.addEventListener("totals", (e) => applyTotals(JSON.parse(e.data)));
+        source.addEventListener("tier", (e) => applyTotals(JSON.parse(e.data)));
+        source.addEventListener("ot", (e) => applyTotals(JSON.parse(e.data)));
+    </script>
+</body>
+</html>
+"""
@@ -5,68 +5,237 @@
 
 import json
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional
 import shutil
+import zipfile
+
+from .metrics import timed, ORDERS_TOTAL, IMAGES_TOTAL
+from .orders import Order, OrderBook
+from . import money
+from .money import Ledger
+from .time_buckets import DEFAULT_WINDOWS, TimeBuckets, TimeWindow, validate_windows
+from .tracing import traced
+
+# คีย์ที่เป็นรายละเอียดของวัน (ไม่รวมในข้อมูลสรุป)
+_DETAIL_KEYS = ("orders", "ledger", "buckets", "changes", "undone_adds", "staff")
+
+
+class SummarySnapshot(NamedTuple):
+    """ข้อมูลสรุปของวันที่แก้ไขไม่ได้ ณ การบันทึกครั้งหนึ่ง"""
+    version: int  # เพิ่มขึ้นทุกครั้งที่บันทึก
+    etag: str  # ไม่ซ้ำข้าม process (ใช้เป็น HTTP ETag หรือ cache key)
+    summary: Mapping
+    modified: float  # เวลาที่บันทึก (epoch seconds ใช้เป็น HTTP Last-Modified)
+
+
+def _order_satang(order: Order) -> Dict[str, int]:
+    """ยอดเงินแต่ละองค์ประกอบของออเดอร์ (สตางค์) ออเดอร์ที่ยกเลิกเป็น 0 ทั้งหมด"""
+    if order.voided:
+        return {}
+    return {
+        money.SALES: money.to_satang(order.amount),
+        money.COMMISSION_1: money.to_satang(order.commission_1),
+        money.COMMISSION_5: money.to_satang(order.commission_5),
+        money.ADD_ON_2VASES: money.to_satang(order.add_on_2vases),
+    }
 
 
 class SalesDatabase:
     """คลาสสำหรับจัดการข้อมูลยอดขายและคอมมิชชั่น"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(
+        self,
+        data_dir: str = "data",
+        windows: Optional[List[TimeWindow]] = None,
+        bucket_minutes: int = 15,
+        day_start: int = 0,
+        clock: Callable[[], datetime] = datetime.now
+    ):
         """
         สร้าง instance ของ SalesDatabase
         
         Args:
             data_dir: โฟลเดอร์สำหรับเก็บข้อมูล
+            windows: ช่วงเวลาที่บันทึกยอดขายในข้อมูลสรุป (ค่าเริ่มต้น 18-22 และ 22-00)
+            bucket_minutes: ความละเอียดของดัชนียอดขายตามเวลา (นาที)
+            day_start: เวลาเริ่มวันทำการ (นาทีนับจากเที่ยงคืน)
+            clock: ฟังก์ชันเวลาปัจจุบันสำหรับชื่อไฟล์รูปภาพและไฟล์สำรอง
         """
+        self.windows = list(windows) if windows is not None else list(DEFAULT_WINDOWS)
+        self.bucket_minutes = bucket_minutes
+        self.day_start = day_start
+        self.clock = clock
+        validate_windows(self.windows, bucket_minutes, day_start)
+        
         self.data_dir = data_dir
         self.data_file = os.path.join(data_dir, "sales_data.json")
         self.images_dir = os.path.join(data_dir, "images")
         
+        # ล็อกสำหรับ worker หลายตัวที่อ่าน-คำนวณ-บันทึกพร้อมกัน
+        self.lock = threading.RLock()
+        
         # สร้างโฟลเดอร์ถ้ายังไม่มี
         os.makedirs(data_dir, exist_ok=True)
         os.makedirs(self.images_dir, exist_ok=True)
         
-        # โหลดข้อมูล
-        self.data = self._load_data()
+        # ข้อมูลของวันโหลดเมื่อถูกใช้ครั้งแรก (ไม่ให้ช่วงเริ่มระบบต้องอ่านไฟล์)
+        self._data: Optional[Dict] = None
+        
+        # ผู้อ่านได้ snapshot ล่าสุดโดยไม่ต้องล็อก (แทนที่ทั้ง object ทุกครั้งที่บันทึก)
+        self._snapshot: Optional[SummarySnapshot] = None
+        self._version = 0
+        self._epoch = format(int(time.time() * 1000), "x")
+    
+    @property
+    def data(self) -> Dict:
+        """ข้อมูลของวันปัจจุบัน (โหลดจากไฟล์เมื่อเรียกใช้ครั้งแรก)"""
+        if self._data is None:
+            with self.lock:
+                if self._data is None:
+                    self._data = self._load_data()
+                    self._publish_snapshot()
+        return self._data
+    
+    @data.setter
+    def data(self, value: Dict):
+        self._data = value
     
     def _load_data(self) -> Dict:
         """โหลดข้อมูลจากไฟล์"""
         if os.path.exists(self.data_file):
             try:
                 with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    data = json.load(f)
+                data["orders"] = OrderBook.from_dicts(data.get("orders", []))
+                # ไฟล์รุ่นก่อนที่ยังไม่มี ledger สร้างจากรายการออเดอร์
+                if "ledger" in data:
+                    data["ledger"] = Ledger.from_json(data["ledger"])
+                else:
+                    data["ledger"] = Ledger.from_orders(data["orders"])
+                data["changes"] = self._migrate_changes(data.get("changes", []))
+                data.setdefault("undone_adds", [])
+                # ไฟล์รุ่นก่อนที่ยังไม่มียอดตามผู้ส่ง สร้างจากรายการออเดอร์
+                if "staff" not in data:
+                    data["staff"] = self._build_staff(data["orders"])
+                # ดัชนีตามเวลาไม่ได้บันทึกลงไฟล์ สร้างใหม่จากรายการออเดอร์
+                data["buckets"] = self._build_buckets(data["orders"])
+                for window in self.windows:
+                    data[window.name] = money.to_baht(data["buckets"].window_sum(window)[0])
+                return data
             except:
                 return self._init_data()
         return self._init_data()
     
+    @staticmethod
+    def _migrate_changes(changes: List[Dict]) -> List[Dict]:
+        """
+        แปลงประวัติรุ่นก่อน (มีรายการ "add" ทุกออเดอร์และเก็บออเดอร์เดิมทั้งรายการ) เป็นรุ่นปัจจุบัน
+        
+        รายการแก้ไขได้จำนวนออเดอร์ ณ เวลาที่แก้ไข จากจำนวนรายการ "add" ก่อนหน้า
+        """
+        if all("orders" in change for change in changes):
+            return changes
+        migrated = []
+        added = 0
+        for change in changes:
+            if change.get("op") == "add":
+                added += 1
+            else:
+                migrated.append({**change, "orders": change.get("orders", added)})
+        return migrated
+    
+    def _build_buckets(self, orders) -> TimeBuckets:
+        """สร้างดัชนียอดขายตามเวลาจากรายการออเดอร์"""
+        buckets = TimeBuckets(self.bucket_minutes, self.day_start)
+        for order in orders:
+            if not order.voided:
+                buckets.add(order.minutes, money.to_satang(order.amount), 1 if order.count_as_order else 0)
+        return buckets
+    
+    @staticmethod
+    def _build_staff(orders) -> Dict[str, Dict]:
+        """สร้างยอดตามผู้ส่งจากรายการออเดอร์"""
+        staff: Dict[str, Dict] = {}
+        for order in orders:
+            if order.user_id and not order.voided:
+                stats = staff.setdefault(order.user_id, {"name": None, "orders": 0, "sales": 0})
+                stats["orders"] += 1 if order.count_as_order else 0
+                stats["sales"] += money.to_satang(order.amount)
+        return staff
+    
     def _init_data(self) -> Dict:
         """สร้างข้อมูลเริ่มต้น"""
-        return {
+        data = {
             "date": None,
             "staff_count": 0,
             "staff_names": [],
             "total_sales": 0,
             "total_orders": 0,
-            "sales_18_22": 0,
-            "sales_22_00": 0,
-            "orders": [],
+            "orders": OrderBook(),
+            "ledger": Ledger(),
+            "buckets": TimeBuckets(self.bucket_minutes, self.day_start),
+            # การแก้ไข/ยกเลิกออเดอร์ตามลำดับ สำหรับ /undo (เก็บเฉพาะฟิลด์ที่เปลี่ยนและจำนวนออเดอร์ ณ ตอนนั้น)
+            # การเพิ่มออเดอร์ไม่ต้องบันทึก ย้อนได้จากลำดับของออเดอร์เอง
+            "changes": [],
+            # รหัสออเดอร์ที่ย้อนการเพิ่มไปแล้ว
+            "undone_adds": [],
+            # ยอดตามผู้ส่ง {user_id: {"name", "orders", "sales" (สตางค์)}}
+            "staff": {},
             "commission_1_total": 0,
             "commission_5_total": 0,
             "add_on_2vases": 0,
             "add_on_order": 0,
+            # ยอดขายช่วง OT ที่ใช้คิด penalty (ไม่ขึ้นกับ SALES_WINDOWS)
+            "ot_sales": 0,
             "ot_penalty": 0,
             "commission_total": 0,
             "incentive_per_person": 0,
             "is_started": False
         }
+        for window in self.windows:
+            data[window.name] = 0
+        return data
     
+    def _publish_snapshot(self):
+        """สร้าง snapshot ใหม่ของข้อมูลสรุป (เรียกขณะถือ lock หรือก่อนมีผู้อ่าน)"""
+        summary = {key: value for key, value in self.data.items() if key not in _DETAIL_KEYS}
+        summary["staff_names"] = tuple(summary.get("staff_names") or ())
+        summary["staff_stats"] = {
+            user_id: {"name": stats["name"], "orders": stats["orders"], "sales": money.to_baht(stats["sales"])}
+            for user_id, stats in self.data.get("staff", {}).items()
+        }
+        self._version += 1
+        self._snapshot = SummarySnapshot(
+            self._version,
+            f'"{self._epoch}-{self._version}"',
+            MappingProxyType(summary),
+            time.time()
+        )
+    
+    def _commit(self):
+        """เผยแพร่ snapshot ใหม่แล้วบันทึกลงไฟล์ (เรียกหลังแก้ไขข้อมูลทุกครั้ง)"""
+        self._publish_snapshot()
+        self._save_data()
+    
+    @traced("db.save_data")
+    @timed("save_data")
     def _save_data(self):
         """บันทึกข้อมูลลงไฟล์"""
+        # แปลงออเดอร์เป็น dict เฉพาะตอนบันทึก
+        data = dict(self.data)
+        data["orders"] = self.data["orders"].to_dicts()
+        data["ledger"] = self.data["ledger"].to_json()
+        del data["buckets"]
+        # json.dumps แบบไม่มี indent ใช้ encoder ภาษา C (json.dump และ indent ใช้ encoder ภาษา Python)
+        content = json.dumps(data, ensure_ascii=False)
         with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
+            f.write(content)
     
+    @traced("db.start_day")
     def start_day(self, date: str, staff_count: int, staff_names: List[str]):
         """
         เริ่มต้นวันใหม่
@@ -91,7 +260,7 @@ class SalesDatabase:
         date_images_dir = os.path.join(self.images_dir, date)
         os.makedirs(date_images_dir, exist_ok=True)
         
-        self._save_data()
+        self._commit()
     
     def is_day_started(self) -> bool:
         """ตรวจสอบว่าเริ่มต้นวันแล้วหรือยัง"""
@@ -101,6 +270,7 @@ class SalesDatabase:
         """ดึงวันที่ปัจจุบัน"""
         return self.data.get("date")
     
+    @traced("db.add_order")
     def add_order(
         self,
         order_id: int,
@@ -113,7 +283,9 @@ class SalesDatabase:
         commission_5: float = 0,
         add_on_2vases: float = 0,
         is_special: bool = False,
-        count_as_order: bool = True
+        count_as_order: bool = True,
+        user_id: Optional[str] = None,
+        staff_name: Optional[str] = None
     ):
         """
         เพิ่มออเดอร์ใหม่
@@ -130,51 +302,171 @@ class SalesDatabase:
             add_on_2vases: Add on (2vases)
             is_special: เป็นสินค้าพิเศษหรือไม่
             count_as_order: นับเป็นออเดอร์หรือไม่
+            user_id: LINE user id ของผู้ส่ง
+            staff_name: ชื่อที่แสดงของผู้ส่ง (ถ้ามี ใช้แทนชื่อเดิม)
         """
-        order = {
-            "order_id": order_id,
-            "amount": amount,
-            "product_name": product_name,
-            "time": time,
-            "image_path": image_path,
-            "note": note,
-            "commission_1": commission_1,
-            "commission_5": commission_5,
-            "add_on_2vases": add_on_2vases,
-            "is_special": is_special,
-            "count_as_order": count_as_order
-        }
+        if user_id and staff_name:
+            self.data["staff"].setdefault(user_id, {"name": None, "orders": 0, "sales": 0})["name"] = staff_name
+        order = Order(
+            order_id=order_id,
+            amount=amount,
+            product_name=product_name,
+            time=time,
+            image_path=image_path,
+            note=note,
+            commission_1=commission_1,
+            commission_5=commission_5,
+            add_on_2vases=add_on_2vases,
+            is_special=is_special,
+            count_as_order=count_as_order,
+            user_id=user_id
+        )
         
         self.data["orders"].append(order)
-        self.data["total_sales"] += amount
+        self._apply_contribution(order, 1)
         
-        if count_as_order:
-            self.data["total_orders"] += 1
+        self._commit()
+        ORDERS_TOTAL.inc()
+    
+    def _apply_contribution(self, order: Order, sign: int):
+        """
+        บวก (sign=1) หรือหักออก (sign=-1) ยอดของออเดอร์จาก ledger, ดัชนีเวลาและยอดรวม
         
-        # อัพเดทยอดขายตามช่วงเวลา
-        if time:
-            try:
-                hour = int(time.split(':')[0])
-                if 18 <= hour < 22:
-                    self.data["sales_18_22"] += amount
-                elif 22 <= hour < 24:
-                    self.data["sales_22_00"] += amount
-            except:
-                pass
+        Args:
+            order: ออเดอร์
+            sign: 1 หรือ -1
+        """
+        if order.voided:
+            return
         
-        # อัพเดทคอมมิชชั่น
-        self.data["commission_1_total"] += commission_1
-        self.data["commission_5_total"] += commission_5
-        self.data["add_on_2vases"] += add_on_2vases
+        # บันทึกยอดเงินแต่ละองค์ประกอบเป็นสตางค์ แล้วคำนวณยอดรวมจาก ledger (ไม่สะสม float)
+        ledger = self.data["ledger"]
+        amounts = _order_satang(order)
+        for component in money.ORDER_COMPONENTS:
+            ledger.post(order.order_id, component, sign * amounts[component])
         
-        self._save_data()
+        if order.count_as_order:
+            self.data["total_orders"] += sign
+        
+        # ยอดตามผู้ส่ง (แก้ไข/ยกเลิก/ย้อน ผ่านฟังก์ชันนี้ จึงปรับตามเสมอ)
+        if order.user_id:
+            stats = self.data["staff"].setdefault(order.user_id, {"name": None, "orders": 0, "sales": 0})
+            stats["sales"] += sign * amounts[money.SALES]
+            if order.count_as_order:
+                stats["orders"] += sign
+        
+        # อัพเดทยอดขายตามช่วงเวลาจากดัชนี (ออเดอร์ทุกเวลาอยู่ในดัชนี แม้ไม่อยู่ในช่วงใด)
+        self.data["buckets"].add(order.minutes, sign * amounts[money.SALES], sign if order.count_as_order else 0)
+        self._refresh_totals()
+    
+    def _refresh_totals(self):
+        """คำนวณยอดรวมของวันจาก ledger และยอดตามช่วงเวลาจากดัชนี"""
+        ledger = self.data["ledger"]
+        self.data["total_sales"] = money.to_baht(ledger.total(money.SALES))
+        self.data["commission_1_total"] = money.to_baht(ledger.total(money.COMMISSION_1))
+        self.data["commission_5_total"] = money.to_baht(ledger.total(money.COMMISSION_5))
+        self.data["add_on_2vases"] = money.to_baht(ledger.total(money.ADD_ON_2VASES))
+        
+        buckets = self.data["buckets"]
+        for window in self.windows:
+            self.data[window.name] = money.to_baht(buckets.window_sum(window)[0])
+    
+    @traced("db.update_order")
+    def update_order(
+        self,
+        order_id: int,
+        changes: Dict,
+        op: str = "edit",
+        adjustments: Optional[Dict[str, int]] = None,
+        record: bool = True
+    ) -> Optional[Order]:
+        """
+        แก้ไขหรือยกเลิกออเดอร์ โดยบันทึกส่วนต่างลง ledger และดัชนี (ไม่คำนวณทั้งวันใหม่)
+        
+        Args:
+            order_id: รหัสออเดอร์
+            changes: ฟิลด์ที่เปลี่ยน เช่น {"amount": 1200, "commission_1": 12.0} หรือ {"voided": True}
+            op: ประเภทการเปลี่ยนแปลง ("edit" หรือ "void") สำหรับประวัติ
+            adjustments: รายการปรับยอดเพิ่มเติม {องค์ประกอบ: สตางค์} ที่บันทึกในนามออเดอร์นี้
+                (เช่น คอมมิชชั่น 1-4% ของออเดอร์ถัดไปที่เปลี่ยนเพราะยอดสะสมเปลี่ยน)
+            record: บันทึกลงประวัติสำหรับ /undo หรือไม่
+            
+        Returns:
+            ออเดอร์หลังแก้ไข หรือ None ถ้าไม่พบออเดอร์
+        """
+        with self.lock:
+            orders = self.data["orders"]
+            old = orders.get(order_id)
+            if old is None:
+                return None
+            
+            new = Order.from_dict({**old.to_dict(), **changes})
+            orders.replace(new)
+            self._apply_contribution(old, -1)
+            self._apply_contribution(new, 1)
+            
+            ledger = self.data["ledger"]
+            for component, satang in (adjustments or {}).items():
+                ledger.post(order_id, component, satang)
+            self._refresh_totals()
+            
+            if record:
+                before = old.to_dict()
+                self.data["changes"].append({
+                    "op": op,
+                    "order_id": order_id,
+                    "before": {field: before[field] for field in changes if field in before},
+                    "adjustments": dict(adjustments or {}),
+                    "orders": len(orders)
+                })
+            
+            self._commit()
+            return new
     
+    @traced("db.undo")
+    def undo(self) -> Optional[Dict]:
+        """
+        ย้อนการเปลี่ยนแปลงล่าสุด (เพิ่ม แก้ไข หรือยกเลิกออเดอร์)
+        
+        ย้อนตามลำดับจากล่าสุดเสมอ สถานะก่อนการเปลี่ยนแปลงจึงคืนกลับได้ตรงทุกสตางค์
+        การย้อนการเพิ่มออเดอร์จะยกเลิกออเดอร์นั้น (รหัสออเดอร์ไม่ถูกใช้ซ้ำ)
+        
+        การเพิ่มออเดอร์ไม่มีประวัติ: ออเดอร์ล่าสุดที่ยังไม่ถูกย้อนคือการเพิ่มล่าสุด
+        และการแก้ไขที่บันทึกเมื่อมีออเดอร์อย่างน้อยเท่านั้นเกิดหลังการเพิ่มนั้น
+        
+        Returns:
+            การเปลี่ยนแปลงที่ถูกย้อน หรือ None ถ้าไม่มี
+        """
+        with self.lock:
+            orders = self.data["orders"]
+            changes = self.data["changes"]
+            undone = self.data["undone_adds"]
+            # จำนวนออเดอร์จนถึงการเพิ่มล่าสุดที่ยังย้อนได้
+            added = len(orders)
+            while added and orders[added - 1].order_id in undone:
+                added -= 1
+            
+            if changes and changes[-1]["orders"] >= added:
+                change = changes.pop()
+                reverse = {component: -satang for component, satang in change["adjustments"].items()}
+                self.update_order(change["order_id"], change["before"], adjustments=reverse, record=False)
+                return change
+            if not added:
+                return None
+            
+            order_id = orders[added - 1].order_id
+            undone.append(order_id)
+            self.update_order(order_id, {"voided": True}, record=False)
+            return {"op": "add", "order_id": order_id, "before": None, "adjustments": {}}
+    
+    @traced("db.update_totals")
     def update_totals(
         self,
         add_on_order: float,
         ot_penalty: float,
         commission_total: float,
-        incentive_per_person: float
+        incentive_per_person: float,
+        ot_sales: Optional[float] = None
     ):
         """
         อัพเดทยอดรวม
@@ -184,30 +476,74 @@ class SalesDatabase:
             ot_penalty: OT Penalty
             commission_total: คอมมิชชั่นรวม
             incentive_per_person: Incentive ต่อคน
+            ot_sales: ยอดขายช่วง OT ที่ใช้คิด penalty (None = ไม่เปลี่ยน)
         """
-        self.data["add_on_order"] = add_on_order
-        self.data["ot_penalty"] = ot_penalty
-        self.data["commission_total"] = commission_total
-        self.data["incentive_per_person"] = incentive_per_person
+        # ปัดเป็นสตางค์ให้ยอดที่บันทึกตรงกับที่จ่ายจริง
+        self.data["add_on_order"] = money.to_baht(money.to_satang(add_on_order))
+        self.data["ot_penalty"] = money.to_baht(money.to_satang(ot_penalty))
+        if ot_sales is not None:
+            self.data["ot_sales"] = money.to_baht(money.to_satang(ot_sales))
+        self.data["commission_total"] = money.to_baht(money.to_satang(commission_total))
+        self.data["incentive_per_person"] = money.to_baht(money.to_satang(incentive_per_person))
         
-        self._save_data()
+        self._commit()
+    
+    def get_summary(self) -> Mapping:
+        """
+        ดึงข้อมูลสรุป (ยอดรวมของวัน ไม่รวมรายการออเดอร์และ ledger)
+        
+        คืน snapshot ที่แก้ไขไม่ได้ของการบันทึกครั้งล่าสุด O(1) ไม่ต้องรอ lock
+        ผู้เขียนสร้าง snapshot ใหม่ทุกครั้ง ค่าที่ได้ไปแล้วจึงไม่เปลี่ยนภายหลัง
+        """
+        return self.get_snapshot().summary
     
-    def get_summary(self) -> Dict:
-        """ดึงข้อมูลสรุป"""
-        return self.data.copy()
+    def get_snapshot(self) -> SummarySnapshot:
+        """ดึงข้อมูลสรุปพร้อมเวอร์ชันและ ETag (ใช้ข้ามการ render ซ้ำเมื่อเวอร์ชันไม่เปลี่ยน)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.data
+            snapshot = self._snapshot
+        return snapshot
     
-    def get_orders(self) -> List[Dict]:
+    def get_orders(self) -> OrderBook:
         """ดึงรายการออเดอร์ทั้งหมด"""
-        return self.data.get("orders", [])
+        return self.data["orders"]
+    
+    def get_order(self, order_id: int) -> Optional[Order]:
+        """ดึงออเดอร์ตามรหัส (None ถ้าไม่พบ)"""
+        return self.data["orders"].get(order_id)
+    
+    def sales_before(self, order_id: int) -> float:
+        """ยอดขายสะสมก่อนออเดอร์นี้ (บาท, O(log n))"""
+        return money.to_baht(self.data["orders"].sales_before(order_id))
+    
+    def get_ledger(self) -> Ledger:
+        """ดึงบัญชีรายการเงินต่อออเดอร์ (หน่วยสตางค์)"""
+        return self.data["ledger"]
+    
+    def get_time_buckets(self) -> TimeBuckets:
+        """ดึงดัชนียอดขายตามช่วงเวลาของวัน"""
+        return self.data["buckets"]
+    
+    def sales_between(self, start: str, end: str) -> float:
+        """
+        ยอดขายระหว่างเวลา (ข้ามเที่ยงคืนได้)
+        
+        Args:
+            start: เวลาเริ่ม "HH:MM" (รวม)
+            end: เวลาสิ้นสุด "HH:MM" (ไม่รวม)
+            
+        Returns:
+            ยอดขาย (บาท)
+        """
+        return money.to_baht(self.data["buckets"].clock_sum(start, end)[0])
     
     def get_order_images(self) -> List[str]:
         """ดึงรายการ path ของรูปภาพทั้งหมด"""
-        images = []
-        for order in self.data.get("orders", []):
-            if order.get("image_path"):
-                images.append(order["image_path"])
-        return images
+        return self.data["orders"].images()
     
+    @traced("db.save_image")
+    @timed("image_save")
     def save_image(self, image_data: bytes, order_id: int) -> str:
         """
         บันทึกรูปภาพ
@@ -219,19 +555,104 @@ class SalesDatabase:
         Returns:
             path ของรูปภาพที่บันทึก
         """
-        date = self.data.get("date", datetime.now().strftime("%Y-%m-%d"))
+        date = self.data.get("date", self.clock().strftime("%Y-%m-%d"))
         date_images_dir = os.path.join(self.images_dir, date)
         os.makedirs(date_images_dir, exist_ok=True)
         
-        timestamp = datetime.now().strftime("%H%M%S")
+        timestamp = self.clock().strftime("%H%M%S")
         filename = f"order_{order_id}_{timestamp}.jpg"
         filepath = os.path.join(date_images_dir, filename)
         
         with open(filepath, 'wb') as f:
             f.write(image_data)
         
+        IMAGES_TOTAL.inc()
         return filepath
     
+    def daily_rollup(self) -> Dict:
+        """
+        ข้อมูลสรุปรายวันที่คำนวณไว้ล่วงหน้า (ยอดรายชั่วโมง ออเดอร์ที่ยกเลิก สินค้าขายดี)
+        
+        Returns:
+            dict ของข้อมูลสรุปและยอดรายชั่วโมง
+        """
+        hourly: Dict[str, List[int]] = {}
+        for clock, sales, count in self.data["buckets"].series():
+            if sales or count:
+                hour = hourly.setdefault(clock[:2] + ":00", [0, 0])
+                hour[0] += sales
+                hour[1] += count
+        products: Dict[str, int] = {}
+        voided = 0
+        for order in self.data["orders"]:
+            if order.voided:
+                voided += 1
+            else:
+                products[order.product_name] = products.get(order.product_name, 0) + money.to_satang(order.amount)
+        top_products = sorted(products.items(), key=lambda item: item[1], reverse=True)[:10]
+        
+        return {
+            "summary": dict(self.get_summary()),
+            "hourly": [
+                {"hour": hour, "sales": money.to_baht(sales), "orders": count}
+                for hour, (sales, count) in hourly.items()
+            ],
+            "voided_orders": voided,
+            "top_products": [{"product_name": name, "sales": money.to_baht(sales)} for name, sales in top_products],
+        }
+    
+    @traced("db.close_day")
+    def close_day(self) -> Optional[Dict]:
+        """
+        ปิดวัน: บันทึกข้อมูลสรุปรายวันลง rollups/ สำรองข้อมูลของวันแล้วกลับเป็นสถานะยังไม่เริ่มวัน
+        
+        Returns:
+            ข้อมูลสรุปรายวัน (daily_rollup) หรือ None ถ้ายังไม่ได้เริ่มวัน
+        """
+        if not self.data.get("is_started"):
+            return None
+        
+        rollup = self.daily_rollup()
+        rollups_dir = os.path.join(self.data_dir, "rollups")
+        os.makedirs(rollups_dir, exist_ok=True)
+        with open(os.path.join(rollups_dir, f"{self.data.get('date')}.json"), 'w', encoding='utf-8') as f:
+            f.write(json.dumps(rollup, ensure_ascii=False))
+        
+        self._archive_data()
+        self.data = self._init_data()
+        self._commit()
+        return rollup
+    
+    @traced("db.compact_images")
+    def compact_images(self, date: str) -> Optional[str]:
+        """
+        รวมรูปภาพของวันที่ปิดแล้วเป็นไฟล์ zip เดียว (images/<วันที่>.zip) แล้วลบโฟลเดอร์ของวันนั้น
+        
+        Args:
+            date: วันที่ "YYYY-MM-DD"
+            
+        Returns:
+            path ของไฟล์ zip หรือ None ถ้าไม่มีรูปภาพ
+        """
+        date_images_dir = os.path.join(self.images_dir, date)
+        if not date or not os.path.isdir(date_images_dir):
+            return None
+        names = sorted(os.listdir(date_images_dir))
+        if not names:
+            os.rmdir(date_images_dir)
+            return None
+        
+        zip_path = os.path.join(self.images_dir, f"{date}.zip")
+        # JPEG บีบอัดแล้ว จึงเก็บแบบไม่บีบอัดซ้ำ (ZIP_STORED) เพื่อลดจำนวนไฟล์เท่านั้น
+        with zipfile.ZipFile(zip_path, 'a', compression=zipfile.ZIP_STORED) as archive:
+            existing = set(archive.namelist())
+            for name in names:
+                if name not in existing:
+                    archive.write(os.path.join(date_images_dir, name), name)
+        shutil.rmtree(date_images_dir)
+        return zip_path
+    
+    @traced("db.reset")
     def reset(self):
         """รีเซ็ตข้อมูลทั้งหมด"""
         # สำรองข้อมูลก่อนรีเซ็ต
@@ -239,8 +660,9 @@ class SalesDatabase:
             self._archive_data()
         
         self.data = self._init_data()
-        self._save_data()
+        self._commit()
     
+    @traced("db.archive_data")
     def _archive_data(self):
         """สำรองข้อมูลเก่า"""
         if not os.path.exists(self.data_file):
@@ -251,8 +673,8 @@ class SalesDatabase:
         os.makedirs(archive_dir, exist_ok=True)
         
         # ตั้งชื่อไฟล์สำรอง
-        date = self.data.get("date", datetime.now().strftime("%Y-%m-%d"))
-        timestamp = datetime.now().strftime("%H%M%S")
+        date = self.data.get("date", self.clock().strftime("%Y-%m-%d"))
+        timestamp = self.clock().strftime("%H%M%S")
         archive_file = os.path.join(archive_dir, f"sales_{date}_{timestamp}.json")
         
         # คัดลอกไฟล์
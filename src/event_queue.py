@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลคิวเหตุการณ์ Webhook แบบ durable ATMO'decor
+
+Webhook จะตรวจลายเซ็นแล้วเขียน body ลงคิวบนดิสก์ก่อนตอบ 'OK' ทันที
+ส่วนงานที่ช้า (แยกข้อความ, คำนวณคอมมิชชั่น, เขียนไฟล์, ตอบกลับ LINE)
+จะถูกประมวลผลโดย worker pool เบื้องหลัง เหตุการณ์ที่ล้มเหลวเกินจำนวนครั้ง
+ที่กำหนดจะถูกย้ายไปเก็บที่ dead letter และสั่ง replay ได้ผ่าน CLI
+(CLI ส่งคำสั่งไปที่ /admin/dead-letters ของเซิร์ฟเวอร์ที่กำลังรัน เพื่อให้ replay ใช้ข้อมูลชุดเดียวกับเซิร์ฟเวอร์)
+
+เมื่อลองใหม่หรือ replay ทั้ง body จะถูกประมวลผลอีกครั้ง แอปจึงบันทึกรหัสเหตุการณ์ที่ทำเสร็จแล้ว
+ไว้ใน ProcessedEvents และข้ามเหตุการณ์เหล่านั้น (ออเดอร์จะไม่ถูกบันทึกซ้ำ)
+
+หมายเหตุ: คิวนี้ออกแบบมาสำหรับ process เดียว (gunicorn --workers 1)
+
+การใช้งาน CLI:
+    python -m src.event_queue list
+    python -m src.event_queue replay <event_id> [<event_id> ...]
+    python -m src.event_queue replay --all --url http://127.0.0.1:5000
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from .metrics import timed, ERRORS_TOTAL
+
+# จำนวนรหัสเหตุการณ์ล่าสุดที่จำไว้ (LINE ส่งซ้ำภายในไม่กี่ชั่วโมง)
+PROCESSED_KEEP = 20000
+
+
+class ProcessedEvents:
+    """รหัสเหตุการณ์ที่ประมวลผลเสร็จแล้ว เก็บเป็นไฟล์ต่อท้ายและจำเฉพาะรายการล่าสุด"""
+
+    def __init__(self, path: str, keep: int = PROCESSED_KEEP):
+        """
+        โหลดรหัสเหตุการณ์จากไฟล์
+
+        Args:
+            path: path ของไฟล์ (หนึ่งรหัสต่อบรรทัด)
+            keep: จำนวนรหัสล่าสุดที่จำไว้
+        """
+        self.path = path
+        self.keep = max(1, keep)
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+        self._lines = 0
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    key = line.strip()
+                    if key:
+                        self._remember(key)
+                        self._lines += 1
+        except OSError:
+            pass
+
+    def _remember(self, key: str):
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.keep:
+            self._keys.popitem(last=False)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str):
+        """บันทึกว่าเหตุการณ์ประมวลผลเสร็จแล้ว (เขียนใหม่ทั้งไฟล์เมื่อไฟล์ยาวเกิน 2 เท่าของที่จำไว้)"""
+        with self._lock:
+            self._remember(key)
+            if self._lines >= 2 * self.keep:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.writelines(f"{item}\n" for item in self._keys)
+                os.replace(tmp_path, self.path)
+                self._lines = len(self._keys)
+                return
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(f"{key}\n")
+            self._lines += 1
+
+
+class EventQueue:
+    """คิวเหตุการณ์ Webhook ที่เก็บบนดิสก์พร้อม worker pool และ dead letter"""
+
+    def __init__(
+        self,
+        queue_dir: str = os.path.join("data", "queue"),
+        process_func: Optional[Callable[[str, str], None]] = None,
+        workers: int = 2,
+        max_attempts: int = 3,
+        retry_delay: float = 1.0
+    ):
+        """
+        สร้าง instance ของ EventQueue
+
+        Args:
+            queue_dir: โฟลเดอร์สำหรับเก็บคิว
+            process_func: ฟังก์ชันประมวลผลเหตุการณ์ รับ (body, signature)
+            workers: จำนวน worker thread
+            max_attempts: จำนวนครั้งสูงสุดที่ลองก่อนย้ายไป dead letter
+            retry_delay: เวลารอ (วินาที) ก่อนลองใหม่ คูณตามจำนวนครั้งที่ล้มเหลว
+        """
+        self.queue_dir = queue_dir
+        self.pending_dir = os.path.join(queue_dir, "pending")
+        self.dead_letter_dir = os.path.join(queue_dir, "dead_letter")
+        self.process_func = process_func
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+
+        os.makedirs(self.pending_dir, exist_ok=True)
+        os.makedirs(self.dead_letter_dir, exist_ok=True)
+        self.processed = ProcessedEvents(os.path.join(queue_dir, "processed.log"))
+
+        # แต่ละ worker มีคิวของตัวเอง เพื่อให้เหตุการณ์ของผู้ใช้คนเดียวกันเรียงลำดับเสมอ
+        # (เช่น รูปภาพต้องถูกประมวลผลก่อนข้อความออเดอร์ที่ตามมา)
+        self._queues = [queue.Queue() for _ in range(self.workers)]
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    def _pending_path(self, event_id: str) -> str:
+        return os.path.join(self.pending_dir, f"{event_id}.json")
+
+    def _dead_letter_path(self, event_id: str) -> str:
+        return os.path.join(self.dead_letter_dir, f"{event_id}.json")
+
+    @staticmethod
+    def _write_record(path: str, record: Dict):
+        """เขียนไฟล์แบบ atomic (เขียนไฟล์ชั่วคราวแล้ว rename)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_record(path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _partition_key(body: str) -> str:
+        """ดึง user id ของเหตุการณ์แรกใน body เพื่อใช้เลือก worker"""
+        try:
+            events = json.loads(body).get("events", [])
+            if events:
+                source = events[0].get("source", {})
+                return source.get("userId") or source.get("groupId") or ""
+        except (ValueError, AttributeError):
+            pass
+        return ""
+
+    def _dispatch(self, event_id: str, partition: str):
+        index = zlib.crc32(partition.encode('utf-8')) % self.workers
+        with self._in_flight_lock:
+            self._in_flight += 1
+        self._queues[index].put(event_id)
+
+    def _dispatch_later(self, event_id: str, partition: str, delay: float):
+        # นับเป็นงานค้างตั้งแต่ตอนนี้ ขนาดคิวจึงรวมเหตุการณ์ที่รอเวลาอยู่ด้วย
+        with self._in_flight_lock:
+            self._in_flight += 1
+        timer = threading.Timer(delay, self._requeue, args=(event_id, partition))
+        timer.daemon = True
+        timer.start()
+
+    def enqueue(self, body: str, signature: str, delay: float = 0) -> str:
+        """
+        เพิ่มเหตุการณ์ลงคิว (บันทึกลงดิสก์ก่อนส่งให้ worker)
+
+        Args:
+            body: Webhook request body
+            signature: X-Line-Signature
+            delay: เวลารอ (วินาที) ก่อนส่งให้ worker (เหตุการณ์ที่ค้างเมื่อเริ่มระบบใหม่จะส่งทันที)
+
+        Returns:
+            event_id ของเหตุการณ์
+        """
+        event_id = f"{time.time_ns()}_{uuid.uuid4().hex[:8]}"
+        partition = self._partition_key(body)
+        record = {
+            "event_id": event_id,
+            "body": body,
+            "signature": signature,
+            "partition": partition,
+            "received_at": datetime.now().isoformat(),
+            "attempts": 0,
+            "last_error": None
+        }
+        self._write_record(self._pending_path(event_id), record)
+        if delay > 0:
+            self._dispatch_later(event_id, partition, delay)
+        else:
+            self._dispatch(event_id, partition)
+        return event_id
+
+    def size(self) -> int:
+        """จำนวนเหตุการณ์ที่อยู่ในคิวหรือกำลังประมวลผล"""
+        return self._in_flight
+
+    def start(self):
+        """เริ่ม worker pool และกู้คืนเหตุการณ์ที่ค้างอยู่จากการรันครั้งก่อน"""
+        if self._threads:
+            return
+
+        self._stop_event.clear()
+        for filename in sorted(os.listdir(self.pending_dir)):
+            if not filename.endswith(".json"):
+                continue
+            event_id = filename[:-len(".json")]
+            record = self._read_record(self._pending_path(event_id))
+            if record is not None:
+                self._dispatch(event_id, record.get("partition", ""))
+
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(index,),
+                name=f"event-worker-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """หยุด worker pool (เหตุการณ์ที่ยังไม่เสร็จจะยังอยู่ในโฟลเดอร์ pending)"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def join(self, timeout: float = 10.0) -> bool:
+        """รอจนคิวว่าง คืนค่า False ถ้าหมดเวลา"""
+        deadline = time.monotonic() + timeout
+        while self._in_flight > 0:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _worker_loop(self, index: int):
+        work_queue = self._queues[index]
+        while not self._stop_event.is_set():
+            try:
+                event_id = work_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                self._process(event_id)
+            finally:
+                with self._in_flight_lock:
+                    self._in_flight -= 1
+                work_queue.task_done()
+
+    def _process(self, event_id: str):
+        """ประมวลผลเหตุการณ์หนึ่งรายการ พร้อมจัดการการลองใหม่และ dead letter"""
+        path = self._pending_path(event_id)
+        record = self._read_record(path)
+        if record is None:
+            return
+
+        try:
+            with timed("event"):
+                self.process_func(record["body"], record["signature"])
+        except Exception as e:
+            ERRORS_TOTAL.inc("event")
+            record["attempts"] = record.get("attempts", 0) + 1
+            record["last_error"] = f"{type(e).__name__}: {e}"
+
+            if record["attempts"] >= self.max_attempts:
+                record["failed_at"] = datetime.now().isoformat()
+                self._write_record(self._dead_letter_path(event_id), record)
+                os.remove(path)
+                print(f"ย้ายเหตุการณ์ {event_id} ไปที่ dead letter: {record['last_error']}")
+                return
+
+            self._write_record(path, record)
+            self._dispatch_later(event_id, record.get("partition", ""), self.retry_delay * record["attempts"])
+            return
+
+        os.remove(path)
+
+    def _requeue(self, event_id: str, partition: str):
+        index = zlib.crc32(partition.encode('utf-8')) % self.workers
+        self._queues[index].put(event_id)
+
+    def dead_letter_count(self) -> int:
+        """จำนวนเหตุการณ์ใน dead letter"""
+        return sum(1 for filename in os.listdir(self.dead_letter_dir) if filename.endswith(".json"))
+
+    def list_dead_letters(self) -> List[Dict]:
+        """ดึงรายการเหตุการณ์ใน dead letter เรียงตามเวลาที่รับ"""
+        records = []
+        for filename in sorted(os.listdir(self.dead_letter_dir)):
+            if filename.endswith(".json"):
+                record = self._read_record(os.path.join(self.dead_letter_dir, filename))
+                if record is not None:
+                    records.append(record)
+        return records
+
+    def replay_dead_letter(self, event_id: str) -> bool:
+        """
+        ประมวลผลเหตุการณ์ใน dead letter อีกครั้งแบบ synchronous
+
+        Args:
+            event_id: รหัสเหตุการณ์
+
+        Returns:
+            True ถ้าประมวลผลสำเร็จ (และลบออกจาก dead letter แล้ว)
+        """
+        path = self._dead_letter_path(event_id)
+        record = self._read_record(path)
+        if record is None:
+            return False
+
+        try:
+            self.process_func(record["body"], record["signature"])
+        except Exception as e:
+            record["attempts"] = record.get("attempts", 0) + 1
+            record["last_error"] = f"{type(e).__name__}: {e}"
+            self._write_record(path, record)
+            return False
+
+        os.remove(path)
+        return True
+
+
+def main(argv: Optional[List[str]] = None):
+    """CLI สำหรับดูและ replay เหตุการณ์ใน dead letter"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="จัดการ dead letter ของคิว Webhook")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="แสดงเหตุการณ์ใน dead letter")
+
+    replay_parser = subparsers.add_parser("replay", help="ประมวลผลเหตุการณ์ใน dead letter อีกครั้งผ่านเซิร์ฟเวอร์")
+    replay_parser.add_argument("event_ids", nargs="*")
+    replay_parser.add_argument("--all", action="store_true", help="replay ทุกเหตุการณ์")
+    replay_parser.add_argument("--url", default=f"http://127.0.0.1:{os.getenv('PORT', 8080)}",
+                               help="URL ของเซิร์ฟเวอร์ที่กำลังรัน")
+
+    args = parser.parse_args(argv)
+
+    # โฟลเดอร์เดียวกับที่แอปใช้ (DATA_DIR/queue)
+    event_queue = EventQueue(os.path.join(os.getenv("DATA_DIR", "data"), "queue"))
+
+    if args.command == "list":
+        for record in event_queue.list_dead_letters():
+            print(f"{record['event_id']}  attempts={record.get('attempts', 0)}  "
+                  f"received={record.get('received_at')}  error={record.get('last_error')}")
+        return
+
+    import requests
+
+    event_ids = args.event_ids
+    if args.all:
+        event_ids = [record["event_id"] for record in event_queue.list_dead_letters()]
+
+    for event_id in event_ids:
+        try:
+            response = requests.post(
+                f"{args.url.rstrip('/')}/admin/dead-letters/{event_id}/replay",
+                headers={"X-Admin-Secret": os.getenv("ADMIN_SECRET", "")},
+                timeout=60
+            )
+            ok = response.ok and response.json().get("replayed", False)
+            detail = "" if response.ok else f" (HTTP {response.status_code})"
+        except requests.RequestException as e:
+            ok, detail = False, f" ({e})"
+        print(f"{'✅' if ok else '❌'} {event_id}{detail}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลส่งออกข้อมูลยอดขาย ATMO'decor (CSV / JSON Lines)
+
+- iter_days: อ่านข้อมูลรายวันจาก data/archive ทีละไฟล์ตามช่วงวันที่ (generator)
+  ในหน่วยความจำจึงมีข้อมูลครั้งละหนึ่งวันเท่านั้น ไม่ว่าช่วงจะยาวเท่าใด
+  วันที่มีหลายไฟล์ (เริ่มวันซ้ำหรือรีเซ็ต) ใช้ไฟล์ล่าสุด ข้อมูลวันปัจจุบันส่งเข้ามาแยก
+- order_rows / summary_rows: แปลงข้อมูลรายวันเป็นแถว
+- csv_chunks / jsonl_chunks: แปลงแถวเป็นข้อความทีละก้อน (~64 KB) สำหรับ HTTP แบบ chunked
+- gzip_chunks: บีบอัดก้อนข้อมูลแบบ streaming
+
+การใช้งาน CLI:
+    python -m src.export orders --start 2026-01-01 --end 2026-01-31 -o orders.csv
+    python -m src.export summaries --start 2026-01-01 --end 2026-01-31 --format jsonl --gzip -o summaries.jsonl.gz
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .orders import ORDER_FIELDS
+from .time_buckets import DEFAULT_WINDOWS
+
+CSV = "csv"
+JSONL = "jsonl"
+EXPORT_FORMATS = (CSV, JSONL)
+ORDERS = "orders"
+SUMMARIES = "summaries"
+EXPORT_KINDS = (ORDERS, SUMMARIES)
+
+MIME_TYPES = {
+    CSV: "text/csv; charset=utf-8",
+    JSONL: "application/x-ndjson; charset=utf-8",
+}
+
+# คอลัมน์ของสรุปรายวัน (ตามด้วยช่วงเวลาของ SALES_WINDOWS)
+SUMMARY_FIELDS = (
+    "date",
+    "staff_count",
+    "staff_names",
+    "total_sales",
+    "total_orders",
+    "commission_1_total",
+    "commission_5_total",
+    "add_on_2vases",
+    "add_on_order",
+    "ot_sales",
+    "ot_penalty",
+    "commission_total",
+    "incentive_per_person",
+)
+
+ORDER_EXPORT_FIELDS = ("date",) + ORDER_FIELDS
+
+# ขนาดโดยประมาณของแต่ละก้อนที่ส่งออก
+CHUNK_SIZE = 64 * 1024
+
+_ARCHIVE_NAME = re.compile(r"^sales_(\d{4}-\d{2}-\d{2})_(\d{6})\.json$")
+
+
+def parse_date(value: str) -> str:
+    """
+    ตรวจรูปแบบวันที่ "YYYY-MM-DD"
+
+    Args:
+        value: วันที่
+
+    Returns:
+        วันที่เดิม
+
+    Raises:
+        ValueError: ถ้ารูปแบบไม่ถูกต้อง
+    """
+    datetime.strptime(value, "%Y-%m-%d")
+    return value
+
+
+def archive_files(archive_dir: str, start: str, end: str) -> List[str]:
+    """
+    ไฟล์ archive ล่าสุดของแต่ละวันในช่วง start..end เรียงตามวันที่
+
+    Args:
+        archive_dir: โฟลเดอร์ archive
+        start: วันเริ่มต้น (รวม)
+        end: วันสิ้นสุด (รวม)
+
+    Returns:
+        รายการ path ของไฟล์
+    """
+    if not os.path.isdir(archive_dir):
+        return []
+    latest: Dict[str, str] = {}
+    for name in os.listdir(archive_dir):
+        match = _ARCHIVE_NAME.match(name)
+        if match and start <= match.group(1) <= end:
+            # ชื่อไฟล์ของวันเดียวกันเรียงตามเวลา HHMMSS
+            latest[match.group(1)] = max(latest.get(match.group(1), name), name)
+    return [os.path.join(archive_dir, latest[date]) for date in sorted(latest)]
+
+
+def iter_days(data_dir: str, start: str, end: str, current: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    ข้อมูลรายวันในช่วง start..end ทีละวัน
+
+    Args:
+        data_dir: โฟลเดอร์ข้อมูล (อ่านจาก data_dir/archive)
+        start: วันเริ่มต้น (รวม)
+        end: วันสิ้นสุด (รวม)
+        current: ข้อมูลวันปัจจุบัน (orders เป็น list ของ dict) ใช้แทน archive ของวันเดียวกัน
+
+    Yields:
+        dict ของข้อมูลหนึ่งวันในรูปแบบเดียวกับ sales_data.json
+    """
+    current_date = current.get("date") if current else None
+    if current_date and not start <= current_date <= end:
+        current_date = None
+
+    for path in archive_files(os.path.join(data_dir, "archive"), start, end):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                day = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ ข้ามไฟล์ archive ที่อ่านไม่ได้ {path}: {e}")
+            continue
+        date = day.get("date")
+        if not date or date == current_date:
+            continue
+        # วันปัจจุบันใหม่กว่า archive ทุกไฟล์ จึงส่งก่อนวันถัดไปเพื่อคงลำดับวันที่
+        if current_date and current_date < date:
+            yield current
+            current_date = None
+        yield day
+
+    if current_date:
+        yield current
+
+
+def order_rows(days: Iterable[Dict]) -> Iterator[Dict]:
+    """แถวของออเดอร์ทุกรายการ (รวมออเดอร์ที่ยกเลิก ดูได้จากคอลัมน์ voided)"""
+    for day in days:
+        for order in day.get("orders", []):
+            row = {"date": day.get("date")}
+            row.update(order)
+            yield row
+
+
+def summary_rows(days: Iterable[Dict]) -> Iterator[Dict]:
+    """แถวสรุปยอดวันละหนึ่งแถว"""
+    for day in days:
+        row = {key: value for key, value in day.items() if key not in ("orders", "ledger", "changes", "undone_adds")}
+        yield row
+
+
+def summary_fields(window_names: Optional[Sequence[str]] = None) -> tuple:
+    """
+    คอลัมน์ของสรุปรายวัน
+
+    Args:
+        window_names: ชื่อฟิลด์ของช่วงเวลา (ค่าเริ่มต้นคือ DEFAULT_WINDOWS)
+    """
+    if window_names is None:
+        window_names = [window.name for window in DEFAULT_WINDOWS]
+    return SUMMARY_FIELDS + tuple(window_names)
+
+
+def csv_chunks(rows: Iterable[Dict], fields: Sequence[str]) -> Iterator[str]:
+    """
+    แปลงแถวเป็น CSV ทีละก้อน (มีหัวตาราง คอลัมน์ที่ไม่มีค่าเป็นค่าว่าง)
+
+    Args:
+        rows: แถวข้อมูล
+        fields: คอลัมน์ตามลำดับ
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for row in rows:
+        names = row.get("staff_names")
+        if isinstance(names, (list, tuple)):
+            row = dict(row, staff_names=", ".join(names))
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def jsonl_chunks(rows: Iterable[Dict], fields: Sequence[str]) -> Iterator[str]:
+    """
+    แปลงแถวเป็น JSON Lines ทีละก้อน
+
+    Args:
+        rows: แถวข้อมูล
+        fields: คอลัมน์ตามลำดับ (คอลัมน์อื่นไม่ส่งออก)
+    """
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps({field: row.get(field) for field in fields}, ensure_ascii=False) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(lines)
+            lines = []
+            size = 0
+    if lines:
+        yield "".join(lines)
+
+
+def gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    """บีบอัดก้อนข้อความเป็น gzip แบบ streaming"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(
+    days: Iterable[Dict],
+    kind: str = ORDERS,
+    fmt: str = CSV,
+    window_names: Optional[Sequence[str]] = None
+) -> Iterator[str]:
+    """
+    ก้อนข้อความของการส่งออก
+
+    Args:
+        days: ข้อมูลรายวัน (จาก iter_days)
+        kind: "orders" หรือ "summaries"
+        fmt: "csv" หรือ "jsonl"
+        window_names: ชื่อฟิลด์ของช่วงเวลา (เฉพาะ summaries)
+    """
+    if kind == ORDERS:
+        rows, fields = order_rows(days), ORDER_EXPORT_FIELDS
+    else:
+        rows, fields = summary_rows(days), summary_fields(window_names)
+    if fmt == CSV:
+        return csv_chunks(rows, fields)
+    return jsonl_chunks(rows, fields)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI ส่งออกออเดอร์หรือสรุปรายวันตามช่วงวันที่"""
+    parser = argparse.ArgumentParser(description="ส่งออกข้อมูลยอดขายเป็น CSV / JSON Lines")
+    parser.add_argument("kind", choices=EXPORT_KINDS)
+    parser.add_argument("--start", required=True, type=parse_date, help="วันเริ่มต้น YYYY-MM-DD")
+    parser.add_argument("--end", type=parse_date, help="วันสิ้นสุด YYYY-MM-DD (ค่าเริ่มต้นคือวันเริ่มต้น)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=CSV)
+    parser.add_argument("--data-dir", default=os.getenv('DATA_DIR', 'data'))
+    parser.add_argument("--gzip", action="store_true", help="บีบอัดผลลัพธ์เป็น gzip")
+    parser.add_argument("-o", "--output", help="ไฟล์ผลลัพธ์ (ค่าเริ่มต้นคือ stdout)")
+    args = parser.parse_args(argv)
+    end = args.end or args.start
+
+    # วันปัจจุบันอ่านจาก sales_data.json (ยังไม่อยู่ใน archive)
+    current = None
+    data_file = os.path.join(args.data_dir, "sales_data.json")
+    if os.path.exists(data_file):
+        with open(data_file, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+
+    chunks = export_chunks(iter_days(args.data_dir, args.start, end, current), args.kind, args.format)
+    if args.output:
+        out = open(args.output, 'wb')
+    else:
+        out = sys.stdout.buffer
+    try:
+        if args.gzip:
+            for data in gzip_chunks(chunks):
+                out.write(data)
+        else:
+            for chunk in chunks:
+                out.write(chunk.encode('utf-8'))
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลอันดับยอดย้อนหลัง ATMO'decor
+
+- top_days: วันที่ยอดขายสูงสุด เลือกแบบ streaming ด้วย heapq.nlargest ใช้หน่วยความจำ O(k)
+  ไม่ว่าประวัติจะยาวเท่าไร (อ่านสรุปทีละวันจาก rollups/ หรือ archive/)
+- top_staff: คนตอบที่ Incentive รวมสูงสุด (รวม incentive_per_person ตามชื่อใน staff_names)
+- top_products: สินค้าที่ยอดขายรวมสูงสุด (อ่านรายการออเดอร์จาก archive เพราะ rollup เก็บแค่ 10 อันดับต่อวัน)
+  ตารางรวมมีขนาดเท่าจำนวนชื่อคน/สินค้า ไม่ใช่จำนวนวันหรือออเดอร์
+- Leaderboards: cache ผลไว้จนกว่าจะมีการปิดวันครั้งถัดไป (โฟลเดอร์ rollups/ หรือ archive/ เปลี่ยน)
+"""
+
+import heapq
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import money
+from .consolidate import branch_summaries
+from .export import iter_days
+
+DAYS = "days"
+STAFF = "staff"
+PRODUCTS = "products"
+# ช่วงเวลาเริ่มต้นของแต่ละอันดับ
+DEFAULT_PERIODS = {DAYS: "all", STAFF: "quarter", PRODUCTS: "month"}
+PERIODS = ("week", "month", "quarter", "year", "all")
+DEFAULT_K = 10
+MAX_K = 100
+
+
+def period_range(period: str, today: str) -> Tuple[str, str]:
+    """
+    ช่วงวันที่ของชื่อช่วงเวลา (นับถึงวันนี้)
+
+    Args:
+        period: week (7 วันล่าสุด), month, quarter, year (ตามปฏิทิน) หรือ all
+        today: วันที่ "YYYY-MM-DD"
+
+    Returns:
+        (วันเริ่มต้น, วันสิ้นสุด)
+    """
+    day = datetime.strptime(today, "%Y-%m-%d")
+    if period == "week":
+        start = day - timedelta(days=6)
+    elif period == "month":
+        start = day.replace(day=1)
+    elif period == "quarter":
+        start = day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    elif period == "year":
+        start = day.replace(month=1, day=1)
+    elif period == "all":
+        return "0000-01-01", today
+    else:
+        raise ValueError(f"ช่วงเวลาต้องเป็นหนึ่งใน {', '.join(PERIODS)}")
+    return start.strftime("%Y-%m-%d"), today
+
+
+def _top_totals(totals: Dict[str, int], k: int, label: str) -> List[Dict]:
+    return [
+        {label: name, "total": money.to_baht(total)}
+        for name, total in heapq.nlargest(k, totals.items(), key=lambda item: item[1])
+    ]
+
+
+def top_days(summaries: Iterable[Dict], k: int = DEFAULT_K) -> List[Dict]:
+    """
+    วันที่ยอดขายสูงสุด k วัน (อ่าน summaries ทีละวัน ถือไว้ไม่เกิน k รายการ)
+
+    Args:
+        summaries: ข้อมูลสรุปรายวัน
+        k: จำนวนอันดับ
+    """
+    best = heapq.nlargest(
+        k,
+        ((money.to_satang(s.get("total_sales") or 0), s.get("date"), s.get("total_orders") or 0) for s in summaries)
+    )
+    return [{"date": date, "total": money.to_baht(sales), "orders": orders} for sales, date, orders in best]
+
+
+def top_staff(summaries: Iterable[Dict], k: int = DEFAULT_K) -> List[Dict]:
+    """
+    คนตอบที่ Incentive รวมสูงสุด k คน
+
+    Args:
+        summaries: ข้อมูลสรุปรายวัน
+        k: จำนวนอันดับ
+    """
+    totals: Dict[str, int] = {}
+    for summary in summaries:
+        incentive = money.to_satang(summary.get("incentive_per_person") or 0)
+        for name in summary.get("staff_names") or ():
+            totals[name] = totals.get(name, 0) + incentive
+    return _top_totals(totals, k, "name")
+
+
+def top_products(days: Iterable[Dict], k: int = DEFAULT_K) -> List[Dict]:
+    """
+    สินค้าที่ยอดขายรวมสูงสุด k รายการ (ไม่นับออเดอร์ที่ยกเลิก)
+
+    Args:
+        days: ข้อมูลรายวันที่มีรายการออเดอร์
+        k: จำนวนอันดับ
+    """
+    totals: Dict[str, int] = {}
+    for day in days:
+        for order in day.get("orders") or ():
+            if not order.get("voided"):
+                name = order.get("product_name") or ""
+                totals[name] = totals.get(name, 0) + money.to_satang(order.get("amount") or 0)
+    return _top_totals(totals, k, "product_name")
+
+
+class Leaderboards:
+    """อันดับยอดย้อนหลังของโฟลเดอร์ข้อมูล พร้อม cache จนกว่าจะปิดวันครั้งถัดไป"""
+
+    def __init__(self, data_dir: str, max_entries: int = 64):
+        """
+        สร้าง instance ของ Leaderboards
+
+        Args:
+            data_dir: โฟลเดอร์ข้อมูล (อ่าน rollups/ และ archive/)
+            max_entries: จำนวนผลที่ cache สูงสุด
+        """
+        self.data_dir = data_dir
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._generation = None
+        self._cache: Dict[Tuple, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _current_generation(self) -> Tuple:
+        # ปิดวัน/เริ่มวันใหม่เพิ่มไฟล์ใน rollups/ หรือ archive/ ทำให้ mtime ของโฟลเดอร์เปลี่ยน
+        generation = []
+        for name in ("rollups", "archive"):
+            try:
+                generation.append(os.stat(os.path.join(self.data_dir, name)).st_mtime_ns)
+            except OSError:
+                generation.append(None)
+        return tuple(generation)
+
+    def _compute(self, board: str, start: str, end: str, k: int) -> List[Dict]:
+        boards: Dict[str, Callable] = {
+            DAYS: lambda: top_days(branch_summaries(self.data_dir, start, end), k),
+            STAFF: lambda: top_staff(branch_summaries(self.data_dir, start, end), k),
+            PRODUCTS: lambda: top_products(iter_days(self.data_dir, start, end), k),
+        }
+        return boards[board]()
+
+    def top(self, board: str, today: str, period: Optional[str] = None, k: int = DEFAULT_K) -> Dict:
+        """
+        อันดับยอดย้อนหลัง (ไม่รวมวันที่ยังไม่ปิด)
+
+        Args:
+            board: days, staff หรือ products
+            today: วันที่อ้างอิง "YYYY-MM-DD"
+            period: ชื่อช่วงเวลา (None = ค่าเริ่มต้นของอันดับ)
+            k: จำนวนอันดับ (1..MAX_K)
+
+        Returns:
+            {"board", "period", "start", "end", "items"}
+        """
+        if board not in DEFAULT_PERIODS:
+            raise ValueError(f"อันดับต้องเป็นหนึ่งใน {', '.join(DEFAULT_PERIODS)}")
+        if not 1 <= k <= MAX_K:
+            raise ValueError(f"จำนวนอันดับต้องอยู่ระหว่าง 1 ถึง {MAX_K}")
+        period = period or DEFAULT_PERIODS[board]
+        start, end = period_range(period, today)
+        key = (board, start, end, k)
+
+        generation = self._current_generation()
+        with self._lock:
+            if generation != self._generation:
+                self._cache.clear()
+                self._generation = generation
+            result = self._cache.get(key)
+            if result is not None:
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = {"board": board, "period": period, "start": start, "end": end,
+                  "items": self._compute(board, start, end, k)}
+        with self._lock:
+            if generation == self._generation:
+                if len(self._cache) >= self.max_entries:
+                    self._cache.clear()
+                self._cache[key] = result
+        return result
+
+    def stats(self) -> Dict:
+        """สถิติของ cache"""
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
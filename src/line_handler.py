@@ -8,6 +8,7 @@ import requests
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 from linebot import LineBotApi, WebhookHandler
+from linebot.exceptions import LineBotApiError
 from linebot.models import (
     TextSendMessage,
     FlexSendMessage,
@@ -18,21 +19,57 @@ from linebot.models import (
     MessageAction
 )
 
+from .metrics import timed, ERRORS_TOTAL
+from .rendering import FLEX, SummaryRenderer, render_summary_text
+from .tracing import traced
+
 
 class LineHandler:
     """คลาสสำหรับจัดการ LINE Messaging API"""
     
-    def __init__(self, channel_access_token: str, channel_secret: str):
+    def __init__(
+        self,
+        channel_access_token: str,
+        channel_secret: str,
+        api_endpoint: Optional[str] = None,
+        data_endpoint: Optional[str] = None,
+        reply_format: str = "text"
+    ):
         """
         สร้าง instance ของ LineHandler
         
         Args:
             channel_access_token: LINE Channel Access Token
             channel_secret: LINE Channel Secret
+            api_endpoint: URL ของ LINE Messaging API (ค่าเริ่มต้นคือ API จริง)
+            data_endpoint: URL ของ LINE data API สำหรับดาวน์โหลดรูปภาพ
+            reply_format: รูปแบบสรุปยอดและยืนยันออเดอร์ ("text" หรือ "flex")
         """
-        self.line_bot_api = LineBotApi(channel_access_token)
+        endpoints = {}
+        if api_endpoint:
+            endpoints["endpoint"] = api_endpoint
+        if data_endpoint:
+            endpoints["data_endpoint"] = data_endpoint
+        self.line_bot_api = LineBotApi(channel_access_token, **endpoints)
         self.handler = WebhookHandler(channel_secret)
         self.user_states = {}  # เก็บสถานะของผู้ใช้แต่ละคน
+        self.reply_format = reply_format
+        self.renderer = SummaryRenderer()
+    
+    @traced("line.reply")
+    @timed("line_reply")
+    def _reply(self, reply_token: str, messages):
+        """
+        ส่งข้อความตอบกลับผ่าน LINE API (จุดเดียวสำหรับวัดเวลา)
+        
+        ส่งไม่สำเร็จจะบันทึก log แทนการ raise: ข้อมูลถูกบันทึกไปแล้ว และ reply token ใช้ได้ครั้งเดียว
+        การลองใหม่ทั้งเหตุการณ์จึงไม่ช่วยให้ส่งได้ มีแต่จะบันทึกออเดอร์ซ้ำ
+        """
+        try:
+            self.line_bot_api.reply_message(reply_token, messages)
+        except (LineBotApiError, requests.RequestException) as e:
+            ERRORS_TOTAL.inc("line_reply")
+            print(f"⚠️ ไม่สามารถตอบกลับ LINE ได้: {e}")
     
     def send_message(self, reply_token: str, message: str):
         """
@@ -42,7 +79,7 @@ class LineHandler:
             reply_token: Reply token จาก LINE
             message: ข้อความที่จะส่ง
         """
-        self.line_bot_api.reply_message(
+        self._reply(
             reply_token,
             TextSendMessage(text=message)
         )
@@ -108,7 +145,7 @@ class LineHandler:
             }
         )
         
-        self.line_bot_api.reply_message(reply_token, flex_message)
+        self._reply(reply_token, flex_message)
     
     def send_staff_count_question(self, reply_token: str):
         """
@@ -127,7 +164,7 @@ class LineHandler:
             ]
         )
         
-        self.line_bot_api.reply_message(
+        self._reply(
             reply_token,
             TextSendMessage(
                 text="👥 มีคนตอบกี่คน?",
@@ -142,105 +179,82 @@ class LineHandler:
         Args:
             reply_token: Reply token จาก LINE
         """
-        self.line_bot_api.reply_message(
+        self._reply(
             reply_token,
             TextSendMessage(text="📝 ชื่อผู้ตอบ? (คั่นด้วยเครื่องหมายคอมม่า เช่น Oil, Fang, Phung)")
         )
     
-    def send_order_confirmation(self, reply_token: str, order_info: Dict, summary: Dict):
+    @traced("line.send_order_confirmation")
+    def send_order_confirmation(self, reply_token: str, order_info: Dict, snapshot):
         """
         ส่งข้อความยืนยันการบันทึกออเดอร์
         
         Args:
             reply_token: Reply token จาก LINE
             order_info: ข้อมูลออเดอร์
-            summary: ข้อมูลสรุปยอด
-        """
-        product_name = order_info.get("product_name", "")
-        amount = order_info.get("amount", 0)
-        time = order_info.get("time", "")
-        commission_1 = order_info.get("commission_1", 0)
-        commission_5 = order_info.get("commission_5", 0)
-        add_on_2vases = order_info.get("add_on_2vases", 0)
-        is_special = order_info.get("is_special", False)
-        
-        # คำนวณคอมมิชชั่นรวมของออเดอร์นี้
-        order_commission = commission_1 + commission_5 + add_on_2vases
-        rate_text = "5%" if is_special else f"{order_info.get('rate', 0)*100:.0f}%"
-        
-        # ข้อมูลสรุปวันนี้
-        date = summary.get("date", "")
-        staff_count = summary.get("staff_count", 0)
-        staff_names = ", ".join(summary.get("staff_names", []))
-        total_sales = summary.get("total_sales", 0)
-        total_orders = summary.get("total_orders", 0)
-        
-        commission_1_total = summary.get("commission_1_total", 0)
-        commission_5_total = summary.get("commission_5_total", 0)
-        add_on_2vases_total = summary.get("add_on_2vases", 0)
-        add_on_order = summary.get("add_on_order", 0)
-        
-        sales_18_22 = summary.get("sales_18_22", 0)
-        ot_penalty = summary.get("ot_penalty", 0)
-        
-        commission_total = summary.get("commission_total", 0)
-        incentive_per_person = summary.get("incentive_per_person", 0)
-        
-        # คำนวณเรทปัจจุบัน
-        from . import commission_calculator
-        rate, _, _ = commission_calculator.calculate_commission_rate(total_sales)
-        
-        # สถานะ OT
-        ot_status = "✅" if sales_18_22 >= commission_calculator.OT_EVENING_MIN_SALES else "❌"
-        
-        message = f"""✅ บันทึกออเดอร์สำเร็จ!
-
-📦 ออเดอร์นี้:
-• สินค้า: {product_name}
-• ยอดขาย: {amount:,.0f} บาท
-• เวลา: {time}
-• คอมมิชชั่น: {order_commission:,.0f} บาท ({rate_text})
-
-📊 สรุปวันนี้ ({date})
-👥 คนตอบ: {staff_names} ({staff_count} คน)
-
-• ยอดขายรวม: {total_sales:,.0f} บาท
-• จำนวนออเดอร์: {total_orders} ออเดอร์
-• เรทปัจจุบัน: {rate*100:.0f}%
-
-💰 คอมมิชชั่น:
-• คอมมิชชั่น 1-4%: {commission_1_total:,.0f} บาท
-• คอมมิชชั่น 5%: {commission_5_total:,.0f} บาท
-• Add on (2vases): {add_on_2vases_total:,.0f} บาท
-• Add on (order): {add_on_order:,.0f} บาท
-
-⏰ OT:
-• ช่วง 18:00-22:00: {sales_18_22:,.0f} บาท {ot_status}
-• Penalty: {ot_penalty:,.0f} บาท
-
-💵 รวมทั้งหมด: {commission_total:,.0f} บาท
-💵 Incentive ต่อคน: {incentive_per_person:,.2f} บาท"""
+            snapshot: SummarySnapshot หลังบันทึกออเดอร์
+        """
+        if self.reply_format == FLEX:
+            message = FlexSendMessage(
+                alt_text=f"✅ บันทึกออเดอร์สำเร็จ! {order_info.get('product_name', '')}",
+                contents=self.renderer.confirmation_flex(order_info, snapshot)
+            )
+        else:
+            message = TextSendMessage(text=self.renderer.confirmation_text(order_info, snapshot))
         
-        self.line_bot_api.reply_message(
-            reply_token,
-            TextSendMessage(text=message)
-        )
+        self._reply(reply_token, message)
     
-    def send_summary(self, reply_token: str, summary: Dict):
+    @traced("line.send_summary")
+    def send_summary(self, reply_token: str, snapshot):
         """
         ส่งข้อความสรุปยอด
         
         Args:
             reply_token: Reply token จาก LINE
-            summary: ข้อมูลสรุป
+            snapshot: SummarySnapshot ของวัน
         """
-        from . import commission_calculator
-        message = commission_calculator.format_summary(summary)
+        if self.reply_format == FLEX:
+            message = FlexSendMessage(
+                alt_text=f"📊 สรุปยอดวันนี้ ({snapshot.summary.get('date') or ''})",
+                contents=self.renderer.summary_flex(snapshot)
+            )
+        else:
+            message = TextSendMessage(text=self.renderer.summary_text(snapshot))
         
-        self.line_bot_api.reply_message(
-            reply_token,
-            TextSendMessage(text=message)
-        )
+        self._reply(reply_token, message)
+    
+    @traced("line.get_profile")
+    def get_display_name(self, user_id: str, group_id: Optional[str] = None) -> Optional[str]:
+        """
+        ดึงชื่อที่แสดงจาก LINE profile API (ใช้ผ่าน ProfileCache เท่านั้น)
+        
+        Args:
+            user_id: LINE user id
+            group_id: group id ถ้าข้อความมาจากกลุ่ม (ผู้ส่งอาจไม่ได้เป็นเพื่อนกับบอท)
+            
+        Returns:
+            ชื่อที่แสดง
+        """
+        if group_id:
+            return self.line_bot_api.get_group_member_profile(group_id, user_id).display_name
+        return self.line_bot_api.get_profile(user_id).display_name
+    
+    @traced("line.push_summary")
+    def push_summary(self, to: str, summary: Dict, title: str = "🌙 ปิดวันแล้ว"):
+        """
+        ส่งสรุปยอดแบบ push (ไม่มี reply token เช่นจากงานปิดวันอัตโนมัติ)
+        
+        Args:
+            to: LINE user id หรือ group id
+            summary: ข้อมูลสรุปของวัน
+            title: หัวข้อข้อความ
+        """
+        text = f"{title}\n\n{render_summary_text(summary)}"
+        try:
+            self.line_bot_api.push_message(to, TextSendMessage(text=text))
+        except (LineBotApiError, requests.RequestException) as e:
+            ERRORS_TOTAL.inc("line_push")
+            print(f"⚠️ ไม่สามารถส่งข้อความ push ได้: {e}")
     
     def send_images_gallery(self, reply_token: str, image_paths: List[str]):
         """
@@ -251,7 +265,7 @@ class LineHandler:
             image_paths: รายการ path ของรูปภาพ
         """
         if not image_paths:
-            self.line_bot_api.reply_message(
+            self._reply(
                 reply_token,
                 TextSendMessage(text="ยังไม่มีรูปภาพออเดอร์")
             )
@@ -262,7 +276,7 @@ class LineHandler:
         for i, path in enumerate(image_paths, 1):
             message += f"{i}. {path}\n"
         
-        self.line_bot_api.reply_message(
+        self._reply(
             reply_token,
             TextSendMessage(text=message)
         )
@@ -283,6 +297,21 @@ class LineHandler:
 
 🔹 /images - ดูรูปภาพออเดอร์ทั้งหมด
 
+🔹 /edit <รหัส> <ข้อมูลใหม่> - แก้ไขออเดอร์
+   (เช่น /edit 12 1,500 บาท 19:30)
+
+🔹 /void <รหัส> - ยกเลิกออเดอร์
+
+🔹 /undo - ย้อนการเพิ่ม/แก้ไข/ยกเลิกล่าสุด
+
+🔹 /audit <รหัส> - ดูประวัติการเปลี่ยนแปลงของออเดอร์
+
+🔹 /top [days|staff|products] [ช่วงเวลา] [จำนวน] - อันดับยอดย้อนหลัง
+   (ช่วงเวลา week, month, quarter, year, all เช่น /top staff quarter 5)
+
+🔹 /find <คำค้น> - ค้นหาออเดอร์ย้อนหลังจากชื่อสินค้า
+   (เช่น /find ฟาแลน)
+
 🔹 /reset - รีเซ็ตข้อมูล
 
 🔹 /help - แสดงคำสั่งนี้
@@ -300,11 +329,13 @@ class LineHandler:
 คุณ ทดสอบ
 ..."""
         
-        self.line_bot_api.reply_message(
+        self._reply(
             reply_token,
             TextSendMessage(text=help_text)
         )
     
+    @traced("line.download_image")
+    @timed("image_download")
     def download_image(self, message_id: str) -> bytes:
         """
         ดาวน์โหลดรูปภาพจาก LINE
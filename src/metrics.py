@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลเก็บ metrics ภายใน process ATMO'decor (รูปแบบ Prometheus text)
+
+ตัวนับและ histogram แยกเก็บต่อ thread (shard) จึงไม่ต้องล็อกบน hot path
+ค่ารวมจะถูกคำนวณตอนเรียก /metrics เท่านั้น
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+# ขอบเขต bucket (วินาที) สำหรับเวลาแต่ละขั้นตอน
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Sharded:
+    """ฐานสำหรับ metric ที่เก็บข้อมูลแยกต่อ thread"""
+
+    def __init__(self, name: str, help_text: str, label_name: Optional[str] = None):
+        self.name = name
+        self.help_text = help_text
+        self.label_name = label_name
+        self._local = threading.local()
+        self._shards: List[Dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            # ล็อกเฉพาะครั้งแรกของแต่ละ thread
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _labels(self, label_value: Optional[str]) -> Tuple[Tuple[str, str], ...]:
+        if self.label_name is None:
+            return ()
+        return ((self.label_name, label_value or ""),)
+
+    def _snapshot(self) -> List[Dict]:
+        with self._shards_lock:
+            return list(self._shards)
+
+
+class Counter(_Sharded):
+    """ตัวนับที่เพิ่มขึ้นอย่างเดียว"""
+
+    def inc(self, label_value: Optional[str] = None, amount: float = 1):
+        """เพิ่มค่าตัวนับ"""
+        shard = self._shard()
+        shard[label_value] = shard.get(label_value, 0) + amount
+
+    def value(self, label_value: Optional[str] = None) -> float:
+        """ดึงค่ารวมของตัวนับ"""
+        return sum(shard.get(label_value, 0) for shard in self._snapshot())
+
+    def render(self) -> List[str]:
+        totals: Dict[Optional[str], float] = {}
+        for shard in self._snapshot():
+            for label_value, value in list(shard.items()):
+                totals[label_value] = totals.get(label_value, 0) + value
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_value in sorted(totals, key=lambda v: v or ""):
+            lines.append(f"{self.name}{_format_labels(self._labels(label_value))} {_format_value(totals[label_value])}")
+        return lines
+
+
+class Histogram(_Sharded):
+    """Histogram แบบ bucket คงที่"""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_name: Optional[str] = None,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help_text, label_name)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, label_value: Optional[str] = None):
+        """บันทึกค่าหนึ่งค่า"""
+        shard = self._shard()
+        series = shard.get(label_value)
+        if series is None:
+            # [จำนวนต่อ bucket..., +Inf, ผลรวม]
+            series = [0] * (len(self.buckets) + 1) + [0.0]
+            shard[label_value] = series
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, label_value: Optional[str] = None) -> "_Timer":
+        """จับเวลาด้วย with-statement หรือใช้เป็น decorator"""
+        return _Timer(self, label_value)
+
+    def count(self, label_value: Optional[str] = None) -> int:
+        """จำนวนค่าที่บันทึกไว้"""
+        return sum(sum(shard[label_value][:-1]) for shard in self._snapshot() if label_value in shard)
+
+    def render(self) -> List[str]:
+        totals: Dict[Optional[str], List[float]] = {}
+        for shard in self._snapshot():
+            for label_value, series in list(shard.items()):
+                total = totals.setdefault(label_value, [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value in sorted(totals, key=lambda v: v or ""):
+            series = totals[label_value]
+            labels = self._labels(label_value)
+            cumulative = 0
+            for bound, value in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += value
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', le),))} {int(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {int(cumulative)}")
+        return lines
+
+
+class _Timer:
+    """ตัวจับเวลาสำหรับ Histogram.time()"""
+
+    __slots__ = ("histogram", "label_value", "started_at")
+
+    def __init__(self, histogram: Histogram, label_value: Optional[str]):
+        self.histogram = histogram
+        self.label_value = label_value
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started_at, self.label_value)
+        return False
+
+    def __call__(self, func: Callable) -> Callable:
+        histogram = self.histogram
+        label_value = self.label_value
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started_at, label_value)
+        return wrapper
+
+
+class CallbackMetric:
+    """ค่าที่อ่านจากฟังก์ชันตอน render (เช่น ขนาดคิว, ตัวนับของโมดูลอื่น)"""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        func: Callable[[], Dict[Optional[str], float]],
+        label_name: Optional[str] = None,
+        metric_type: str = "gauge"
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.func = func
+        self.label_name = label_name
+        self.metric_type = metric_type
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        for label_value, value in sorted(self.func().items(), key=lambda item: item[0] or ""):
+            labels = ((self.label_name, label_value),) if self.label_name else ()
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    """รวม metrics ทั้งหมดเพื่อ render ที่ /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """ลงทะเบียน metric (ถ้าชื่อซ้ำจะแทนที่ของเดิม)"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """สร้างข้อความรูปแบบ Prometheus text exposition"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# เวลาแต่ละขั้นตอน: webhook, signature, parse, commission, save_data,
+# image_download, image_save, line_reply, event
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "atmo_stage_duration_seconds",
+    "Duration of each processing stage in seconds",
+    label_name="stage"
+))
+ORDERS_TOTAL = REGISTRY.register(Counter("atmo_orders_total", "Orders recorded"))
+IMAGES_TOTAL = REGISTRY.register(Counter("atmo_images_total", "Order images saved"))
+REDELIVERIES_TOTAL = REGISTRY.register(Counter(
+    "atmo_webhook_redeliveries_total",
+    "Webhook events redelivered by LINE"
+))
+DEFERRED_EVENTS_TOTAL = REGISTRY.register(Counter(
+    "atmo_webhook_deferred_events_total",
+    "Webhook events deferred because their sender exceeded the per-user rate"
+))
+ERRORS_TOTAL = REGISTRY.register(Counter(
+    "atmo_errors_total",
+    "Errors by processing stage",
+    label_name="stage"
+))
+
+
+def timed(stage: str) -> _Timer:
+    """จับเวลาขั้นตอน (ใช้ได้ทั้ง with-statement และ decorator)"""
+    return STAGE_SECONDS.time(stage)
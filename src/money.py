@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลจำนวนเงินแบบจุดตรึง (สตางค์) ATMO'decor
+
+เก็บและรวมยอดเงินเป็นจำนวนเต็มหน่วยสตางค์ เพื่อไม่ให้เกิดความคลาดเคลื่อน
+จากการบวกเลขทศนิยม (float) สะสมหลายร้อยออเดอร์
+- แปลงจากบาทเป็นสตางค์ครั้งเดียวตอนรับข้อมูล
+- คูณเรทด้วย basis point (1% = 100) และปัดเศษตามกฎของแต่ละองค์ประกอบ
+- Ledger เก็บรายการต่อออเดอร์ต่อองค์ประกอบแบบคอลัมน์ (array)
+  รวมยอดได้เร็วแม้มีหลายล้านรายการ
+"""
+
+from array import array
+from decimal import Decimal, ROUND_HALF_UP as DECIMAL_ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SATANG_PER_BAHT = 100
+BASIS_POINTS = 10000
+
+# วิธีปัดเศษ
+ROUND_HALF_UP = "half_up"  # ปัดครึ่งขึ้น (0.5 สตางค์ขึ้นไปปัดขึ้น)
+ROUND_DOWN = "down"  # ปัดลงเสมอ (ไม่จ่ายเกินยอดจริง)
+
+# องค์ประกอบของยอดเงิน
+SALES = "sales"
+COMMISSION_1 = "commission_1"
+COMMISSION_5 = "commission_5"
+ADD_ON_2VASES = "add_on_2vases"
+ADD_ON_ORDER = "add_on_order"
+OT_PENALTY = "ot_penalty"
+INCENTIVE = "incentive"
+
+# องค์ประกอบที่บันทึกเป็นรายการต่อออเดอร์ใน Ledger
+ORDER_COMPONENTS = (SALES, COMMISSION_1, COMMISSION_5, ADD_ON_2VASES)
+
+# กฎการปัดเศษเมื่อคิดเป็นเปอร์เซ็นต์ของแต่ละองค์ประกอบ (ต้องมีครบทุกองค์ประกอบ)
+ROUNDING_RULES = {
+    # ยอดขายและค่าเพิ่มปัดครึ่งขึ้นเหมือน to_satang
+    SALES: ROUND_HALF_UP,
+    ADD_ON_2VASES: ROUND_HALF_UP,
+    ADD_ON_ORDER: ROUND_HALF_UP,
+    COMMISSION_1: ROUND_HALF_UP,
+    COMMISSION_5: ROUND_HALF_UP,
+    OT_PENALTY: ROUND_HALF_UP,
+    # แบ่งให้แต่ละคนโดยปัดลง ผลรวมจึงไม่เกินคอมมิชชั่นรวม
+    INCENTIVE: ROUND_DOWN,
+}
+
+
+def to_satang(baht) -> int:
+    """
+    แปลงบาทเป็นสตางค์ (ปัดครึ่งขึ้นที่ 0.5 สตางค์)
+
+    Args:
+        baht: จำนวนเงินหน่วยบาท (int, float, str หรือ Decimal)
+
+    Returns:
+        จำนวนเงินหน่วยสตางค์
+    """
+    if isinstance(baht, int):
+        return baht * SATANG_PER_BAHT
+    # ใช้ str() เพื่อให้ 1.005 เป็น 1.005 จริง ไม่ใช่ 1.00499999...
+    value = Decimal(str(baht)) * SATANG_PER_BAHT
+    return int(value.quantize(Decimal(1), rounding=DECIMAL_ROUND_HALF_UP))
+
+
+def to_baht(satang: int) -> float:
+    """
+    แปลงสตางค์เป็นบาท (สำหรับแสดงผลและบันทึกในรูปแบบเดิม)
+
+    Args:
+        satang: จำนวนเงินหน่วยสตางค์
+
+    Returns:
+        จำนวนเงินหน่วยบาท
+    """
+    return satang / SATANG_PER_BAHT
+
+
+def rate_to_bp(rate: float) -> int:
+    """แปลงเรท (เช่น 0.05) เป็น basis point (500)"""
+    return int(round(rate * BASIS_POINTS))
+
+
+def _rounding(component: str) -> str:
+    try:
+        return ROUNDING_RULES[component]
+    except KeyError:
+        raise ValueError(f"ไม่มีกฎการปัดเศษสำหรับองค์ประกอบ {component!r}") from None
+
+
+def _divide(numerator: int, denominator: int, rounding: str) -> int:
+    if rounding == ROUND_DOWN:
+        return numerator // denominator
+    if numerator >= 0:
+        return (numerator * 2 + denominator) // (denominator * 2)
+    return -((-numerator * 2 + denominator) // (denominator * 2))
+
+
+def apply_rate(satang: int, rate_bp: int, component: str) -> int:
+    """
+    คูณจำนวนเงินด้วยเรท แล้วปัดเศษตามกฎขององค์ประกอบ
+
+    Args:
+        satang: จำนวนเงินหน่วยสตางค์
+        rate_bp: เรทหน่วย basis point (1% = 100)
+        component: ชื่อองค์ประกอบใน ROUNDING_RULES
+
+    Returns:
+        ผลลัพธ์หน่วยสตางค์
+
+    Raises:
+        ValueError: ถ้าองค์ประกอบไม่มีใน ROUNDING_RULES
+    """
+    return _divide(satang * rate_bp, BASIS_POINTS, _rounding(component))
+
+
+def split(satang: int, parts: int, component: str = INCENTIVE) -> int:
+    """
+    แบ่งจำนวนเงินเท่าๆ กัน ปัดเศษตามกฎขององค์ประกอบ
+
+    Args:
+        satang: จำนวนเงินหน่วยสตางค์
+        parts: จำนวนส่วน
+        component: ชื่อองค์ประกอบใน ROUNDING_RULES
+
+    Returns:
+        จำนวนเงินต่อส่วนหน่วยสตางค์ (0 ถ้า parts <= 0)
+
+    Raises:
+        ValueError: ถ้าองค์ประกอบไม่มีใน ROUNDING_RULES
+    """
+    rounding = _rounding(component)
+    if parts <= 0:
+        return 0
+    return _divide(satang, parts, rounding)
+
+
+class Ledger:
+    """บัญชีรายการเงินต่อออเดอร์ต่อองค์ประกอบ เก็บแบบคอลัมน์หน่วยสตางค์"""
+
+    __slots__ = ("_order_ids", "_amounts", "_totals")
+
+    def __init__(self):
+        """สร้าง Ledger ว่าง"""
+        self._order_ids: Dict[str, array] = {}
+        self._amounts: Dict[str, array] = {}
+        self._totals: Dict[str, int] = {}
+
+    def post(self, order_id: int, component: str, satang: int):
+        """
+        บันทึกรายการหนึ่งรายการ (ข้ามรายการที่เป็น 0)
+
+        Args:
+            order_id: รหัสออเดอร์
+            component: องค์ประกอบ
+            satang: จำนวนเงินหน่วยสตางค์
+        """
+        if not satang:
+            return
+        if component not in self._amounts:
+            self._order_ids[component] = array('q')
+            self._amounts[component] = array('q')
+            self._totals[component] = 0
+        self._order_ids[component].append(order_id)
+        self._amounts[component].append(satang)
+        self._totals[component] += satang
+
+    def total(self, component: str) -> int:
+        """ยอดรวมขององค์ประกอบ (สตางค์)"""
+        return self._totals.get(component, 0)
+
+    def totals(self) -> Dict[str, int]:
+        """ยอดรวมของทุกองค์ประกอบ (สตางค์)"""
+        return dict(self._totals)
+
+    def entries(self, component: str) -> List[Tuple[int, int]]:
+        """รายการ (order_id, สตางค์) ขององค์ประกอบตามลำดับที่บันทึก"""
+        if component not in self._amounts:
+            return []
+        return list(zip(self._order_ids[component], self._amounts[component]))
+
+    def for_order(self, order_id: int) -> Dict[str, int]:
+        """ยอดของแต่ละองค์ประกอบของออเดอร์หนึ่ง (สตางค์)"""
+        result = {}
+        for component, order_ids in self._order_ids.items():
+            amounts = self._amounts[component]
+            total = sum(amounts[i] for i, oid in enumerate(order_ids) if oid == order_id)
+            if total:
+                result[component] = total
+        return result
+
+    def __len__(self) -> int:
+        return sum(len(amounts) for amounts in self._amounts.values())
+
+    def to_json(self) -> Dict[str, Dict[str, List[int]]]:
+        """แปลงเป็นโครงสร้างสำหรับบันทึกเป็น JSON (แบบคอลัมน์)"""
+        return {
+            component: {
+                "order_ids": self._order_ids[component].tolist(),
+                "satang": self._amounts[component].tolist(),
+            }
+            for component in self._amounts
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Dict[str, List[int]]]) -> "Ledger":
+        """สร้างจากโครงสร้างที่อ่านจาก JSON"""
+        ledger = cls()
+        for component, columns in data.items():
+            ledger._order_ids[component] = array('q', columns["order_ids"])
+            ledger._amounts[component] = array('q', columns["satang"])
+            # sum() บน array จำนวนเต็มทำงานในภาษา C จึงรวมหลายล้านรายการได้เร็ว
+            ledger._totals[component] = sum(ledger._amounts[component])
+        return ledger
+
+    @classmethod
+    def from_orders(cls, orders: Iterable) -> "Ledger":
+        """
+        สร้างจากรายการออเดอร์ (สำหรับไฟล์ข้อมูลรุ่นเก่าที่ยังไม่มี ledger)
+
+        Args:
+            orders: รายการ Order
+        """
+        ledger = cls()
+        for order in orders:
+            if getattr(order, "voided", False):
+                continue
+            for component in ORDER_COMPONENTS:
+                value = order.amount if component == SALES else getattr(order, component)
+                ledger.post(order.order_id, component, to_satang(value or 0))
+        return ledger
+
+
+def sum_ledgers(ledgers: Iterable[Ledger], components: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    รวมยอดจากหลาย Ledger (เช่น หลายวันหรือหลายสาขา)
+
+    Args:
+        ledgers: รายการ Ledger
+        components: องค์ประกอบที่ต้องการ (None = ทั้งหมด)
+
+    Returns:
+        ยอดรวมต่อองค์ประกอบ (สตางค์)
+    """
+    wanted = set(components) if components is not None else None
+    result: Dict[str, int] = {}
+    for ledger in ledgers:
+        for component, total in ledger.totals().items():
+            if wanted is None or component in wanted:
+                result[component] = result.get(component, 0) + total
+    return result
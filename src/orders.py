@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลโครงสร้างข้อมูลออเดอร์ ATMO'decor
+
+เก็บออเดอร์ในหน่วยความจำเป็น object แบบ __slots__ แทน dict 11 คีย์
+(ใช้หน่วยความจำน้อยกว่าหลายเท่า) ชื่อสินค้าถูก intern ไว้เพื่อใช้ string ร่วมกัน
+แปลงเป็น dict/JSON เฉพาะตอนบันทึกลงไฟล์เท่านั้น
+
+OrderBook เก็บยอดขายตามลำดับออเดอร์ใน Fenwick tree จึงหายอดสะสม
+ณ ออเดอร์ใดๆ และแก้ไขยอดของออเดอร์กลางวันได้ใน O(log n)
+"""
+
+import sys
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from .money import to_satang
+
+# ลำดับฟิลด์ตรงกับรูปแบบใน sales_data.json
+ORDER_FIELDS = (
+    "order_id",
+    "amount",
+    "product_name",
+    "time",
+    "image_path",
+    "note",
+    "commission_1",
+    "commission_5",
+    "add_on_2vases",
+    "is_special",
+    "count_as_order",
+    "voided",
+    "user_id",
+)
+
+
+def time_to_minutes(time: Optional[str]) -> int:
+    """
+    แปลงเวลา "HH:MM" เป็นนาทีนับจากเที่ยงคืน
+
+    Args:
+        time: เวลาในรูปแบบ "HH:MM"
+
+    Returns:
+        จำนวนนาที หรือ -1 ถ้าไม่มีเวลาหรือรูปแบบไม่ถูกต้อง
+    """
+    if not time:
+        return -1
+    try:
+        hour, _, minute = time.partition(':')
+        return int(hour) * 60 + int(minute or 0)
+    except ValueError:
+        return -1
+
+
+class Order:
+    """ออเดอร์หนึ่งรายการ"""
+
+    __slots__ = ORDER_FIELDS + ("minutes",)
+
+    def __init__(
+        self,
+        order_id: int,
+        amount: float,
+        product_name: str,
+        time: str,
+        image_path: Optional[str] = None,
+        note: str = "",
+        commission_1: float = 0,
+        commission_5: float = 0,
+        add_on_2vases: float = 0,
+        is_special: bool = False,
+        count_as_order: bool = True,
+        voided: bool = False,
+        user_id: Optional[str] = None
+    ):
+        self.order_id = order_id
+        self.amount = amount
+        self.product_name = sys.intern(product_name) if product_name else product_name
+        self.time = sys.intern(time) if time else time
+        self.image_path = image_path
+        self.note = note
+        self.commission_1 = commission_1
+        self.commission_5 = commission_5
+        self.add_on_2vases = add_on_2vases
+        self.is_special = is_special
+        self.count_as_order = count_as_order
+        self.voided = voided
+        # LINE user id ของผู้ส่งออเดอร์ (intern เพราะซ้ำกันเกือบทุกออเดอร์)
+        self.user_id = sys.intern(user_id) if user_id else user_id
+        self.minutes = time_to_minutes(time)
+
+    def to_dict(self) -> Dict:
+        """แปลงเป็น dict สำหรับบันทึกเป็น JSON"""
+        return {
+            "order_id": self.order_id,
+            "amount": self.amount,
+            "product_name": self.product_name,
+            "time": self.time,
+            "image_path": self.image_path,
+            "note": self.note,
+            "commission_1": self.commission_1,
+            "commission_5": self.commission_5,
+            "add_on_2vases": self.add_on_2vases,
+            "is_special": self.is_special,
+            "count_as_order": self.count_as_order,
+            "voided": self.voided,
+            "user_id": self.user_id
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Order":
+        """สร้างจาก dict ที่อ่านจาก JSON (ข้ามคีย์ที่ไม่รู้จัก)"""
+        return cls(**{field: data[field] for field in ORDER_FIELDS if field in data})
+
+    def __repr__(self) -> str:
+        return f"Order({self.order_id}, {self.amount}, {self.product_name!r}, {self.time!r})"
+
+
+class FenwickTree:
+    """Fenwick tree (binary indexed tree) ของจำนวนเต็ม ต่อท้ายได้ทีละค่า"""
+
+    __slots__ = ("_tree",)
+
+    def __init__(self):
+        """สร้าง FenwickTree ว่าง"""
+        # ช่อง 0 ไม่ใช้ (ดัชนีภายในเริ่มที่ 1)
+        self._tree = array('q', [0])
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def append(self, value: int):
+        """เพิ่มค่าต่อท้าย O(log n)"""
+        index = len(self._tree)
+        # ช่องใหม่ครอบคลุมช่วง (index - lowbit, index]
+        covered = self.prefix_sum(index - 1) - self.prefix_sum(index - (index & -index))
+        self._tree.append(value + covered)
+
+    def add(self, position: int, delta: int):
+        """
+        บวกค่าที่ตำแหน่งหนึ่ง O(log n)
+
+        Args:
+            position: ตำแหน่ง (เริ่มที่ 0)
+            delta: ค่าที่บวกเพิ่ม
+        """
+        tree = self._tree
+        index = position + 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def prefix_sum(self, count: int) -> int:
+        """ผลรวมของ count ค่าแรก O(log n)"""
+        tree = self._tree
+        total = 0
+        index = count
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+
+def _sales_satang(order: Order) -> int:
+    return 0 if order.voided else to_satang(order.amount)
+
+
+class OrderBook:
+    """รายการออเดอร์ของวัน พร้อมดัชนีรูปภาพและยอดสะสมตามลำดับออเดอร์"""
+
+    __slots__ = ("_orders", "_images", "_positions", "_sales")
+
+    def __init__(self, orders: Optional[List[Order]] = None):
+        """
+        สร้าง instance ของ OrderBook
+
+        Args:
+            orders: รายการออเดอร์เริ่มต้น
+        """
+        self._orders: List[Order] = []
+        self._images: List[str] = []
+        self._positions: Dict[int, int] = {}
+        self._sales = FenwickTree()
+        for order in orders or []:
+            self.append(order)
+
+    def append(self, order: Order):
+        """เพิ่มออเดอร์ต่อท้าย"""
+        self._positions[order.order_id] = len(self._orders)
+        self._orders.append(order)
+        self._sales.append(_sales_satang(order))
+        if order.image_path:
+            self._images.append(order.image_path)
+
+    def get(self, order_id: int) -> Optional[Order]:
+        """ดึงออเดอร์ตามรหัส (None ถ้าไม่พบ)"""
+        position = self._positions.get(order_id)
+        return self._orders[position] if position is not None else None
+
+    def replace(self, order: Order):
+        """
+        แทนที่ออเดอร์ที่มีรหัสเดียวกัน (เช่น หลังแก้ไขหรือยกเลิก) O(log n)
+
+        Args:
+            order: ออเดอร์ใหม่ (รูปภาพต้องเป็นรูปเดิม)
+        """
+        position = self._positions[order.order_id]
+        old = self._orders[position]
+        self._orders[position] = order
+        self._sales.add(position, _sales_satang(order) - _sales_satang(old))
+
+    def sales_before(self, order_id: int) -> int:
+        """ยอดขายสะสม (สตางค์) ของออเดอร์ก่อนหน้าออเดอร์นี้ ไม่รวมออเดอร์ที่ยกเลิก"""
+        return self._sales.prefix_sum(self._positions[order_id])
+
+    def images(self) -> List[str]:
+        """path ของรูปภาพทั้งหมดตามลำดับออเดอร์"""
+        return list(self._images)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __iter__(self) -> Iterator[Order]:
+        return iter(self._orders)
+
+    def __getitem__(self, index):
+        return self._orders[index]
+
+    def to_dicts(self) -> List[Dict]:
+        """แปลงเป็นรายการ dict สำหรับบันทึกเป็น JSON"""
+        return [order.to_dict() for order in self._orders]
+
+    @classmethod
+    def from_dicts(cls, items: List[Dict]) -> "OrderBook":
+        """สร้างจากรายการ dict ที่อ่านจาก JSON"""
+        return cls([Order.from_dict(item) for item in items])
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูล cache ชื่อที่แสดงของผู้ใช้ LINE ATMO'decor
+
+- ชื่อที่ดึงได้เก็บไว้ ttl วินาที ผู้ส่งคนเดิมในช่วงออเดอร์หนาแน่นจึงไม่เรียก profile API ทุกข้อความ
+- ดึงไม่ได้ (ไม่ได้เป็นเพื่อน บล็อก หรือ API ผิดพลาด) เก็บผลว่า "ไม่มีชื่อ" ไว้ negative_ttl วินาที
+- คำขอพร้อมกันของ user เดียวกันรอผลการดึงครั้งเดียว (ไม่ยิง API ซ้อน)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+class ProfileCache:
+    """cache ของ user_id → ชื่อที่แสดง พร้อม TTL และ negative cache"""
+
+    def __init__(
+        self,
+        fetch: Callable[..., Optional[str]],
+        ttl: float = 6 * 3600,
+        negative_ttl: float = 600,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        สร้าง instance ของ ProfileCache
+
+        Args:
+            fetch: ฟังก์ชันดึงชื่อ fetch(user_id, *fetch_args) (exception หรือ None = ไม่มีชื่อ)
+            ttl: อายุของชื่อที่ดึงได้ (วินาที)
+            negative_ttl: อายุของผล "ไม่มีชื่อ" (วินาที)
+            max_entries: จำนวน user สูงสุด (เกินแล้วลบรายการที่ใช้นานที่สุด)
+            clock: ฟังก์ชันเวลา (สำหรับทดสอบ)
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        # {user_id: (ชื่อหรือ None, เวลาหมดอายุ)}
+        self._entries: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._pending: Dict[str, threading.Event] = {}
+        self.hits = 0
+        # misses = จำนวนครั้งที่เรียก profile API
+        self.misses = 0
+
+    def get(self, user_id: Optional[str], *fetch_args) -> Optional[str]:
+        """
+        ชื่อที่แสดงของผู้ใช้
+
+        Args:
+            user_id: LINE user id
+            fetch_args: อาร์กิวเมนต์เพิ่มเติมของ fetch เมื่อต้องดึงใหม่ (เช่น group id)
+
+        Returns:
+            ชื่อที่แสดง หรือ None ถ้าไม่มี
+        """
+        if not user_id:
+            return None
+        while True:
+            with self._lock:
+                entry = self._entries.get(user_id)
+                if entry is not None and entry[1] > self.clock():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return entry[0]
+                pending = self._pending.get(user_id)
+                if pending is None:
+                    # thread นี้เป็นผู้ดึง thread อื่นที่ขอ user เดียวกันรอผล
+                    pending = self._pending[user_id] = threading.Event()
+                    self.misses += 1
+                    break
+            pending.wait(10)
+
+        name = None
+        try:
+            name = self.fetch(user_id, *fetch_args)
+        except Exception as e:
+            print(f"⚠️ ไม่สามารถดึงชื่อของ {user_id} ได้: {e}")
+        finally:
+            with self._lock:
+                ttl = self.ttl if name else self.negative_ttl
+                self._entries[user_id] = (name, self.clock() + ttl)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self._pending.pop(user_id).set()
+        return name
+
+    def stats(self) -> Dict:
+        """สถิติของ cache"""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
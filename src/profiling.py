@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูล Profiling ขณะระบบทำงาน ATMO'decor
+
+- RequestProfiler: เก็บ cProfile ของเหตุการณ์ Webhook N รายการถัดไป
+  แล้วบันทึกเป็นไฟล์ .pstats ใน data/profiles/
+- MemoryTracker: ถ่าย snapshot ของ tracemalloc และเปรียบเทียบระหว่างสองจุด
+  เพื่อหาตำแหน่งที่จองหน่วยความจำเพิ่มขึ้นมากที่สุด
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# คีย์ที่ใช้เรียงผล profile ได้ (ค่าของ pstats.SortKey และชื่อคอลัมน์ เช่น tottime, ncalls)
+PROFILE_SORT_KEYS = frozenset(pstats.Stats.sort_arg_dict_default)
+# การจัดกลุ่มที่ Snapshot.compare_to รองรับ
+MEMORY_KEY_TYPES = ("lineno", "filename", "traceback")
+
+
+class RequestProfiler:
+    """คลาสสำหรับ profile เหตุการณ์ Webhook ตามจำนวนที่สั่ง"""
+
+    def __init__(self, profiles_dir: str = os.path.join("data", "profiles")):
+        """
+        สร้าง instance ของ RequestProfiler
+
+        Args:
+            profiles_dir: โฟลเดอร์สำหรับเก็บไฟล์ .pstats
+        """
+        self.profiles_dir = profiles_dir
+        self._remaining = 0
+        self._lock = threading.Lock()
+        # cProfile ทำงานได้ทีละตัวต่อ process จึง profile ทีละเหตุการณ์
+        self._active = threading.Lock()
+
+    def arm(self, count: int):
+        """สั่งให้ profile เหตุการณ์ถัดไป count รายการ"""
+        with self._lock:
+            self._remaining = max(0, count)
+
+    def remaining(self) -> int:
+        """จำนวนเหตุการณ์ที่ยังรอ profile"""
+        return self._remaining
+
+    def _take(self) -> bool:
+        if self._remaining <= 0:
+            return False
+        with self._lock:
+            if self._remaining <= 0 or not self._active.acquire(blocking=False):
+                return False
+            self._remaining -= 1
+            return True
+
+    def run(self, func: Callable, *args, **kwargs):
+        """
+        เรียกฟังก์ชัน โดย profile ด้วย cProfile ถ้ายังมีโควต้าเหลือ
+
+        Args:
+            func: ฟังก์ชันที่จะเรียก
+        """
+        if not self._take():
+            return func(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            self._active.release()
+            os.makedirs(self.profiles_dir, exist_ok=True)
+            filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.pstats"
+            profile.dump_stats(os.path.join(self.profiles_dir, filename))
+
+    def list_profiles(self) -> List[str]:
+        """รายชื่อไฟล์ .pstats ที่บันทึกไว้ (ใหม่สุดก่อน)"""
+        if not os.path.isdir(self.profiles_dir):
+            return []
+        return sorted(
+            (name for name in os.listdir(self.profiles_dir) if name.endswith(".pstats")),
+            reverse=True
+        )
+
+    def summarize(self, filename: str, limit: int = 20, sort_by: str = "cumulative") -> Optional[str]:
+        """
+        สรุปฟังก์ชันที่ใช้เวลามากที่สุดจากไฟล์ .pstats
+
+        Args:
+            filename: ชื่อไฟล์ใน profiles_dir
+            limit: จำนวนฟังก์ชันที่แสดง
+            sort_by: คีย์สำหรับเรียง (ค่าใน PROFILE_SORT_KEYS เช่น cumulative, tottime, ncalls)
+
+        Returns:
+            ข้อความสรุป หรือ None ถ้าไม่พบไฟล์
+
+        Raises:
+            ValueError: ถ้า sort_by ไม่รองรับ
+        """
+        if sort_by not in PROFILE_SORT_KEYS:
+            raise ValueError(f"sort ต้องเป็นหนึ่งใน {', '.join(sorted(PROFILE_SORT_KEYS))}")
+        if filename not in self.list_profiles():
+            return None
+
+        output = io.StringIO()
+        stats = pstats.Stats(os.path.join(self.profiles_dir, filename), stream=output)
+        stats.strip_dirs().sort_stats(sort_by).print_stats(limit)
+        return output.getvalue()
+
+
+class MemoryTracker:
+    """คลาสสำหรับถ่ายและเปรียบเทียบ snapshot ของ tracemalloc"""
+
+    def __init__(self, max_snapshots: int = 10):
+        """
+        สร้าง instance ของ MemoryTracker
+
+        Args:
+            max_snapshots: จำนวน snapshot สูงสุดที่เก็บไว้ในหน่วยความจำ
+        """
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, frames: int = 10):
+        """เริ่มติดตามการจองหน่วยความจำ"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self):
+        """หยุดติดตามและล้าง snapshot ทั้งหมด"""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def status(self) -> Dict:
+        """สถานะปัจจุบันของ tracemalloc"""
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        with self._lock:
+            names = list(self._snapshots)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "snapshots": names,
+        }
+
+    def snapshot(self, name: Optional[str] = None) -> str:
+        """
+        ถ่าย snapshot (ต้องเรียก start() ก่อน)
+
+        Args:
+            name: ชื่อ snapshot (ค่าเริ่มต้นคือเวลาปัจจุบัน)
+
+        Returns:
+            ชื่อ snapshot
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc ยังไม่ได้เริ่มทำงาน")
+
+        name = name or datetime.now().strftime("%H%M%S_%f")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        with self._lock:
+            self._snapshots[name] = snapshot
+            self._snapshots.move_to_end(name)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return name
+
+    def diff(self, first: str, second: str, limit: int = 20, key_type: str = "lineno") -> Optional[List[Dict]]:
+        """
+        เปรียบเทียบ snapshot สองจุด
+
+        Args:
+            first: ชื่อ snapshot ก่อนหน้า
+            second: ชื่อ snapshot หลัง
+            limit: จำนวนตำแหน่งที่แสดง
+            key_type: การจัดกลุ่ม (lineno, filename, traceback)
+
+        Returns:
+            รายการตำแหน่งที่หน่วยความจำเปลี่ยนมากที่สุด หรือ None ถ้าไม่พบ snapshot
+
+        Raises:
+            ValueError: ถ้า key_type ไม่รองรับ
+        """
+        if key_type not in MEMORY_KEY_TYPES:
+            raise ValueError(f"key ต้องเป็นหนึ่งใน {', '.join(MEMORY_KEY_TYPES)}")
+        with self._lock:
+            old = self._snapshots.get(first)
+            new = self._snapshots.get(second)
+        if old is None or new is None:
+            return None
+
+        return [
+            {
+                "location": str(stat.traceback),
+                "size_diff": stat.size_diff,
+                "size": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count,
+            }
+            for stat in new.compare_to(old, key_type)[:limit]
+        ]
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลสร้างข้อความตอบกลับ ATMO'decor
+
+- SUMMARY_SECTIONS คือรูปแบบของสรุปยอดเพียงแห่งเดียว ใช้ทั้งข้อความ (text)
+  และ Flex bubble ของ /summary และข้อความยืนยันออเดอร์
+- template ถูกประกอบครั้งเดียวตอน import แต่ละข้อความจึงเหลือแค่ format_map
+- SummaryRenderer เก็บผลของสรุปยอดตาม ETag ของ snapshot ข้อความยืนยันออเดอร์
+  ที่ใช้ snapshot เดียวกัน (หรือ /summary ซ้ำโดยไม่มีออเดอร์ใหม่) ไม่ต้อง render ใหม่
+"""
+
+from typing import Dict, List, Mapping, Tuple
+
+from .commission_calculator import (
+    MIN_SALES_THRESHOLD,
+    OT_EVENING_END,
+    OT_EVENING_MIN_SALES,
+    OT_EVENING_START,
+    calculate_commission_rate,
+)
+
+TEXT = "text"
+FLEX = "flex"
+REPLY_FORMATS = (TEXT, FLEX)
+
+# รูปแบบสรุปยอด: (หัวข้อ, [(ป้าย, รูปแบบค่า)]) หัวข้อ None = ไม่มีหัวข้อ
+SUMMARY_HEADER = "📊 สรุปยอดวันนี้ ({date})"
+SUMMARY_STAFF = "👥 คนตอบ: {staff_names} ({staff_count} คน)"
+SUMMARY_SECTIONS: Tuple[Tuple, ...] = (
+    (None, (
+        ("ยอดขายรวม", "{total_sales:,.0f} บาท"),
+        ("ส่วนต่าง (เกิน 20,000)", "{excess:,.0f} บาท"),
+        ("จำนวนออเดอร์", "{total_orders} ออเดอร์"),
+        ("เรทปัจจุบัน", "{rate_percent:.0f}%"),
+    )),
+    ("💰 คอมมิชชั่น:", (
+        ("คอมมิชชั่น 1-4%", "{commission_1_total:,.2f} บาท"),
+        ("คอมมิชชั่น 5%", "{commission_5_total:,.2f} บาท"),
+        ("Add on (2vases)", "{add_on_2vases:,.0f} บาท"),
+        ("Add on (order)", "{add_on_order:,.0f} บาท"),
+    )),
+    ("⏰ OT:", (
+        (f"ช่วง {OT_EVENING_START}-{OT_EVENING_END}", "{ot_sales:,.0f} บาท {ot_status}"),
+        ("Penalty", "{ot_penalty:,.0f} บาท"),
+    )),
+)
+SUMMARY_TOTALS = (
+    ("💵 รวมทั้งหมด", "{commission_total:,.2f} บาท"),
+    ("💵 Incentive ต่อคน", "{incentive_per_person:,.2f} บาท"),
+)
+
+# ยอดตามผู้ส่ง (แสดงเมื่อมีออเดอร์ที่ทราบผู้ส่ง เรียงตามยอดขาย)
+SUMMARY_SENDERS_TITLE = "👤 ตามผู้ส่ง:"
+SUMMARY_SENDER_VALUE = "{orders} ออเดอร์ / {sales:,.0f} บาท"
+
+ORDER_HEADER = "✅ บันทึกออเดอร์สำเร็จ!"
+ORDER_ROWS = (
+    ("สินค้า", "{product_name}"),
+    ("ยอดขาย", "{amount:,.0f} บาท"),
+    ("เวลา", "{time}"),
+    ("คอมมิชชั่น", "{order_commission:,.0f} บาท ({rate_text})"),
+)
+# แสดงเมื่อยอดต่างจากราคาตั้งในแคตตาล็อกเกินเกณฑ์
+ORDER_PRICE_WARNING = "⚠️ ยอดต่างจากราคาตั้ง {list_price:,.0f} บาท ({price_deviation:+.0%})"
+
+_SUMMARY_DEFAULTS = {
+    "date": "",
+    "staff_count": 0,
+    "total_sales": 0,
+    "total_orders": 0,
+    "commission_1_total": 0,
+    "commission_5_total": 0,
+    "add_on_2vases": 0,
+    "add_on_order": 0,
+    "ot_sales": 0,
+    "ot_penalty": 0,
+    "commission_total": 0,
+    "incentive_per_person": 0,
+}
+
+
+def _compile_text() -> Tuple[str, str]:
+    """ประกอบ template ข้อความของสรุปยอดและออเดอร์ (เรียกครั้งเดียวตอน import)"""
+    blocks = [SUMMARY_HEADER + "\n" + SUMMARY_STAFF]
+    for title, rows in SUMMARY_SECTIONS:
+        lines = [title] if title else []
+        lines.extend(f"• {label}: {value}" for label, value in rows)
+        blocks.append("\n".join(lines))
+    blocks.append("\n".join(f"{label}: {value}" for label, value in SUMMARY_TOTALS))
+
+    order = "\n".join([ORDER_HEADER, "", "📦 ออเดอร์นี้:"] + [f"• {label}: {value}" for label, value in ORDER_ROWS])
+    return "\n\n".join(blocks), order
+
+
+_SUMMARY_TEXT, _ORDER_TEXT = _compile_text()
+
+
+def summary_values(summary: Mapping) -> Dict:
+    """
+    ค่าที่ใช้เติม template ของสรุปยอด (รวมค่าที่คำนวณจากข้อมูลสรุป)
+
+    Args:
+        summary: ข้อมูลสรุปของวัน
+
+    Returns:
+        dict สำหรับ format_map
+    """
+    values = dict(_SUMMARY_DEFAULTS)
+    values.update(summary)
+    total_sales = values["total_sales"]
+    rate, _, _ = calculate_commission_rate(total_sales)
+    values["date"] = values["date"] or ""
+    values["staff_names"] = ", ".join(summary.get("staff_names") or ())
+    values["rate"] = rate
+    values["rate_percent"] = rate * 100
+    values["excess"] = max(0, total_sales - MIN_SALES_THRESHOLD)
+    if "ot_sales" not in summary:
+        # ไฟล์รุ่นก่อนที่ยังไม่มี ot_sales (คำนวณใหม่เมื่อมีออเดอร์ถัดไป)
+        values["ot_sales"] = summary.get("sales_18_22", 0)
+    values["ot_status"] = "✅" if values["ot_sales"] >= OT_EVENING_MIN_SALES else "❌"
+    values["sender_rows"] = sender_rows(summary.get("staff_stats") or {})
+    return values
+
+
+def sender_rows(staff_stats: Mapping) -> List[Tuple[str, str]]:
+    """
+    แถว (ชื่อ, ยอด) ของยอดตามผู้ส่ง เรียงจากยอดขายมากไปน้อย
+
+    Args:
+        staff_stats: {user_id: {"name", "orders", "sales"}} จากข้อมูลสรุป
+    """
+    ordered = sorted(staff_stats.items(), key=lambda item: item[1]["sales"], reverse=True)
+    return [
+        (stats["name"] or f"{user_id[:8]}…", SUMMARY_SENDER_VALUE.format_map(stats))
+        for user_id, stats in ordered
+        if stats["orders"] or stats["sales"]
+    ]
+
+
+def _render_text(values: Dict) -> str:
+    """ข้อความสรุปยอดจาก template ที่ประกอบไว้ ตามด้วยยอดตามผู้ส่ง (ถ้ามี)"""
+    text = _SUMMARY_TEXT.format_map(values)
+    if values["sender_rows"]:
+        lines = [SUMMARY_SENDERS_TITLE] + [f"• {label}: {value}" for label, value in values["sender_rows"]]
+        text += "\n\n" + "\n".join(lines)
+    return text
+
+
+def order_values(order_info: Mapping) -> Dict:
+    """
+    ค่าที่ใช้เติม template ของออเดอร์
+
+    Args:
+        order_info: ข้อมูลออเดอร์ (product_name, amount, time, commission_1, commission_5,
+            add_on_2vases, is_special, rate และ list_price, price_deviation ถ้ายอดต่างจากราคาตั้ง)
+
+    Returns:
+        dict สำหรับ format_map
+    """
+    return {
+        "product_name": order_info.get("product_name", ""),
+        "amount": order_info.get("amount", 0),
+        "time": order_info.get("time", ""),
+        "order_commission": (
+            order_info.get("commission_1", 0) +
+            order_info.get("commission_5", 0) +
+            order_info.get("add_on_2vases", 0)
+        ),
+        "rate_text": "5%" if order_info.get("is_special") else f"{order_info.get('rate', 0) * 100:.0f}%",
+        "price_warning": (
+            ORDER_PRICE_WARNING.format_map(order_info) if order_info.get("price_deviation") is not None else ""
+        ),
+    }
+
+
+def render_summary_text(summary: Mapping) -> str:
+    """ข้อความสรุปยอด (ไม่ใช้ cache)"""
+    return _render_text(summary_values(summary))
+
+
+def _flex_row(label: str, text: str) -> Dict:
+    return {
+        "type": "box",
+        "layout": "baseline",
+        "contents": [
+            {"type": "text", "text": label, "size": "sm", "color": "#666666", "flex": 5},
+            {"type": "text", "text": text, "size": "sm", "align": "end", "flex": 5},
+        ],
+    }
+
+
+def _flex_rows(rows, values: Dict) -> List[Dict]:
+    return [_flex_row(label, value.format_map(values)) for label, value in rows]
+
+
+def _flex_summary_contents(values: Dict) -> List[Dict]:
+    """ส่วนสรุปยอดของ Flex bubble (ใช้ SUMMARY_SECTIONS เดียวกับข้อความ)"""
+    contents = [
+        {"type": "text", "text": SUMMARY_HEADER.format_map(values), "weight": "bold", "size": "md"},
+        {"type": "text", "text": SUMMARY_STAFF.format_map(values), "size": "xs", "color": "#999999", "wrap": True},
+    ]
+    for title, rows in SUMMARY_SECTIONS:
+        contents.append({"type": "separator", "margin": "md"})
+        if title:
+            contents.append({"type": "text", "text": title, "weight": "bold", "size": "sm", "margin": "md"})
+        contents.extend(_flex_rows(rows, values))
+    contents.append({"type": "separator", "margin": "md"})
+    contents.extend(_flex_rows(SUMMARY_TOTALS, values))
+    if values["sender_rows"]:
+        contents.append({"type": "separator", "margin": "md"})
+        contents.append({"type": "text", "text": SUMMARY_SENDERS_TITLE, "weight": "bold", "size": "sm", "margin": "md"})
+        contents.extend(_flex_row(label, value) for label, value in values["sender_rows"])
+    return contents
+
+
+def _bubble(contents: List[Dict]) -> Dict:
+    return {"type": "bubble", "body": {"type": "box", "layout": "vertical", "spacing": "sm", "contents": contents}}
+
+
+class SummaryRenderer:
+    """สร้างข้อความสรุปยอดและยืนยันออเดอร์ โดยเก็บส่วนสรุปยอดตาม ETag ของ snapshot"""
+
+    def __init__(self):
+        """สร้าง instance ของ SummaryRenderer"""
+        # {รูปแบบ: (etag, ผลลัพธ์)} เก็บเฉพาะเวอร์ชันล่าสุดของแต่ละรูปแบบ
+        self._cache: Dict[str, Tuple[str, object]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, kind: str, snapshot, build):
+        entry = self._cache.get(kind)
+        if entry is not None and entry[0] == snapshot.etag:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        result = build(summary_values(snapshot.summary))
+        # แทนที่ทั้ง tuple ผู้อ่านพร้อมกันจึงได้ค่าที่สอดคล้องกันเสมอ
+        self._cache[kind] = (snapshot.etag, result)
+        return result
+
+    def summary_text(self, snapshot) -> str:
+        """
+        ข้อความสรุปยอด
+
+        Args:
+            snapshot: SummarySnapshot (ต้องมี etag และ summary)
+        """
+        return self._cached(TEXT, snapshot, _render_text)
+
+    def summary_flex(self, snapshot) -> Dict:
+        """Flex bubble ของสรุปยอด (ห้ามแก้ไข dict ที่ได้ เพราะใช้ร่วมกันจาก cache)"""
+        return self._cached(FLEX, snapshot, lambda values: _bubble(_flex_summary_contents(values)))
+
+    def confirmation_text(self, order_info: Mapping, snapshot) -> str:
+        """ข้อความยืนยันออเดอร์: ส่วนออเดอร์ render ใหม่ ส่วนสรุปยอดจาก cache"""
+        values = order_values(order_info)
+        text = _ORDER_TEXT.format_map(values)
+        if values["price_warning"]:
+            text += "\n" + values["price_warning"]
+        return text + "\n\n" + self.summary_text(snapshot)
+
+    def confirmation_flex(self, order_info: Mapping, snapshot) -> Dict:
+        """Flex bubble ยืนยันออเดอร์ (ส่วนสรุปยอดใช้ร่วมกับ summary_flex)"""
+        values = order_values(order_info)
+        summary_contents = self.summary_flex(snapshot)["body"]["contents"]
+        contents = [
+            {"type": "text", "text": ORDER_HEADER, "weight": "bold", "size": "lg", "color": "#1DB446"},
+            *_flex_rows(ORDER_ROWS, values),
+            *([{"type": "text", "text": values["price_warning"], "size": "sm", "color": "#E67E22", "wrap": True}]
+              if values["price_warning"] else []),
+            {"type": "separator", "margin": "lg"},
+            *summary_contents,
+        ]
+        return _bubble(contents)
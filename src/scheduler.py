@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลงานตามเวลา ATMO'decor
+
+- LeaderLock: เลือกผู้รันงานด้วย file lock (fcntl.flock แบบไม่รอ) ใน data/locks
+  ใช้ได้ทั้งหลาย thread หลาย worker และหลาย instance ที่ใช้โฟลเดอร์ข้อมูลร่วมกัน
+  ผู้ที่ได้ lock บันทึก key ของรอบที่รันแล้ว (เช่นวันที่) ผู้ที่มาทีหลังในรอบเดียวกันจึงข้าม
+- start_scheduler: APScheduler (BackgroundScheduler) ตามเขตเวลา ค่าเริ่มต้น Asia/Bangkok
+  import APScheduler เมื่อเปิดใช้เท่านั้น (ไม่เพิ่มเวลาเริ่มระบบเมื่อไม่ได้ตั้งเวลา)
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .time_buckets import parse_clock
+
+try:
+    import fcntl
+except ImportError:  # Windows: กันได้เฉพาะ thread ใน process เดียวกัน
+    fcntl = None
+
+DEFAULT_TIMEZONE = "Asia/Bangkok"
+
+
+class LeaderLock:
+    """lock ต่องานแบบไม่รอ (ผู้ที่ได้ lock คือผู้รันงานรอบนั้น)"""
+
+    def __init__(self, lock_dir: str):
+        """
+        สร้าง instance ของ LeaderLock
+
+        Args:
+            lock_dir: โฟลเดอร์ของไฟล์ lock (ต้องอยู่บน filesystem ที่ทุก instance ใช้ร่วมกัน)
+        """
+        self.lock_dir = lock_dir
+        self._local_lock = threading.Lock()
+        self._held = set()
+
+    def _path(self, name: str, suffix: str) -> str:
+        return os.path.join(self.lock_dir, f"{name}.{suffix}")
+
+    @contextmanager
+    def hold(self, name: str) -> Iterator[bool]:
+        """
+        พยายามถือ lock ของงาน (ไม่รอ)
+
+        Args:
+            name: ชื่องาน
+
+        Yields:
+            True ถ้าได้ lock
+        """
+        os.makedirs(self.lock_dir, exist_ok=True)
+        fd = os.open(self._path(name, "lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        acquired = False
+        try:
+            if fcntl is not None:
+                # flock ผูกกับ open file description: thread อื่นที่เปิดไฟล์เองก็ได้ lock ไม่ได้เช่นกัน
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    acquired = True
+                except OSError:
+                    pass
+            else:
+                with self._local_lock:
+                    if name not in self._held:
+                        self._held.add(name)
+                        acquired = True
+            if acquired:
+                os.ftruncate(fd, 0)
+                os.write(fd, f"{os.getpid()} {time.time():.0f}\n".encode('ascii'))
+            yield acquired
+        finally:
+            if acquired:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    with self._local_lock:
+                        self._held.discard(name)
+            os.close(fd)
+
+    def last_run(self, name: str) -> Optional[str]:
+        """key ของรอบล่าสุดที่รันสำเร็จ"""
+        try:
+            with open(self._path(name, "last"), 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def mark_run(self, name: str, key: str):
+        """บันทึก key ของรอบที่รันสำเร็จ (เรียกขณะถือ lock)"""
+        path = self._path(name, "last")
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(key)
+        os.replace(path + ".tmp", path)
+
+
+def run_exclusive(leader: LeaderLock, name: str, func: Callable, run_key: Optional[str] = None):
+    """
+    รันงานเมื่อได้เป็นผู้นำของรอบนั้นเท่านั้น
+
+    Args:
+        leader: LeaderLock
+        name: ชื่องาน
+        func: ฟังก์ชันของงาน (ไม่มีอาร์กิวเมนต์)
+        run_key: key ของรอบ เช่นวันที่ (None = รันทุกครั้งที่ได้ lock)
+
+    Returns:
+        (ได้รันหรือไม่, ผลของ func)
+    """
+    with leader.hold(name) as acquired:
+        if not acquired:
+            print(f"⏭️ ข้ามงาน {name}: มีผู้อื่นกำลังรันอยู่")
+            return False, None
+        if run_key is not None and leader.last_run(name) == run_key:
+            print(f"⏭️ ข้ามงาน {name}: รอบ {run_key} รันไปแล้ว")
+            return False, None
+        result = func()
+        if run_key is not None:
+            leader.mark_run(name, run_key)
+        return True, result
+
+
+def start_scheduler(
+    jobs: List[Tuple[str, Callable, str]],
+    leader: LeaderLock,
+    timezone: str = DEFAULT_TIMEZONE
+):
+    """
+    เริ่ม scheduler ที่รันงานทุกวันตามเวลาในเขตเวลาที่กำหนด
+
+    Args:
+        jobs: [(ชื่องาน, ฟังก์ชัน, เวลา "HH:MM")]
+        leader: LeaderLock สำหรับเลือกผู้รันแต่ละรอบ
+        timezone: ชื่อเขตเวลา
+
+    Returns:
+        BackgroundScheduler ที่เริ่มทำงานแล้ว
+    """
+    import pytz
+    from datetime import datetime
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+
+    tz = pytz.timezone(timezone)
+    scheduler = BackgroundScheduler(
+        timezone=tz,
+        # ถ้า process หยุดไปตอนถึงเวลา ให้รันครั้งเดียวเมื่อกลับมา (ภายใน 1 ชั่วโมง)
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 3600}
+    )
+
+    def job(name: str, func: Callable):
+        # key ของรอบคือวันที่ตามเขตเวลา ทุก instance จึงได้ key เดียวกัน
+        run_exclusive(leader, name, func, datetime.now(tz).strftime("%Y-%m-%d"))
+
+    for name, func, clock in jobs:
+        hour, minute = divmod(parse_clock(clock), 60)
+        scheduler.add_job(
+            job, CronTrigger(hour=hour, minute=minute, timezone=tz),
+            args=(name, func), id=name, name=name, replace_existing=True
+        )
+    scheduler.start()
+    print(f"⏰ เริ่ม scheduler ({timezone}): " + ", ".join(f"{name} {clock}" for name, _, clock in jobs))
+    return scheduler
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลค้นหาออเดอร์ย้อนหลัง ATMO'decor (inverted index)
+
+- ข้อความที่ค้นได้คือ product_name และ note ของออเดอร์
+- ตัดคำ: ภาษาไทยไม่มีช่องว่างจึงใช้ character bigram ของแต่ละช่วงอักษรไทย
+  ภาษาอังกฤษและตัวเลขใช้ทั้งคำเป็นตัวพิมพ์เล็ก
+- posting list ของแต่ละคำเก็บรหัสเอกสารแบบ delta + varint ใน bytearray
+  รหัสเอกสารเพิ่มขึ้นเสมอ การเพิ่มเอกสารจึงต่อท้ายได้ทันทีไม่ต้องเรียงใหม่
+- เอกสารหนึ่งคือออเดอร์หนึ่ง (วันที่, รหัสออเดอร์) ออเดอร์ที่ถูกแก้ไขได้รหัสเอกสารใหม่
+  รหัสเดิมถูกข้ามตอนค้นหา
+- บันทึกลง search/docs.jsonl แบบต่อท้าย (เฉพาะออเดอร์ที่เปลี่ยน) และสร้าง index ในหน่วยความจำ
+  เมื่อใช้ครั้งแรก archive ที่ยังไม่เคย index (รวมข้อมูลก่อนเปิดใช้) ถูกเพิ่มด้วย sync_archives
+- ค้นหา: ทุกคำในคำค้นต้องเป็น substring ของข้อความ (รวมถึง prefix)
+  หาเอกสารที่เป็นไปได้จาก posting list แล้วตรวจกับข้อความจริง
+
+การใช้งาน CLI:
+    python -m src.search data "ฟาแลน"
+    python -m src.search data "faland vase" --start 2026-01-01 --limit 50
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+DOCS_FILE = "docs.jsonl"
+NGRAM = 2
+DEFAULT_LIMIT = 20
+# จำนวน posting list ที่ถอดรหัสแล้วเก็บไว้ (คำที่ค้นบ่อยไม่ต้องถอดรหัสซ้ำ)
+DECODED_CACHE_TERMS = 64
+
+_THAI_RUN = re.compile("[\u0e00-\u0e7f]+")
+_WORD = re.compile(r"[0-9a-z]+")
+_ARCHIVE_NAME = re.compile(r"^sales_\d{4}-\d{2}-\d{2}_\d{6}\.json$")
+
+
+def tokenize(text: str) -> Set[str]:
+    """
+    คำใน index ของข้อความ
+
+    Args:
+        text: ข้อความ
+
+    Returns:
+        bigram ของช่วงอักษรไทย (ช่วงที่ยาวอักษรเดียวใช้ทั้งช่วง) และคำภาษาอังกฤษ/ตัวเลข
+    """
+    text = text.lower()
+    terms = set(_WORD.findall(text))
+    for run in _THAI_RUN.findall(text):
+        if len(run) < NGRAM:
+            terms.add(run)
+        else:
+            terms.update(run[i:i + NGRAM] for i in range(len(run) - NGRAM + 1))
+    return terms
+
+
+def encode_varint(value: int, out: bytearray):
+    """ต่อท้ายจำนวนเต็มไม่ติดลบแบบ varint (7 bit ต่อ byte)"""
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_postings(data: bytes) -> Iterator[int]:
+    """รหัสเอกสารจาก posting list (delta + varint)"""
+    doc_id = shift = delta = 0
+    for byte in data:
+        delta |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            doc_id += delta
+            yield doc_id
+            shift = delta = 0
+
+
+def _order_fields(order) -> Dict:
+    return order if isinstance(order, dict) else order.to_dict()
+
+
+class SearchIndex:
+    """inverted index ของออเดอร์ทุกวัน (เพิ่มทีละออเดอร์)"""
+
+    def __init__(self, index_dir: str, archive_dir: Optional[str] = None):
+        """
+        สร้าง instance ของ SearchIndex (ยังไม่อ่านไฟล์จนกว่าจะใช้ครั้งแรก)
+
+        Args:
+            index_dir: โฟลเดอร์ของ index
+            archive_dir: โฟลเดอร์ archive สำหรับ sync_archives
+        """
+        self.index_dir = index_dir
+        self.archive_dir = archive_dir
+        self.docs_path = os.path.join(index_dir, DOCS_FILE)
+        self._lock = threading.Lock()
+        self._loaded = False
+        # รหัสเอกสาร → (วันที่, รหัสออเดอร์, ข้อความ, ยอด, ยกเลิก, ข้อความตัวพิมพ์เล็ก) หรือ None ถ้าถูกแทนแล้ว
+        self._docs: List[Optional[Tuple]] = []
+        self._latest: Dict[Tuple[str, int], int] = {}
+        self._postings: Dict[str, bytearray] = {}
+        self._last_doc: Dict[str, int] = {}
+        self._synced: Set[str] = set()
+        # คำ → (ความยาว posting list ตอนถอดรหัส, รหัสเอกสาร)
+        self._decoded: "OrderedDict[str, Tuple[int, Set[int]]]" = OrderedDict()
+
+    def _index_doc(self, date: str, order_id: int, text: str, amount: float, voided: bool) -> bool:
+        """เพิ่มเอกสารในหน่วยความจำ (False ถ้าเหมือนเอกสารล่าสุดของออเดอร์เดิม)"""
+        key = (date, order_id)
+        doc = (date, order_id, text, amount, voided, text.lower())
+        old_id = self._latest.get(key)
+        if old_id is not None:
+            if self._docs[old_id][:5] == doc[:5]:
+                return False
+            self._docs[old_id] = None
+        doc_id = len(self._docs)
+        self._docs.append(doc)
+        self._latest[key] = doc_id
+        for term in tokenize(doc[5]):
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = bytearray()
+            encode_varint(doc_id - self._last_doc.get(term, 0), postings)
+            self._last_doc[term] = doc_id
+        return True
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.docs_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # บรรทัดสุดท้ายที่เขียนไม่ครบ
+                    if "archive" in record:
+                        self._synced.add(record["archive"])
+                    else:
+                        self._index_doc(record["date"], record["order_id"], record["text"],
+                                        record["amount"], record["voided"])
+        except FileNotFoundError:
+            pass
+
+    def _append(self, records: List[Dict]):
+        if not records:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self.docs_path, 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+
+    def _record(self, date: str, order) -> Optional[Dict]:
+        fields = _order_fields(order)
+        text = "\n".join(part for part in (fields.get("product_name"), fields.get("note")) if part)
+        record = {
+            "date": date,
+            "order_id": int(fields["order_id"]),
+            "text": text,
+            "amount": fields.get("amount") or 0,
+            "voided": bool(fields.get("voided")),
+        }
+        changed = self._index_doc(record["date"], record["order_id"], record["text"],
+                                  record["amount"], record["voided"])
+        return record if changed else None
+
+    def add(self, date: str, order):
+        """
+        เพิ่มหรืออัพเดทออเดอร์ใน index
+
+        Args:
+            date: วันที่ของออเดอร์
+            order: Order หรือ dict ของออเดอร์
+        """
+        if not date:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            record = self._record(date, order)
+            self._append([record] if record else [])
+
+    def sync_archives(self) -> int:
+        """
+        index ไฟล์ archive ที่ยังไม่เคย index (เรียกหลังสำรองข้อมูล เช่นเริ่มวันหรือปิดวัน)
+
+        ออเดอร์ใน archive คือสถานะสุดท้ายของวัน จึงแทนข้อมูลที่ index ไว้ระหว่างวัน
+
+        Returns:
+            จำนวนออเดอร์ที่เพิ่มหรือเปลี่ยน
+        """
+        if not self.archive_dir or not os.path.isdir(self.archive_dir):
+            return 0
+        with self._lock:
+            self._ensure_loaded()
+            changed = 0
+            for name in sorted(os.listdir(self.archive_dir)):
+                if not _ARCHIVE_NAME.match(name) or name in self._synced:
+                    continue
+                try:
+                    with open(os.path.join(self.archive_dir, name), 'r', encoding='utf-8') as f:
+                        day = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ ข้ามไฟล์ archive ที่อ่านไม่ได้ {name}: {e}")
+                    continue
+                records = [self._record(day["date"], order) for order in day.get("orders", [])] if day.get("date") else []
+                records = [record for record in records if record]
+                self._synced.add(name)
+                self._append(records + [{"archive": name}])
+                changed += len(records)
+            return changed
+
+    def _doc_ids(self, term: str) -> Set[int]:
+        """รหัสเอกสารของคำ (ห้ามแก้ไข set ที่ได้ เพราะอาจเป็นค่าใน cache)"""
+        postings = self._postings.get(term)
+        if postings is None:
+            return set()
+        cached = self._decoded.get(term)
+        # posting list ต่อท้ายได้อย่างเดียว ความยาวเท่าเดิมแปลว่ายังไม่เปลี่ยน
+        if cached is not None and cached[0] == len(postings):
+            self._decoded.move_to_end(term)
+            return cached[1]
+        doc_ids = set(decode_postings(postings))
+        self._decoded[term] = (len(postings), doc_ids)
+        self._decoded.move_to_end(term)
+        while len(self._decoded) > DECODED_CACHE_TERMS:
+            self._decoded.popitem(last=False)
+        return doc_ids
+
+    def _matching_terms(self, pattern: "re.Pattern", piece: str) -> Set[int]:
+        """รวมรหัสเอกสารของทุกคำชนิดเดียวกันที่มี piece เป็น substring"""
+        doc_ids: Set[int] = set()
+        for term in self._postings:
+            if piece in term and pattern.fullmatch(term):
+                doc_ids |= self._doc_ids(term)
+        return doc_ids
+
+    def _candidates(self, piece: str) -> Optional[Set[int]]:
+        """เอกสารที่อาจมีคำค้นนี้ (None = ตัดจาก index ไม่ได้ ต้องตรวจทุกเอกสาร)"""
+        result: Optional[Set[int]] = None
+
+        def narrow(doc_ids: Set[int]):
+            nonlocal result
+            result = doc_ids if result is None else result & doc_ids
+
+        for run in _THAI_RUN.findall(piece):
+            if len(run) >= NGRAM:
+                grams = sorted({run[i:i + NGRAM] for i in range(len(run) - NGRAM + 1)},
+                               key=lambda gram: len(self._postings.get(gram, b"")))
+                for gram in grams:
+                    narrow(self._doc_ids(gram))
+                    if not result:
+                        return result
+            else:
+                narrow(self._matching_terms(_THAI_RUN, run))
+        for word in _WORD.findall(piece):
+            # คำภาษาอังกฤษที่มีคำค้นเป็น substring (รวมถึง prefix)
+            narrow(self._matching_terms(_WORD, word))
+        return result
+
+    def find(
+        self,
+        query: str,
+        limit: int = DEFAULT_LIMIT,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Dict:
+        """
+        ค้นหาออเดอร์ที่ข้อความมีทุกคำในคำค้น
+
+        Args:
+            query: คำค้น (คั่นหลายคำด้วยช่องว่าง)
+            limit: จำนวนผลสูงสุด
+            start: วันเริ่มต้น (รวม)
+            end: วันสิ้นสุด (รวม)
+
+        Returns:
+            {"total": จำนวนที่พบ, "results": [ออเดอร์ล่าสุดก่อน]}
+        """
+        pieces = query.lower().split()
+        if not pieces:
+            raise ValueError("กรุณาระบุคำค้น")
+        with self._lock:
+            self._ensure_loaded()
+            candidates: Optional[Set[int]] = None
+            for piece in pieces:
+                doc_ids = self._candidates(piece)
+                if doc_ids is not None:
+                    candidates = doc_ids if candidates is None else candidates & doc_ids
+            if candidates is None:
+                candidates = set(self._latest.values())
+            docs = [self._docs[doc_id] for doc_id in candidates]
+
+        # คำที่ index ตรงทั้งคำ (คำอังกฤษหรือไทยไม่เกิน NGRAM อักษร) ไม่ต้องตรวจกับข้อความซ้ำ
+        verify = [piece for piece in pieces
+                  if not (_WORD.fullmatch(piece) or (_THAI_RUN.fullmatch(piece) and len(piece) <= NGRAM))]
+        matches = [
+            doc for doc in docs
+            if doc is not None
+            and (start is None or doc[0] >= start) and (end is None or doc[0] <= end)
+            and all(piece in doc[5] for piece in verify)
+        ]
+        # tuple ขึ้นต้นด้วย (วันที่, รหัสออเดอร์) ซึ่งไม่ซ้ำกัน จึงเรียงได้โดยไม่ต้องใช้ key
+        latest = heapq.nlargest(limit, matches)
+        return {
+            "total": len(matches),
+            "results": [
+                {"date": date, "order_id": order_id, "text": text, "amount": amount, "voided": voided}
+                for date, order_id, text, amount, voided, _ in latest
+            ]
+        }
+
+    def stats(self) -> Dict:
+        """ขนาดของ index"""
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "orders": len(self._latest),
+                "terms": len(self._postings),
+                "postings_bytes": sum(len(postings) for postings in self._postings.values()),
+            }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI ค้นหาออเดอร์ย้อนหลัง"""
+    parser = argparse.ArgumentParser(description="ค้นหาออเดอร์ย้อนหลัง")
+    parser.add_argument("data_dir", help="โฟลเดอร์ข้อมูล (อ่าน search/ และ archive/)")
+    parser.add_argument("query")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args(argv)
+
+    index = SearchIndex(os.path.join(args.data_dir, "search"), os.path.join(args.data_dir, "archive"))
+    index.sync_archives()
+    found = index.find(args.query, args.limit, args.start, args.end)
+    print(f"🔎 พบ {found['total']} ออเดอร์")
+    for item in found["results"]:
+        voided = " (ยกเลิก)" if item["voided"] else ""
+        print(f"• {item['date']} #{item['order_id']}: {item['text']} {item['amount']:,.0f} บาท{voided}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
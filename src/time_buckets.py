@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูลดัชนียอดขายตามช่วงเวลา ATMO'decor
+
+แบ่งวันทำการเป็นช่อง (เช่น ทุก 15 นาที) เก็บยอดขาย (สตางค์) และจำนวนออเดอร์
+ของแต่ละช่อง พร้อม prefix sum สำหรับหายอดของช่วงเวลาใดๆ ใน O(1)
+
+วันทำการเริ่มที่ day_start (เช่น 06:00) ออเดอร์หลังเที่ยงคืนของกะดึก
+จึงยังอยู่ในวันเดียวกัน และช่วงเวลาที่ข้ามเที่ยงคืน (เช่น 22:00-02:00) ใช้ได้ตามปกติ
+"""
+
+from array import array
+from typing import List, Tuple
+
+from .orders import time_to_minutes
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_clock(value: str) -> int:
+    """
+    แปลงเวลา "HH:MM" เป็นนาที (รองรับ "24:00")
+
+    Args:
+        value: เวลาในรูปแบบ "HH:MM"
+
+    Returns:
+        จำนวนนาทีนับจากเที่ยงคืน
+
+    Raises:
+        ValueError: ถ้ารูปแบบไม่ถูกต้อง
+    """
+    minutes = time_to_minutes(value)
+    if minutes < 0 or minutes > MINUTES_PER_DAY:
+        raise ValueError(f"เวลาไม่ถูกต้อง: {value!r}")
+    return minutes
+
+
+class TimeWindow:
+    """ช่วงเวลาที่มีชื่อ เช่น sales_18_22 = 18:00-22:00 (ข้ามเที่ยงคืนได้)"""
+
+    __slots__ = ("name", "start", "end")
+
+    def __init__(self, name: str, start: str, end: str):
+        """
+        สร้าง instance ของ TimeWindow
+
+        Args:
+            name: ชื่อช่วงเวลา (ใช้เป็นคีย์ในข้อมูลสรุป)
+            start: เวลาเริ่ม "HH:MM" (รวม)
+            end: เวลาสิ้นสุด "HH:MM" (ไม่รวม)
+        """
+        self.name = name
+        self.start = parse_clock(start)
+        self.end = parse_clock(end)
+
+    def __repr__(self) -> str:
+        return f"TimeWindow({self.name!r}, {self.start // 60:02d}:{self.start % 60:02d}, " \
+               f"{self.end // 60:02d}:{self.end % 60:02d})"
+
+
+# ช่วงเวลาเริ่มต้น (ตรงกับฟิลด์เดิมในข้อมูลสรุป)
+DEFAULT_WINDOWS = (
+    TimeWindow("sales_18_22", "18:00", "22:00"),
+    TimeWindow("sales_22_00", "22:00", "00:00"),
+)
+
+
+def parse_windows(spec: str) -> List[TimeWindow]:
+    """
+    แยกการตั้งค่าช่วงเวลา
+
+    Args:
+        spec: เช่น "sales_18_22=18:00-22:00,sales_22_02=22:00-02:00"
+
+    Returns:
+        รายการ TimeWindow
+
+    Raises:
+        ValueError: ถ้ารูปแบบไม่ถูกต้อง
+    """
+    windows = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, times = item.partition('=')
+        start, _, end = times.partition('-')
+        if not name.strip() or not start or not end:
+            raise ValueError(f"รูปแบบช่วงเวลาไม่ถูกต้อง: {item!r}")
+        windows.append(TimeWindow(name.strip(), start.strip(), end.strip()))
+    return windows
+
+
+class TimeBuckets:
+    """ยอดขายและจำนวนออเดอร์ของวันทำการ แบ่งเป็นช่องตามความละเอียดที่กำหนด"""
+
+    __slots__ = ("resolution", "day_start", "slots", "_sales", "_counts",
+                 "_prefix_sales", "_prefix_counts", "_dirty")
+
+    def __init__(self, resolution: int = 15, day_start: int = 0):
+        """
+        สร้าง instance ของ TimeBuckets
+
+        Args:
+            resolution: ความกว้างของช่อง (นาที) ต้องหาร 1440 ลงตัว
+            day_start: เวลาเริ่มวันทำการ (นาทีนับจากเที่ยงคืน)
+        """
+        if resolution <= 0 or MINUTES_PER_DAY % resolution:
+            raise ValueError(f"ความละเอียด {resolution} นาทีต้องหาร 1440 ลงตัว")
+        if day_start % resolution:
+            raise ValueError("เวลาเริ่มวันทำการต้องตรงกับขอบของช่อง")
+
+        self.resolution = resolution
+        self.day_start = day_start % MINUTES_PER_DAY
+        self.slots = MINUTES_PER_DAY // resolution
+        self._sales = array('q', [0]) * self.slots
+        self._counts = array('q', [0]) * self.slots
+        self._prefix_sales = array('q', [0]) * (self.slots + 1)
+        self._prefix_counts = array('q', [0]) * (self.slots + 1)
+        self._dirty = False
+
+    def slot(self, minutes: int) -> int:
+        """ช่องของเวลา (นาทีนับจากเที่ยงคืน) ในวันทำการ"""
+        return ((minutes - self.day_start) % MINUTES_PER_DAY) // self.resolution
+
+    def add(self, minutes: int, satang: int, count: int = 1):
+        """
+        เพิ่มยอดขายลงช่องของเวลา (ใช้ค่าติดลบเพื่อยกเลิกได้)
+
+        Args:
+            minutes: เวลา (นาทีนับจากเที่ยงคืน) ค่าติดลบคือไม่ทราบเวลา จะไม่บันทึก
+            satang: ยอดขาย (สตางค์)
+            count: จำนวนออเดอร์
+        """
+        if minutes < 0:
+            return
+        index = self.slot(minutes)
+        self._sales[index] += satang
+        self._counts[index] += count
+        self._dirty = True
+
+    def _rebuild(self):
+        # ตั้ง _dirty ก่อนคำนวณ ถ้ามีการ add ระหว่างนี้ คำถามถัดไปจะคำนวณใหม่อีกครั้ง
+        self._dirty = False
+        sales = array('q', [0]) * (self.slots + 1)
+        counts = array('q', [0]) * (self.slots + 1)
+        running_sales = running_counts = 0
+        for i in range(self.slots):
+            running_sales += self._sales[i]
+            running_counts += self._counts[i]
+            sales[i + 1] = running_sales
+            counts[i + 1] = running_counts
+        self._prefix_sales = sales
+        self._prefix_counts = counts
+
+    def _boundary(self, minutes: int) -> int:
+        offset = (minutes - self.day_start) % MINUTES_PER_DAY
+        if offset % self.resolution:
+            raise ValueError(f"เวลา {minutes // 60:02d}:{minutes % 60:02d} "
+                             f"ไม่ตรงกับขอบช่อง {self.resolution} นาที")
+        return offset // self.resolution
+
+    def range_sum(self, start: int, end: int) -> Tuple[int, int]:
+        """
+        ยอดขายและจำนวนออเดอร์ในช่วง [start, end) ข้ามเที่ยงคืนได้
+
+        Args:
+            start: เวลาเริ่ม (นาทีนับจากเที่ยงคืน)
+            end: เวลาสิ้นสุด (นาทีนับจากเที่ยงคืน) ถ้าเท่ากับ start คือทั้งวัน
+
+        Returns:
+            (ยอดขายสตางค์, จำนวนออเดอร์)
+        """
+        if self._dirty:
+            self._rebuild()
+        sales, counts = self._prefix_sales, self._prefix_counts
+
+        first, last = self._boundary(start), self._boundary(end)
+        if first < last:
+            return sales[last] - sales[first], counts[last] - counts[first]
+        # ช่วงที่ข้ามขอบวันทำการ (หรือทั้งวันเมื่อ first == last)
+        return (
+            sales[self.slots] - sales[first] + sales[last],
+            counts[self.slots] - counts[first] + counts[last]
+        )
+
+    def window_sum(self, window: TimeWindow) -> Tuple[int, int]:
+        """ยอดขายและจำนวนออเดอร์ของช่วงเวลาที่มีชื่อ"""
+        return self.range_sum(window.start, window.end)
+
+    def clock_sum(self, start: str, end: str) -> Tuple[int, int]:
+        """ยอดขายและจำนวนออเดอร์ระหว่างเวลา "HH:MM" สองค่า"""
+        return self.range_sum(parse_clock(start), parse_clock(end))
+
+    def series(self) -> List[Tuple[str, int, int]]:
+        """ยอดของแต่ละช่องเรียงตามวันทำการ [(เวลาเริ่มช่อง, สตางค์, จำนวน)]"""
+        result = []
+        for i in range(self.slots):
+            minutes = (self.day_start + i * self.resolution) % MINUTES_PER_DAY
+            result.append((f"{minutes // 60:02d}:{minutes % 60:02d}", self._sales[i], self._counts[i]))
+        return result
+
+
+def validate_windows(windows: List[TimeWindow], resolution: int, day_start: int = 0):
+    """
+    ตรวจว่าทุกช่วงเวลาตรงกับขอบช่อง (เรียกตอนเริ่มระบบเพื่อให้ผิดพลาดตั้งแต่ต้น)
+
+    Raises:
+        ValueError: ถ้ามีช่วงเวลาที่ไม่ตรงกับขอบช่อง
+    """
+    buckets = TimeBuckets(resolution, day_start)
+    for window in windows:
+        buckets.window_sum(window)
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+โมดูล Tracing แบบเบา ATMO'decor
+
+เก็บเวลาของแต่ละขั้นตอน (span) แบบ parent/child ต่อหนึ่งเหตุการณ์ Webhook
+สุ่มเก็บตามอัตราที่กำหนด และเขียน span ที่เสร็จแล้วลงไฟล์ JSON Lines
+แบบ asynchronous (หมุนไฟล์อัตโนมัติเมื่อไฟล์ใหญ่เกินกำหนด)
+
+การใช้งาน CLI:
+    python -m src.tracing report [--file data/traces/spans.jsonl] [--limit 10]
+"""
+
+import argparse
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Callable, Dict, Iterator, List, Optional
+
+DEFAULT_TRACE_FILE = os.path.join("data", "traces", "spans.jsonl")
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("atmo_current_span", default=None)
+
+
+class Span:
+    """ช่วงเวลาการทำงานหนึ่งช่วง"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name",
+        "started_at", "_started_perf", "duration_ms", "attributes", "error"
+    )
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, attributes: Dict):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.started_at = time.time()
+        self._started_perf = time.perf_counter()
+        self.duration_ms = 0.0
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        """เพิ่มข้อมูลประกอบให้ span"""
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class SpanExporter:
+    """เขียน span ลงไฟล์ JSON Lines ผ่าน thread เบื้องหลัง"""
+
+    def __init__(self, path: str = DEFAULT_TRACE_FILE, max_bytes: int = 5 * 1024 * 1024, backup_count: int = 3):
+        """
+        สร้าง instance ของ SpanExporter
+
+        Args:
+            path: path ของไฟล์ span
+            max_bytes: ขนาดไฟล์สูงสุดก่อนหมุนไฟล์
+            backup_count: จำนวนไฟล์เก่าที่เก็บไว้ (spans.jsonl.1, .2, ...)
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._queue: queue.Queue = queue.Queue()
+
+        file_handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        self._file_handler = file_handler
+        self._listener = QueueListener(self._queue, file_handler)
+        self._listener.start()
+        self._closed = False
+        atexit.register(self.close)
+
+    def export(self, span: Span):
+        """ส่ง span เข้าคิวเพื่อเขียนลงไฟล์ (ไม่บล็อก)"""
+        record = logging.makeLogRecord({"msg": json.dumps(span.to_dict(), ensure_ascii=False)})
+        self._queue.put_nowait(record)
+
+    def flush(self):
+        """รอจนเขียน span ที่ค้างอยู่ทั้งหมดแล้ว (ใช้ตอนปิดระบบและในการทดสอบ)"""
+        self._listener.stop()
+        self._file_handler.flush()
+        self._listener.start()
+
+    def close(self):
+        """หยุด thread เบื้องหลังและปิดไฟล์"""
+        if self._closed:
+            return
+        self._closed = True
+        self._listener.stop()
+        self._file_handler.close()
+
+
+class Tracer:
+    """ตัวสร้าง span พร้อมการสุ่มเก็บ"""
+
+    def __init__(self, sample_rate: float = 0.0, exporter: Optional[SpanExporter] = None):
+        """
+        สร้าง instance ของ Tracer
+
+        Args:
+            sample_rate: สัดส่วนของเหตุการณ์ที่เก็บ trace (0.0 - 1.0)
+            exporter: ตัวเขียน span (None = ไม่เก็บ trace)
+        """
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    @contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """เริ่ม trace ใหม่ (root span) ถ้าถูกสุ่มเลือก"""
+        if self.exporter is None or random.random() >= self.sample_rate:
+            yield None
+            return
+
+        with self._run(Span(uuid.uuid4().hex, None, name, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """สร้าง child span ภายใต้ span ปัจจุบัน (ไม่ทำอะไรถ้าไม่ได้อยู่ใน trace)"""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+
+        with self._run(Span(parent.trace_id, parent.span_id, name, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def _run(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - span._started_perf) * 1000
+            _current_span.reset(token)
+            self.exporter.export(span)
+
+
+_tracer = Tracer()
+
+
+def configure(sample_rate: float, path: str = DEFAULT_TRACE_FILE) -> Tracer:
+    """
+    ตั้งค่า tracer ของทั้งแอป
+
+    Args:
+        sample_rate: สัดส่วนของเหตุการณ์ที่เก็บ trace (0 = ปิด)
+        path: path ของไฟล์ span
+
+    Returns:
+        tracer ที่ตั้งค่าแล้ว
+    """
+    global _tracer
+    if _tracer.exporter is not None:
+        _tracer.exporter.close()
+    exporter = SpanExporter(path) if sample_rate > 0 else None
+    _tracer = Tracer(sample_rate, exporter)
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    """ดึง tracer ปัจจุบันของแอป"""
+    return _tracer
+
+
+def trace(name: str, **attributes):
+    """เริ่ม trace ใหม่ด้วย tracer ของแอป"""
+    return _tracer.trace(name, **attributes)
+
+
+def span(name: str, **attributes):
+    """สร้าง child span ด้วย tracer ของแอป"""
+    return _tracer.span(name, **attributes)
+
+
+def traced(name: str) -> Callable:
+    """Decorator สร้าง span รอบฟังก์ชัน (แทบไม่มี overhead เมื่อไม่ได้อยู่ใน trace)"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with _tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def load_spans(path: str = DEFAULT_TRACE_FILE) -> List[Dict]:
+    """
+    โหลด span จากไฟล์ปัจจุบันและไฟล์ที่หมุนแล้ว
+
+    Args:
+        path: path ของไฟล์ span
+
+    Returns:
+        รายการ span
+    """
+    spans = []
+    directory = os.path.dirname(path) or "."
+    basename = os.path.basename(path)
+    if not os.path.isdir(directory):
+        return spans
+
+    for filename in sorted(os.listdir(directory)):
+        if filename != basename and not filename.startswith(basename + "."):
+            continue
+        with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue
+    return spans
+
+
+def slowest_traces(spans: List[Dict], limit: int = 10) -> List[Dict]:
+    """
+    หา trace ที่ช้าที่สุด
+
+    Args:
+        spans: รายการ span
+        limit: จำนวน trace ที่ต้องการ
+
+    Returns:
+        รายการ {"root": span, "spans": [span, ...]} เรียงจากช้าไปเร็ว
+    """
+    by_trace: Dict[str, List[Dict]] = {}
+    for item in spans:
+        by_trace.setdefault(item["trace_id"], []).append(item)
+
+    traces = []
+    for trace_spans in by_trace.values():
+        roots = [item for item in trace_spans if item.get("parent_id") is None]
+        if roots:
+            traces.append({"root": roots[0], "spans": trace_spans})
+
+    traces.sort(key=lambda t: t["root"]["duration_ms"], reverse=True)
+    return traces[:limit]
+
+
+def span_breakdown(spans: List[Dict]) -> List[Dict]:
+    """
+    สรุปเวลาตามชื่อ span
+
+    Args:
+        spans: รายการ span
+
+    Returns:
+        รายการ {"name", "count", "total_ms", "avg_ms", "max_ms", "errors"} เรียงตามเวลารวม
+    """
+    stats: Dict[str, Dict] = {}
+    for item in spans:
+        entry = stats.setdefault(item["name"], {
+            "name": item["name"], "count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0
+        })
+        entry["count"] += 1
+        entry["total_ms"] += item["duration_ms"]
+        entry["max_ms"] = max(entry["max_ms"], item["duration_ms"])
+        if item.get("error"):
+            entry["errors"] += 1
+
+    for entry in stats.values():
+        entry["avg_ms"] = entry["total_ms"] / entry["count"]
+    return sorted(stats.values(), key=lambda e: e["total_ms"], reverse=True)
+
+
+def _print_tree(trace_spans: List[Dict], parent_id: Optional[str], depth: int):
+    children = sorted(
+        (item for item in trace_spans if item.get("parent_id") == parent_id),
+        key=lambda item: item["started_at"]
+    )
+    for item in children:
+        error = f"  ❌ {item['error']}" if item.get("error") else ""
+        print(f"{'    ' * depth}{item['name']:<{40 - 4 * depth}} {item['duration_ms']:>10.2f} ms{error}")
+        _print_tree(trace_spans, item["span_id"], depth + 1)
+
+
+def main(argv: Optional[List[str]] = None):
+    """CLI สำหรับดู trace ที่ช้าที่สุดและสรุปเวลาตาม span"""
+    parser = argparse.ArgumentParser(description="รายงาน trace ของระบบ")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser("report", help="แสดง trace ที่ช้าที่สุดและสรุปตาม span")
+    report_parser.add_argument("--file", default=DEFAULT_TRACE_FILE)
+    report_parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    spans = load_spans(args.file)
+    if not spans:
+        print(f"ไม่พบ span ใน {args.file}")
+        return
+
+    print("=" * 60)
+    print(f"🐢 Trace ที่ช้าที่สุด {args.limit} รายการ")
+    print("=" * 60)
+    for item in slowest_traces(spans, args.limit):
+        root = item["root"]
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(root["started_at"]))
+        print(f"\n[{started}] trace {root['trace_id']}")
+        _print_tree(item["spans"], None, 0)
+
+    print("\n" + "=" * 60)
+    print("📊 สรุปเวลาตาม span")
+    print("=" * 60)
+    print(f"{'span':<32} {'count':>7} {'total ms':>12} {'avg ms':>10} {'max ms':>10} {'errors':>7}")
+    for entry in span_breakdown(spans):
+        print(f"{entry['name']:<32} {entry['count']:>7} {entry['total_ms']:>12.2f} "
+              f"{entry['avg_ms']:>10.2f} {entry['max_ms']:>10.2f} {entry['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบ Admission Control
+"""
+
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.admission import (
+    AdmissionController,
+    TokenBucket,
+    extract_user_ids,
+    parse_events,
+    sign_body,
+    split_user_events,
+    validate_signature,
+    SHED_IN_FLIGHT,
+    SHED_QUEUE_FULL,
+    SHED_USER_RATE
+)
+
+
+def test_token_bucket():
+    """ทดสอบการเติมและใช้ token"""
+    bucket = TokenBucket(rate=1, capacity=2, now=0)
+    assert bucket.try_acquire(0)
+    assert bucket.try_acquire(0)
+    assert not bucket.try_acquire(0), "ควรเกินอัตรา"
+    assert bucket.try_acquire(1.0), "ควรได้ token คืนหลัง 1 วินาที"
+
+
+def test_in_flight_limit():
+    """ทดสอบการจำกัดจำนวนคำขอพร้อมกัน"""
+    admission = AdmissionController(max_in_flight=2)
+    assert admission.try_enter()
+    assert admission.try_enter()
+    assert not admission.try_enter(), "คำขอที่ 3 ควรถูกปฏิเสธ"
+    admission.leave()
+    assert admission.try_enter()
+    assert admission.stats()["shed_" + SHED_IN_FLIGHT] == 1
+
+
+def test_queue_high_water_and_user_rate():
+    """ทดสอบการปฏิเสธเมื่อคิวเต็ม เมื่อผู้ใช้ส่งถี่เกินไป และการเลื่อนเฉพาะเหตุการณ์ของผู้ใช้ที่เกินอัตรา"""
+    admission = AdmissionController(queue_high_water=10, user_rate=1, user_burst=3, max_defer=2.5)
+    assert admission.check(10, ["U1"]) == (SHED_QUEUE_FULL, {})
+
+    for _ in range(3):
+        assert admission.check(0, ["U1"]) == (None, {})
+    assert admission.check(0, ["U1"]) == (SHED_USER_RATE, {})
+    assert admission.check(0, ["U2"]) == (None, {}), "ผู้ใช้อื่นต้องไม่ถูกกระทบ"
+
+    # U1 เกินอัตราอยู่ก่อนใน body: รับ body ไว้ เลื่อนเหตุการณ์ของ U1 ตามคิว token ที่จอง และ U3 เสีย token เพียงหนึ่ง
+    reason, deferred = admission.check(0, ["U1", "U3"])
+    assert reason is None and list(deferred) == ["U1"] and 0.9 < deferred["U1"] <= 1.0
+    reason, deferred = admission.check(0, ["U1", "U3"])
+    assert reason is None and 1.9 < deferred["U1"] <= 2.0, "การเลื่อนครั้งถัดไปต้องรอนานขึ้นตามลำดับ"
+    assert admission.check(0, ["U1", "U3"]) == (SHED_USER_RATE, {}), "รอนานเกิน max_defer ต้องให้ LINE ส่งซ้ำ"
+    assert admission.check(0, ["U3"]) == (None, {}), "body ที่ถูกปฏิเสธต้องไม่ใช้ token ของ U3"
+    assert admission.check(0, ["U3"]) == (SHED_USER_RATE, {})
+
+    stats = admission.stats()
+    assert stats["admitted"] == 7 and stats["deferred_users"] == 2
+    assert stats["shed_total"] == 4
+
+    body = json.dumps({"destination": "Ubot", "events": [
+        {"source": {"userId": "U1"}, "message": {"text": "สแปม"}},
+        {"source": {"userId": "U3"}, "message": {"text": "แจกัน 1,500 บาท"}},
+    ]}, ensure_ascii=False)
+    kept, moved, count = split_user_events(body, ["U1"])
+    assert count == 1 and json.loads(kept)["destination"] == json.loads(moved)["destination"] == "Ubot"
+    assert extract_user_ids(parse_events(kept)) == ["U3"]
+    assert extract_user_ids(parse_events(moved)) == ["U1"]
+    assert validate_signature("secret", moved, sign_body("secret", moved))
+
+
+def test_extract_user_ids():
+    """ทดสอบการดึง user id จาก body"""
+    body = json.dumps({"events": [
+        {"source": {"userId": "U1"}},
+        {"source": {"userId": "U2"}},
+        {"source": {"userId": "U1"}},
+        {"source": {"type": "group"}},
+    ]})
+    assert extract_user_ids(parse_events(body)) == ["U1", "U2"]
+    assert parse_events("not json") == []
+
+
+def test_validate_signature_matches_sdk():
+    """ทดสอบว่าการตรวจลายเซ็นให้ผลเหมือน LINE SDK"""
+    from linebot.webhook import SignatureValidator
+    from benchmarks.webhook_events import sign_body
+
+    body = json.dumps({"events": [{"type": "message", "text": "ดอกไม้ 1500"}]}, ensure_ascii=False)
+    signature = sign_body("secret", body)
+
+    assert SignatureValidator("secret").validate(body, signature)
+    assert validate_signature("secret", body, signature)
+    assert not validate_signature("other", body, signature)
+    assert not validate_signature("secret", body + " ", signature)
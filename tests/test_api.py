@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบส่วนช่วยของ Read API (cache ตามเวอร์ชันและการแบ่งหน้าด้วย cursor)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.api import ResponseCache, decode_cursor, encode_cursor, order_page
+from src.database import SalesDatabase
+
+
+def test_response_cache_is_scoped_to_version():
+    """ทดสอบว่า cache ใช้ได้เฉพาะเวอร์ชันเดียวกัน และถูกล้างเมื่อเวอร์ชันเปลี่ยน"""
+    cache = ResponseCache(max_entries=2)
+    cache.put("/api/summary", 1, b"v1")
+    assert cache.get("/api/summary", 1) == b"v1"
+    assert cache.get("/api/summary", 2) is None, "เวอร์ชันใหม่ต้องไม่ได้ body เก่า"
+
+    cache.put("/api/summary", 2, b"v2")
+    cache.put("/api/summary", 1, b"stale")
+    assert cache.get("/api/summary", 2) == b"v2", "ต้องไม่เก็บ body ของเวอร์ชันที่เก่ากว่า"
+
+    cache.put("/api/orders?limit=1", 2, b"a")
+    cache.put("/api/orders?limit=2", 2, b"b")
+    assert cache.get("/api/summary", 2) is None, "เกินจำนวนแล้วต้องลบรายการที่ใช้นานที่สุด"
+    assert cache.stats()["entries"] == 2 and cache.hits == 2
+
+
+def test_order_pages_follow_cursor():
+    """ทดสอบการแบ่งหน้าออเดอร์ และ cursor ที่ใช้รับเฉพาะออเดอร์ใหม่"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir)
+        db.start_day("2026-01-10", 1, ["A"])
+        for i in range(1, 8):
+            db.add_order(i, 100 * i, "แจกัน", "19:00")
+
+        seen = []
+        cursor = None
+        while True:
+            page = order_page(db.get_orders(), "2026-01-10", cursor, 3)
+            seen.extend(order["order_id"] for order in page["orders"])
+            cursor = page["next_cursor"]
+            if not page["has_more"]:
+                break
+        assert seen == list(range(1, 8))
+
+        assert order_page(db.get_orders(), "2026-01-10", cursor, 3)["orders"] == []
+        db.add_order(8, 800, "แจกัน", "20:00")
+        page = order_page(db.get_orders(), "2026-01-10", cursor, 3)
+        assert [order["order_id"] for order in page["orders"]] == [8]
+
+        assert decode_cursor(encode_cursor("2026-01-10", 5)) == ("2026-01-10", 5)
+        for bad in ("!!!", encode_cursor("2026-01-09", 1)):
+            try:
+                order_page(db.get_orders(), "2026-01-10", bad, 3)
+                assert False, f"cursor {bad} ต้องไม่ถูกยอมรับ"
+            except ValueError:
+                pass
+
+
+if __name__ == "__main__":
+    test_response_cache_is_scoped_to_version()
+    test_order_pages_follow_cursor()
+    print("✅ ผ่านการทดสอบทั้งหมด")
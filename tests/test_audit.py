@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบ audit log แบบ hash chain
+"""
+
+import sys
+import os
+import json
+import tempfile
+from datetime import datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.audit import GENESIS, AuditLog, verify
+
+
+def _fill(audit_dir, count):
+    """เขียนเหตุการณ์ตัวอย่าง (ออเดอร์ละ add แล้วบางรายการ edit)"""
+    log = AuditLog(audit_dir)
+    for i in range(1, count + 1):
+        log.append("add", date="2026-01-10", order_id=i, user_id="U1", message_id=str(1000 + i),
+                   fields={"amount": 1500.5, "product_name": "แจกัน"}, commission={"commission_1": 15.01},
+                   rule_version="2.1")
+        if i % 10 == 0:
+            log.append("edit", date="2026-01-10", order_id=i - 5, user_id="U2", fields={"amount": 900})
+    return log
+
+
+def test_chain_continues_and_index_lookup():
+    """ทดสอบว่า chain ต่อข้าม instance และ /audit อ่านเฉพาะรายการของออเดอร์จาก index"""
+    with tempfile.TemporaryDirectory() as audit_dir:
+        _fill(audit_dir, 30)
+        # เวลาคงที่ในเดือนเดียวกับรายการเดิม (chain เรียงไฟล์ตามเดือน)
+        fixed = datetime.now().replace(hour=19, minute=42, second=0, microsecond=0)
+        reopened = AuditLog(audit_dir, clock=lambda: fixed)
+        entry = reopened.append("void", date="2026-01-10", order_id=5, user_id="U3")
+        assert entry["seq"] == 34, "seq ต้องต่อจากรายการสุดท้ายในไฟล์"
+        assert entry["ts"] == fixed.isoformat(timespec="milliseconds"), "ts ต้องมาจากนาฬิกาที่กำหนด (replay)"
+
+        history = reopened.history("2026-01-10", 5)
+        assert [item["op"] for item in history] == ["add", "edit", "void"]
+        assert history[0]["message_id"] == "1005" and history[0]["fields"]["product_name"] == "แจกัน"
+        assert AuditLog(audit_dir).history("2026-01-11", 5) == []
+
+        result = verify(audit_dir, workers=1)
+        assert result["ok"] and result["entries"] == 34 and result["anchor"] == GENESIS, result
+
+
+def test_parallel_verify_detects_tampering():
+    """ทดสอบการตรวจแบบขนานหลายช่วง และการตรวจพบรายการที่ถูกแก้ไขหรือลบ"""
+    with tempfile.TemporaryDirectory() as audit_dir:
+        _fill(audit_dir, 200)
+        result = verify(audit_dir, workers=2, chunk_bytes=4096)
+        assert result["ok"] and result["chunks"] > 4 and result["entries"] == 220, result
+
+        path = os.path.join(audit_dir, [name for name in os.listdir(audit_dir) if name.endswith(".jsonl")][0])
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+
+        edited = json.loads(lines[50])
+        edited["fields"]["amount"] = 99999
+        tampered = lines[:50] + [json.dumps(edited, ensure_ascii=False) + "\n"] + lines[51:]
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(tampered)
+        result = verify(audit_dir, workers=2, chunk_bytes=4096)
+        assert not result["ok"] and any("hash ไม่ตรง" in error for error in result["errors"])
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(lines[:120] + lines[121:])
+        result = verify(audit_dir, workers=2, chunk_bytes=4096)
+        assert not result["ok"] and any("chain ขาด" in error for error in result["errors"])
+
+
+if __name__ == "__main__":
+    test_chain_continues_and_index_lookup()
+    test_parallel_verify_detects_tampering()
+    print("✅ ผ่านการทดสอบทั้งหมด")
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบตัวสร้างออเดอร์จำลองและการตรวจ regression ของ benchmark
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import commission_calculator
+from benchmarks.order_generator import generate_orders
+from benchmarks.bench_e2e import compare
+
+
+def test_generated_orders_are_parseable():
+    """ทดสอบว่าข้อความที่สร้างแยกยอดเงินและเวลาได้ตรงกับค่าที่สร้าง"""
+    orders = list(generate_orders(500, seed=7))
+    for order in orders:
+        assert commission_calculator.extract_amount(order["text"]) == order["amount"], order["text"]
+        assert commission_calculator.extract_time(order["text"]) == order["time"], order["text"]
+
+    assert orders == list(generate_orders(500, seed=7)), "seed เดิมต้องได้ผลลัพธ์เดิม"
+    assert {order["category"] for order in orders} >= {"faland", "perfume", "vase", "plain"}
+    assert any(order["time"] >= "18:00" and order["time"] < "22:00" for order in orders)
+
+
+def test_compare_detects_regressions():
+    """ทดสอบการตรวจ regression เทียบกับ baseline"""
+    baseline = {"metrics": {"parser_ops_per_sec": 1000, "add_order_p50_ms@10": 1.0}}
+
+    ok = {"metrics": {"parser_ops_per_sec": 900, "add_order_p50_ms@10": 1.2}}
+    assert compare(ok, baseline, 0.25) == []
+
+    slow = {"metrics": {"parser_ops_per_sec": 500, "add_order_p50_ms@10": 2.0}}
+    regressions = compare(slow, baseline, 0.25)
+    assert len(regressions) == 2
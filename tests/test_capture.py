@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบการบันทึกและ replay Webhook
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.capture import REPLAY_DISABLED_SETTINGS, WebhookCapture, read_capture, replay, replay_environ
+
+
+def test_capture_is_readable_before_close():
+    """ทดสอบว่าอ่าน log ได้ครบทั้งที่ยังไม่ปิดไฟล์ และรวมหลายไฟล์ตามเวลาที่รับ"""
+    capture_dir = tempfile.mkdtemp()
+    first = WebhookCapture(capture_dir)
+    first.record('{"events": [1]}', received_at=100.0)
+    first.record('{"events": [3]}', received_at=300.0)
+
+    records = read_capture(first.path)
+    assert [r["body"] for r in records] == ['{"events": [1]}', '{"events": [3]}'], \
+        "ต้องอ่านรายการที่ flush แล้วได้แม้ยังไม่ปิดไฟล์"
+
+    # จำลอง process อื่นที่เขียนไฟล์ของตัวเองในโฟลเดอร์เดียวกัน
+    second = WebhookCapture(capture_dir)
+    assert second.path != first.path
+    second.record('{"events": [2]}', received_at=200.0)
+    second.close()
+    first.close()
+
+    assert [r["received_at"] for r in read_capture(capture_dir)] == [100.0, 200.0, 300.0]
+
+
+def test_replay_keeps_order_and_resigns():
+    """ทดสอบว่า replay ส่ง body ตามลำดับเดิมพร้อมลายเซ็นใหม่ ตั้งนาฬิกาเป็นเวลาที่รับเดิม และนับข้อผิดพลาด"""
+    records = [
+        {"received_at": 10.0, "body": "a"},
+        {"received_at": 10.05, "body": "b"},
+        {"received_at": 10.1, "body": "fail"},
+    ]
+    seen = []
+    clock = []
+
+    def process(body, signature):
+        if body == "fail":
+            raise ValueError("boom")
+        seen.append((body, signature, clock[-1]))
+
+    result = replay(records, process, lambda body: f"sig-{body}", pacing="original", set_clock=clock.append)
+
+    assert seen == [("a", "sig-a", 10.0), ("b", "sig-b", 10.05)]
+    assert result["events"] == 3 and result["errors"] == 1
+    assert result["elapsed_s"] >= 0.09, "pacing แบบ original ต้องรอตามช่วงเวลาเดิม"
+
+
+def test_replay_environ_overrides_dotenv():
+    """ทดสอบว่าค่าจาก .env (วันอัตโนมัติ แคตตาล็อก ผู้ดูแล) ไม่มีผลระหว่าง replay"""
+    from dotenv import load_dotenv
+
+    env_file = os.path.join(tempfile.mkdtemp(), ".env")
+    with open(env_file, "w", encoding="utf-8") as f:
+        f.write("DAY_CLOSE_TIME=23:30\nCATALOG_FILE=catalog.csv\nADMIN_SECRET=prod\n")
+
+    environ = replay_environ("/tmp/replay", "http://127.0.0.1:9", "replay-secret")
+    saved = {key: os.environ.get(key) for key in environ}
+    try:
+        os.environ.update(environ)
+        load_dotenv(env_file)
+        assert all(os.environ[key] == "" for key in REPLAY_DISABLED_SETTINGS)
+        assert os.environ["DATA_DIR"] == "/tmp/replay"
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
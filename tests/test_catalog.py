@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบแคตตาล็อกสินค้าและการจับคู่แบบใกล้เคียง
+"""
+
+import sys
+import os
+import random
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.catalog import Catalog, CatalogItem, classify, price_deviation, product_type, substring_distance
+from src.commission_calculator import calculate_order_commission
+from src.rendering import SummaryRenderer
+from src.database import SummarySnapshot
+
+CATALOG = Catalog([
+    CatalogItem("แจกันฟาแลนด์", "faland", 6500, ("faland",)),
+    CatalogItem("Ikebana Curve", "ikebana_curve", 7500),
+    CatalogItem("Ikebana", "flower_only", 8000),
+    CatalogItem("Mini Vase", "mini_vase", 2200, ("มินิเวส",)),
+    CatalogItem("Oud Wood", "perfume", 3200),
+])
+
+
+def _edit_distance(pattern, text):
+    """edit distance ของ pattern กับส่วนหนึ่งของ text แบบตาราง DP เต็ม (ใช้ตรวจผล)"""
+    previous = [0] * (len(text) + 1)
+    for i, p in enumerate(pattern, 1):
+        current = [i] + [0] * len(text)
+        for j, t in enumerate(text, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (p != t))
+        previous = current
+    return min(previous)
+
+
+def test_fuzzy_resolve():
+    """ทดสอบการจับคู่ชื่อที่พิมพ์ผิด ชื่อที่เจาะจงกว่า และชื่อสั้นที่ต้องตรงทุกตัว"""
+    rng = random.Random(7)
+    for _ in range(2000):
+        pattern = "".join(rng.choice("abc") for _ in range(rng.randint(1, 8)))
+        text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 12)))
+        assert substring_distance(pattern, text) == _edit_distance(pattern, text), (pattern, text)
+
+    assert CATALOG.resolve("แจกันฟาแลนด สีขาว").item.name == "แจกันฟาแลนด์"
+    assert CATALOG.resolve("ikebana curv ใบเล็ก").item.category == "ikebana_curve", "ชื่อที่เจาะจงกว่าต้องชนะ"
+    assert CATALOG.resolve("Ikebana สีเขียว").item.category == "flower_only"
+    assert CATALOG.resolve("minivase ทิวลิป").item.name == "Mini Vase"
+    assert CATALOG.resolve("Oud Wod").distance == 1
+    assert CATALOG.resolve("Oud") is None and CATALOG.resolve("กระเป๋า") is None
+
+    matches = CATALOG.resolve_lines("ikebana curv\n1,500 บาท\nมินิเวส 2 ใบ")
+    assert [match and match.item.name for match in matches] == ["Ikebana Curve", None, "Mini Vase"]
+    list_price, deviation = price_deviation(4850, matches)
+    assert list_price == 9700 and deviation == -0.5
+
+
+def test_catalog_category_drives_commission():
+    """ทดสอบว่าประเภทจากแคตตาล็อกให้คอมมิชชั่น 5% และข้อความยืนยันแจ้งเตือนราคา"""
+    keyword_only = calculate_order_commission(7000, "ikebana curv", "ikebana curv\n7,000 บาท")
+    assert not keyword_only["is_special"], "คำสำคัญเดิมจับ ikebana curv ไม่ได้"
+
+    match = CATALOG.resolve("ikebana curv")
+    with_catalog = calculate_order_commission(7000, "ikebana curv", "ikebana curv\n7,000 บาท",
+                                              product_type=product_type(match.item.category))
+    assert with_catalog["is_special"] and with_catalog["commission_5"] == 350
+
+    snapshot = SummarySnapshot(1, '"1-1"', {"date": "2026-01-10", "staff_names": ("A",)}, 0)
+    order_info = {"product_name": "ikebana curv", "amount": 2000, "list_price": 7500, "price_deviation": -0.7333}
+    text = SummaryRenderer().confirmation_text(order_info, snapshot)
+    assert "⚠️ ยอดต่างจากราคาตั้ง 7,500 บาท (-73%)" in text
+    assert "ราคาตั้ง" not in SummaryRenderer().confirmation_text({"product_name": "x", "amount": 1}, snapshot)
+
+
+def test_edit_keeps_catalog_classification():
+    """ทดสอบว่าการแก้ไขออเดอร์ที่จัดประเภทจากแคตตาล็อก (เช่น แก้เฉพาะเวลา) ยังได้คอมมิชชั่น 5%"""
+    _, added_type = classify(CATALOG, "ikebana curv\n7,000 บาท\n19:30")
+    added = calculate_order_commission(7000, "ikebana curv", "ikebana curv\n7,000 บาท\n19:30",
+                                       product_type=added_type)
+
+    # /edit <รหัส> 19:45 บรรทัดเดียว: แอปใช้ชื่อสินค้าเดิมเป็นบรรทัดแรกของข้อความใหม่
+    order_text = "ikebana curv\n19:45"
+    _, edited_type = classify(CATALOG, order_text)
+    edited = calculate_order_commission(7000, "ikebana curv", order_text, product_type=edited_type)
+    assert edited_type == added_type and edited["is_special"] and edited["commission_5"] == added["commission_5"] == 350
+
+    assert classify(None, order_text) == ([None], None), "ไม่มีแคตตาล็อกต้องใช้คำสำคัญเดิม"
+    assert classify(CATALOG, "กระเป๋า\n500 บาท")[1] is None
+
+
+if __name__ == "__main__":
+    test_fuzzy_resolve()
+    test_catalog_category_drives_commission()
+    test_edit_keeps_catalog_classification()
+    print("✅ ผ่านการทดสอบทั้งหมด")
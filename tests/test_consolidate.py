@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบการรวมรายงานหลายสาขา
+"""
+
+import sys
+import os
+import json
+import tempfile
+from functools import reduce
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.consolidate import branch_partial, build_report, consolidate, empty_rollup, main, merge_rollups
+from src.database import SalesDatabase
+
+
+def _branch(data_dir, days):
+    """สร้างข้อมูลของสาขา: วันสุดท้ายปิดวัน (มี rollup) วันอื่นเก็บเป็น archive อย่างเดียว"""
+    db = SalesDatabase(data_dir)
+    for date, amounts in days:
+        db.start_day(date, 2, ["A", "B"])
+        for order_id, amount in enumerate(amounts, 1):
+            db.add_order(order_id, amount, "แจกัน", "19:00")
+    db.close_day()
+
+
+def test_merge_is_associative():
+    """ทดสอบว่าการรวมผลรวมย่อยไม่ขึ้นกับลำดับและการจัดกลุ่ม"""
+    a = {"daily": {"2026-01-10": {"siam": {"total_sales": 10, "days": 1}}}, "monthly": {}}
+    b = {"daily": {"2026-01-10": {"siam": {"total_sales": 5, "days": 1}, "central": {"total_sales": 7}}},
+         "monthly": {"2026-01": {"central": {"total_sales": 7}}}}
+    c = {"daily": {"2026-01-11": {"central": {"total_sales": 1}}}, "monthly": {"2026-01": {"central": {"total_sales": 1}}}}
+
+    left = merge_rollups(merge_rollups(a, b), c)
+    right = merge_rollups(a, merge_rollups(b, c))
+    assert left == right == merge_rollups(c, merge_rollups(b, a)), "ผลต้องไม่ขึ้นกับลำดับการรวม"
+    assert left["daily"]["2026-01-10"]["siam"] == {"total_sales": 15, "days": 2}
+    assert merge_rollups(empty_rollup(), a) == a and a["daily"]["2026-01-10"]["siam"]["total_sales"] == 10, \
+        "ต้องไม่แก้ไขผลรวมย่อยเดิม"
+
+
+def test_parallel_consolidation_matches_sequential():
+    """ทดสอบการรวมหลายสาขาแบบขนานเทียบกับแบบทีละสาขา และรายงานจาก CLI"""
+    with tempfile.TemporaryDirectory() as root:
+        branches = []
+        for index, name in enumerate(["siam", "central", "icon"]):
+            data_dir = os.path.join(root, name)
+            _branch(data_dir, [("2026-01-30", [1000.5, 2000]), ("2026-01-31", [500 * (index + 1)]),
+                               ("2026-02-01", [3000])])
+            branches.append((name, data_dir))
+
+        parallel = consolidate(branches, "2026-01-01", "2026-01-31", workers=3)
+        sequential = reduce(merge_rollups, (branch_partial((n, d, "2026-01-01", "2026-01-31")) for n, d in branches),
+                            empty_rollup())
+        assert parallel == sequential, "ผลแบบขนานต้องเท่ากับแบบทีละสาขา"
+        assert set(parallel["daily"]) == {"2026-01-30", "2026-01-31"}, "ต้องไม่รวมวันนอกช่วง"
+
+        report = build_report(parallel, [n for n, _ in branches], "2026-01-01", "2026-01-31")
+        january = report["monthly"][0]
+        assert january["month"] == "2026-01" and january["total"]["total_sales"] == 3 * 3000.5 + 3000
+        assert january["total"]["days"] == 6 and january["branches"]["icon"]["total_orders"] == 3
+        assert report["total"] == january["total"]
+
+        output = os.path.join(root, "report.json")
+        args = ["--start", "2026-01-01", "--end", "2026-02-28", "-o", output]
+        for name, data_dir in branches:
+            args += ["--branch", f"{name}={data_dir}"]
+        assert main(args) == 0
+        with open(output, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        assert [row["month"] for row in saved["monthly"]] == ["2026-01", "2026-02"]
+        assert saved["daily"][-1]["total"]["total_sales"] == 9000
+
+
+if __name__ == "__main__":
+    test_merge_is_associative()
+    test_parallel_consolidation_matches_sequential()
+    print("✅ ผ่านการทดสอบทั้งหมด")
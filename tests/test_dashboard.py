@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบ Broadcaster ของ Dashboard (Server-Sent Events)
+"""
+
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dashboard import Broadcaster, format_event, summary_delta
+
+
+def _events(chunks):
+    """แยกข้อความ SSE เป็น (id, event, data)"""
+    result = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n") if not line.startswith(":"))
+        if "event" in fields:
+            result.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return result
+
+
+def test_snapshot_then_deltas_and_resume():
+    """ทดสอบ snapshot ตอนเชื่อมต่อ เหตุการณ์ที่ตามมา และการเชื่อมต่อใหม่ด้วย Last-Event-ID"""
+    broadcaster = Broadcaster(max_clients=2, history=4)
+    subscription, initial = broadcaster.subscribe(lambda: {"summary": {"total_sales": 0}})
+    assert [event for _, event, _ in initial] == ["snapshot"]
+
+    first = broadcaster.publish("order", {"order": {"order_id": 1}, "totals": {"total_sales": 1500}})
+    broadcaster.publish("tier", {"rate": 0.01})
+    stream = broadcaster.stream(subscription, initial, heartbeat=0.01, max_seconds=0.2)
+    events = _events(stream)
+    assert [event for _, event, _ in events] == ["snapshot", "order", "tier"]
+    assert events[1][2]["totals"] == {"total_sales": 1500}
+    assert broadcaster.client_count() == 0, "stream ที่ปิดแล้วต้องถูกลบออก"
+
+    # เชื่อมต่อใหม่: ได้เฉพาะเหตุการณ์หลัง Last-Event-ID
+    _, resumed = broadcaster.subscribe(lambda: {"snapshot": True}, last_event_id=first)
+    assert [event for _, event, _ in resumed] == ["tier"]
+
+    # Last-Event-ID เก่ากว่า ring buffer (หรือจาก process เก่า) ได้ snapshot ใหม่
+    for i in range(5):
+        broadcaster.publish("totals", {"i": i})
+    _, stale = broadcaster.subscribe(lambda: {"snapshot": True}, last_event_id=first)
+    assert [event for _, event, _ in stale] == ["snapshot"]
+
+    # ผู้ชมเต็มแล้ว
+    assert broadcaster.subscribe(lambda: {}) is None
+
+
+def test_slow_subscriber_is_dropped():
+    """ทดสอบว่าผู้ชมที่อ่านไม่ทันถูกตัด โดยไม่ทำให้ publish บล็อก"""
+    broadcaster = Broadcaster(max_pending=3)
+    subscription, initial = broadcaster.subscribe(lambda: {})
+    for i in range(10):
+        broadcaster.publish("totals", {"i": i})
+    assert subscription.dropped
+    chunks = list(broadcaster.stream(subscription, initial, heartbeat=0.01, max_seconds=1))
+    assert len(_events(chunks)) == 1, "ผู้ชมที่ถูกตัดได้แค่ snapshot แล้วปิด stream"
+
+    assert summary_delta({"a": 1, "b": 2, "staff_names": ["A"]}, {"a": 1, "b": 3, "staff_names": ["B"]}) == {"b": 3}
+    assert format_event(7, "ot", {"ok": True}) == 'id: 7\nevent: ot\ndata: {"ok": true}\n\n'
+
+
+if __name__ == "__main__":
+    test_snapshot_then_deltas_and_resume()
+    test_slow_subscriber_is_dropped()
+    print("✅ ผ่านการทดสอบทั้งหมด")
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบคิวเหตุการณ์ Webhook
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.event_queue import EventQueue, ProcessedEvents
+
+
+def _body(user_id: str, text: str) -> str:
+    return json.dumps({
+        "events": [{"source": {"userId": user_id}, "message": {"text": text}}]
+    })
+
+
+def test_process_in_order_per_user():
+    """ทดสอบว่าเหตุการณ์ของผู้ใช้คนเดียวกันถูกประมวลผลตามลำดับ"""
+    queue_dir = tempfile.mkdtemp()
+    processed = []
+    lock = threading.Lock()
+
+    def process(body, signature):
+        with lock:
+            processed.append(json.loads(body)["events"][0]["message"]["text"])
+
+    event_queue = EventQueue(queue_dir, process_func=process, workers=4)
+    event_queue.start()
+    for i in range(20):
+        event_queue.enqueue(_body("U1", str(i)), "sig")
+
+    assert event_queue.join(5), "คิวไม่ว่างภายในเวลาที่กำหนด"
+    event_queue.stop()
+
+    assert processed == [str(i) for i in range(20)], "ลำดับเหตุการณ์ไม่ถูกต้อง"
+    assert os.listdir(event_queue.pending_dir) == [], "ยังมีไฟล์ค้างใน pending"
+    shutil.rmtree(queue_dir, ignore_errors=True)
+
+
+def test_dead_letter_and_replay():
+    """ทดสอบการย้ายไป dead letter และ replay"""
+    queue_dir = tempfile.mkdtemp()
+    state = {"fail": True, "calls": 0}
+
+    def process(body, signature):
+        state["calls"] += 1
+        if state["fail"]:
+            raise RuntimeError("LINE API ล่ม")
+
+    event_queue = EventQueue(queue_dir, process_func=process, workers=1, max_attempts=2, retry_delay=0.01)
+    event_queue.start()
+    event_id = event_queue.enqueue(_body("U1", "ออเดอร์"), "sig")
+    assert event_queue.join(5), "คิวไม่ว่างภายในเวลาที่กำหนด"
+    event_queue.stop()
+
+    assert state["calls"] == 2, "ควรลองประมวลผล 2 ครั้ง"
+    dead_letters = event_queue.list_dead_letters()
+    assert [record["event_id"] for record in dead_letters] == [event_id]
+    assert "LINE API ล่ม" in dead_letters[0]["last_error"]
+
+    state["fail"] = False
+    assert event_queue.replay_dead_letter(event_id), "replay ควรสำเร็จ"
+    assert event_queue.list_dead_letters() == []
+    shutil.rmtree(queue_dir, ignore_errors=True)
+
+
+def test_recover_pending_on_start():
+    """ทดสอบการกู้คืนเหตุการณ์ที่ค้างอยู่เมื่อเริ่มใหม่"""
+    queue_dir = tempfile.mkdtemp()
+    processed = []
+
+    EventQueue(queue_dir, process_func=None).enqueue(_body("U1", "ค้าง"), "sig")
+
+    event_queue = EventQueue(queue_dir, process_func=lambda body, sig: processed.append(body))
+    event_queue.start()
+    assert event_queue.join(5), "คิวไม่ว่างภายในเวลาที่กำหนด"
+    event_queue.stop()
+
+    assert len(processed) == 1, "ควรประมวลผลเหตุการณ์ที่ค้างอยู่"
+    shutil.rmtree(queue_dir, ignore_errors=True)
+
+
+def test_retry_skips_processed_events():
+    """ทดสอบว่าการลองใหม่และ replay ไม่บันทึกเหตุการณ์ที่ทำเสร็จแล้วซ้ำ"""
+    queue_dir = tempfile.mkdtemp()
+    committed = []
+    state = {"fail": True}
+
+    def process(body, signature):
+        for event in json.loads(body)["events"]:
+            key = event["webhookEventId"]
+            if key in event_queue.processed:
+                continue
+            committed.append(key)
+            event_queue.processed.add(key)
+        if state["fail"]:
+            raise RuntimeError("ตอบกลับ LINE ไม่สำเร็จ")
+
+    event_queue = EventQueue(queue_dir, process_func=process, workers=1, max_attempts=2, retry_delay=0.01)
+    event_queue.start()
+    body = json.dumps({"events": [{"webhookEventId": "E1", "source": {"userId": "U1"}},
+                                  {"webhookEventId": "E2", "source": {"userId": "U1"}}]})
+    event_id = event_queue.enqueue(body, "sig")
+    assert event_queue.join(5), "คิวไม่ว่างภายในเวลาที่กำหนด"
+    event_queue.stop()
+
+    state["fail"] = False
+    assert "E2" in EventQueue(queue_dir).processed, "ต้องโหลดรหัสที่ทำเสร็จแล้วจากไฟล์ได้"
+    assert event_queue.replay_dead_letter(event_id)
+    assert committed == ["E1", "E2"], "ต้องไม่บันทึกซ้ำเมื่อลองใหม่หรือ replay"
+
+    processed = ProcessedEvents(os.path.join(queue_dir, "small.log"), keep=3)
+    for i in range(10):
+        processed.add(f"K{i}")
+    reloaded = ProcessedEvents(os.path.join(queue_dir, "small.log"), keep=3)
+    assert len(reloaded) == 3 and "K9" in reloaded and "K6" not in reloaded
+    shutil.rmtree(queue_dir, ignore_errors=True)
+
+
+def test_deferred_enqueue_runs_after_delay():
+    """ทดสอบว่าเหตุการณ์ที่เลื่อนไว้นับรวมในขนาดคิวและถูกประมวลผลหลังเวลาที่กำหนด"""
+    queue_dir = tempfile.mkdtemp()
+    processed = []
+    lock = threading.Lock()
+
+    def process(body, signature):
+        with lock:
+            processed.append(json.loads(body)["events"][0]["message"]["text"])
+
+    event_queue = EventQueue(queue_dir, process_func=process, workers=2)
+    event_queue.start()
+    event_queue.enqueue(_body("U1", "เลื่อน"), "sig", delay=0.2)
+    event_queue.enqueue(_body("U2", "ทันที"), "sig")
+    assert event_queue.size() >= 1, "เหตุการณ์ที่รอเวลาต้องนับในขนาดคิว"
+
+    assert event_queue.join(5), "คิวไม่ว่างภายในเวลาที่กำหนด"
+    event_queue.stop()
+
+    assert processed == ["ทันที", "เลื่อน"]
+    assert os.listdir(event_queue.pending_dir) == []
+    shutil.rmtree(queue_dir, ignore_errors=True)
+
+
+def test_cli_lists_dead_letters_from_data_dir(monkeypatch, capsys):
+    """ทดสอบว่า CLI อ่าน dead letter จากโฟลเดอร์ DATA_DIR/queue เดียวกับแอป"""
+    from src import event_queue as event_queue_module
+
+    data_dir = tempfile.mkdtemp()
+    event_queue = EventQueue(os.path.join(data_dir, "queue"))
+    event_queue._write_record(event_queue._dead_letter_path("1_abcdef12"), {"event_id": "1_abcdef12", "attempts": 3})
+
+    monkeypatch.setenv("DATA_DIR", data_dir)
+    event_queue_module.main(["list"])
+    assert "1_abcdef12  attempts=3" in capsys.readouterr().out
+    shutil.rmtree(data_dir, ignore_errors=True)
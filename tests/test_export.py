@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบการส่งออกข้อมูลยอดขาย (CSV / JSON Lines)
+"""
+
+import sys
+import os
+import csv
+import gzip
+import io
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import export
+
+
+def _write_archive(data_dir, date, stamp, orders, **summary):
+    """เขียนไฟล์ archive หนึ่งวันในรูปแบบเดียวกับ sales_data.json"""
+    archive_dir = os.path.join(data_dir, "archive")
+    os.makedirs(archive_dir, exist_ok=True)
+    day = dict(summary, date=date, orders=orders, ledger={})
+    with open(os.path.join(archive_dir, f"sales_{date}_{stamp}.json"), 'w', encoding='utf-8') as f:
+        json.dump(day, f, ensure_ascii=False)
+
+
+def _order(order_id, amount, name="แจกัน"):
+    return {"order_id": order_id, "amount": amount, "product_name": name, "time": "19:00", "voided": False}
+
+
+def test_days_in_range_use_latest_archive_and_current_day():
+    """ทดสอบการเลือกไฟล์ archive ล่าสุดของแต่ละวัน และข้อมูลวันปัจจุบันแทน archive"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        _write_archive(data_dir, "2026-01-09", "230000", [_order(1, 100)], total_sales=100)
+        _write_archive(data_dir, "2026-01-10", "120000", [_order(1, 1)], total_sales=1)
+        _write_archive(data_dir, "2026-01-10", "235900", [_order(1, 500), _order(2, 700)], total_sales=1200)
+        _write_archive(data_dir, "2026-01-11", "090000", [_order(1, 9)], total_sales=9)
+        _write_archive(data_dir, "2026-01-12", "235900", [_order(1, 50)], total_sales=50)
+        current = {"date": "2026-01-11", "total_sales": 3000, "orders": [_order(1, 3000, 'แจกัน "ใหญ่", ฟ้า')]}
+
+        days = list(export.iter_days(data_dir, "2026-01-10", "2026-01-12", current))
+        assert [(day["date"], day["total_sales"]) for day in days] == \
+            [("2026-01-10", 1200), ("2026-01-11", 3000), ("2026-01-12", 50)]
+
+        text = "".join(export.export_chunks(iter(days), export.ORDERS, export.CSV))
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert [row["amount"] for row in rows] == ["500", "700", "3000", "50"]
+        assert rows[2]["product_name"] == 'แจกัน "ใหญ่", ฟ้า' and rows[2]["date"] == "2026-01-11"
+        assert list(rows[0]) == list(export.ORDER_EXPORT_FIELDS)
+
+        assert list(export.iter_days(data_dir, "2026-02-01", "2026-02-28")) == []
+
+
+def test_summaries_jsonl_chunks_and_gzip():
+    """ทดสอบสรุปรายวันแบบ JSON Lines การแบ่งก้อน และการบีบอัด gzip"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        for day in range(1, 31):
+            orders = [_order(i, 1000 + i) for i in range(1, 101)]
+            _write_archive(data_dir, f"2026-01-{day:02d}", "235900", orders,
+                           total_sales=sum(order["amount"] for order in orders), staff_names=["A", "B"])
+
+        days = export.iter_days(data_dir, "2026-01-01", "2026-01-31")
+        lines = "".join(export.export_chunks(days, export.SUMMARIES, export.JSONL, ["sales_18_22"])).splitlines()
+        first = json.loads(lines[0])
+        assert len(lines) == 30 and first["date"] == "2026-01-01"
+        assert list(first) == list(export.summary_fields(["sales_18_22"]))
+        assert first["total_sales"] == 105050 and first["staff_names"] == ["A", "B"]
+
+        summary_csv = "".join(export.export_chunks(
+            export.iter_days(data_dir, "2026-01-01", "2026-01-01"), export.SUMMARIES, export.CSV))
+        assert next(csv.DictReader(io.StringIO(summary_csv)))["staff_names"] == "A, B"
+
+        chunks = list(export.export_chunks(export.iter_days(data_dir, "2026-01-01", "2026-01-31")))
+        assert len(chunks) > 1, "ข้อมูลหลายวันต้องถูกแบ่งส่งเป็นหลายก้อน"
+        assert all(len(chunk) < export.CHUNK_SIZE * 2 for chunk in chunks)
+        compressed = b"".join(export.gzip_chunks(iter(chunks)))
+        assert gzip.decompress(compressed).decode('utf-8') == "".join(chunks)
+        assert "".join(chunks).count("\n") == 30 * 100 + 1
+
+
+if __name__ == "__main__":
+    test_days_in_range_use_latest_archive_and_current_day()
+    test_summaries_jsonl_chunks_and_gzip()
+    print("✅ ผ่านการทดสอบทั้งหมด")
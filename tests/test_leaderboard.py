@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบอันดับยอดย้อนหลัง
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import SalesDatabase
+from src.leaderboard import Leaderboards, period_range, top_days, top_staff
+
+
+def test_streaming_selection_and_periods():
+    """ทดสอบการเลือก k อันดับจาก generator และช่วงเวลา"""
+    summaries = ({"date": f"2026-01-{day:02d}", "total_sales": day * 100.5, "total_orders": day,
+                  "staff_names": ["A", "B"] if day % 2 else ["A"], "incentive_per_person": day}
+                 for day in range(1, 31))
+    days = top_days(summaries, 3)
+    assert [day["date"] for day in days] == ["2026-01-30", "2026-01-29", "2026-01-28"]
+    assert days[0] == {"date": "2026-01-30", "total": 3015.0, "orders": 30}
+
+    staff = top_staff([{"staff_names": ["A", "B"], "incentive_per_person": 100.25},
+                       {"staff_names": ["B"], "incentive_per_person": 50}], 5)
+    assert staff == [{"name": "B", "total": 150.25}, {"name": "A", "total": 100.25}]
+
+    assert period_range("quarter", "2026-05-20") == ("2026-04-01", "2026-05-20")
+    assert period_range("week", "2026-03-02") == ("2026-02-24", "2026-03-02")
+    try:
+        period_range("decade", "2026-05-20")
+        assert False, "ช่วงเวลาที่ไม่รู้จักต้อง error"
+    except ValueError:
+        pass
+
+
+def test_results_cached_until_next_close():
+    """ทดสอบอันดับจากวันที่ปิดแล้ว และ cache ที่ล้างเมื่อปิดวันถัดไป"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir)
+        boards = Leaderboards(data_dir)
+        db.start_day("2026-01-10", 2, ["A", "B"])
+        db.add_order(1, 1500, "แจกัน", "19:00")
+        db.add_order(2, 2500, "ดอกไม้", "19:10")
+        db.add_order(3, 9000, "แจกัน", "19:20")
+        db.update_order(3, {"voided": True}, "void")
+        db.close_day()
+
+        products = boards.top("products", "2026-01-31")
+        assert products["items"] == [{"product_name": "ดอกไม้", "total": 2500.0},
+                                     {"product_name": "แจกัน", "total": 1500.0}], "ต้องไม่นับออเดอร์ที่ยกเลิก"
+        assert boards.top("products", "2026-01-31") is products and boards.stats()["hits"] == 1
+
+        db.start_day("2026-01-11", 1, ["B"])
+        db.add_order(1, 6000, "แจกัน", "19:00")
+        db.update_totals(0, 0, 120, 120)
+        assert boards.top("days", "2026-01-31")["items"][0]["date"] == "2026-01-10", "วันที่ยังไม่ปิดต้องไม่นับ"
+        db.close_day()
+
+        assert boards.top("days", "2026-01-31")["items"][0] == {"date": "2026-01-11", "total": 6000.0, "orders": 1}
+        assert boards.top("products", "2026-01-31")["items"][0] == {"product_name": "แจกัน", "total": 7500.0}
+        assert boards.top("staff", "2026-01-31", k=1)["items"][0]["name"] == "B"
+
+
+if __name__ == "__main__":
+    test_streaming_selection_and_periods()
+    test_results_cached_until_next_close()
+    print("✅ ผ่านการทดสอบทั้งหมด")
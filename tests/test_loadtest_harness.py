@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบเครื่องมือทดสอบโหลด (LINE stub และ Webhook ที่ลงลายเซ็น)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from linebot import WebhookParser
+from linebot.models import TextSendMessage
+
+from src.line_handler import LineHandler
+from benchmarks import webhook_events
+from benchmarks.line_stub import LineStubServer
+
+
+def test_line_handler_replies_to_stub():
+    """ทดสอบว่า LineHandler ส่งข้อความตอบกลับไปที่ LINE stub เมื่อกำหนด api_endpoint"""
+    stub = LineStubServer().start()
+    try:
+        line_handler = LineHandler("token", "secret", api_endpoint=stub.url, data_endpoint=stub.url)
+        line_handler._reply("reply-token", TextSendMessage(text="สวัสดี"))
+        content = line_handler.download_image("12345")
+    finally:
+        stub.stop()
+
+    assert stub.counts.get("reply") == 1, f"stub ต้องได้รับ reply 1 ครั้ง: {stub.counts}"
+    assert stub.requests[0]["payload"]["replyToken"] == "reply-token"
+    assert content and content.startswith(b"\xff\xd8"), "ต้องดาวน์โหลดรูปจาก stub ได้"
+
+
+def test_signed_body_passes_validation():
+    """ทดสอบว่า Webhook body ที่สร้างขึ้นผ่านการตรวจลายเซ็นของ SDK"""
+    body = webhook_events.build_body([
+        webhook_events.text_event("U1", "ดอกไม้ 1500 บาท 19:30"),
+        webhook_events.image_event("U1"),
+        webhook_events.date_postback_event("U1", "2026-01-11"),
+    ])
+    parser = WebhookParser("secret")
+    events = parser.parse(body, webhook_events.sign_body("secret", body))
+
+    assert [event.type for event in events] == ["message", "message", "postback"]
+    assert events[0].message.text == "ดอกไม้ 1500 บาท 19:30"
+
+    flow = webhook_events.start_of_day_flow("U2", "2026-01-11", ["Oil", "Fang"])
+    assert len(flow) >= 3, "โฟลว์เริ่มต้นวันต้องมีหลายขั้นตอน"
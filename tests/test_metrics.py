@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบ metrics
+"""
+
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.metrics import Counter, Histogram, CallbackMetric, Registry
+
+
+def test_counter_across_threads():
+    """ทดสอบว่าตัวนับรวมค่าจากทุก thread ถูกต้อง"""
+    counter = Counter("test_total", "test")
+
+    def work():
+        for _ in range(1000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value() == 4000, "ค่ารวมของตัวนับไม่ถูกต้อง"
+
+
+def test_histogram_render():
+    """ทดสอบการแสดงผล histogram รูปแบบ Prometheus"""
+    histogram = Histogram("test_seconds", "test", label_name="stage", buckets=(0.1, 1.0))
+    histogram.observe(0.05, "parse")
+    histogram.observe(0.5, "parse")
+    histogram.observe(5, "parse")
+    with histogram.time("save"):
+        pass
+
+    registry = Registry()
+    registry.register(histogram)
+    text = registry.render()
+
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="parse",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="parse"} 3' in text
+    assert 'test_seconds_sum{stage="parse"} 5.55' in text
+    assert histogram.count("save") == 1
+
+
+def test_callback_metric():
+    """ทดสอบ metric ที่อ่านค่าจากฟังก์ชัน"""
+    metric = CallbackMetric("queue_size", "test", lambda: {None: 7})
+    assert metric.render()[-1] == "queue_size 7"
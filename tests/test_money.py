@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบจำนวนเงินแบบสตางค์และ Ledger
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import money
+from src import commission_calculator
+from src.money import Ledger, sum_ledgers
+from src.database import SalesDatabase
+
+
+def test_conversion_and_rounding_rules():
+    """ทดสอบการแปลงหน่วยและกฎการปัดเศษของแต่ละองค์ประกอบ"""
+    assert money.to_satang(1.005) == 101, "0.5 สตางค์ต้องปัดขึ้น"
+    assert money.to_satang(0.1 + 0.2) == 30
+    assert money.to_satang(30000) == 3000000
+    assert money.to_baht(12345) == 123.45
+
+    # 5% ของ 0.10 บาท = 0.5 สตางค์ -> ปัดขึ้น
+    assert money.apply_rate(10, 500, money.COMMISSION_5) == 1
+    # 30% ของ 0.05 บาท = 1.5 สตางค์ -> ปัดขึ้น
+    assert money.apply_rate(5, 3000, money.OT_PENALTY) == 2
+    # Incentive ปัดลงเสมอ ผลรวมไม่เกินยอดจริง
+    assert money.split(10000, 3) == 3333
+    assert commission_calculator.calculate_incentive_per_person(100, 3) == 33.33
+
+    # ทุกองค์ประกอบมีกฎการปัดเศษ ชื่อที่ไม่รู้จักต้องแจ้งชื่อองค์ประกอบ
+    components = (money.SALES, money.COMMISSION_1, money.COMMISSION_5, money.ADD_ON_2VASES,
+                  money.ADD_ON_ORDER, money.OT_PENALTY, money.INCENTIVE)
+    assert set(components) == set(money.ROUNDING_RULES)
+    assert money.apply_rate(5, 3000, money.ADD_ON_ORDER) == 2 and money.split(10001, 2, money.SALES) == 5001
+    try:
+        money.apply_rate(100, 100, "bonus")
+        assert False, "องค์ประกอบที่ไม่รู้จักต้องถูกปฏิเสธ"
+    except ValueError as e:
+        assert "'bonus'" in str(e)
+
+
+def test_commission_1_deltas_sum_exactly():
+    """ทดสอบว่าคอมมิชชั่น 1-4% ต่อออเดอร์รวมกันได้เท่ากับคอมมิชชั่นของยอดสะสมพอดี"""
+    previous = 0.0
+    total_satang = 0
+    for amount in [19999.99, 0.02, 333.33, 29666.67, 0.01] * 20:
+        total = money.to_baht(money.to_satang(previous) + money.to_satang(amount))
+        total_satang += money.to_satang(commission_calculator.calculate_commission_1_delta(previous, total))
+        previous = total
+
+    expected = commission_calculator.commission_from_excess_satang(money.to_satang(previous))
+    assert total_satang == expected, f"{total_satang} != {expected}"
+
+
+def test_database_totals_do_not_drift():
+    """ทดสอบว่ายอดรวมในฐานข้อมูลไม่คลาดเคลื่อน และ ledger บันทึก/โหลดได้"""
+    data_dir = tempfile.mkdtemp()
+    db = SalesDatabase(data_dir=data_dir)
+    db.start_day("2026-01-11", 2, ["Oil", "Fang"])
+    db._save_data = lambda: None
+    for i in range(1, 1001):
+        db.add_order(order_id=i, amount=0.1, product_name="A", time="19:00", commission_5=0.01)
+    del db._save_data
+    db._save_data()
+
+    summary = db.get_summary()
+    assert summary["total_sales"] == 100.0, summary["total_sales"]
+    assert summary["sales_18_22"] == 100.0
+    assert summary["commission_5_total"] == 10.0
+    assert db.get_ledger().for_order(7) == {money.SALES: 10, money.COMMISSION_5: 1}
+
+    reloaded = SalesDatabase(data_dir=data_dir)
+    assert reloaded.get_ledger().totals() == db.get_ledger().totals()
+    assert sum_ledgers([db.get_ledger(), reloaded.get_ledger()], [money.SALES]) == {money.SALES: 20000}
+
+
+def test_ledger_built_from_old_files():
+    """ทดสอบว่าไฟล์ข้อมูลรุ่นเก่าที่ไม่มี ledger สร้าง ledger จากรายการออเดอร์"""
+    data_dir = tempfile.mkdtemp()
+    with open(os.path.join(data_dir, "sales_data.json"), 'w', encoding='utf-8') as f:
+        json.dump({
+            "date": "2026-01-11", "is_started": True, "total_sales": 1500.5,
+            "orders": [
+                {"order_id": 1, "amount": 1000.25, "product_name": "A", "time": "12:00", "commission_1": 0},
+                {"order_id": 2, "amount": 500.25, "product_name": "B", "time": "13:00", "commission_5": 25.01},
+            ]
+        }, f)
+
+    ledger = SalesDatabase(data_dir=data_dir).get_ledger()
+    assert ledger.total(money.SALES) == 150050
+    assert ledger.entries(money.COMMISSION_5) == [(2, 2501)]
+    assert isinstance(Ledger.from_json(ledger.to_json()), Ledger)
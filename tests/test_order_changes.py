@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบการแก้ไข ยกเลิก และย้อนออเดอร์
+"""
+
+import sys
+import os
+import random
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import commission_calculator, money
+from src.database import SalesDatabase
+from src.orders import FenwickTree
+
+
+def _add(db, amount, time):
+    """เพิ่มออเดอร์แบบเดียวกับแอป (คอมมิชชั่น 1-4% เป็นส่วนต่างของยอดสะสม)"""
+    previous = db.get_summary()["total_sales"]
+    total = money.to_baht(money.to_satang(previous) + money.to_satang(amount))
+    db.add_order(len(db.get_orders()) + 1, amount, "แจกัน", time,
+                 commission_1=commission_calculator.calculate_commission_1_delta(previous, total))
+
+
+def _change(db, order_id, changes, op):
+    """แก้ไขหรือยกเลิกออเดอร์แบบเดียวกับแอป"""
+    old = db.get_order(order_id)
+    voided = changes.get("voided", False)
+    commission_1, following = commission_calculator.recalculate_commission_1(
+        db.sales_before(order_id), old.amount, old.commission_1,
+        0 if voided else changes.get("amount", old.amount), db.get_summary()["total_sales"]
+    )
+    if not voided:
+        changes = dict(changes, commission_1=commission_1)
+    db.update_order(order_id, changes, op, {money.COMMISSION_1: money.to_satang(following)} if following else None)
+
+
+def test_fenwick_prefix_sums():
+    """ทดสอบ Fenwick tree กับผลรวมแบบตรงไปตรงมา"""
+    rng = random.Random(7)
+    values = []
+    tree = FenwickTree()
+    for _ in range(300):
+        value = rng.randint(-1000, 100000)
+        values.append(value)
+        tree.append(value)
+    for _ in range(200):
+        position = rng.randrange(len(values))
+        delta = rng.randint(-5000, 5000)
+        values[position] += delta
+        tree.add(position, delta)
+    for count in range(len(values) + 1):
+        assert tree.prefix_sum(count) == sum(values[:count]), f"prefix_sum({count}) ไม่ตรง"
+
+
+def test_edit_void_undo_matches_full_replay():
+    """ทดสอบว่าแก้ไข/ยกเลิกกลางวันได้ยอดเท่ากับคำนวณทั้งวันใหม่ และ /undo คืนสถานะเดิม"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir)
+        db.start_day("2026-01-10", 2, ["A", "B"])
+        rng = random.Random(3)
+        for i in range(60):
+            _add(db, rng.choice([1500, 2890.5, 4200, 9999.99]), f"{12 + i // 6:02d}:{(i % 6) * 10:02d}")
+        baseline = db.get_summary()
+
+        _change(db, 5, {"amount": 25000.25, "time": "23:40"}, "edit")
+        _change(db, 40, {"voided": True}, "void")
+        _change(db, 12, {"amount": 100}, "edit")
+
+        summary = db.get_summary()
+        live = [order for order in db.get_orders() if not order.voided]
+        expected_total = sum(money.to_satang(order.amount) for order in live)
+        assert money.to_satang(summary["total_sales"]) == expected_total
+        assert summary["total_orders"] == 59
+        assert money.to_satang(summary["commission_1_total"]) == \
+            commission_calculator.commission_from_excess_satang(expected_total), "คอมมิชชั่นรวมต้องเท่ากับคำนวณใหม่ทั้งวัน"
+        assert money.to_satang(summary["sales_22_00"]) == money.to_satang(25000.25)
+        assert db.sales_before(13) == money.to_baht(
+            sum(money.to_satang(order.amount) for order in live if order.order_id < 13))
+
+        # โหลดจากไฟล์แล้วได้ยอดเดิม
+        assert SalesDatabase(data_dir).get_summary() == summary
+
+        for _ in range(3):
+            assert db.undo() is not None
+        assert db.get_summary() == baseline, "ย้อนครบแล้วต้องกลับเป็นสถานะเดิม"
+
+        # ย้อนการเพิ่มออเดอร์ล่าสุด = ยกเลิกออเดอร์นั้น
+        change = db.undo()
+        assert change["op"] == "add" and db.get_order(60).voided
+        assert db.get_summary()["total_orders"] == 59
+
+        # การเพิ่มไม่มีประวัติ: ย้อนสลับกับการแก้ไขตามลำดับที่เกิดจริง และข้ามออเดอร์ที่ย้อนไปแล้ว
+        _change(db, 3, {"amount": 700}, "edit")
+        _add(db, 1200, "21:00")
+        assert [change["op"] for change in db.data["changes"]] == ["edit"], "ต้องไม่บันทึกประวัติต่อออเดอร์"
+        assert set(db.data["changes"][0]["before"]) == {"amount", "commission_1"}
+        assert [(change["op"], change["order_id"]) for change in (db.undo(), db.undo(), db.undo())] == [
+            ("add", 61), ("edit", 3), ("add", 59)
+        ]
+        assert SalesDatabase(data_dir).undo()["order_id"] == 58, "ลำดับการย้อนต้องโหลดจากไฟล์ได้"
+
+
+if __name__ == "__main__":
+    test_fenwick_prefix_sums()
+    test_edit_void_undo_matches_full_replay()
+    print("✅ ผ่านการทดสอบทั้งหมด")
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบโครงสร้างข้อมูลออเดอร์แบบ __slots__
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.orders import Order, OrderBook, time_to_minutes
+from src.database import SalesDatabase
+
+
+def test_order_round_trip_and_interning():
+    """ทดสอบการแปลง Order เป็น dict และกลับ รวมถึงการ intern ชื่อสินค้า"""
+    data = {
+        "order_id": 1, "amount": 1500.0, "product_name": "แจกัน" + "ดอกไม้",
+        "time": "19:30", "image_path": None, "note": "", "commission_1": 10.0,
+        "commission_5": 0, "add_on_2vases": 0, "is_special": False, "count_as_order": True,
+        "voided": False, "user_id": "U1234"
+    }
+    order = Order.from_dict(data)
+    assert order.to_dict() == data
+    assert order.minutes == 19 * 60 + 30
+    assert Order.from_dict(data).product_name is order.product_name, "ชื่อสินค้าเดียวกันต้องใช้ string ร่วมกัน"
+    assert not hasattr(order, "__dict__"), "Order ต้องไม่มี __dict__"
+
+    assert time_to_minutes("00:05") == 5
+    assert time_to_minutes("") == -1
+    assert time_to_minutes("ไม่ระบุ") == -1
+
+
+def test_database_keeps_json_format_and_image_index():
+    """ทดสอบว่าไฟล์ยังเป็น JSON รูปแบบเดิม โหลดกลับได้ และดัชนีรูปภาพถูกต้อง"""
+    data_dir = tempfile.mkdtemp()
+    db = SalesDatabase(data_dir=data_dir)
+    db.start_day("2026-01-11", 2, ["Oil", "Fang"])
+    db.add_order(order_id=1, amount=1000, product_name="A", time="19:00", image_path="a.jpg")
+    db.add_order(order_id=2, amount=2000, product_name="B", time="22:30")
+    db.add_order(order_id=3, amount=500, product_name="A", time="12:00", image_path="c.jpg")
+
+    assert db.get_order_images() == ["a.jpg", "c.jpg"]
+    summary = db.get_summary()
+    assert "orders" not in summary, "summary ต้องไม่รวมรายการออเดอร์"
+    assert summary["sales_18_22"] == 1000 and summary["sales_22_00"] == 2000
+
+    with open(os.path.join(data_dir, "sales_data.json"), 'r', encoding='utf-8') as f:
+        stored = json.load(f)
+    assert [order["order_id"] for order in stored["orders"]] == [1, 2, 3]
+    assert stored["orders"][0]["image_path"] == "a.jpg"
+
+    reloaded = SalesDatabase(data_dir=data_dir)
+    assert isinstance(reloaded.get_orders(), OrderBook)
+    assert len(reloaded.get_orders()) == 3
+    assert reloaded.get_order_images() == ["a.jpg", "c.jpg"]
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบ cache ชื่อผู้ส่งและยอดตามผู้ส่ง
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import SalesDatabase
+from src.profiles import ProfileCache
+from src.rendering import render_summary_text
+
+
+def test_ttl_negative_cache_and_single_fetch():
+    """ทดสอบ TTL, negative cache และการดึงครั้งเดียวเมื่อขอพร้อมกัน"""
+    now = [0.0]
+    calls = []
+
+    def fetch(user_id, group_id=None):
+        calls.append((user_id, group_id))
+        time.sleep(0.05)
+        if user_id == "Ublocked":
+            raise RuntimeError("404")
+        return f"name-{user_id}"
+
+    cache = ProfileCache(fetch, ttl=100, negative_ttl=10, clock=lambda: now[0])
+    threads = [threading.Thread(target=cache.get, args=("U1", "G1")) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [("U1", "G1")], "คำขอพร้อมกันต้องเรียก API ครั้งเดียว"
+    assert cache.get("U1") == "name-U1"
+
+    assert cache.get("Ublocked") is None and cache.get("Ublocked") is None
+    assert len(calls) == 2, "ผลที่ดึงไม่ได้ต้องถูก cache ไว้"
+
+    now[0] = 11
+    cache.get("Ublocked")
+    cache.get("U1")
+    assert len(calls) == 3, "negative cache หมดอายุก่อนชื่อที่ดึงได้"
+    now[0] = 101
+    cache.get("U1")
+    assert len(calls) == 4
+    assert cache.get(None) is None
+
+
+def test_staff_aggregates_follow_edits_and_reload():
+    """ทดสอบยอดตามผู้ส่งที่อัพเดทตามการเพิ่ม/แก้ไข/ยกเลิก/ย้อน และโหลดจากไฟล์"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir)
+        db.start_day("2026-01-10", 2, ["A", "B"])
+        db.add_order(1, 1500, "แจกัน", "19:00", user_id="Uaaaaaaaaaa", staff_name="Oil")
+        db.add_order(2, 2500, "แจกัน", "19:10", user_id="Ubbbbbbbbbb")
+        db.add_order(3, 1000, "แจกัน", "19:20", user_id="Uaaaaaaaaaa")
+        db.update_order(3, {"amount": 4000}, "edit")
+        db.update_order(2, {"voided": True}, "void")
+
+        stats = db.get_summary()["staff_stats"]
+        assert stats["Uaaaaaaaaaa"] == {"name": "Oil", "orders": 2, "sales": 5500}
+        assert stats["Ubbbbbbbbbb"] == {"name": None, "orders": 0, "sales": 0}
+
+        db.undo()
+        assert db.get_summary()["staff_stats"]["Ubbbbbbbbbb"]["sales"] == 2500
+        assert SalesDatabase(data_dir).get_summary()["staff_stats"] == db.get_summary()["staff_stats"]
+
+        text = render_summary_text(db.get_summary())
+        assert "👤 ตามผู้ส่ง:\n• Oil: 2 ออเดอร์ / 5,500 บาท\n• Ubbbbbbb…: 1 ออเดอร์ / 2,500 บาท" in text
+
+
+if __name__ == "__main__":
+    test_ttl_negative_cache_and_single_fetch()
+    test_staff_aggregates_follow_edits_and_reload()
+    print("✅ ผ่านการทดสอบทั้งหมด")
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบ Profiling
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.profiling import RequestProfiler, MemoryTracker
+
+
+def test_profile_next_n_requests():
+    """ทดสอบการ profile เฉพาะ N รายการถัดไป"""
+    profiles_dir = tempfile.mkdtemp()
+    profiler = RequestProfiler(profiles_dir)
+
+    assert profiler.run(sum, [1, 2, 3]) == 6
+    assert profiler.list_profiles() == [], "ยังไม่ได้สั่ง profile"
+
+    profiler.arm(2)
+    for _ in range(3):
+        profiler.run(sorted, range(1000))
+
+    profiles = profiler.list_profiles()
+    assert len(profiles) == 2, "ควรมีไฟล์ .pstats 2 ไฟล์"
+    assert profiler.remaining() == 0
+    assert "sorted" in profiler.summarize(profiles[0])
+    assert profiler.summarize("../secret.pstats") is None
+    assert "tottime" in profiler.summarize(profiles[0], sort_by="tottime")
+    try:
+        profiler.summarize(profiles[0], sort_by="bogus")
+        assert False, "คีย์เรียงที่ไม่รองรับต้องถูกปฏิเสธ"
+    except ValueError:
+        pass
+    shutil.rmtree(profiles_dir, ignore_errors=True)
+
+
+def test_tracemalloc_diff():
+    """ทดสอบการเปรียบเทียบ snapshot ของหน่วยความจำ"""
+    tracker = MemoryTracker()
+    tracker.start()
+    tracker.snapshot("before")
+    leak = [bytes(1024) for _ in range(1000)]
+    tracker.snapshot("after")
+
+    top = tracker.diff("before", "after", limit=5)
+    assert top and top[0]["size_diff"] > 500 * 1024, "ควรพบการจองหน่วยความจำที่เพิ่มขึ้น"
+    assert tracker.diff("before", "missing") is None
+    assert tracker.diff("before", "after", key_type="filename")
+    try:
+        tracker.diff("before", "after", key_type="bogus")
+        assert False, "การจัดกลุ่มที่ไม่รองรับต้องถูกปฏิเสธ"
+    except ValueError:
+        pass
+    assert tracker.status()["snapshots"] == ["before", "after"]
+
+    tracker.stop()
+    assert not tracker.status()["tracing"]
+    del leak
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบการสร้างข้อความสรุปยอดและยืนยันออเดอร์
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import commission_calculator
+from src.database import SalesDatabase
+from src.rendering import SummaryRenderer, render_summary_text
+from src.time_buckets import TimeWindow
+
+
+def test_summary_text_and_cache_by_etag():
+    """ทดสอบข้อความสรุปยอด และ cache ที่ใช้ซ้ำจนกว่า snapshot จะเปลี่ยนเวอร์ชัน"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir)
+        db.start_day("2026-01-10", 2, ["A", "B"])
+        db.add_order(1, 25000, "แจกัน", "19:00", commission_1=50)
+        renderer = SummaryRenderer()
+
+        snapshot = db.get_snapshot()
+        text = renderer.summary_text(snapshot)
+        assert "📊 สรุปยอดวันนี้ (2026-01-10)" in text
+        assert "👥 คนตอบ: A, B (2 คน)" in text
+        assert "• ยอดขายรวม: 25,000 บาท" in text
+        assert "• ส่วนต่าง (เกิน 20,000): 5,000 บาท" in text
+        assert text == render_summary_text(snapshot.summary) == commission_calculator.format_summary(snapshot.summary)
+
+        assert renderer.summary_text(snapshot) is text, "snapshot เดิมต้องได้ผลจาก cache"
+        confirmation = renderer.confirmation_text(
+            {"product_name": "แจกัน", "amount": 25000, "time": "19:00", "commission_1": 50, "rate": 0.01},
+            snapshot
+        )
+        assert confirmation.startswith("✅ บันทึกออเดอร์สำเร็จ!")
+        assert "• สินค้า: แจกัน" in confirmation and confirmation.endswith(text)
+        assert (renderer.hits, renderer.misses) == (2, 1)
+
+        db.add_order(2, 1000, "แจกัน", "20:00")
+        updated = renderer.summary_text(db.get_snapshot())
+        assert "• ยอดขายรวม: 26,000 บาท" in updated
+        assert renderer.misses == 2, "เวอร์ชันใหม่ต้อง render ใหม่"
+
+    # SALES_WINDOWS ที่ไม่มีช่วง 18:00-22:00: บรรทัด OT ต้องแสดงยอดเดียวกับที่ใช้คิด penalty
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir, [TimeWindow("sales_17_21", "17:00", "21:00")])
+        db.start_day("2026-01-10", 1, ["A"])
+        db.add_order(1, 6000, "แจกัน", "21:30")
+        ot_sales = db.sales_between(commission_calculator.OT_EVENING_START, commission_calculator.OT_EVENING_END)
+        db.update_totals(0, commission_calculator.calculate_ot_penalty(100, ot_sales), 100, 100, ot_sales)
+        text = render_summary_text(db.get_summary())
+        assert "• ช่วง 18:00-22:00: 6,000 บาท ✅" in text and "• Penalty: 0 บาท" in text
+
+
+def test_flex_bubble_uses_same_layout():
+    """ทดสอบ Flex bubble ของสรุปยอดและยืนยันออเดอร์"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir)
+        db.start_day("2026-01-10", 1, ["A"])
+        db.add_order(1, 1500, "แจกัน {สีฟ้า}", "19:00")
+        renderer = SummaryRenderer()
+        snapshot = db.get_snapshot()
+
+        bubble = renderer.summary_flex(snapshot)
+        assert bubble["type"] == "bubble"
+        texts = [
+            item["text"] if item["type"] == "text" else item["contents"][1]["text"]
+            for item in bubble["body"]["contents"] if item["type"] in ("text", "box")
+        ]
+        assert texts[0] == "📊 สรุปยอดวันนี้ (2026-01-10)"
+        assert "1,500 บาท" in texts
+
+        confirmation = renderer.confirmation_flex({"product_name": "แจกัน {สีฟ้า}", "amount": 1500}, snapshot)
+        contents = confirmation["body"]["contents"]
+        assert contents[1]["contents"][1]["text"] == "แจกัน {สีฟ้า}", "ชื่อสินค้าต้องไม่ถูกตีความเป็น template"
+        assert contents[-len(bubble["body"]["contents"]):] == bubble["body"]["contents"]
+        assert renderer.misses == 1
+
+
+if __name__ == "__main__":
+    test_summary_text_and_cache_by_etag()
+    test_flex_bubble_uses_same_layout()
+    print("✅ ผ่านการทดสอบทั้งหมด")
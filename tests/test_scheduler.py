@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบงานตามเวลา (leader lock และการปิดวัน)
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import zipfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import SalesDatabase
+from src.scheduler import LeaderLock, run_exclusive, start_scheduler
+
+
+def test_only_one_leader_per_run():
+    """ทดสอบว่าหลาย thread พร้อมกันได้ผู้รันคนเดียว และรอบที่รันแล้วไม่รันซ้ำ"""
+    with tempfile.TemporaryDirectory() as lock_dir:
+        leader = LeaderLock(lock_dir)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def job():
+            calls.append(threading.get_ident())
+            started.set()
+            release.wait(5)
+            return "done"
+
+        first = threading.Thread(target=run_exclusive, args=(leader, "close_day", job, "2026-01-10"))
+        first.start()
+        assert started.wait(5)
+        others = [run_exclusive(LeaderLock(lock_dir), "close_day", job, "2026-01-10") for _ in range(3)]
+        release.set()
+        first.join()
+
+        assert others == [(False, None)] * 3 and len(calls) == 1
+        assert run_exclusive(leader, "close_day", job, "2026-01-10") == (False, None), "รอบเดิมต้องไม่รันซ้ำ"
+        release.set()
+        assert run_exclusive(leader, "close_day", job, "2026-01-11") == (True, "done")
+        assert leader.last_run("close_day") == "2026-01-11"
+
+
+def test_close_day_rollup_archive_and_images():
+    """ทดสอบการปิดวัน: ข้อมูลสรุปรายวัน archive และรวมรูปภาพเป็น zip"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir)
+        assert db.close_day() is None, "ยังไม่ได้เริ่มวันต้องไม่ปิดวัน"
+        db.start_day("2026-01-10", 2, ["A", "B"])
+        db.add_order(1, 1500, "แจกัน", "18:10", image_path=db.save_image(b"jpeg-1", 1))
+        db.add_order(2, 2500, "แจกัน", "18:40", image_path=db.save_image(b"jpeg-2", 2))
+        db.add_order(3, 9000, "ดอกไม้", "23:05")
+        db.update_order(2, {"voided": True}, "void")
+
+        rollup = db.close_day()
+        assert rollup["summary"]["total_sales"] == 10500
+        assert rollup["hourly"] == [{"hour": "18:00", "sales": 1500, "orders": 1}, {"hour": "23:00", "sales": 9000, "orders": 1}]
+        assert rollup["voided_orders"] == 1 and rollup["top_products"][0]["product_name"] == "ดอกไม้"
+        with open(os.path.join(data_dir, "rollups", "2026-01-10.json"), 'r', encoding='utf-8') as f:
+            assert json.load(f)["summary"]["total_sales"] == 10500
+        assert len(os.listdir(os.path.join(data_dir, "archive"))) == 1
+        assert not db.is_day_started() and db.get_summary()["total_sales"] == 0
+
+        zip_path = db.compact_images("2026-01-10")
+        with zipfile.ZipFile(zip_path) as archive:
+            assert len(archive.namelist()) == 2
+        assert not os.path.exists(os.path.join(data_dir, "images", "2026-01-10"))
+        assert db.compact_images("2026-01-10") is None
+
+
+def test_scheduler_uses_bangkok_time():
+    """ทดสอบว่างานถูกตั้งเวลาตามเขตเวลา Asia/Bangkok"""
+    with tempfile.TemporaryDirectory() as lock_dir:
+        scheduler = start_scheduler([("close_day", lambda: None, "05:30")], LeaderLock(lock_dir))
+        try:
+            next_run = scheduler.get_job("close_day").next_run_time
+            assert (next_run.hour, next_run.minute) == (5, 30)
+            assert next_run.utcoffset().total_seconds() == 7 * 3600
+        finally:
+            scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    test_only_one_leader_per_run()
+    test_close_day_rollup_archive_and_images()
+    test_scheduler_uses_bangkok_time()
+    print("✅ ผ่านการทดสอบทั้งหมด")
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบ index ค้นหาออเดอร์ย้อนหลัง
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import SalesDatabase
+from src.search import SearchIndex, decode_postings, encode_varint, tokenize
+
+
+def test_tokenize_and_postings():
+    """ทดสอบการตัดคำไทย/อังกฤษ และการเข้ารหัส posting list"""
+    assert tokenize("แจกัน Faland") == {"แจ", "จก", "กั", "ัน", "faland"}
+    assert tokenize("ก 2 ใบ") == {"ก", "2", "ใบ"}
+
+    doc_ids = [0, 1, 5, 300, 70000]
+    postings = bytearray()
+    previous = 0
+    for doc_id in doc_ids:
+        encode_varint(doc_id - previous, postings)
+        previous = doc_id
+    assert list(decode_postings(postings)) == doc_ids
+    assert len(postings) == 1 + 1 + 1 + 2 + 3, "delta ที่น้อยกว่า 128 ต้องใช้ 1 byte"
+
+
+def test_find_follows_orders_and_archives():
+    """ทดสอบค้นหา substring/prefix การแก้ไข การ index archive และการโหลดจากไฟล์"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir)
+        index = SearchIndex(os.path.join(data_dir, "search"), os.path.join(data_dir, "archive"))
+        db.start_day("2026-01-10", 2, ["A", "B"])
+        db.add_order(1, 6500, "แจกันฟาแลนด์ สีขาว", "19:00")
+        db.add_order(2, 1500, "Ikebana Curve ใบเล็ก", "19:10")
+        db.add_order(3, 2500, "ช่อกุหลาบ", "19:20")
+        for order in db.get_orders():
+            index.add("2026-01-10", order)
+
+        assert [item["order_id"] for item in index.find("ฟาแลน")["results"]] == [1], "ต้องค้น substring ภาษาไทยได้"
+        assert index.find("CURV")["results"][0]["order_id"] == 2, "ต้องค้น prefix ภาษาอังกฤษโดยไม่สนตัวพิมพ์"
+        assert index.find("ike ใบ")["total"] == 1 and index.find("ฟาแลนด์ ใบ")["total"] == 0
+        assert index.find("แลนด์สี")["total"] == 0, "bigram ครบแต่ไม่ติดกันต้องไม่นับ"
+
+        db.update_order(3, {"product_name": "แจกันทิวลิป"}, "edit")
+        db.update_order(1, {"voided": True}, "void")
+        db.start_day("2026-01-11", 1, ["A"])
+        db.add_order(1, 3000, "แจกันเซรามิก", "18:00")
+        index.add("2026-01-11", db.get_order(1))
+        assert index.sync_archives() == 2, "archive ต้องแทนข้อมูลที่ index ไว้ระหว่างวัน"
+        assert index.sync_archives() == 0
+
+        found = index.find("แจกัน")
+        assert found["total"] == 3
+        assert [(item["date"], item["order_id"]) for item in found["results"]] == [
+            ("2026-01-11", 1), ("2026-01-10", 3), ("2026-01-10", 1)
+        ]
+        assert found["results"][2]["voided"] and index.find("กุหลาบ")["total"] == 0
+        assert index.find("แจกัน", start="2026-01-11")["total"] == 1
+
+        reloaded = SearchIndex(os.path.join(data_dir, "search"), os.path.join(data_dir, "archive"))
+        assert reloaded.find("แจกัน") == found and reloaded.sync_archives() == 0
+        assert reloaded.stats()["orders"] == 4
+
+
+if __name__ == "__main__":
+    test_tokenize_and_postings()
+    test_find_follows_orders_and_archives()
+    print("✅ ผ่านการทดสอบทั้งหมด")
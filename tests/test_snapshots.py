@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบ snapshot ข้อมูลสรุปแบบมีเวอร์ชัน
+"""
+
+import sys
+import os
+import tempfile
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import SalesDatabase
+
+
+def test_snapshot_is_immutable_and_versioned():
+    """ทดสอบว่า snapshot แก้ไขไม่ได้ ไม่เปลี่ยนหลังบันทึก และเวอร์ชันเพิ่มทุกครั้งที่บันทึก"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir)
+        db.start_day("2026-01-10", 2, ["A", "B"])
+        first = db.get_snapshot()
+        assert db.get_summary() is first.summary, "อ่านซ้ำโดยไม่มีการบันทึกต้องได้ object เดิม"
+
+        db.add_order(1, 1500, "แจกัน", "19:00")
+        second = db.get_snapshot()
+        assert second.version == first.version + 1 and second.etag != first.etag
+        assert first.summary["total_sales"] == 0, "snapshot เก่าต้องไม่เปลี่ยน"
+        assert second.summary["total_sales"] == 1500
+        assert second.summary["staff_names"] == ("A", "B")
+
+        try:
+            second.summary["total_sales"] = 0
+            assert False, "snapshot ต้องแก้ไขไม่ได้"
+        except TypeError:
+            pass
+
+        reloaded = SalesDatabase(data_dir)
+        assert reloaded.get_summary() == second.summary
+
+
+def test_readers_see_consistent_snapshots_during_writes():
+    """ทดสอบว่าผู้อ่านไม่ต้องรอผู้เขียน และเห็นยอดที่สอดคล้องกันเสมอ"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir)
+        db.start_day("2026-01-10", 1, ["A"])
+        db._save_data = lambda: None
+        done = threading.Event()
+        problems = []
+
+        def reader():
+            last_version = 0
+            while not done.is_set():
+                snapshot = db.get_snapshot()
+                summary = snapshot.summary
+                if snapshot.version < last_version:
+                    problems.append("เวอร์ชันย้อนกลับ")
+                if summary["total_sales"] != summary["total_orders"] * 100:
+                    problems.append(f"ยอดไม่สอดคล้อง: {dict(summary)}")
+                last_version = snapshot.version
+
+        readers = [threading.Thread(target=reader) for _ in range(3)]
+        for thread in readers:
+            thread.start()
+        for i in range(1, 301):
+            with db.lock:
+                db.add_order(i, 100, "แจกัน", "19:00")
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        assert not problems, problems[:3]
+        assert db.get_summary()["total_orders"] == 300
+
+
+if __name__ == "__main__":
+    test_snapshot_is_immutable_and_versioned()
+    test_readers_see_consistent_snapshots_during_writes()
+    print("✅ ผ่านการทดสอบทั้งหมด")
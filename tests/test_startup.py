@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบการเริ่มระบบแบบ lazy (cold start)
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import SalesDatabase
+from benchmarks.bench_startup import parse_importtime, check
+
+
+def test_day_state_loads_on_first_use():
+    """ทดสอบว่า SalesDatabase ไม่อ่านไฟล์จนกว่าจะใช้ข้อมูลครั้งแรก"""
+    data_dir = tempfile.mkdtemp()
+    with open(os.path.join(data_dir, "sales_data.json"), 'w', encoding='utf-8') as f:
+        json.dump({"date": "2026-01-11", "orders": [], "is_started": True}, f)
+
+    db = SalesDatabase(data_dir=data_dir)
+    assert db._data is None, "ไม่ควรโหลดข้อมูลตอนสร้าง instance"
+    assert db.is_day_started() is True
+    assert db.data["date"] == "2026-01-11"
+
+
+def test_importtime_report_and_budget():
+    """ทดสอบการแยกผล -X importtime และการตรวจงบเวลา"""
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       500 |        500 |   flask",
+        "import time:      1000 |       1500 | app",
+    ])
+    assert parse_importtime(stderr) == [("flask", 500, 500), ("app", 1000, 1500)]
+
+    report = {"import_ms": 300.0, "modules": ["app", "flask", "linebot.api"]}
+    assert check(report, 500, ["requests"]) == []
+    problems = check(report, 200, ["linebot"])
+    assert len(problems) == 2, problems
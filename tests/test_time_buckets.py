@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบดัชนียอดขายตามช่วงเวลา
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.time_buckets import TimeBuckets, TimeWindow, parse_clock, parse_windows
+from src.database import SalesDatabase
+
+
+def test_range_sum_wraps_midnight():
+    """ทดสอบยอดของช่วงเวลาที่ข้ามเที่ยงคืนและขอบวันทำการ"""
+    buckets = TimeBuckets(resolution=15, day_start=parse_clock("06:00"))
+    buckets.add(parse_clock("19:10"), 100000)
+    buckets.add(parse_clock("23:50"), 50000)
+    buckets.add(parse_clock("01:20"), 30000)
+    buckets.add(parse_clock("07:00"), 7000)
+    buckets.add(-1, 999999)  # ไม่ทราบเวลา ไม่บันทึก
+
+    assert buckets.clock_sum("18:00", "22:00") == (100000, 1)
+    assert buckets.clock_sum("22:00", "02:00") == (80000, 2), "ช่วงข้ามเที่ยงคืนต้องรวมออเดอร์หลังเที่ยงคืน"
+    assert buckets.clock_sum("04:00", "08:00") == (7000, 1), "ช่วงข้ามขอบวันทำการต้องรวมได้"
+    assert buckets.clock_sum("06:00", "06:00") == (187000, 4), "start == end คือทั้งวัน"
+
+    # เพิ่มหลังจาก query แล้ว prefix sum ต้องคำนวณใหม่
+    buckets.add(parse_clock("20:00"), -100000, -1)
+    assert buckets.clock_sum("18:00", "22:00") == (0, 0)
+
+    try:
+        buckets.clock_sum("18:10", "22:00")
+        assert False, "ช่วงเวลาที่ไม่ตรงกับขอบช่องต้องแจ้งข้อผิดพลาด"
+    except ValueError:
+        pass
+
+    windows = parse_windows("late=22:00-02:00, evening=18:00-22:00")
+    assert [w.name for w in windows] == ["late", "evening"]
+    assert windows[0].start == 22 * 60 and windows[0].end == 2 * 60
+
+
+def test_database_window_fields():
+    """ทดสอบว่ายอดตามช่วงเวลาในข้อมูลสรุปมาจากดัชนี และสร้างใหม่เมื่อโหลดไฟล์"""
+    windows = [TimeWindow("sales_18_22", "18:00", "22:00"), TimeWindow("sales_22_02", "22:00", "02:00")]
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = SalesDatabase(data_dir, windows, 15, parse_clock("06:00"))
+        db.start_day("2026-01-10", 3, ["A", "B", "C"])
+        db.add_order(1, 1200.5, "แจกัน", "19:30")
+        db.add_order(2, 800, "แจกัน", "23:15")
+        db.add_order(3, 450.25, "น้ำหอม", "01:40", count_as_order=False)
+        db.add_order(4, 300, "แจกัน", "12:00")
+
+        summary = db.get_summary()
+        assert summary["sales_18_22"] == 1200.5
+        assert summary["sales_22_02"] == 1250.25, f"ได้ {summary['sales_22_02']}"
+        assert "buckets" not in summary
+        assert db.sales_between("12:00", "12:15") == 300
+        assert db.get_time_buckets().clock_sum("22:00", "02:00")[1] == 1, "น้ำหอมไม่นับเป็นออเดอร์"
+
+        reloaded = SalesDatabase(data_dir, windows, 15, parse_clock("06:00"))
+        assert reloaded.get_summary() == summary
+        assert reloaded.sales_between("06:00", "06:00") == summary["total_sales"]
+
+    try:
+        SalesDatabase(tempfile.gettempdir(), [TimeWindow("x", "18:05", "22:00")])
+        assert False, "ช่วงเวลาที่ไม่ตรงกับขอบช่องต้องแจ้งตั้งแต่สร้าง SalesDatabase"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_range_sum_wraps_midnight()
+    test_database_window_fields()
+    print("✅ ผ่านการทดสอบทั้งหมด")
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+สคริปต์ทดสอบ Tracing
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import tracing
+
+
+def test_nested_spans_exported():
+    """ทดสอบ span แบบซ้อนกันและการเขียนลงไฟล์"""
+    trace_dir = tempfile.mkdtemp()
+    path = os.path.join(trace_dir, "spans.jsonl")
+    tracer = tracing.configure(1.0, path)
+
+    @tracing.traced("child")
+    def child():
+        return 42
+
+    with tracing.trace("root"):
+        with tracing.span("parse"):
+            pass
+        assert child() == 42
+
+    tracer.exporter.flush()
+    spans = tracing.load_spans(path)
+    names = sorted(item["name"] for item in spans)
+    assert names == ["child", "parse", "root"], f"span ไม่ครบ: {names}"
+
+    root = [item for item in spans if item["name"] == "root"][0]
+    assert all(item["trace_id"] == root["trace_id"] for item in spans)
+    assert all(item["parent_id"] == root["span_id"] for item in spans if item["name"] != "root")
+
+    traces = tracing.slowest_traces(spans)
+    assert len(traces) == 1 and traces[0]["root"]["name"] == "root"
+    assert {entry["name"] for entry in tracing.span_breakdown(spans)} == {"root", "parse", "child"}
+
+    tracing.configure(0)
+    shutil.rmtree(trace_dir, ignore_errors=True)
+
+
+def test_unsampled_is_noop():
+    """ทดสอบว่าเมื่อไม่ถูกสุ่มเลือกจะไม่สร้าง span"""
+    tracing.configure(0)
+    with tracing.trace("root") as root:
+        with tracing.span("child") as child:
+            assert root is None and child is None